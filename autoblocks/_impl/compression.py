@@ -0,0 +1,116 @@
+import dataclasses
+import gzip
+import logging
+from types import ModuleType
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks._impl.util import StrEnum
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MIN_BYTES = 1024
+
+
+class Compression(StrEnum):
+    NONE = "none"
+    GZIP = "gzip"
+    # Requires the zstandard package. Falls back to gzip if it isn't installed.
+    ZSTD = "zstd"
+
+
+@dataclasses.dataclass(frozen=True)
+class CompressionConfig:
+    """
+    Controls how request bodies sent to Autoblocks are compressed.
+    """
+
+    algorithm: Compression = Compression.GZIP
+    # Bodies smaller than this are sent uncompressed since compressing them saves little and costs CPU
+    min_bytes: int = DEFAULT_MIN_BYTES
+    # Compression level passed to the compressor. Uses the algorithm's default if not set.
+    level: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.min_bytes < 0:
+            raise ValueError("min_bytes must not be negative")
+
+
+NO_COMPRESSION = CompressionConfig(algorithm=Compression.NONE)
+
+
+def compression_config_from_env() -> CompressionConfig:
+    """
+    Reads the compression config from the AUTOBLOCKS_COMPRESSION and AUTOBLOCKS_COMPRESSION_MIN_BYTES
+    environment variables. Compression is disabled if AUTOBLOCKS_COMPRESSION isn't set.
+    """
+    raw_algorithm = AutoblocksEnvVar.COMPRESSION.get()
+    if not raw_algorithm:
+        return NO_COMPRESSION
+    try:
+        algorithm = Compression(raw_algorithm.strip().lower())
+    except ValueError:
+        log.warning(
+            f"Ignoring invalid {AutoblocksEnvVar.COMPRESSION} value '{raw_algorithm}'. "
+            f"Expected one of: {', '.join(c.value for c in Compression)}."
+        )
+        return NO_COMPRESSION
+
+    raw_min_bytes = AutoblocksEnvVar.COMPRESSION_MIN_BYTES.get()
+    try:
+        min_bytes = int(raw_min_bytes) if raw_min_bytes else DEFAULT_MIN_BYTES
+    except ValueError:
+        log.warning(f"Ignoring invalid {AutoblocksEnvVar.COMPRESSION_MIN_BYTES} value '{raw_min_bytes}'.")
+        min_bytes = DEFAULT_MIN_BYTES
+    return CompressionConfig(algorithm=algorithm, min_bytes=min_bytes)
+
+
+def _get_zstd() -> Optional[ModuleType]:
+    try:
+        import zstandard  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+    module: ModuleType = zstandard
+    return module
+
+
+def is_zstd_available() -> bool:
+    return _get_zstd() is not None
+
+
+_warned_zstd_unavailable = False
+
+
+def resolve_algorithm(algorithm: Compression) -> Compression:
+    """
+    Returns the algorithm that will actually be used, falling back to gzip if zstd isn't installed.
+    """
+    global _warned_zstd_unavailable
+    if algorithm == Compression.ZSTD and not is_zstd_available():
+        if not _warned_zstd_unavailable:
+            log.warning("zstd compression requires the zstandard package, falling back to gzip.")
+            _warned_zstd_unavailable = True
+        return Compression.GZIP
+    return algorithm
+
+
+def compress_body(body: bytes, config: CompressionConfig) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Compresses a request body according to the config.
+    Returns the body to send and the headers that need to be sent with it.
+    """
+    if config.algorithm == Compression.NONE or len(body) < config.min_bytes:
+        return body, {}
+
+    algorithm = resolve_algorithm(config.algorithm)
+    if algorithm == Compression.ZSTD:
+        zstd = _get_zstd()
+        assert zstd is not None
+        compressor = zstd.ZstdCompressor() if config.level is None else zstd.ZstdCompressor(level=config.level)
+        return compressor.compress(body), {"Content-Encoding": "zstd"}
+
+    level = 6 if config.level is None else config.level
+    # mtime is fixed so that the same body always compresses to the same bytes
+    return gzip.compress(body, compresslevel=level, mtime=0), {"Content-Encoding": "gzip"}
@@ -4,5 +4,6 @@ API_ENDPOINT = "https://api.autoblocks.ai"
 API_ENDPOINT_V2 = AutoblocksEnvVar.V2_API_ENDPOINT.get() or "https://api-v2.autoblocks.ai"
 PUBLIC_WEBAPP_UI_URL = AutoblocksEnvVar.PUBLIC_WEBAPP_UI_URL.get() or "https://app-v2.autoblocks.ai"
 INGESTION_ENDPOINT = "https://ingest-event.autoblocks.ai"
+INGESTION_BATCH_ENDPOINT = f"{INGESTION_ENDPOINT}/batch"
 REVISION_LATEST = "latest"
 REVISION_UNDEPLOYED = "undeployed"
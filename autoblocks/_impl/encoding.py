@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+import orjson
+
+from autoblocks._impl.compression import Compression
+from autoblocks._impl.compression import CompressionConfig
+from autoblocks._impl.compression import compress_body
+from autoblocks._impl.util import orjson_default
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Compressing bodies at least this large is moved to a worker thread. zlib releases the GIL
+# while it works, so this keeps large uploads from stalling the background event loop.
+OFFLOAD_MIN_BYTES = 64 * 1024
+
+
+def encode_json(data: Any) -> bytes:
+    """
+    Serializes a request body to JSON bytes in a single pass.
+    """
+    # Non-string keys are allowed for parity with the stdlib json module, which coerces them to strings
+    return orjson.dumps(data, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def encode_json_body(data: Any, compression: CompressionConfig) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Encodes and compresses a JSON request body.
+    Returns the bytes to send as `content=` and the headers that need to be sent with them.
+    """
+    body, headers = compress_body(encode_json(data), compression)
+    return body, {**JSON_HEADERS, **headers}
+
+
+async def acompress_body(body: bytes, compression: CompressionConfig) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Like `compress_body`, but compresses large bodies off the event loop.
+    """
+    if compression.algorithm != Compression.NONE and len(body) >= max(OFFLOAD_MIN_BYTES, compression.min_bytes):
+        return await asyncio.to_thread(compress_body, body, compression)
+    return compress_body(body, compression)
+
+
+async def aencode_json_body(data: Any, compression: CompressionConfig) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Like `encode_json_body`, but compresses large bodies off the event loop.
+    """
+    body, headers = await acompress_body(encode_json(data), compression)
+    return body, {**JSON_HEADERS, **headers}
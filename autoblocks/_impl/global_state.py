@@ -2,12 +2,20 @@ import asyncio
 import logging
 import threading
 import time
+import weakref
 from datetime import timedelta
+from typing import Callable
+from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Set
+from typing import Tuple
 
 import httpx
 
+from autoblocks._impl.limiter import AdaptiveLimiter
+from autoblocks._impl.limiter import concurrency_limit_config_from_env
+from autoblocks._impl.tracer.sampling import SamplingConfig
 from autoblocks._impl.util import AnyTask
 
 log = logging.getLogger(__name__)
@@ -18,10 +26,19 @@ _background_event_loop: Optional[asyncio.AbstractEventLoop] = None
 _client: Optional[httpx.AsyncClient] = None
 _sync_client: Optional[httpx.Client] = None
 _background_tasks: Set[AnyTask] = set()
+# Guards _background_tasks and friends since tasks complete on the background thread
+# while flush() waits on the caller's thread
+_background_tasks_changed = threading.Condition()
+_background_task_owners: Dict[AnyTask, object] = {}  # task -> owner
+_pending_tasks_per_owner: Dict[object, int] = {}  # owner -> number of pending tasks
+_async_flush_waiters: List[Tuple[Optional[object], asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = []
 _main_thread_has_finished: bool = False
-_test_run_api_semaphore: Optional[asyncio.Semaphore] = None
+_test_run_api_limiter: Optional[AdaptiveLimiter] = None
 _github_comment_semaphore: Optional[asyncio.Semaphore] = None
 _is_auto_tracer_initialized: bool = False
+_auto_tracer_sampling: Optional[SamplingConfig] = None
+_flush_listeners: List["weakref.WeakMethod[Callable[[], None]]"] = []
+_flushes_in_progress: int = 0
 
 
 def _run_event_loop(_event_loop: asyncio.AbstractEventLoop) -> None:
@@ -29,30 +46,134 @@ def _run_event_loop(_event_loop: asyncio.AbstractEventLoop) -> None:
     _event_loop.run_forever()
 
 
-def flush(timeout: Optional[timedelta] = None) -> None:
+def flush(timeout: Optional[timedelta] = None, owner: Optional[object] = None) -> None:
     """
     Wait for all pending tasks to complete.
+
+    If owner is given, only waits for the tasks that were added with that owner.
     """
     timeout_seconds = timeout.total_seconds() if timeout else 30
 
-    log.debug("Flushing background tasks with timeout of % seconds.", timeout_seconds)
-    if not _background_tasks:
-        # Already empty
-        log.debug("No background tasks to flush.")
-        return
+    _start_flush()
+    try:
+        if owner is None:
+            _notify_flush_listeners()
+
+        log.debug("Flushing background tasks with timeout of % seconds.", timeout_seconds)
+        deadline = time.perf_counter() + timeout_seconds
+        with _background_tasks_changed:
+            if _is_idle(owner):
+                # Already empty
+                log.debug("No background tasks to flush.")
+                return
+
+            log.debug("Waiting for %s background tasks to finish...", _num_pending(owner))
+            while not _is_idle(owner):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                _background_tasks_changed.wait(remaining)
+
+            if not _is_idle(owner):
+                log.error(
+                    "Timed out waiting for background tasks to flush. %s tasks left unfinished.",
+                    _num_pending(owner),
+                )
+            else:
+                log.debug("Successfully flushed all background tasks.")
+    finally:
+        _end_flush()
+
+
+async def aflush(timeout: Optional[timedelta] = None, owner: Optional[object] = None) -> None:
+    """
+    Like flush(), but can be awaited from any event loop without blocking it.
+    """
+    timeout_seconds = timeout.total_seconds() if timeout else 30
+
+    _start_flush()
+    try:
+        if owner is None:
+            _notify_flush_listeners()
+
+        loop = asyncio.get_running_loop()
+        with _background_tasks_changed:
+            if _is_idle(owner):
+                log.debug("No background tasks to flush.")
+                return
+            waiter = (owner, loop, loop.create_future())
+            _async_flush_waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[2], timeout_seconds)
+            log.debug("Successfully flushed all background tasks.")
+        except asyncio.TimeoutError:
+            log.error(
+                "Timed out waiting for background tasks to flush. %s tasks left unfinished.",
+                _num_pending(owner),
+            )
+        finally:
+            with _background_tasks_changed:
+                if waiter in _async_flush_waiters:
+                    _async_flush_waiters.remove(waiter)
+    finally:
+        _end_flush()
+
+
+def _start_flush() -> None:
+    global _flushes_in_progress
+    # flush() and aflush() run on different threads
+    with _background_tasks_changed:
+        _flushes_in_progress += 1
+
+
+def _end_flush() -> None:
+    global _flushes_in_progress
+    with _background_tasks_changed:
+        _flushes_in_progress -= 1
+
+
+def _is_idle(owner: Optional[object]) -> bool:
+    """
+    Must be called with _background_tasks_changed held.
+    """
+    return not _background_tasks if owner is None else owner not in _pending_tasks_per_owner
+
+
+def _num_pending(owner: Optional[object]) -> int:
+    return len(_background_tasks) if owner is None else _pending_tasks_per_owner.get(owner, 0)
+
+
+def is_flushing() -> bool:
+    """
+    Whether a flush() is currently waiting for background tasks. Components that buffer work
+    should hand it off immediately while this is true instead of waiting for their own timers.
+    """
+    with _background_tasks_changed:
+        return _flushes_in_progress > 0
+
 
-    start_time = time.perf_counter()
-    log.debug("Waiting for %s background tasks to finish...", len(_background_tasks))
-    while _background_tasks and (time.perf_counter() - start_time) < timeout_seconds:
-        time.sleep(0.1)
+def add_flush_listener(listener: Callable[[], None]) -> None:
+    """
+    Registers a bound method that is called at the start of every flush(). Listeners are used by
+    components that buffer work (e.g. the tracer's batching exporter) to hand it off as background
+    tasks immediately instead of waiting for their own timers.
 
-    if _background_tasks:
-        log.error(
-            "Timed out waiting for background tasks to flush. % tasks left unfinished.",
-            len(_background_tasks),
-        )
-    else:
-        log.debug("Successfully flushed all background tasks.")
+    Only a weak reference is kept so that registering doesn't keep the listener's owner alive.
+    """
+    _flush_listeners.append(weakref.WeakMethod(listener))
+
+
+def _notify_flush_listeners() -> None:
+    for ref in list(_flush_listeners):
+        listener = ref()
+        if listener is None:
+            _flush_listeners.remove(ref)
+            continue
+        try:
+            listener()
+        except Exception as err:
+            log.warning(f"Flush listener failed: {err}", exc_info=True)
 
 
 def _flush_and_shut_down_event_loop() -> None:
@@ -134,18 +255,23 @@ def init() -> None:
     _started = True
 
 
-def init_auto_tracer() -> None:
-    global _is_auto_tracer_initialized
+def init_auto_tracer(sampling: Optional[SamplingConfig] = None) -> None:
+    global _is_auto_tracer_initialized, _auto_tracer_sampling
     _is_auto_tracer_initialized = True
+    _auto_tracer_sampling = sampling
 
 
 def is_auto_tracer_initialized() -> bool:
     return _is_auto_tracer_initialized
 
 
+def auto_tracer_sampling() -> Optional[SamplingConfig]:
+    return _auto_tracer_sampling
+
+
 async def init_semaphores() -> None:
-    global _test_run_api_semaphore, _github_comment_semaphore
-    _test_run_api_semaphore = asyncio.Semaphore(value=10)
+    global _test_run_api_limiter, _github_comment_semaphore
+    _test_run_api_limiter = AdaptiveLimiter(concurrency_limit_config_from_env())
     _github_comment_semaphore = asyncio.Semaphore(value=1)
 
 
@@ -167,10 +293,17 @@ def sync_http_client() -> httpx.Client:
     return _sync_client
 
 
-def test_run_api_semaphore() -> asyncio.Semaphore:
-    if not _test_run_api_semaphore:
-        raise Exception("Test run API semaphore not initialized")
-    return _test_run_api_semaphore
+def test_run_api_limiter() -> AdaptiveLimiter:
+    """
+    Limits how many requests to the CLI and the testing APIs are in flight at once
+    """
+    if not _test_run_api_limiter:
+        raise Exception("Test run API limiter not initialized")
+    return _test_run_api_limiter
+
+
+def test_run_api_limiter_or_none() -> Optional[AdaptiveLimiter]:
+    return _test_run_api_limiter
 
 
 def github_comment_semaphore() -> asyncio.Semaphore:
@@ -182,14 +315,48 @@ def github_comment_semaphore() -> asyncio.Semaphore:
     return _github_comment_semaphore
 
 
-def add_background_task(task: AnyTask) -> None:
+def add_background_task(task: AnyTask, owner: Optional[object] = None) -> None:
     """
     Keep a strong reference to the task so that it isn't garbage collected.
     See https://docs.python.org/3/library/asyncio-task.html#asyncio.create_task
     We also use this set to flush tasks on exit (i.e. wait for it to be empty)
+
+    Tasks added with an owner can also be flushed on their own with flush(owner=owner).
     """
-    _background_tasks.add(task)
-    task.add_done_callback(_background_tasks.discard)
+    with _background_tasks_changed:
+        _background_tasks.add(task)
+        if owner is not None:
+            _background_task_owners[task] = owner
+            _pending_tasks_per_owner[owner] = _pending_tasks_per_owner.get(owner, 0) + 1
+    # Registered outside the lock since the callback runs immediately if the task is already done
+    task.add_done_callback(_on_background_task_done)
+
+
+def _on_background_task_done(task: AnyTask) -> None:
+    with _background_tasks_changed:
+        _background_tasks.discard(task)
+        owner = _background_task_owners.pop(task, None)
+        if owner is not None:
+            _pending_tasks_per_owner[owner] -= 1
+            if not _pending_tasks_per_owner[owner]:
+                del _pending_tasks_per_owner[owner]
+
+        if _async_flush_waiters:
+            for waiter in [w for w in _async_flush_waiters if _is_idle(w[0])]:
+                _async_flush_waiters.remove(waiter)
+                _, loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(_resolve_flush_waiter, future)
+                except RuntimeError:
+                    # The waiter's event loop has been closed
+                    pass
+
+        _background_tasks_changed.notify_all()
+
+
+def _resolve_flush_waiter(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
 
 
 def main_thread_has_finished() -> bool:
@@ -0,0 +1,257 @@
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator
+from typing import Deque
+from typing import Optional
+
+import httpx
+
+from autoblocks._impl.util import AutoblocksEnvVar
+
+log = logging.getLogger(__name__)
+
+DEFAULT_INITIAL_LIMIT = 10
+DEFAULT_MAX_LIMIT = 64
+
+# Longest we'll pause for a Retry-After header, in case the server sends something unreasonable
+MAX_RETRY_AFTER_SECONDS = 60
+# How quickly the baseline latency drifts up towards slower observations. Faster observations replace it immediately.
+BASELINE_LATENCY_DRIFT = 0.05
+
+
+@dataclasses.dataclass(frozen=True)
+class ConcurrencyLimitConfig:
+    """
+    Controls how many requests to the test run APIs can be in flight at once.
+
+    The limit grows by one for every `limit` successful requests while it's being used, shrinks by
+    backoff_ratio when a request is rate limited (429), fails on the server (5xx) or can't connect,
+    and shrinks by latency_backoff_ratio when a request is much slower than usual.
+    """
+
+    initial_limit: int = DEFAULT_INITIAL_LIMIT
+    min_limit: int = 1
+    max_limit: int = DEFAULT_MAX_LIMIT
+    backoff_ratio: float = 0.5
+    # A successful request slower than this multiple of the baseline latency is treated as a sign of congestion.
+    # Set to None to only back off on errors.
+    latency_tolerance: Optional[float] = 2.0
+    latency_backoff_ratio: float = 0.9
+
+    def __post_init__(self) -> None:
+        if self.min_limit < 1:
+            raise ValueError("min_limit must be at least 1")
+        if not self.min_limit <= self.initial_limit <= self.max_limit:
+            raise ValueError("initial_limit must be between min_limit and max_limit")
+        if not 0 < self.backoff_ratio < 1 or not 0 < self.latency_backoff_ratio < 1:
+            raise ValueError("backoff ratios must be between 0 and 1")
+        if self.latency_tolerance is not None and self.latency_tolerance <= 1:
+            raise ValueError("latency_tolerance must be greater than 1")
+
+
+def concurrency_limit_config_from_env() -> ConcurrencyLimitConfig:
+    """
+    Reads the limiter config from the AUTOBLOCKS_TEST_RUN_API_CONCURRENCY (initial limit) and
+    AUTOBLOCKS_TEST_RUN_API_MAX_CONCURRENCY environment variables.
+    """
+
+    def read(env_var: AutoblocksEnvVar) -> Optional[int]:
+        raw = env_var.get()
+        if not raw:
+            return None
+        try:
+            value = int(raw)
+        except ValueError:
+            value = 0
+        if value < 1:
+            log.warning(f"Ignoring invalid {env_var} value '{raw}'. Expected a positive integer.")
+            return None
+        return value
+
+    initial_limit = read(AutoblocksEnvVar.TEST_RUN_API_CONCURRENCY)
+    max_limit = read(AutoblocksEnvVar.TEST_RUN_API_MAX_CONCURRENCY)
+    if max_limit is None:
+        max_limit = max(DEFAULT_MAX_LIMIT, initial_limit or 0)
+    if initial_limit is None:
+        initial_limit = min(DEFAULT_INITIAL_LIMIT, max_limit)
+    return ConcurrencyLimitConfig(initial_limit=min(initial_limit, max_limit), max_limit=max_limit)
+
+
+@dataclasses.dataclass(frozen=True)
+class ConcurrencyLimiterStats:
+    limit: int
+    in_flight: int
+    # Requests waiting for a free slot
+    waiting: int
+    # Seconds until requests are allowed again after a Retry-After response, or 0 if they aren't paused
+    paused_for: float
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header, which is either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclasses.dataclass
+class Permit:
+    limiter: "AdaptiveLimiter"
+    started: float
+    # The limiter's generation when the request started. Requests that started before the last decrease
+    # were sent under the old limit, so their failures don't decrease it again.
+    generation: int
+    in_flight: int
+    observed: bool = False
+
+    def observe(self, resp: httpx.Response) -> None:
+        """
+        Reports the outcome of the request made with this permit.
+        """
+        self.observed = True
+        self.limiter._observe(self, resp)
+
+
+class AdaptiveLimiter:
+    """
+    A semaphore whose limit adapts to how the server is coping (AIMD), and that honors Retry-After.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, config: ConcurrencyLimitConfig) -> None:
+        self._config = config
+        self._limit = float(config.initial_limit)
+        self._in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = collections.deque()
+        self._paused_until = 0.0
+        self._resume_handle: Optional[asyncio.TimerHandle] = None
+        self._baseline_latency: Optional[float] = None
+        self._generation = 0
+
+    @property
+    def limit(self) -> int:
+        return max(self._config.min_limit, int(self._limit))
+
+    @property
+    def stats(self) -> ConcurrencyLimiterStats:
+        return ConcurrencyLimiterStats(
+            limit=self.limit,
+            in_flight=self._in_flight,
+            waiting=len(self._waiters),
+            paused_for=max(0.0, self._paused_until - time.monotonic()),
+        )
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Permit]:
+        """
+        Waits for a free slot. Call `observe` on the permit with the response so the limit can adapt.
+        """
+        await self._acquire()
+        permit = Permit(
+            limiter=self,
+            started=time.monotonic(),
+            generation=self._generation,
+            in_flight=self._in_flight,
+        )
+        try:
+            yield permit
+        except (httpx.TimeoutException, httpx.NetworkError):
+            if not permit.observed:
+                self._decrease(permit, self._config.backoff_ratio)
+            raise
+        finally:
+            self._in_flight -= 1
+            self._wake()
+
+    def _can_start(self) -> bool:
+        return self._in_flight < self.limit and time.monotonic() >= self._paused_until
+
+    async def _acquire(self) -> None:
+        if not self._waiters and self._can_start():
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._wake()
+        try:
+            # _wake takes the slot on our behalf before resolving the future
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Cancelled after being given a slot, so hand it to someone else
+                self._in_flight -= 1
+                self._wake()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            raise
+
+    def _wake(self) -> None:
+        remaining_pause = self._paused_until - time.monotonic()
+        if remaining_pause > 0:
+            if self._waiters and self._resume_handle is None:
+                self._resume_handle = asyncio.get_running_loop().call_later(remaining_pause, self._resume)
+            return
+
+        while self._waiters and self._in_flight < self.limit:
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _resume(self) -> None:
+        self._resume_handle = None
+        self._wake()
+
+    def _observe(self, permit: Permit, resp: httpx.Response) -> None:
+        latency = time.monotonic() - permit.started
+        if resp.status_code == 429 or resp.status_code >= 500:
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if retry_after:
+                self._paused_until = max(
+                    self._paused_until,
+                    time.monotonic() + min(retry_after, MAX_RETRY_AFTER_SECONDS),
+                )
+            self._decrease(permit, self._config.backoff_ratio)
+            return
+
+        if not resp.is_success:
+            # Other client errors say nothing about how the server is coping
+            return
+
+        tolerance = self._config.latency_tolerance
+        baseline = self._baseline_latency
+        if baseline is None or latency < baseline:
+            self._baseline_latency = latency
+        else:
+            self._baseline_latency = baseline + (latency - baseline) * BASELINE_LATENCY_DRIFT
+
+        if tolerance is not None and baseline is not None and latency > baseline * tolerance:
+            self._decrease(permit, self._config.latency_backoff_ratio)
+        elif permit.in_flight * 2 >= self._limit:
+            # Only grow the limit while it's being used, otherwise it would grow without bound when idle
+            self._limit = min(float(self._config.max_limit), self._limit + 1 / self._limit)
+            self._wake()
+
+    def _decrease(self, permit: Permit, ratio: float) -> None:
+        if permit.generation != self._generation:
+            return
+        self._limit = max(float(self._config.min_limit), self._limit * ratio)
+        self._generation += 1
+        log.debug(f"Decreased test run API concurrency limit to {self.limit}")
@@ -12,11 +12,17 @@ from tenacity import stop_after_attempt
 from tenacity import wait_random_exponential
 
 from autoblocks._impl import global_state
+from autoblocks._impl.compression import compression_config_from_env
 from autoblocks._impl.config.constants import API_ENDPOINT
 from autoblocks._impl.context_vars import get_revision_usage
+from autoblocks._impl.encoding import JSON_HEADERS
+from autoblocks._impl.encoding import acompress_body
+from autoblocks._impl.encoding import encode_json
+from autoblocks._impl.limiter import ConcurrencyLimiterStats
 from autoblocks._impl.testing.models import Evaluation
 from autoblocks._impl.testing.models import TestCaseContext
 from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.testing.profiler import profile
 from autoblocks._impl.testing.util import GridSearchParams
 from autoblocks._impl.testing.util import GridSearchParamsCombo
 from autoblocks._impl.testing.util import serialize_output
@@ -39,64 +45,107 @@ TIMEOUT_SECONDS = 30
 @retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=1, max=30), reraise=True)
 async def post_to_cli_with_retry(
     url: str,
-    json: dict[str, Any],
+    content: bytes,
+    headers: dict[str, str],
 ) -> Response:
-    resp = await global_state.http_client().post(
-        url,
-        json=json,
-        timeout=TIMEOUT_SECONDS,
-    )
+    # Each attempt takes its own slot so that slots aren't held while waiting to retry
+    async with global_state.test_run_api_limiter().acquire() as permit:
+        resp = await global_state.http_client().post(
+            url,
+            content=content,
+            timeout=TIMEOUT_SECONDS,
+            headers=headers,
+        )
+        permit.observe(resp)
     resp.raise_for_status()
     return resp
 
 
-async def post_to_cli(
+async def post_encoded_to_cli(
     path: str,
-    json: dict[str, Any],
+    body: bytes,
+    retry: bool = True,
 ) -> Response:
+    """
+    Like `post_to_cli`, but for bodies that have already been encoded to JSON.
+    """
     cli_server_address = AutoblocksEnvVar.CLI_SERVER_ADDRESS.get()
     # We check this ahead of time, so it should always be set here
     if not cli_server_address:
         raise Exception("CLI server address is not set.")
 
-    async with global_state.test_run_api_semaphore():
-        return await post_to_cli_with_retry(
-            f"{cli_server_address}{path}",
-            json,
-        )
+    post = post_to_cli_with_retry if retry else post_to_cli_with_retry.retry_with(stop=stop_after_attempt(1))
+    # The CLI server runs locally, so there's nothing to gain from compressing the body
+    return await post(
+        f"{cli_server_address}{path}",
+        body,
+        JSON_HEADERS,
+    )
+
+
+async def post_to_cli(
+    path: str,
+    json: dict[str, Any],
+) -> Response:
+    return await post_encoded_to_cli(path, encode_json(json))
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=1, max=30), reraise=True)
 async def post_to_api_with_retry(
     url: str,
     api_key: str,
-    json: dict[str, Any],
+    content: bytes,
+    headers: dict[str, str],
 ) -> Response:
-    resp = await global_state.http_client().post(
-        url,
-        json=json,
-        timeout=TIMEOUT_SECONDS,
-        headers={"Authorization": f"Bearer {api_key}"},
-    )
+    async with global_state.test_run_api_limiter().acquire() as permit:
+        resp = await global_state.http_client().post(
+            url,
+            content=content,
+            timeout=TIMEOUT_SECONDS,
+            headers={**headers, "Authorization": f"Bearer {api_key}"},
+        )
+        permit.observe(resp)
     resp.raise_for_status()
     return resp
 
 
-async def post_to_api(
+async def post_encoded_to_api(
     path: str,
-    json: dict[str, Any],
+    body: bytes,
+    retry: bool = True,
 ) -> Response:
+    """
+    Like `post_to_api`, but for bodies that have already been encoded to JSON.
+    """
     sub_path = "/testing/ci" if is_ci() else "/testing/local"
     api_key = AutoblocksEnvVar.API_KEY.get()
     if not api_key:
         raise ValueError(f"You must set the {AutoblocksEnvVar.API_KEY} environment variable.")
 
-    async with global_state.test_run_api_semaphore():
-        return await post_to_api_with_retry(
-            f"{API_ENDPOINT}{sub_path}{path}",
-            api_key,
-            json,
-        )
+    post = post_to_api_with_retry if retry else post_to_api_with_retry.retry_with(stop=stop_after_attempt(1))
+    content, headers = await acompress_body(body, compression_config_from_env())
+    return await post(
+        f"{API_ENDPOINT}{sub_path}{path}",
+        api_key,
+        content,
+        {**JSON_HEADERS, **headers},
+    )
+
+
+async def post_to_api(
+    path: str,
+    json: dict[str, Any],
+) -> Response:
+    return await post_encoded_to_api(path, encode_json(json))
+
+
+def get_api_concurrency_stats() -> Optional[ConcurrencyLimiterStats]:
+    """
+    Returns the current concurrency limit and in-flight count of requests to the CLI and the testing APIs,
+    or None if no test suite has been run yet.
+    """
+    limiter = global_state.test_run_api_limiter_or_none()
+    return limiter.stats if limiter else None
 
 
 async def send_info_for_alignment_mode(
@@ -214,6 +263,143 @@ async def send_test_events(
         log.warning(f"Failed to send test events for run '{run_id}' and test case hash '{test_case_hash}'", exc_info=e)
 
 
+def serialize_test_case_result(
+    test_case_ctx: TestCaseContext[TestCaseType],
+    output: Any,
+    test_case_duration_ms: Optional[float],
+) -> dict[str, Any]:
+    """
+    Serializes everything recorded about a test case's result.
+    Revision usage is collected throughout a test case's run, so this must be called from the test case's context.
+    """
+    revision_usage = get_revision_usage()
+    with profile("serialize"):
+        return dict(
+            testCaseHash=test_case_ctx.hash(),
+            datasetItemId=test_case_ctx.test_case.serialize_dataset_item_id(),
+            testCaseBody=serialize_test_case(test_case_ctx.test_case),
+            testCaseOutput=serialize_output(output),
+            testCaseDurationMs=test_case_duration_ms,
+            testCaseRevisionUsage=[usage.serialize() for usage in revision_usage] if revision_usage else None,
+            testCaseHumanReviewInputFields=serialize_test_case_for_human_review(test_case_ctx.test_case),
+            testCaseHumanReviewOutputFields=serialize_output_for_human_review(output),
+        )
+
+
+def serialize_evaluation_for_api(
+    evaluator_external_id: str,
+    evaluation: Evaluation,
+) -> dict[str, Any]:
+    """
+    Serializes an evaluation the way the public API expects it.
+    Revision usage is collected throughout an evaluator's evaluate_test_case call on a test case,
+    so this must be called from the evaluator's context.
+    """
+    revision_usage = get_revision_usage()
+    return dict(
+        evaluatorExternalId=evaluator_external_id,
+        score=evaluation.score,
+        passed=evaluation.passed(),
+        threshold=dataclasses.asdict(evaluation.threshold) if evaluation.threshold else None,
+        metadata=evaluation.metadata,
+        revisionUsage=[usage.serialize() for usage in revision_usage] if revision_usage else None,
+        assertions=[assertion.serialize() for assertion in evaluation.assertions] if evaluation.assertions else None,
+    )
+
+
+def serialize_evaluation_for_cli(
+    test_external_id: str,
+    run_id: str,
+    test_case_hash: str,
+    evaluator_external_id: str,
+    evaluation: Evaluation,
+) -> dict[str, Any]:
+    """
+    Serializes an evaluation the way the CLI expects it. Like `serialize_evaluation_for_api`,
+    this must be called from the evaluator's context.
+    """
+    revision_usage = get_revision_usage()
+    return dict(
+        testExternalId=test_external_id,
+        runId=run_id,
+        testCaseHash=test_case_hash,
+        evaluatorExternalId=evaluator_external_id,
+        score=evaluation.score,
+        threshold=dataclasses.asdict(evaluation.threshold) if evaluation.threshold else None,
+        metadata=evaluation.metadata,
+        revisionUsage=[usage.serialize() for usage in revision_usage] if revision_usage else None,
+        assertions=[assertion.serialize() for assertion in evaluation.assertions] if evaluation.assertions else None,
+    )
+
+
+async def send_test_case_result_parts(
+    run_id: str,
+    result: dict[str, Any],
+) -> str:
+    """
+    Sends a serialized test case result to the public API.
+    """
+    test_case_hash = result["testCaseHash"]
+    # results to the public api are split into multiple requests to avoid errors when sending large amounts of data
+    # the CLI splits the results into the same way
+    results_resp = await post_to_api(
+        f"/runs/{run_id}/results",
+        json=dict(
+            testCaseHash=test_case_hash,
+            datasetItemId=result["datasetItemId"],
+            testCaseDurationMs=result["testCaseDurationMs"],
+            testCaseRevisionUsage=result["testCaseRevisionUsage"],
+        ),
+    )
+    result_id: str = results_resp.json()["id"]
+    results = await all_settled(
+        [
+            post_to_api(
+                f"/runs/{run_id}/results/{result_id}/body",
+                json=dict(
+                    testCaseBody=result["testCaseBody"],
+                ),
+            ),
+            post_to_api(
+                f"/runs/{run_id}/results/{result_id}/output",
+                json=dict(
+                    testCaseOutput=result["testCaseOutput"],
+                ),
+            ),
+            send_test_events(run_id, test_case_hash, result_id),
+        ]
+    )
+    for settled in results:
+        if isinstance(settled, Exception):
+            log.warning(
+                "Failed to send part of the test case results to Autoblocks\n"
+                f"test case hash: {test_case_hash}\n"
+                f"{settled}",
+                exc_info=settled,
+            )
+
+    try:
+        await post_to_api(
+            f"/runs/{run_id}/results/{result_id}/human-review-fields",
+            json=dict(
+                testCaseHumanReviewInputFields=result["testCaseHumanReviewInputFields"],
+                testCaseHumanReviewOutputFields=result["testCaseHumanReviewOutputFields"],
+            ),
+        )
+    except Exception as e:
+        log.warning(
+            "Failed to send human review fields to Autoblocks\n" f"test case hash: {test_case_hash}\n",
+            exc_info=e,
+        )
+
+    try:
+        await post_to_api(f"/runs/{run_id}/results/{result_id}/ui-based-evaluations", json={})
+    except Exception as e:
+        log.warning("Failed to run ui based evaluations\n" f"test case hash: {test_case_hash}\n", exc_info=e)
+
+    return result_id
+
+
 async def send_test_case_result(
     test_external_id: str,
     run_id: str,
@@ -221,92 +407,25 @@ async def send_test_case_result(
     output: Any,
     test_case_duration_ms: Optional[float] = None,
 ) -> str:
-    # Revision usage is collected throughout a test case's run
-    revision_usage = get_revision_usage()
-    dataset_item_id = test_case_ctx.test_case.serialize_dataset_item_id()
-    serialized_test_case = serialize_test_case(test_case_ctx.test_case)
-    serialized_output = serialize_output(output)
-    test_case_revision_usage = [usage.serialize() for usage in revision_usage] if revision_usage else None
-    serialized_test_case_human_review_input_fields = serialize_test_case_for_human_review(test_case_ctx.test_case)
-    serialized_test_case_human_review_output_fields = serialize_output_for_human_review(output)
+    result = serialize_test_case_result(
+        test_case_ctx=test_case_ctx,
+        output=output,
+        test_case_duration_ms=test_case_duration_ms,
+    )
     if is_cli_running():
         results_resp = await post_to_cli(
             "/results",
             json=dict(
                 testExternalId=test_external_id,
                 runId=run_id,
-                testCaseHash=test_case_ctx.hash(),
-                datasetItemId=dataset_item_id,
-                testCaseBody=serialized_test_case,
-                testCaseOutput=serialized_output,
-                testCaseDurationMs=test_case_duration_ms,
-                testCaseRevisionUsage=test_case_revision_usage,
-                testCaseHumanReviewInputFields=serialized_test_case_human_review_input_fields,
-                testCaseHumanReviewOutputFields=serialized_test_case_human_review_output_fields,
+                **result,
             ),
         )
         result_id_cli: str = results_resp.json()["id"]
         await send_test_events(run_id, test_case_ctx.hash(), result_id_cli)
         return result_id_cli
     else:
-        # results to the public api are split into multiple requests to avoid errors when sending large amounts of data
-        # the CLI splits the results into the same way
-        results_resp = await post_to_api(
-            f"/runs/{run_id}/results",
-            json=dict(
-                testCaseHash=test_case_ctx.hash(),
-                datasetItemId=dataset_item_id,
-                testCaseDurationMs=test_case_duration_ms,
-                testCaseRevisionUsage=test_case_revision_usage,
-            ),
-        )
-        result_id: str = results_resp.json()["id"]
-        results = await all_settled(
-            [
-                post_to_api(
-                    f"/runs/{run_id}/results/{result_id}/body",
-                    json=dict(
-                        testCaseBody=serialized_test_case,
-                    ),
-                ),
-                post_to_api(
-                    f"/runs/{run_id}/results/{result_id}/output",
-                    json=dict(
-                        testCaseOutput=serialized_output,
-                    ),
-                ),
-                send_test_events(run_id, test_case_ctx.hash(), result_id),
-            ]
-        )
-        for result in results:
-            if isinstance(result, Exception):
-                log.warning(
-                    "Failed to send part of the test case results to Autoblocks\n"
-                    f"test case hash: {test_case_ctx.hash()}\n"
-                    f"{result}",
-                    exc_info=result,
-                )
-
-        try:
-            await post_to_api(
-                f"/runs/{run_id}/results/{result_id}/human-review-fields",
-                json=dict(
-                    testCaseHumanReviewInputFields=serialized_test_case_human_review_input_fields,
-                    testCaseHumanReviewOutputFields=serialized_test_case_human_review_output_fields,
-                ),
-            )
-        except Exception as e:
-            log.warning(
-                "Failed to send human review fields to Autoblocks\n" f"test case hash: {test_case_ctx.hash()}\n",
-                exc_info=e,
-            )
-
-        try:
-            await post_to_api(f"/runs/{run_id}/results/{result_id}/ui-based-evaluations", json={})
-        except Exception as e:
-            log.warning("Failed to run ui based evaluations\n" f"test case hash: {test_case_ctx.hash()}\n", exc_info=e)
-
-        return result_id
+        return await send_test_case_result_parts(run_id=run_id, result=result)
 
 
 async def send_eval(
@@ -317,38 +436,21 @@ async def send_eval(
     evaluation: Evaluation,
     test_case_result_id: str,
 ) -> None:
-    # Revision usage is collected throughout an evaluator's evaluate_test_case call on a test case
-    revision_usage = get_revision_usage()
-    eval_revision_usage = [usage.serialize() for usage in revision_usage] if revision_usage else None
-    threshold = dataclasses.asdict(evaluation.threshold) if evaluation.threshold else None
-    assertions = [assertion.serialize() for assertion in evaluation.assertions] if evaluation.assertions else None
     if is_cli_running():
         await post_to_cli(
             "/evals",
-            json=dict(
-                testExternalId=test_external_id,
-                runId=run_id,
-                testCaseHash=test_case_hash,
-                evaluatorExternalId=evaluator_external_id,
-                score=evaluation.score,
-                threshold=threshold,
-                metadata=evaluation.metadata,
-                revisionUsage=eval_revision_usage,
-                assertions=assertions,
+            json=serialize_evaluation_for_cli(
+                test_external_id=test_external_id,
+                run_id=run_id,
+                test_case_hash=test_case_hash,
+                evaluator_external_id=evaluator_external_id,
+                evaluation=evaluation,
             ),
         )
     else:
         await post_to_api(
             f"/runs/{run_id}/results/{test_case_result_id}/evaluations",
-            json=dict(
-                evaluatorExternalId=evaluator_external_id,
-                score=evaluation.score,
-                passed=evaluation.passed(),
-                threshold=threshold,
-                metadata=evaluation.metadata,
-                revisionUsage=eval_revision_usage,
-                assertions=assertions,
-            ),
+            json=serialize_evaluation_for_api(evaluator_external_id, evaluation),
         )
 
 
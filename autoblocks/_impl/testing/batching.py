@@ -0,0 +1,476 @@
+import abc
+import asyncio
+import dataclasses
+import logging
+from datetime import timedelta
+from typing import Any
+from typing import Optional
+
+import httpx
+
+from autoblocks._impl.encoding import encode_json
+from autoblocks._impl.testing.api import post_encoded_to_api
+from autoblocks._impl.testing.api import post_encoded_to_cli
+from autoblocks._impl.testing.api import post_to_api
+from autoblocks._impl.testing.api import send_test_case_result_parts
+from autoblocks._impl.testing.api import send_test_events
+from autoblocks._impl.testing.api import serialize_evaluation_for_api
+from autoblocks._impl.testing.api import serialize_evaluation_for_cli
+from autoblocks._impl.testing.api import serialize_test_case_result
+from autoblocks._impl.testing.models import Evaluation
+from autoblocks._impl.testing.models import TestCaseContext
+from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.tracer.tracer import test_events
+from autoblocks._impl.util import all_settled
+
+log = logging.getLogger(__name__)
+
+# Status codes the CLI responds with when it doesn't accept an array body at a path
+CLI_BATCH_UNSUPPORTED_STATUS_CODES = frozenset({400, 404, 405, 415, 422})
+# Status codes the public API responds with when it doesn't have the bulk results endpoint
+API_BATCH_UNSUPPORTED_STATUS_CODES = frozenset({404, 405})
+
+
+@dataclasses.dataclass(frozen=True)
+class ResultBatchConfig:
+    """
+    Controls how test case results and evaluations are coalesced into bulk requests.
+    A batch is sent as soon as either size limit is reached.
+    """
+
+    # Maximum number of test case results (or evaluations, when running under the CLI) sent in a single request
+    max_batch_size: int = 50
+    # Maximum size of the encoded results sent in a single request. A result larger than this
+    # on its own is sent in multiple requests, the same way results are sent without batching.
+    max_batch_bytes: int = 2_000_000
+    # Maximum amount of time a request to the CLI waits for others to join its batch. Results sent to the
+    # public API are held until the end of the run instead, since nothing is waiting on them.
+    max_linger: timedelta = timedelta(milliseconds=5)
+
+    def __post_init__(self) -> None:
+        if self.max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if self.max_batch_bytes < 1:
+            raise ValueError("max_batch_bytes must be at least 1")
+
+
+def encode_array(records: list[bytes]) -> bytes:
+    return b"[" + b",".join(records) + b"]"
+
+
+def encode_results_batch(records: list[bytes]) -> bytes:
+    """
+    Builds the body of a bulk results request to the public API from already-encoded composite results.
+    """
+    return b'{"results":' + encode_array(records) + b"}"
+
+
+class TestRunBatcher(abc.ABC):
+    """
+    Sends the results and evaluations of a single test run in bulk.
+    """
+
+    __test__ = False  # See https://docs.pytest.org/en/7.1.x/example/pythoncollection.html#customizing-test-collection
+
+    @abc.abstractmethod
+    async def send_result(
+        self,
+        test_case_ctx: TestCaseContext[TestCaseType],
+        output: Any,
+        test_case_duration_ms: Optional[float],
+    ) -> str:
+        """
+        Returns the ID to pass to send_evaluation for this test case's evaluations.
+        Must be called from the test case's context.
+        """
+
+    @abc.abstractmethod
+    async def send_evaluation(
+        self,
+        test_case_hash: str,
+        test_case_result_id: str,
+        evaluator_external_id: str,
+        evaluation: Evaluation,
+    ) -> None:
+        """
+        Must be called from the evaluator's context.
+        """
+
+    @abc.abstractmethod
+    async def complete(self, test_case_hash: str) -> None:
+        """
+        Called once all of a test case's evaluators have finished.
+        """
+
+    @abc.abstractmethod
+    async def flush(self) -> None:
+        """
+        Sends whatever is buffered. Called before the run is ended.
+        """
+
+
+@dataclasses.dataclass
+class PendingResult:
+    result: dict[str, Any]
+    evaluations: list[dict[str, Any]] = dataclasses.field(default_factory=list)
+
+
+class ResultBatcher(TestRunBatcher):
+    """
+    Accumulates a test run's results and evaluations and uploads them to the public API in bulk.
+
+    Without batching, each test case takes a request for its result, body, output, events, human review fields
+    and UI-based evaluations, plus one request per evaluation. With batching, a test case's result is held until
+    its evaluators have finished and is then sent as a single composite record alongside other test cases'.
+
+    If a batch fails, or the API doesn't have the bulk endpoint, its results are sent the same way as without
+    batching. Once the endpoint is found to be missing, every later result is too.
+    Must be used from the background event loop.
+    """
+
+    def __init__(self, run_id: str, config: ResultBatchConfig) -> None:
+        self._run_id = run_id
+        self._config = config
+        self._pending: dict[str, PendingResult] = {}  # test case hash -> result waiting for its evaluations
+        # None until the first batch tells us whether the API has the bulk endpoint
+        self._supported: Optional[bool] = None
+        self._buffer: list[tuple[PendingResult, bytes]] = []
+        self._buffer_bytes = 0
+
+    @property
+    def supported(self) -> Optional[bool]:
+        return self._supported
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    async def send_result(
+        self,
+        test_case_ctx: TestCaseContext[TestCaseType],
+        output: Any,
+        test_case_duration_ms: Optional[float],
+    ) -> str:
+        self._pending[test_case_ctx.hash()] = PendingResult(
+            result=serialize_test_case_result(
+                test_case_ctx=test_case_ctx,
+                output=output,
+                test_case_duration_ms=test_case_duration_ms,
+            ),
+        )
+        # The result is uploaded along with its evaluations once they're done, so it doesn't have an ID yet
+        return test_case_ctx.hash()
+
+    async def send_evaluation(
+        self,
+        test_case_hash: str,
+        test_case_result_id: str,
+        evaluator_external_id: str,
+        evaluation: Evaluation,
+    ) -> None:
+        self._pending[test_case_hash].evaluations.append(
+            serialize_evaluation_for_api(evaluator_external_id, evaluation)
+        )
+
+    async def complete(self, test_case_hash: str) -> None:
+        pending = self._pending.pop(test_case_hash)
+        if self._supported is False:
+            await self._send_split(pending)
+            return
+
+        events = test_events.get((self._run_id, test_case_hash))
+        encoded = encode_json(
+            dict(
+                **pending.result,
+                testCaseEvents=[event.to_json() for event in events] if events else None,
+                evaluations=pending.evaluations,
+            )
+        )
+        if len(encoded) > self._config.max_batch_bytes:
+            log.debug(f"Test case result '{test_case_hash}' is too large to batch, sending it on its own")
+            await self._send_split(pending)
+            return
+
+        if self._buffer and self._buffer_bytes + len(encoded) > self._config.max_batch_bytes:
+            # Adding this result would go over the byte limit, so send what we have first
+            await self._send_buffer()
+
+        self._buffer.append((pending, encoded))
+        self._buffer_bytes += len(encoded)
+
+        if len(self._buffer) >= self._config.max_batch_size or self._buffer_bytes >= self._config.max_batch_bytes:
+            await self._send_buffer()
+
+    async def flush(self) -> None:
+        await self._send_buffer()
+
+    async def _send_buffer(self) -> None:
+        if not self._buffer:
+            return
+
+        batch = self._buffer
+        log.debug(f"Sending batch of {len(batch)} test case results ({self._buffer_bytes} bytes)")
+        self._buffer = []
+        self._buffer_bytes = 0
+
+        if self._supported is not False:
+            try:
+                # Don't retry the first batch, since a missing endpoint would be retried for nothing
+                await post_encoded_to_api(
+                    f"/runs/{self._run_id}/results/batch",
+                    encode_results_batch([encoded for _, encoded in batch]),
+                    retry=self._supported is True,
+                )
+                self._supported = True
+                for pending, _ in batch:
+                    test_events.pop((self._run_id, pending.result["testCaseHash"]), None)
+                return
+            except Exception as err:
+                if (
+                    self._supported is None
+                    and isinstance(err, httpx.HTTPStatusError)
+                    and err.response.status_code in API_BATCH_UNSUPPORTED_STATUS_CODES
+                ):
+                    log.debug("The API doesn't accept batches of test case results, sending them one at a time")
+                    self._supported = False
+                else:
+                    log.warning(
+                        f"Failed to send batch of {len(batch)} test case results for run '{self._run_id}', "
+                        "sending them one at a time",
+                        exc_info=err,
+                    )
+
+        results = await all_settled([self._send_split(pending) for pending, _ in batch])
+        for (pending, _), settled in zip(batch, results):
+            if isinstance(settled, Exception):
+                log.error(
+                    f"Failed to send test case result '{pending.result['testCaseHash']}' for run '{self._run_id}'",
+                    exc_info=settled,
+                )
+
+    async def _send_split(self, pending: PendingResult) -> None:
+        """
+        Sends a result and its evaluations the same way as without batching.
+        """
+        test_case_hash = pending.result["testCaseHash"]
+        result_id = await send_test_case_result_parts(run_id=self._run_id, result=pending.result)
+        results = await all_settled(
+            [
+                post_to_api(f"/runs/{self._run_id}/results/{result_id}/evaluations", json=evaluation)
+                for evaluation in pending.evaluations
+            ]
+        )
+        for settled in results:
+            if isinstance(settled, Exception):
+                log.warning(
+                    "Failed to send an evaluation to Autoblocks\n" f"test case hash: {test_case_hash}\n" f"{settled}",
+                    exc_info=settled,
+                )
+
+
+@dataclasses.dataclass
+class QueuedSubmission:
+    body: bytes
+    future: "asyncio.Future[Any]"
+
+
+class CliSubmissionQueue:
+    """
+    Coalesces requests to a single CLI endpoint into array-bodied requests. The CLI responds with an
+    array containing the response to each item, in order.
+
+    If the CLI doesn't accept an array body, the batch and every later submission are sent one at a time.
+    Must be used from the background event loop.
+    """
+
+    def __init__(self, path: str, config: ResultBatchConfig) -> None:
+        self._path = path
+        self._config = config
+        # None until the first batch tells us whether the CLI accepts array bodies
+        self._supported: Optional[bool] = None
+        self._buffer: list[QueuedSubmission] = []
+        self._buffer_bytes = 0
+        self._linger_task: Optional[asyncio.Task[None]] = None
+        self._send_tasks: set[asyncio.Task[None]] = set()
+        self._probe_lock = asyncio.Lock()
+
+    @property
+    def supported(self) -> Optional[bool]:
+        return self._supported
+
+    async def submit(self, payload: dict[str, Any]) -> Any:
+        """
+        Returns the CLI's response to this payload.
+        """
+        encoded = encode_json(payload)
+        if self._supported is False:
+            return (await post_encoded_to_cli(self._path, encoded)).json()
+
+        if self._buffer and self._buffer_bytes + len(encoded) > self._config.max_batch_bytes:
+            self._send_buffer()
+
+        submission = QueuedSubmission(body=encoded, future=asyncio.get_running_loop().create_future())
+        self._buffer.append(submission)
+        self._buffer_bytes += len(encoded)
+
+        if len(self._buffer) >= self._config.max_batch_size or self._buffer_bytes >= self._config.max_batch_bytes:
+            self._send_buffer()
+        elif self._linger_task is None:
+            self._linger_task = asyncio.get_running_loop().create_task(self._linger())
+
+        return await submission.future
+
+    async def _linger(self) -> None:
+        await asyncio.sleep(self._config.max_linger.total_seconds())
+        self._linger_task = None
+        self._send_buffer()
+
+    def _send_buffer(self) -> None:
+        if self._linger_task is not None:
+            self._linger_task.cancel()
+            self._linger_task = None
+
+        if not self._buffer:
+            return
+
+        submissions = self._buffer
+        self._buffer = []
+        self._buffer_bytes = 0
+        # Each submitter awaits its own future, so the task only needs to be kept alive until it's done
+        task = asyncio.get_running_loop().create_task(self._send(submissions))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+
+    async def _send(self, submissions: list[QueuedSubmission]) -> None:
+        if len(submissions) > 1 and self._supported is None:
+            # Only one batch at a time finds out whether the CLI accepts array bodies
+            async with self._probe_lock:
+                await self._send_submissions(submissions)
+        else:
+            await self._send_submissions(submissions)
+
+    async def _send_submissions(self, submissions: list[QueuedSubmission]) -> None:
+        if len(submissions) > 1 and self._supported is not False:
+            try:
+                responses = await self._send_batch(submissions)
+            except Exception as err:
+                for submission in submissions:
+                    if not submission.future.done():
+                        submission.future.set_exception(err)
+                return
+            if responses is not None:
+                for submission, response in zip(submissions, responses):
+                    submission.future.set_result(response)
+                return
+
+        await all_settled([self._send_one(submission) for submission in submissions])
+
+    async def _send_batch(self, submissions: list[QueuedSubmission]) -> Optional[list[Any]]:
+        """
+        Returns None if the batch's requests should be sent one at a time instead: when the CLI doesn't accept
+        array bodies, or when the first batch failed before we found out whether it does.
+        """
+        log.debug(f"Sending batch of {len(submissions)} requests to the CLI's {self._path} endpoint")
+        try:
+            # Don't retry the first batch, since an unsupported array body would be retried for nothing
+            resp = await post_encoded_to_cli(
+                self._path,
+                encode_array([submission.body for submission in submissions]),
+                retry=self._supported is True,
+            )
+        except Exception as err:
+            if self._supported is not None:
+                raise
+            if (
+                isinstance(err, httpx.HTTPStatusError)
+                and err.response.status_code in CLI_BATCH_UNSUPPORTED_STATUS_CODES
+            ):
+                log.debug(f"CLI doesn't accept batches at {self._path}, sending requests one at a time")
+                self._supported = False
+            else:
+                # The single requests are retried, and the next batch finds out whether batches are supported
+                log.debug(f"First batch to the CLI's {self._path} endpoint failed, sending its requests one at a time")
+            return None
+
+        try:
+            responses = resp.json()
+        except ValueError:
+            responses = None
+        if not isinstance(responses, list) or len(responses) != len(submissions):
+            # An older CLI might handle the array as a single item
+            log.debug(f"CLI didn't answer a batch at {self._path} with one response per request, sending one at a time")
+            self._supported = False
+            return None
+        self._supported = True
+        return responses
+
+    async def _send_one(self, submission: QueuedSubmission) -> None:
+        try:
+            resp = await post_encoded_to_cli(self._path, submission.body)
+            submission.future.set_result(resp.json())
+        except Exception as err:
+            submission.future.set_exception(err)
+
+    async def flush(self) -> None:
+        self._send_buffer()
+
+
+class CliResultBatcher(TestRunBatcher):
+    """
+    Coalesces a test run's /results and /evals requests to the CLI.
+
+    Unlike the public API, the CLI needs each result's ID before its events can be sent,
+    so requests are only held for max_linger rather than until the end of the run.
+    """
+
+    def __init__(self, test_id: str, run_id: str, config: ResultBatchConfig) -> None:
+        self._test_id = test_id
+        self._run_id = run_id
+        self._results = CliSubmissionQueue("/results", config)
+        self._evals = CliSubmissionQueue("/evals", config)
+
+    async def send_result(
+        self,
+        test_case_ctx: TestCaseContext[TestCaseType],
+        output: Any,
+        test_case_duration_ms: Optional[float],
+    ) -> str:
+        response = await self._results.submit(
+            dict(
+                testExternalId=self._test_id,
+                runId=self._run_id,
+                **serialize_test_case_result(
+                    test_case_ctx=test_case_ctx,
+                    output=output,
+                    test_case_duration_ms=test_case_duration_ms,
+                ),
+            )
+        )
+        result_id: str = response["id"]
+        await send_test_events(self._run_id, test_case_ctx.hash(), result_id)
+        return result_id
+
+    async def send_evaluation(
+        self,
+        test_case_hash: str,
+        test_case_result_id: str,
+        evaluator_external_id: str,
+        evaluation: Evaluation,
+    ) -> None:
+        await self._evals.submit(
+            serialize_evaluation_for_cli(
+                test_external_id=self._test_id,
+                run_id=self._run_id,
+                test_case_hash=test_case_hash,
+                evaluator_external_id=evaluator_external_id,
+                evaluation=evaluation,
+            )
+        )
+
+    async def complete(self, test_case_hash: str) -> None:
+        # Everything for the test case has already been sent
+        pass
+
+    async def flush(self) -> None:
+        await self._results.flush()
+        await self._evals.flush()
@@ -0,0 +1,474 @@
+import abc
+import asyncio
+import collections
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import orjson
+
+from autoblocks._impl.configs.config import config_revisions_map
+from autoblocks._impl.context_vars import RevisionType
+from autoblocks._impl.context_vars import RevisionUsage
+from autoblocks._impl.context_vars import evaluator_run_context_var
+from autoblocks._impl.prompts.manager import prompt_revisions_map
+from autoblocks._impl.testing.models import BaseTestEvaluator
+from autoblocks._impl.testing.models import Evaluation
+from autoblocks._impl.testing.models import TestCaseContext
+from autoblocks._impl.testing.util import serialize
+from autoblocks._impl.testing.util import serialize_output
+from autoblocks._impl.util import orjson_default
+
+log = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = ".pkl"
+# Bump when the entry layout changes so that old entries are ignored instead of misread
+ENTRY_FORMAT_VERSION = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class OutputCacheConfig:
+    """
+    Configures the local cache of test case outputs. On a hit, the stored output is used instead of calling `fn`.
+
+    Entries are pickled, so only point this at a directory you trust.
+    """
+
+    # Directory the entries are written to. Can be shared between test suites and processes.
+    directory: str
+    # Identifies the version of the code and configuration `fn` depends on. Change it to invalidate every entry
+    # written under the previous value, e.g. by passing a hash of the prompt templates or the git commit.
+    fingerprint: str = ""
+    # Least recently used entries are deleted once the cache grows past this size
+    max_total_bytes: int = 500_000_000
+    # Also store evaluations and replay them on a hit instead of running the evaluators again.
+    # Evaluators without a stored evaluation still run.
+    replay_evaluations: bool = False
+
+    def __post_init__(self) -> None:
+        if not self.directory:
+            raise ValueError("directory must not be empty")
+        if self.max_total_bytes <= 0:
+            raise ValueError("max_total_bytes must be positive")
+
+
+@dataclasses.dataclass(frozen=True)
+class OutputCacheStats:
+    hits: int
+    misses: int
+    # Entries deleted to stay under max_total_bytes
+    evictions: int
+
+
+@dataclasses.dataclass
+class CachedOutput:
+    output: Any
+    test_case_duration_ms: float
+    revision_usage: List[RevisionUsage]
+    evaluations: Dict[str, Evaluation] = dataclasses.field(default_factory=dict)
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _test_dir(directory: str, test_id: str) -> str:
+    return os.path.join(directory, _digest(test_id)[:32])
+
+
+def _revision_overrides() -> Dict[RevisionType, Dict[str, str]]:
+    return {
+        RevisionType.PROMPT: prompt_revisions_map(),
+        RevisionType.CONFIG: config_revisions_map(),
+    }
+
+
+def _is_stale(revision_usage: List[RevisionUsage]) -> bool:
+    """
+    An entry is stale if `fn` used a prompt or config that is now overridden to a different revision.
+    """
+    overrides = _revision_overrides()
+    for usage in revision_usage:
+        override = overrides.get(usage.entity_type, {}).get(usage.entity_id)
+        if override is not None and override != usage.revision_id:
+            return True
+    return False
+
+
+def _evict_least_recently_used(paths: List[str], max_total_bytes: int) -> Tuple[int, int]:
+    """
+    Deletes the least recently modified of the given files until they fit in max_total_bytes.
+    Returns the remaining size and the number of files deleted.
+    """
+    sized = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        sized.append((stat.st_mtime, stat.st_size, path))
+    sized.sort()
+    total = sum(size for _, size, _ in sized)
+    evicted = 0
+    for _, size, path in sized:
+        if total <= max_total_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        evicted += 1
+    return total, evicted
+
+
+def invalidate_output_cache(
+    directory: str,
+    test_id: Optional[str] = None,
+    test_case_hash: Optional[str] = None,
+) -> int:
+    """
+    Deletes cached outputs and returns how many were deleted. Deletes every entry for the given test case
+    if test_case_hash is given, every entry for the given test suite if only test_id is given,
+    or everything in the directory otherwise.
+    """
+    assert test_case_hash is None or test_id is not None, "test_case_hash requires test_id"
+    if not os.path.isdir(directory):
+        return 0
+
+    if test_id is None:
+        removed = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isdir(path):
+                removed += len([entry for entry in os.listdir(path) if entry.endswith(ENTRY_SUFFIX)])
+                shutil.rmtree(path, ignore_errors=True)
+        return removed
+
+    test_dir = _test_dir(directory, test_id)
+    if not os.path.isdir(test_dir):
+        return 0
+    prefix = f"{_digest(test_case_hash)[:32]}-" if test_case_hash is not None else ""
+    removed = 0
+    for name in os.listdir(test_dir):
+        if name.startswith(prefix) and name.endswith(ENTRY_SUFFIX):
+            try:
+                os.remove(os.path.join(test_dir, name))
+                removed += 1
+            except FileNotFoundError:
+                continue
+    return removed
+
+
+class OutputCache:
+    """
+    Stores one pickled entry per test case under <directory>/<test id digest>/<test case digest>-<key digest>.pkl.
+
+    The key also covers the fingerprint, the test case's repetition and the grid search params, so changing
+    any of them misses. Entries record the prompt and config revisions `fn` used, and are ignored if one of them
+    is now overridden to a different revision. Reading an entry touches it so that eviction is least recently used.
+
+    Methods do blocking file IO, so callers on the event loop should run them in a thread.
+    """
+
+    def __init__(self, config: OutputCacheConfig, test_id: str) -> None:
+        self._config = config
+        self._test_id = test_id
+        self._test_dir = _test_dir(config.directory, test_id)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        os.makedirs(self._test_dir, exist_ok=True)
+        self._total_bytes = self._directory_size()
+
+    @property
+    def config(self) -> OutputCacheConfig:
+        return self._config
+
+    @property
+    def stats(self) -> OutputCacheStats:
+        return OutputCacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions)
+
+    def _entries(self) -> List[str]:
+        paths: List[str] = []
+        for root, _, names in os.walk(self._config.directory):
+            paths.extend(os.path.join(root, name) for name in names if name.endswith(ENTRY_SUFFIX))
+        return paths
+
+    def _directory_size(self) -> int:
+        total = 0
+        for path in self._entries():
+            try:
+                total += os.path.getsize(path)
+            except FileNotFoundError:
+                continue
+        return total
+
+    def _path(self, test_case_ctx: TestCaseContext[Any], grid_params: Optional[Dict[str, Any]]) -> str:
+        # The repetition is part of the key rather than the file name prefix so that
+        # invalidating a test case removes all of its repetitions
+        test_case_hash = test_case_ctx.test_case.hash()
+        key = json.dumps(
+            dict(
+                testId=self._test_id,
+                testCaseHash=test_case_hash,
+                repetitionIdx=test_case_ctx.repetition_idx,
+                gridParams=grid_params,
+                fingerprint=self._config.fingerprint,
+                version=ENTRY_FORMAT_VERSION,
+            ),
+            sort_keys=True,
+            default=str,
+        )
+        return os.path.join(self._test_dir, f"{_digest(test_case_hash)[:32]}-{_digest(key)}{ENTRY_SUFFIX}")
+
+    def get(self, test_case_ctx: TestCaseContext[Any], grid_params: Optional[Dict[str, Any]]) -> Optional[CachedOutput]:
+        path = self._path(test_case_ctx, grid_params)
+        entry: Optional[CachedOutput] = None
+        try:
+            with open(path, "rb") as f:
+                loaded = pickle.load(f)
+            if isinstance(loaded, CachedOutput):
+                entry = loaded
+                os.utime(path)
+        except FileNotFoundError:
+            pass
+        except Exception as err:
+            log.warning(f"Ignoring unreadable output cache entry {path}: {err}")
+
+        if entry is not None and _is_stale(entry.revision_usage):
+            log.debug(f"Ignoring output cache entry for test case '{test_case_ctx.hash()}' with overridden revisions")
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return entry
+
+    def put(
+        self,
+        test_case_ctx: TestCaseContext[Any],
+        grid_params: Optional[Dict[str, Any]],
+        entry: CachedOutput,
+    ) -> None:
+        path = self._path(test_case_ctx, grid_params)
+        try:
+            data = pickle.dumps(entry)
+        except Exception as err:
+            log.warning(
+                f"Not caching the output of test case '{test_case_ctx.hash()}' because it can't be pickled: {err}"
+            )
+            return
+
+        # Write to a temporary file first so that readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        try:
+            previous_size = os.path.getsize(path)
+        except FileNotFoundError:
+            previous_size = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes += len(data) - previous_size
+            if self._total_bytes > self._config.max_total_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Recount since other processes may share the directory
+        self._total_bytes, evicted = _evict_least_recently_used(self._entries(), self._config.max_total_bytes)
+        self._evictions += evicted
+        log.debug(f"Evicted output cache entries to stay under {self._config.max_total_bytes} bytes")
+
+
+@dataclasses.dataclass
+class CachedEvaluation:
+    evaluation: Evaluation
+    # Revisions the evaluator used, which are replayed with the evaluation
+    revision_usage: List[RevisionUsage] = dataclasses.field(default_factory=list)
+
+
+class EvaluationCache(abc.ABC):
+    """
+    Stores evaluations so that an evaluator isn't called again for a test case and output it has already scored.
+    Subclass this to keep evaluations somewhere other than memory or local disk.
+    """
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[CachedEvaluation]:
+        pass
+
+    @abc.abstractmethod
+    async def set(self, key: str, entry: CachedEvaluation) -> None:
+        pass
+
+
+class InMemoryEvaluationCache(EvaluationCache):
+    """
+    Keeps the most recently used evaluations in memory, so they're reused across test suites and
+    grid search combos in the same process.
+    """
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        assert max_entries > 0, "max_entries must be positive"
+        self._max_entries = max_entries
+        self._entries: "collections.OrderedDict[str, CachedEvaluation]" = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[CachedEvaluation]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedEvaluation) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class DiskEvaluationCache(EvaluationCache):
+    """
+    Keeps evaluations in a local directory so that they're reused by later runs. Least recently used
+    evaluations are deleted once the directory grows past max_total_bytes.
+
+    Entries are pickled, so only point this at a directory you trust. Use a different directory from the output cache.
+    """
+
+    def __init__(self, directory: str, max_total_bytes: int = 100_000_000) -> None:
+        assert directory, "directory must not be empty"
+        assert max_total_bytes > 0, "max_total_bytes must be positive"
+        self._directory = directory
+        self._max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(path) for path in self._entries())
+
+    def _entries(self) -> List[str]:
+        return [
+            os.path.join(self._directory, name) for name in os.listdir(self._directory) if name.endswith(ENTRY_SUFFIX)
+        ]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{_digest(key)}{ENTRY_SUFFIX}")
+
+    def _read(self, key: str) -> Optional[CachedEvaluation]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            log.warning(f"Ignoring unreadable evaluation cache entry {path}: {err}")
+            return None
+        return entry if isinstance(entry, CachedEvaluation) else None
+
+    def _write(self, key: str, entry: CachedEvaluation) -> None:
+        path = self._path(key)
+        data = pickle.dumps(entry)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        try:
+            previous_size = os.path.getsize(path)
+        except FileNotFoundError:
+            previous_size = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes += len(data) - previous_size
+            if self._total_bytes > self._max_total_bytes:
+                self._total_bytes, _ = _evict_least_recently_used(self._entries(), self._max_total_bytes)
+
+    async def get(self, key: str) -> Optional[CachedEvaluation]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, entry: CachedEvaluation) -> None:
+        await asyncio.to_thread(self._write, key, entry)
+
+
+def evaluation_cache_key(
+    evaluator: BaseTestEvaluator,
+    test_case_ctx: TestCaseContext[Any],
+    output: Any,
+    hook_results: Any,
+) -> str:
+    """
+    Evaluations are keyed by what the evaluator sees, so repetitions and grid search combos that
+    produce the same output share an evaluation.
+    """
+    key = orjson.dumps(
+        dict(
+            evaluatorId=evaluator.id,
+            evaluatorVersion=evaluator.cache_version,
+            testCaseHash=test_case_ctx.test_case.hash(),
+            output=serialize_output(output),
+            hookResults=serialize(hook_results),
+        ),
+        default=orjson_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(key).hexdigest()
+
+
+async def evaluate_with_cache(
+    cache: Optional[EvaluationCache],
+    evaluator: BaseTestEvaluator,
+    test_case_ctx: TestCaseContext[Any],
+    output: Any,
+    hook_results: Any,
+    evaluate: Callable[[], Awaitable[Optional[Evaluation]]],
+) -> Optional[Evaluation]:
+    """
+    Returns the cached evaluation if there is one, otherwise calls `evaluate` and caches its result.
+    Must be called within the evaluator's run context so that revision usage is recorded and replayed.
+    """
+    if cache is None:
+        return await evaluate()
+
+    try:
+        key = evaluation_cache_key(evaluator, test_case_ctx, output, hook_results)
+        entry = await cache.get(key)
+    except Exception as err:
+        log.warning(f"Not using the evaluation cache for evaluator '{evaluator.id}'", exc_info=err)
+        return await evaluate()
+
+    run_ctx = evaluator_run_context_var.get()
+    if entry is not None and not _is_stale(entry.revision_usage):
+        if run_ctx is not None:
+            run_ctx.revision_usage.extend(entry.revision_usage)
+        return entry.evaluation
+
+    evaluation = await evaluate()
+    if evaluation is not None:
+        try:
+            await cache.set(
+                key,
+                CachedEvaluation(
+                    evaluation=evaluation,
+                    revision_usage=list(run_ctx.revision_usage) if run_ctx is not None else [],
+                ),
+            )
+        except Exception as err:
+            log.warning(f"Failed to cache the evaluation from evaluator '{evaluator.id}'", exc_info=err)
+    return evaluation
@@ -0,0 +1,142 @@
+import collections
+import dataclasses
+import json
+import logging
+import os
+import tempfile
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from autoblocks._impl.testing.models import TestCaseType
+
+log = logging.getLogger(__name__)
+
+# (test_id, test case hash) -> (mean duration in ms, number of runs the mean is over)
+DurationEntries = Dict[Tuple[str, str], Tuple[float, int]]
+
+
+@dataclasses.dataclass(frozen=True)
+class DurationStatsConfig:
+    """
+    Starts the test cases that took longest in previous runs first, so that long test cases don't start last
+    and leave the other concurrency slots idle at the end of the run. Test cases without a recorded duration
+    are treated as taking the average time.
+
+    Durations are read from and written back to a local file with one test case per line, sorted, so that
+    files written by different shards can be merged by concatenating them or with a regular text merge.
+    """
+
+    path: str
+    # The recorded duration is the mean of at most this many recent runs, so it follows changes in fn
+    max_samples: int = 10
+
+    def __post_init__(self) -> None:
+        if not self.path:
+            raise ValueError("path must not be empty")
+        if self.max_samples < 1:
+            raise ValueError("max_samples must be at least 1")
+
+
+def _merge(entries: DurationEntries, key: Tuple[str, str], mean_ms: float, samples: int) -> None:
+    existing = entries.get(key)
+    if existing is None:
+        entries[key] = (mean_ms, samples)
+        return
+    existing_mean_ms, existing_samples = existing
+    total = existing_samples + samples
+    entries[key] = ((existing_mean_ms * existing_samples + mean_ms * samples) / total, total)
+
+
+def load_duration_entries(path: str) -> DurationEntries:
+    """
+    Lines for the same test case, e.g. from concatenated shard files, are combined.
+    """
+    entries: DurationEntries = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    test_id, test_case_hash, mean_ms, samples = json.loads(line)
+                    _merge(entries, (str(test_id), str(test_case_hash)), float(mean_ms), int(samples))
+                except (ValueError, TypeError):
+                    log.debug(f"Ignoring malformed line in duration stats file '{path}': {line!r}")
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def write_duration_entries(path: str, entries: DurationEntries) -> None:
+    lines = [
+        json.dumps([test_id, test_case_hash, round(mean_ms, 1), samples], separators=(",", ":"))
+        for (test_id, test_case_hash), (mean_ms, samples) in sorted(entries.items())
+    ]
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Replace the file atomically so a crash can't leave it half written
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".durations-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("".join(f"{line}\n" for line in lines))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class DurationStats:
+    """
+    Historical fn durations of one test suite's test cases, plus the durations measured during the current run.
+    """
+
+    def __init__(self, config: DurationStatsConfig, test_id: str) -> None:
+        self._config = config
+        self._test_id = test_id
+        self._entries = {
+            test_case_hash: mean_ms
+            for (entry_test_id, test_case_hash), (mean_ms, _) in load_duration_entries(config.path).items()
+            if entry_test_id == test_id
+        }
+        self._measured: Dict[str, List[float]] = collections.defaultdict(list)
+
+    @property
+    def num_known(self) -> int:
+        return len(self._entries)
+
+    def order(self, test_cases: Sequence[TestCaseType]) -> List[TestCaseType]:
+        """
+        Sorts test cases by their recorded duration, longest first. Ties keep the given order.
+        """
+        if not self._entries:
+            return list(test_cases)
+        default_ms = sum(self._entries.values()) / len(self._entries)
+        return sorted(
+            test_cases,
+            key=lambda test_case: self._entries.get(test_case.hash(), default_ms),
+            reverse=True,
+        )
+
+    def record(self, test_case_hash: str, duration_ms: float) -> None:
+        """
+        Records one call of fn. Repetitions and grid search combos of a test case are averaged.
+        """
+        self._measured[test_case_hash].append(duration_ms)
+
+    def save(self) -> None:
+        """
+        Updates the stats file with this run's durations. The file is read again first so that
+        other test suites' entries written in the meantime are kept.
+        """
+        if not self._measured:
+            return
+        entries = load_duration_entries(self._config.path)
+        for test_case_hash, durations in self._measured.items():
+            key = (self._test_id, test_case_hash)
+            measured_ms = sum(durations) / len(durations)
+            mean_ms, samples = entries.get(key, (measured_ms, 0))
+            samples = min(samples + 1, self._config.max_samples)
+            entries[key] = (mean_ms + (measured_ms - mean_ms) / samples, samples)
+        write_duration_entries(self._config.path, entries)
@@ -0,0 +1,292 @@
+import asyncio
+import contextvars
+import dataclasses
+import functools
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from autoblocks._impl import global_state
+from autoblocks._impl.testing.models import BaseTestEvaluator
+from autoblocks._impl.util import StrEnum
+
+log = logging.getLogger(__name__)
+
+
+class ExecutionMode(StrEnum):
+    # Sync callables run in a thread pool
+    THREAD = "thread"
+    # Sync test functions and process-safe evaluators run in a pool of worker processes
+    PROCESS = "process"
+
+
+@dataclasses.dataclass(frozen=True)
+class ExecutorStats:
+    # Number of worker threads, or None if a user-provided executor doesn't expose it
+    max_workers: Optional[int]
+    # Sync callables that have been submitted but are waiting for a free worker
+    queued: int
+    # Sync callables that are currently running in a worker
+    running: int
+    completed: int
+    # Number of worker processes, or None if the test suite isn't running in process mode
+    process_max_workers: Optional[int] = None
+    # Sync callables that have been sent to a worker process and haven't finished yet
+    process_pending: int = 0
+    # Sync callables that timed out while running. While they finish in the background, callables that would
+    # queue behind them run in a separate pool of up to max_workers replacement threads instead.
+    abandoned: int = 0
+
+
+def default_max_workers(max_test_case_concurrency: int, evaluators: Sequence[BaseTestEvaluator]) -> int:
+    """
+    Enough workers for every test case and every evaluator to run a sync callable at their configured concurrency.
+    fn and before_evaluators_hook share a test case's slot, so they only count once.
+    """
+    return max_test_case_concurrency + sum(evaluator.max_concurrency for evaluator in evaluators)
+
+
+class TestSuiteExecutor:
+    """
+    Runs the synchronous test functions, hooks and evaluators of a test suite.
+
+    The event loop's default executor is capped at min(32, cpu_count + 4) threads, which silently
+    throttles suites configured with a higher concurrency, so each test suite gets its own pool.
+
+    A running callable can't be interrupted, so when its caller gives up on it (e.g. because it timed out)
+    its worker stays busy until it returns. Callables that would have to wait for a free worker because of
+    that run in a second pool of replacement workers, which has the same fixed size as the first. Once the
+    replacements are busy too, further abandoned callables reduce the suite's concurrency until they return.
+    User-provided executors don't get replacements.
+    """
+
+    __test__ = False  # See https://docs.pytest.org/en/7.1.x/example/pythoncollection.html#customizing-test-collection
+
+    def __init__(
+        self,
+        max_workers: int,
+        executor: Optional[Executor] = None,
+        process_max_workers: Optional[int] = None,
+    ):
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="autoblocks-test-suite",
+        )
+        self._max_workers: Optional[int] = max_workers if executor is None else getattr(executor, "_max_workers", None)
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._cancelled = 0
+        self._abandoned = 0
+        # Abandoned callables that are still running, each of which makes room for a replacement worker
+        self._abandoned_running = 0
+        # Callables submitted to the main pool and the replacement pool that haven't finished yet
+        self._main_in_flight = 0
+        self._replacement_in_flight = 0
+        self._replacement_executor: Optional[ThreadPoolExecutor] = None
+        self._process_max_workers = process_max_workers
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+        self._process_pending = 0
+
+    @property
+    def max_workers(self) -> Optional[int]:
+        return self._max_workers
+
+    @property
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return ExecutorStats(
+                max_workers=self._max_workers,
+                queued=self._submitted - self._started - self._cancelled,
+                running=self._started - self._completed,
+                completed=self._completed,
+                process_max_workers=self._process_max_workers,
+                process_pending=self._process_pending,
+                abandoned=self._abandoned,
+            )
+
+    def _track(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._started += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._completed += 1
+
+    def _on_done(self, future: "Future[Any]", replacement: bool) -> None:
+        with self._lock:
+            if replacement:
+                self._replacement_in_flight -= 1
+            else:
+                self._main_in_flight -= 1
+            if future.cancelled():
+                # Cancelled while still queued, so it will never start
+                self._cancelled += 1
+
+    def _choose_executor(self) -> Tuple[Executor, bool]:
+        """
+        Returns the executor to submit to and whether it's the replacement pool. Must be called with the lock held.
+        """
+        if (
+            self._owns_executor
+            and self._max_workers is not None
+            and self._main_in_flight >= self._max_workers
+            and self._replacement_in_flight < min(self._abandoned_running, self._max_workers)
+        ):
+            if self._replacement_executor is None:
+                self._replacement_executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="autoblocks-test-suite-replacement",
+                )
+            self._replacement_in_flight += 1
+            return self._replacement_executor, True
+        self._main_in_flight += 1
+        return self._executor, False
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Runs fn in a worker with a copy of the caller's context.
+        """
+        ctx = contextvars.copy_context()
+        with self._lock:
+            self._submitted += 1
+            executor, replacement = self._choose_executor()
+        try:
+            future = executor.submit(self._track, functools.partial(ctx.run, fn, *args, **kwargs))
+        except Exception:
+            with self._lock:
+                self._submitted -= 1
+                if replacement:
+                    self._replacement_in_flight -= 1
+                else:
+                    self._main_in_flight -= 1
+            raise
+        future.add_done_callback(functools.partial(self._on_done, replacement=replacement))
+        try:
+            # Cancelling the awaiting task cancels the future if it hasn't started yet
+            return await asyncio.wrap_future(future, loop=global_state.event_loop())
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                with self._lock:
+                    self._abandoned += 1
+                    self._abandoned_running += 1
+                future.add_done_callback(self._on_abandoned_done)
+            raise
+
+    def _on_abandoned_done(self, future: "Future[Any]") -> None:
+        with self._lock:
+            self._abandoned_running -= 1
+
+    def _get_process_executor(self) -> ProcessPoolExecutor:
+        if self._process_executor is None:
+            # Forking a process that has running threads (like our event loop thread) can deadlock,
+            # so worker processes are spawned. They import fn and evaluators by reference.
+            self._process_executor = ProcessPoolExecutor(
+                max_workers=self._process_max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._process_executor
+
+    def _on_process_done(self, future: "Future[Any]") -> None:
+        with self._lock:
+            self._process_pending -= 1
+
+    async def run_in_process(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Runs fn in a worker process if the test suite is running in process mode, otherwise in a worker thread.
+
+        fn, its arguments and its return value are pickled. Context variables aren't available in worker processes,
+        so tracer events and prompt revision usage recorded there aren't attached to the test case.
+        """
+        if self._process_max_workers is None:
+            return await self.run(fn, *args, **kwargs)
+
+        with self._lock:
+            self._process_pending += 1
+        try:
+            future = self._get_process_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._process_pending -= 1
+            raise
+        future.add_done_callback(self._on_process_done)
+        return await asyncio.wrap_future(future, loop=global_state.event_loop())
+
+    def shutdown(self) -> None:
+        """
+        Shuts down the pools created by this class. User-provided executors are left running.
+        """
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+        if self._replacement_executor is not None:
+            self._replacement_executor.shutdown(wait=False)
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def is_picklable(obj: Any) -> bool:
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+
+def validate_process_mode_inputs(
+    test_id: str,
+    fn: Callable[..., Any],
+    evaluators: Sequence[BaseTestEvaluator],
+) -> None:
+    """
+    Worker processes receive fn and process-safe evaluators by pickling them, which only works for
+    module-level functions and instances of module-level classes.
+    """
+    assert is_picklable(fn), (
+        f"[{test_id}] fn must be picklable to run in process mode. "
+        "Use a function defined at the top level of a module instead of a lambda or nested function."
+    )
+    for evaluator in evaluators:
+        if evaluator.process_safe:
+            assert is_picklable(evaluator), (
+                f"[{test_id}] Evaluator '{evaluator.id}' is process_safe but can't be pickled. "
+                "Process-safe evaluators must be instances of classes defined at the top level of a module."
+            )
+
+
+def create_test_suite_executor(
+    test_id: str,
+    max_test_case_concurrency: int,
+    evaluators: Sequence[BaseTestEvaluator],
+    executor: Optional[Executor],
+    max_workers: Optional[int],
+    execution_mode: ExecutionMode = ExecutionMode.THREAD,
+    max_process_workers: Optional[int] = None,
+) -> TestSuiteExecutor:
+    requested_workers = default_max_workers(max_test_case_concurrency, evaluators)
+    suite_executor = TestSuiteExecutor(
+        max_workers=max_workers or requested_workers,
+        executor=executor,
+        process_max_workers=(
+            (max_process_workers or os.cpu_count() or 1) if execution_mode == ExecutionMode.PROCESS else None
+        ),
+    )
+    if suite_executor.max_workers is not None and suite_executor.max_workers < requested_workers:
+        log.info(
+            f"Test suite '{test_id}' can run up to {requested_workers} sync callables at once, "
+            f"but its executor only has {suite_executor.max_workers} workers."
+        )
+    return suite_executor
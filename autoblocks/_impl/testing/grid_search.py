@@ -0,0 +1,205 @@
+import asyncio
+import dataclasses
+import logging
+import math
+from typing import AsyncIterator
+from typing import Generic
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+
+from autoblocks._impl.testing.models import BaseTestEvaluator
+from autoblocks._impl.testing.models import Evaluation
+from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.testing.util import GridSearchParams
+from autoblocks._impl.testing.util import yield_test_case_contexts_from_test_cases
+
+log = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class SuccessiveHalvingConfig:
+    """
+    Prunes grid search combos that score poorly on a subset of the test cases.
+
+    Every combo starts on the first min_test_cases test cases. After each round, only the best
+    1 / reduction_factor of the remaining combos continue, on reduction_factor times as many test cases,
+    until the survivors have run the whole suite. Test cases are used in the order given, so put a
+    representative mix first.
+    """
+
+    # Evaluator whose mean score ranks the combos. Defaults to the mean score across all evaluators.
+    evaluator_id: Optional[str] = None
+    higher_is_better: bool = True
+    reduction_factor: int = 3
+    # Test cases every combo runs in the first round. Defaults to the fewest that still let
+    # the last round run the whole suite.
+    min_test_cases: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.reduction_factor < 2:
+            raise ValueError("reduction_factor must be at least 2")
+        if self.min_test_cases is not None and self.min_test_cases < 1:
+            raise ValueError("min_test_cases must be at least 1")
+
+
+@dataclasses.dataclass(frozen=True)
+class GridSearchStats:
+    combos: int
+    # Combos that were stopped before running the whole suite
+    pruned_combos: int
+    fn_calls: int
+    # Calls that running every combo on every test case would have made on top of fn_calls
+    fn_calls_saved: int
+
+
+def validate_successive_halving_inputs(
+    test_id: str,
+    config: SuccessiveHalvingConfig,
+    evaluators: Sequence[BaseTestEvaluator],
+    grid_search_params: Optional[GridSearchParams],
+) -> None:
+    assert grid_search_params is not None, f"[{test_id}] successive_halving requires grid_search_params."
+    assert evaluators, f"[{test_id}] successive_halving requires at least one evaluator to rank the combos."
+    if config.evaluator_id is not None:
+        assert config.evaluator_id in {
+            evaluator.id for evaluator in evaluators
+        }, f"[{test_id}] successive_halving evaluator_id '{config.evaluator_id}' is not one of the evaluators."
+
+
+def round_budgets(num_test_cases: int, num_combos: int, config: SuccessiveHalvingConfig) -> List[int]:
+    """
+    Returns how many test cases the surviving combos have run by the end of each round.
+    """
+    num_rounds = 0
+    remaining = num_combos
+    while remaining > 1:
+        remaining = math.ceil(remaining / config.reduction_factor)
+        num_rounds += 1
+
+    budget = config.min_test_cases or math.ceil(num_test_cases / config.reduction_factor**num_rounds)
+    budgets = []
+    while budget < num_test_cases:
+        budgets.append(budget)
+        budget *= config.reduction_factor
+    budgets.append(num_test_cases)
+    return budgets
+
+
+class SuccessiveHalving(Generic[TestCaseType]):
+    """
+    Feeds each combo's run its test cases one round at a time and decides which combos continue once
+    every surviving combo has finished the round.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        config: SuccessiveHalvingConfig,
+        test_cases: Sequence[TestCaseType],
+        num_combos: int,
+    ) -> None:
+        self._config = config
+        self._test_cases = test_cases
+        self._num_combos = num_combos
+        self._budgets = round_budgets(len(test_cases), num_combos, config)
+
+        # fn is called once per test case context, so repetitions count separately
+        self._contexts_by_round: List[int] = []
+        previous = 0
+        for budget in self._budgets:
+            self._contexts_by_round.append(
+                (self._contexts_by_round[-1] if self._contexts_by_round else 0)
+                + sum(1 for _ in yield_test_case_contexts_from_test_cases(test_cases[previous:budget]))
+            )
+            previous = budget
+
+        self._round = 0
+        self._decided = [asyncio.Event() for _ in self._budgets]
+        self._remaining = set(range(num_combos))
+        self._pruned: set[int] = set()
+        self._completed = [0] * num_combos
+        self._scores: List[List[float]] = [[] for _ in range(num_combos)]
+
+    @property
+    def stats(self) -> GridSearchStats:
+        fn_calls = sum(self._completed)
+        return GridSearchStats(
+            combos=self._num_combos,
+            pruned_combos=len(self._pruned),
+            fn_calls=fn_calls,
+            fn_calls_saved=self._contexts_by_round[-1] * self._num_combos - fn_calls,
+        )
+
+    async def test_cases(self, combo_idx: int) -> AsyncIterator[TestCaseType]:
+        previous = 0
+        for round_idx, budget in enumerate(self._budgets):
+            if round_idx > 0:
+                await self._decided[round_idx - 1].wait()
+                if combo_idx in self._pruned:
+                    return
+            for test_case in self._test_cases[previous:budget]:
+                yield test_case
+            previous = budget
+
+    def _objective(self, evaluations: Mapping[str, Evaluation]) -> Optional[float]:
+        if self._config.evaluator_id is not None:
+            evaluation = evaluations.get(self._config.evaluator_id)
+            scores = [evaluation.score] if evaluation is not None else []
+        else:
+            scores = [evaluation.score for evaluation in evaluations.values()]
+        if not scores:
+            return None
+        score = sum(scores) / len(scores)
+        return score if self._config.higher_is_better else -score
+
+    def record(self, combo_idx: int, repetitions: Sequence[Mapping[str, Evaluation]]) -> None:
+        """
+        Called when one of the combo's test cases has finished, including its evaluators, with the evaluations
+        of each of its adaptive repetitions, or just its own. Its score is the mean of its repetitions' scores.
+        Test cases that failed count as finished with no score.
+        """
+        self._completed[combo_idx] += 1
+        scores = [score for score in map(self._objective, repetitions) if score is not None]
+        if scores:
+            self._scores[combo_idx].append(sum(scores) / len(scores))
+        self._maybe_end_round()
+
+    def finish(self, combo_idx: int) -> None:
+        """
+        Called when the combo's run has ended, for example because it couldn't be started,
+        so that the other combos don't wait for it.
+        """
+        self._remaining.discard(combo_idx)
+        self._maybe_end_round()
+
+    def _mean_score(self, combo_idx: int) -> float:
+        scores = self._scores[combo_idx]
+        # Combos without any scores, e.g. because fn always failed, rank last
+        return sum(scores) / len(scores) if scores else -math.inf
+
+    def _maybe_end_round(self) -> None:
+        if self._round >= len(self._budgets) - 1:
+            # Whoever is left runs the rest of the suite
+            return
+        expected = self._contexts_by_round[self._round]
+        if any(self._completed[combo_idx] < expected for combo_idx in self._remaining):
+            return
+
+        # Ties keep the combos' order since the sort is stable
+        ranked = sorted(sorted(self._remaining), key=self._mean_score, reverse=True)
+        keep = max(1, math.ceil(len(ranked) / self._config.reduction_factor))
+        pruned = ranked[keep:]
+        self._pruned.update(pruned)
+        self._remaining.difference_update(pruned)
+        log.info(
+            f"Grid search round {self._round + 1}: {len(self._remaining)} of {len(ranked)} combos continue "
+            f"after {self._budgets[self._round]} test cases"
+        )
+
+        self._decided[self._round].set()
+        self._round += 1
+        # Every remaining combo may have been pruned or finished already
+        self._maybe_end_round()
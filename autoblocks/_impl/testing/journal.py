@@ -0,0 +1,168 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from autoblocks._impl.testing.models import TestCaseContext
+from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.testing.util import GridSearchParamsCombo
+
+log = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".jsonl"
+
+
+@dataclasses.dataclass(frozen=True)
+class RunJournalConfig:
+    """
+    Configures the local journal of completed test cases. Running the test suite again with the same run_id
+    skips the test cases the journal has recorded and appends the rest to the same run.
+    """
+
+    # Directory the journals are written to, one file per test suite and run
+    directory: str
+    # Completed test cases are buffered and written (and fsynced) once this many are waiting
+    # or this long after the last write, whichever comes first
+    max_pending: int = 100
+    flush_interval_seconds: float = 5.0
+
+    def __post_init__(self) -> None:
+        if not self.directory:
+            raise ValueError("directory must not be empty")
+        if self.max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        if self.flush_interval_seconds < 0:
+            raise ValueError("flush_interval_seconds must not be negative")
+
+
+def journal_path(directory: str, test_id: str, run_id: str) -> str:
+    test_digest = hashlib.sha256(test_id.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(directory, f"{test_digest}-{run_id}{JOURNAL_SUFFIX}")
+
+
+def _key(test_case_hash: str, grid_search_params_combo: Optional[GridSearchParamsCombo]) -> Tuple[str, str]:
+    return test_case_hash, json.dumps(grid_search_params_combo, sort_keys=True, default=str)
+
+
+def _load(path: str) -> Dict[Tuple[str, str], str]:
+    completed: Dict[Tuple[str, str], str] = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    completed[_key(entry["testCaseHash"], entry["gridSearchParamsCombo"])] = entry["id"]
+                except (ValueError, KeyError, TypeError):
+                    # The last line is cut short if the process died mid-write
+                    continue
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return completed
+
+
+class RunJournal:
+    """
+    Records which test cases of a run have completed and the id they were recorded under.
+    Use open_run_journal to load an existing journal.
+    """
+
+    def __init__(
+        self,
+        config: RunJournalConfig,
+        path: str,
+        completed: Dict[Tuple[str, str], str],
+        # Called before each write, e.g. to make sure the recorded results have been sent
+        before_write: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._config = config
+        self._before_write = before_write
+        self.path = path
+        self._completed = completed
+        self._pending: List[str] = []
+        self._lock = asyncio.Lock()
+        self._last_write = time.monotonic()
+        self.skipped = 0
+
+    @property
+    def num_completed(self) -> int:
+        return len(self._completed)
+
+    def is_completed(
+        self,
+        test_case_hash: str,
+        grid_search_params_combo: Optional[GridSearchParamsCombo],
+    ) -> bool:
+        return _key(test_case_hash, grid_search_params_combo) in self._completed
+
+    async def record(
+        self,
+        test_case_hash: str,
+        grid_search_params_combo: Optional[GridSearchParamsCombo],
+        id: str,
+    ) -> None:
+        self._completed[_key(test_case_hash, grid_search_params_combo)] = id
+        self._pending.append(
+            json.dumps(
+                dict(testCaseHash=test_case_hash, gridSearchParamsCombo=grid_search_params_combo, id=id),
+                default=str,
+            )
+        )
+        if (
+            len(self._pending) >= self._config.max_pending
+            or time.monotonic() - self._last_write >= self._config.flush_interval_seconds
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            lines, self._pending = self._pending, []
+            if not lines:
+                return
+            await asyncio.to_thread(self._write, lines)
+            self._last_write = time.monotonic()
+
+    def _write(self, lines: List[str]) -> None:
+        if self._before_write is not None:
+            self._before_write()
+        data = "".join(f"{line}\n" for line in lines).encode("utf-8")
+        with open(self.path, "a+b") as f:
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Don't append to a line cut short by a crash
+                    data = b"\n" + data
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+async def open_run_journal(
+    config: RunJournalConfig,
+    test_id: str,
+    run_id: str,
+    before_write: Optional[Callable[[], None]] = None,
+) -> RunJournal:
+    path = journal_path(config.directory, test_id, run_id)
+    completed = await asyncio.to_thread(_load, path)
+    return RunJournal(config=config, path=path, completed=completed, before_write=before_write)
+
+
+async def skip_completed(
+    test_case_contexts: AsyncIterator[TestCaseContext[TestCaseType]],
+    journal: Optional[RunJournal],
+    grid_search_params_combo: Optional[GridSearchParamsCombo],
+) -> AsyncIterator[TestCaseContext[TestCaseType]]:
+    async for test_case_ctx in test_case_contexts:
+        if journal is not None and journal.is_completed(test_case_ctx.hash(), grid_search_params_combo):
+            journal.skipped += 1
+            continue
+        yield test_case_ctx
@@ -74,10 +74,42 @@ class EvaluationWithId:
     assertions: Optional[List[Assertion]] = None
 
 
+@dataclasses.dataclass(frozen=True)
+class AdaptiveRepetitionConfig:
+    """
+    Runs a test case's repetitions a batch at a time and stops once the confidence interval of every
+    evaluator's mean score is narrow enough, instead of always running repeat_num_times repetitions.
+    """
+
+    # Stop once each evaluator's mean score is within this much of the true mean at the given confidence
+    max_half_width: float
+    confidence: float = 0.95
+    # Repetitions to run before the confidence intervals are first checked
+    min_repetitions: int = 3
+    # Repetitions to run at a time after that
+    batch_size: int = 1
+
+    def __post_init__(self) -> None:
+        if self.max_half_width <= 0:
+            raise ValueError("max_half_width must be greater than 0")
+        if not 0 < self.confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        if self.min_repetitions < 3:
+            raise ValueError("min_repetitions must be at least 3")
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+
 @dataclasses.dataclass
 class TestCaseConfig:
     __test__ = False  # See https://docs.pytest.org/en/7.1.x/example/pythoncollection.html#customizing-test-collection
     repeat_num_times: Optional[int] = None
+    # Stops repeating the test case early once its scores agree. repeat_num_times is then the maximum.
+    adaptive_repetitions: Optional[AdaptiveRepetitionConfig] = None
+
+    def __post_init__(self) -> None:
+        if self.adaptive_repetitions is not None and self.repeat_num_times is None:
+            raise ValueError("adaptive_repetitions requires repeat_num_times")
 
 
 class HumanReviewFieldContentType(StrEnum):
@@ -168,10 +200,28 @@ class BaseTestEvaluator(abc.ABC):
     # Controls how many concurrent evaluations can be run for this evaluator
     max_concurrency = 10
 
+    # If true, a sync evaluate_test_case is run in a worker process when the test suite runs in process mode.
+    # The evaluator, test case, output and evaluation must be picklable.
+    process_safe = False
+
+    # Part of the key evaluations are cached under when the test suite has an evaluation cache.
+    # Change it when the evaluator's logic changes so that previously cached evaluations aren't used.
+    cache_version = ""
+
+    # Seconds an evaluation may take before it's cancelled and reported as an error.
+    # Overrides the test suite's TimeoutConfig.evaluator_seconds.
+    timeout: Optional[float] = None
+
     def __init_subclass__(cls, **kwargs: Any) -> None:
         super().__init_subclass__(**kwargs)
         if not isinstance(cls.max_concurrency, int):
             raise TypeError(f"{cls.__name__}.max_concurrency must be an int")
+        if not isinstance(cls.process_safe, bool):
+            raise TypeError(f"{cls.__name__}.process_safe must be a bool")
+        if not isinstance(cls.cache_version, str):
+            raise TypeError(f"{cls.__name__}.cache_version must be a str")
+        if cls.timeout is not None and (not isinstance(cls.timeout, (int, float)) or cls.timeout <= 0):
+            raise TypeError(f"{cls.__name__}.timeout must be a positive number")
 
     @property
     @abc.abstractmethod
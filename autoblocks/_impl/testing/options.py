@@ -0,0 +1,55 @@
+import dataclasses
+from concurrent.futures import Executor
+from typing import Optional
+
+from autoblocks._impl.testing.batching import ResultBatchConfig
+from autoblocks._impl.testing.cache import EvaluationCache
+from autoblocks._impl.testing.cache import OutputCacheConfig
+from autoblocks._impl.testing.durations import DurationStatsConfig
+from autoblocks._impl.testing.executor import ExecutionMode
+from autoblocks._impl.testing.grid_search import SuccessiveHalvingConfig
+from autoblocks._impl.testing.profiler import ProfilerConfig
+from autoblocks._impl.testing.sharding import ShardConfig
+from autoblocks._impl.testing.timeouts import TimeoutConfig
+
+
+@dataclasses.dataclass(frozen=True)
+class RunOptions:
+    """
+    Opt-in features of run_test_suite. Nothing is enabled by default.
+    """
+
+    # Executor for sync fn, before_evaluators_hook and evaluators. Defaults to a thread pool with enough workers
+    # for max_test_case_concurrency plus every evaluator's max_concurrency. Not shut down when provided.
+    executor: Optional[Executor] = None
+    # Overrides the size of the default thread pool. Ignored if executor is provided.
+    max_executor_workers: Optional[int] = None
+    # In process mode, a sync fn and sync evaluators with process_safe = True run in worker processes,
+    # which avoids contention on the GIL for CPU-bound work. They must be picklable.
+    execution_mode: ExecutionMode = ExecutionMode.THREAD
+    # Number of worker processes in process mode. Defaults to the number of CPUs.
+    max_process_workers: Optional[int] = None
+    # Sends results and evaluations in bulk instead of one or more requests each. When running under the CLI,
+    # requests made within result_batch.max_linger of each other are combined.
+    result_batch: Optional[ResultBatchConfig] = None
+    # Replays outputs stored by previous runs instead of calling fn. Hits and misses are logged when the
+    # suite finishes and are available from get_output_cache_stats.
+    output_cache: Optional[OutputCacheConfig] = None
+    # Reuses evaluations of the same evaluator (and cache_version), test case and output instead of calling
+    # the evaluator again. Use InMemoryEvaluationCache, DiskEvaluationCache or your own EvaluationCache.
+    evaluation_cache: Optional[EvaluationCache] = None
+    # Runs grid search combos on a growing subset of the test cases and stops the worst scoring ones after
+    # each round, so only the most promising combos run the whole suite. See get_grid_search_stats.
+    successive_halving: Optional[SuccessiveHalvingConfig] = None
+    # Runs only this CI runner's share of the test cases. Each shard reports its share in its own run,
+    # with its own human review job and notifications, so a sharded test suite has one run per shard.
+    # Defaults to the AUTOBLOCKS_SHARD_INDEX and AUTOBLOCKS_SHARD_TOTAL environment variables.
+    shard: Optional[ShardConfig] = None
+    # Limits how long fn and evaluators may run. Timed out test cases and evaluations are reported as errors.
+    timeouts: Optional[TimeoutConfig] = None
+    # Starts the test cases whose fn took longest in previous runs first, which shortens the run when a few
+    # test cases are much slower than the rest. Durations are updated in the given file after each run.
+    duration_stats: Optional[DurationStatsConfig] = None
+    # Times each phase of each test case and prints the p50, p95 and max of each phase when the suite finishes.
+    # See get_phase_stats.
+    profiler: Optional[ProfilerConfig] = None
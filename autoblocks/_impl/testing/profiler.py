@@ -0,0 +1,242 @@
+import asyncio
+import collections
+import contextlib
+import dataclasses
+import json
+import math
+import os
+import time
+from contextvars import ContextVar
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from autoblocks._impl.testing.models import TestCaseContext
+from autoblocks._impl.testing.util import GridSearchParamsCombo
+
+# The lane spans are drawn in when they're not recorded by an evaluator
+TEST_CASE_LANE = "test case"
+
+
+@dataclasses.dataclass(frozen=True)
+class ProfilerConfig:
+    """
+    Records how long each phase of each test case takes: waiting for a concurrency slot, fn,
+    before_evaluators_hook, each evaluator, serializing results and uploading them. The p50, p95 and max
+    of every phase are printed when the run ends.
+
+    Spans are wall-clock time, so phases that wait on each other or on the network overlap.
+    """
+
+    # Where to write the spans as a Chrome trace-event file, which chrome://tracing and https://ui.perfetto.dev open
+    trace_path: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.trace_path is not None and not self.trace_path:
+            raise ValueError("trace_path must not be empty")
+
+
+@dataclasses.dataclass(frozen=True)
+class PhaseStats:
+    phase: str
+    count: int
+    total_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+@dataclasses.dataclass(frozen=True)
+class Span:
+    phase: str
+    track: str
+    lane: str
+    start: float
+    end: float
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1_000
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    # Nearest rank, so the result is always one of the measured durations
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def track_name(test_case_ctx: TestCaseContext[Any], grid_search_params_combo: Optional[GridSearchParamsCombo]) -> str:
+    if not grid_search_params_combo:
+        return test_case_ctx.hash()
+    return f"{test_case_ctx.hash()} {json.dumps(grid_search_params_combo, sort_keys=True, default=str)}"
+
+
+class RunProfiler:
+    """
+    Collects the spans of one test suite run. Spans are recorded on the event loop.
+    """
+
+    def __init__(self, config: ProfilerConfig, name: str) -> None:
+        self.config = config
+        self.name = name
+        self._origin = time.perf_counter()
+        self._spans: List[Span] = []
+
+    @property
+    def spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def record(self, phase: str, track: str, lane: str, start: float, end: float) -> None:
+        self._spans.append(Span(phase=phase, track=track, lane=lane, start=start, end=end))
+
+    def phase_stats(self) -> List[PhaseStats]:
+        """
+        Returns the stats of each phase, the phases that took the most time in total first.
+        """
+        durations: Dict[str, List[float]] = collections.defaultdict(list)
+        for span in self._spans:
+            durations[span.phase].append(span.duration_ms)
+        stats = []
+        for phase, phase_durations in durations.items():
+            ordered = sorted(phase_durations)
+            stats.append(
+                PhaseStats(
+                    phase=phase,
+                    count=len(ordered),
+                    total_ms=sum(ordered),
+                    p50_ms=_percentile(ordered, 0.5),
+                    p95_ms=_percentile(ordered, 0.95),
+                    max_ms=ordered[-1],
+                )
+            )
+        return sorted(stats, key=lambda s: (-s.total_ms, s.phase))
+
+    def summary(self) -> str:
+        stats = self.phase_stats()
+        width = max([len("phase")] + [len(s.phase) for s in stats])
+        lines = [
+            f"Profile of '{self.name}' (wall-clock ms):",
+            f"{'phase':<{width}} {'count':>7} {'total':>10} {'p50':>10} {'p95':>10} {'max':>10}",
+        ]
+        for s in stats:
+            lines.append(
+                f"{s.phase:<{width}} {s.count:>7} {s.total_ms:>10.1f} {s.p50_ms:>10.1f} {s.p95_ms:>10.1f} "
+                f"{s.max_ms:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Each test case is a process and each evaluator a thread within it, so that concurrent
+        evaluators don't draw on top of each other.
+        """
+        pids: Dict[str, int] = {}
+        tids: Dict[Tuple[str, str], int] = {}
+        events: List[Dict[str, Any]] = []
+        for span in sorted(self._spans, key=lambda s: s.start):
+            if span.track not in pids:
+                pids[span.track] = len(pids) + 1
+                events.append(
+                    dict(name="process_name", ph="M", pid=pids[span.track], tid=0, args=dict(name=span.track))
+                )
+            pid = pids[span.track]
+            if (span.track, span.lane) not in tids:
+                evaluator_lanes = sum(1 for track, lane in tids if track == span.track and lane != TEST_CASE_LANE)
+                tids[(span.track, span.lane)] = tid = 0 if span.lane == TEST_CASE_LANE else evaluator_lanes + 1
+                events.append(dict(name="thread_name", ph="M", pid=pid, tid=tid, args=dict(name=span.lane)))
+            events.append(
+                dict(
+                    name=span.phase,
+                    cat=self.name,
+                    ph="X",
+                    ts=round((span.start - self._origin) * 1_000_000, 3),
+                    dur=round((span.end - span.start) * 1_000_000, 3),
+                    pid=pid,
+                    tid=tids[(span.track, span.lane)],
+                )
+            )
+        return dict(traceEvents=events, displayTimeUnit="ms")
+
+    def write_chrome_trace(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def report(self) -> None:
+        """
+        Prints the summary and writes the trace file, if configured. Called when the run ends.
+        """
+        print(self.summary())
+        if self.config.trace_path is not None:
+            self.write_chrome_trace(self.config.trace_path)
+            print(f"Wrote the Chrome trace of '{self.name}' to {self.config.trace_path}")
+
+
+# The profiler, track and lane that the phases of the current test case or evaluator are recorded in
+profile_scope_var: ContextVar[Optional[Tuple[RunProfiler, str, str]]] = ContextVar(
+    "autoblocks_sdk_profile_scope_var",
+    default=None,
+)
+
+
+@contextlib.contextmanager
+def profile_scope(profiler: Optional[RunProfiler], track: str) -> Iterator[None]:
+    """
+    Records the phases profiled within this block in the given track. Does nothing without a profiler.
+    """
+    if profiler is None:
+        yield
+        return
+    reset_token = profile_scope_var.set((profiler, track, TEST_CASE_LANE))
+    try:
+        yield
+    finally:
+        profile_scope_var.reset(reset_token)
+
+
+@contextlib.contextmanager
+def profile_lane(lane: str) -> Iterator[None]:
+    """
+    Records the phases profiled within this block in their own lane of the current track, e.g. for an evaluator.
+    """
+    scope = profile_scope_var.get()
+    if scope is None:
+        yield
+        return
+    profiler, track, _ = scope
+    reset_token = profile_scope_var.set((profiler, track, lane))
+    try:
+        yield
+    finally:
+        profile_scope_var.reset(reset_token)
+
+
+@contextlib.contextmanager
+def profile(phase: str) -> Iterator[None]:
+    scope = profile_scope_var.get()
+    if scope is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler, track, lane = scope
+        profiler.record(phase, track, lane, start, time.perf_counter())
+
+
+@contextlib.asynccontextmanager
+async def profiled_acquire(semaphore: asyncio.Semaphore, phase: str) -> AsyncIterator[None]:
+    """
+    Holds the semaphore for the duration of the block, recording the time spent waiting for it as the given phase.
+    """
+    with profile(phase):
+        await semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
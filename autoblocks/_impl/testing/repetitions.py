@@ -0,0 +1,141 @@
+import collections
+import dataclasses
+import logging
+import math
+import statistics
+from typing import Any
+from typing import Callable
+from typing import Coroutine
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+
+from autoblocks._impl.testing.models import AdaptiveRepetitionConfig
+from autoblocks._impl.testing.models import TestCaseContext
+from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.testing.util import GridSearchParamsCombo
+from autoblocks._impl.testing.util import config_from_test_case
+from autoblocks._impl.util import all_settled
+
+log = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class RepetitionCount:
+    test_case_hash: str
+    grid_search_params_combo: Optional[GridSearchParamsCombo]
+    repetitions: int
+    max_repetitions: int
+    # Each evaluator's mean score and the half-width of its confidence interval after the last repetition
+    mean_scores: Dict[str, float]
+    half_widths: Dict[str, float]
+
+
+def adaptive_repetitions(test_case: TestCaseType) -> Optional[Tuple[AdaptiveRepetitionConfig, int]]:
+    """
+    Returns the test case's adaptive repetition config and its maximum number of repetitions,
+    or None if its repetitions aren't adaptive.
+    """
+    config = config_from_test_case(test_case)
+    if config is None or config.adaptive_repetitions is None or config.repeat_num_times is None:
+        return None
+    return config.adaptive_repetitions, config.repeat_num_times
+
+
+def _t_quantile(p: float, df: int) -> float:
+    # Cornish-Fisher expansion of Student's t around the normal quantile (Abramowitz & Stegun 26.7.5).
+    # Within 1% of the exact quantile from 2 degrees of freedom on, which is plenty for a stopping rule.
+    # Below that it's too narrow, so intervals need at least 3 scores.
+    z = statistics.NormalDist().inv_cdf(p)
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df**2 + g3 / df**3 + g4 / df**4
+
+
+def confidence_half_width(scores: List[float], confidence: float) -> float:
+    """
+    Half-width of the t confidence interval of the mean of the scores.
+    """
+    if len(scores) < 3:
+        return math.inf
+    return _t_quantile((1 + confidence) / 2, len(scores) - 1) * statistics.stdev(scores) / math.sqrt(len(scores))
+
+
+async def run_adaptive_repetitions(
+    test_case_ctx: TestCaseContext[TestCaseType],
+    grid_search_params_combo: Optional[GridSearchParamsCombo],
+    config: AdaptiveRepetitionConfig,
+    max_repetitions: int,
+    # Runs one repetition and returns its evaluators' scores by evaluator id
+    run_repetition: Callable[[TestCaseContext[TestCaseType]], Coroutine[Any, Any, Mapping[str, float]]],
+) -> RepetitionCount:
+    """
+    Runs the test case's repetitions a batch at a time until every evaluator that scored it has a narrow enough
+    confidence interval, or max_repetitions ran. Without any scores, e.g. without evaluators, all of them run.
+    """
+    scores: Dict[str, List[float]] = collections.defaultdict(list)
+    half_widths: Dict[str, float] = {}
+    num_repetitions = 0
+    batch_size = min(config.min_repetitions, max_repetitions)
+    while batch_size > 0:
+        results = await all_settled(
+            [
+                run_repetition(TestCaseContext(test_case=test_case_ctx.test_case, repetition_idx=idx))
+                for idx in range(num_repetitions, num_repetitions + batch_size)
+            ],
+        )
+        num_repetitions += batch_size
+        for result in results:
+            if isinstance(result, BaseException):
+                log.error(f"Error running a repetition of test case '{test_case_ctx.hash()}'", exc_info=result)
+                continue
+            for evaluator_id, score in result.items():
+                scores[evaluator_id].append(score)
+
+        half_widths = {
+            evaluator_id: confidence_half_width(evaluator_scores, config.confidence)
+            for evaluator_id, evaluator_scores in scores.items()
+        }
+        if half_widths and all(half_width <= config.max_half_width for half_width in half_widths.values()):
+            break
+        batch_size = min(config.batch_size, max_repetitions - num_repetitions)
+
+    log.info(f"Ran {num_repetitions} of at most {max_repetitions} repetitions of test case '{test_case_ctx.hash()}'")
+    return RepetitionCount(
+        test_case_hash=test_case_ctx.hash(),
+        grid_search_params_combo=grid_search_params_combo,
+        repetitions=num_repetitions,
+        max_repetitions=max_repetitions,
+        mean_scores={evaluator_id: statistics.fmean(s) for evaluator_id, s in scores.items()},
+        half_widths=half_widths,
+    )
+
+
+class RepetitionStats:
+    """
+    Collects how many repetitions each adaptively repeated test case of a test suite run ran.
+    """
+
+    def __init__(self) -> None:
+        self._counts: List[RepetitionCount] = []
+
+    @property
+    def counts(self) -> List[RepetitionCount]:
+        return list(self._counts)
+
+    def record(self, count: RepetitionCount) -> None:
+        self._counts.append(count)
+
+    def report(self, test_id: str) -> None:
+        if not self._counts:
+            return
+        repetitions = sum(count.repetitions for count in self._counts)
+        max_repetitions = sum(count.max_repetitions for count in self._counts)
+        log.info(
+            f"Ran {repetitions} of at most {max_repetitions} repetitions of the {len(self._counts)} adaptively "
+            f"repeated test cases of test suite '{test_id}'"
+        )
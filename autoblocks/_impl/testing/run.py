@@ -1,16 +1,19 @@
 import asyncio
-import contextvars
 import functools
 import inspect
 import json
 import logging
 import time
+from concurrent.futures import Executor
 from typing import Any
 from typing import Awaitable
 from typing import Callable
+from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
+from typing import Type
 from typing import Union
 from typing import overload
 
@@ -18,7 +21,6 @@ import httpx
 from tenacity import retry
 from tenacity import retry_if_exception_type
 from tenacity import stop_after_attempt
-from tenacity import wait_random_exponential
 
 from autoblocks._impl import global_state
 from autoblocks._impl.context_vars import EvaluatorRunContext
@@ -36,15 +38,65 @@ from autoblocks._impl.testing.api import send_slack_notification
 from autoblocks._impl.testing.api import send_start_grid_search_run
 from autoblocks._impl.testing.api import send_start_test_run
 from autoblocks._impl.testing.api import send_test_case_result
+from autoblocks._impl.testing.batching import CliResultBatcher
+from autoblocks._impl.testing.batching import ResultBatchConfig
+from autoblocks._impl.testing.batching import ResultBatcher
+from autoblocks._impl.testing.batching import TestRunBatcher
+from autoblocks._impl.testing.cache import CachedOutput
+from autoblocks._impl.testing.cache import EvaluationCache
+from autoblocks._impl.testing.cache import OutputCache
+from autoblocks._impl.testing.cache import OutputCacheConfig
+from autoblocks._impl.testing.cache import OutputCacheStats
+from autoblocks._impl.testing.cache import evaluate_with_cache
+from autoblocks._impl.testing.durations import DurationStats
+from autoblocks._impl.testing.durations import DurationStatsConfig
+from autoblocks._impl.testing.executor import ExecutionMode
+from autoblocks._impl.testing.executor import ExecutorStats
+from autoblocks._impl.testing.executor import TestSuiteExecutor
+from autoblocks._impl.testing.executor import create_test_suite_executor
+from autoblocks._impl.testing.executor import validate_process_mode_inputs
+from autoblocks._impl.testing.grid_search import GridSearchStats
+from autoblocks._impl.testing.grid_search import SuccessiveHalving
+from autoblocks._impl.testing.grid_search import SuccessiveHalvingConfig
+from autoblocks._impl.testing.grid_search import validate_successive_halving_inputs
 from autoblocks._impl.testing.models import BaseTestCase
 from autoblocks._impl.testing.models import BaseTestEvaluator
 from autoblocks._impl.testing.models import CreateHumanReviewJob
+from autoblocks._impl.testing.models import Evaluation
 from autoblocks._impl.testing.models import TestCaseContext
 from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.testing.options import RunOptions
+from autoblocks._impl.testing.profiler import PhaseStats
+from autoblocks._impl.testing.profiler import ProfilerConfig
+from autoblocks._impl.testing.profiler import RunProfiler
+from autoblocks._impl.testing.profiler import profile
+from autoblocks._impl.testing.profiler import profile_lane
+from autoblocks._impl.testing.profiler import profile_scope
+from autoblocks._impl.testing.profiler import profiled_acquire
+from autoblocks._impl.testing.profiler import track_name
+from autoblocks._impl.testing.repetitions import RepetitionCount
+from autoblocks._impl.testing.repetitions import RepetitionStats
+from autoblocks._impl.testing.repetitions import adaptive_repetitions
+from autoblocks._impl.testing.repetitions import run_adaptive_repetitions
+from autoblocks._impl.testing.scheduler import TestCaseSource
+from autoblocks._impl.testing.scheduler import aiter_test_case_contexts
+from autoblocks._impl.testing.scheduler import filter_test_cases
+from autoblocks._impl.testing.scheduler import is_streamed
+from autoblocks._impl.testing.scheduler import materialize_test_cases
+from autoblocks._impl.testing.scheduler import max_in_flight_test_cases
+from autoblocks._impl.testing.scheduler import run_with_bounded_concurrency
+from autoblocks._impl.testing.scheduler import validate_streamed_test_cases
+from autoblocks._impl.testing.sharding import ShardConfig
+from autoblocks._impl.testing.sharding import filter_shard
+from autoblocks._impl.testing.sharding import shard_config_from_env
+from autoblocks._impl.testing.timeouts import Deadline
+from autoblocks._impl.testing.timeouts import TimeoutConfig
+from autoblocks._impl.testing.timeouts import TimeoutExceededError
+from autoblocks._impl.testing.timeouts import evaluator_timeout
+from autoblocks._impl.testing.timeouts import wait_unless_timed_out
 from autoblocks._impl.testing.util import GridSearchParams
 from autoblocks._impl.testing.util import GridSearchParamsCombo
 from autoblocks._impl.testing.util import yield_grid_search_param_combos
-from autoblocks._impl.testing.util import yield_test_case_contexts_from_test_cases
 from autoblocks._impl.util import AutoblocksEnvVar
 from autoblocks._impl.util import all_settled
 from autoblocks._impl.util import is_cli_running
@@ -54,11 +106,23 @@ log = logging.getLogger(__name__)
 
 test_case_semaphore_registry: dict[str, asyncio.Semaphore] = {}  # test_id -> semaphore
 evaluator_semaphore_registry: dict[str, dict[str, asyncio.Semaphore]] = {}  # test_id -> evaluator_id -> semaphore
+executor_registry: dict[str, TestSuiteExecutor] = {}  # test_id -> executor for sync callables
+result_batcher_registry: dict[str, TestRunBatcher] = {}  # run_id -> batcher for results and evaluations
+output_cache_registry: dict[str, OutputCache] = {}  # test_id -> cache of outputs
+evaluation_cache_registry: dict[str, EvaluationCache] = {}  # test_id -> cache of evaluations
+grid_search_stats_registry: dict[str, GridSearchStats] = {}  # test_id -> stats of the last pruned grid search
+timeout_registry: dict[str, TimeoutConfig] = {}  # test_id -> timeouts
+duration_stats_registry: dict[str, DurationStats] = {}  # test_id -> historical and measured fn durations
+profiler_registry: dict[str, RunProfiler] = {}  # test_id -> profiler of the current or last run
+repetition_stats_registry: dict[str, RepetitionStats] = {}  # test_id -> repetitions of adaptively repeated test cases
 
 DEFAULT_MAX_TEST_CASE_CONCURRENCY = 10
 
 
-def create_retry_decorator(retry_count: int) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+def create_retry_decorator(
+    retry_count: int,
+    retry_on_timeout: bool = False,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """Create retry decorator following existing tenacity pattern."""
     if retry_count <= 0:
         # No retry - return identity decorator
@@ -67,19 +131,21 @@ def create_retry_decorator(retry_count: int) -> Callable[[Callable[..., Any]], C
 
         return no_retry_decorator
 
+    retryable: Tuple[Type[BaseException], ...] = (
+        httpx.TimeoutException,
+        httpx.ConnectError,
+        httpx.ReadTimeout,
+        httpx.WriteTimeout,
+        httpx.PoolTimeout,
+    )
+    if retry_on_timeout:
+        retryable += (TimeoutExceededError,)
+
     # Use same pattern as existing code in api.py
     return retry(
         stop=stop_after_attempt(retry_count + 1),  # +1 because first attempt isn't a retry
-        wait=wait_random_exponential(multiplier=1, max=30),
-        retry=retry_if_exception_type(
-            (
-                httpx.TimeoutException,
-                httpx.ConnectError,
-                httpx.ReadTimeout,
-                httpx.WriteTimeout,
-                httpx.PoolTimeout,
-            )
-        ),
+        wait=wait_unless_timed_out(multiplier=1, max=30),
+        retry=retry_if_exception_type(retryable),
         reraise=True,
     )
 
@@ -107,6 +173,50 @@ def filters_test_suites_list() -> list[str]:
     return json.loads(raw)  # type: ignore
 
 
+def get_executor_stats(test_id: str) -> Optional[ExecutorStats]:
+    """
+    Returns the queue depth and utilization of the executor that runs a test suite's sync callables,
+    or None if the test suite hasn't started.
+    """
+    executor = executor_registry.get(test_id)
+    return executor.stats if executor else None
+
+
+def get_output_cache_stats(test_id: str) -> Optional[OutputCacheStats]:
+    """
+    Returns the output cache hits and misses of a test suite's most recent run,
+    or None if it wasn't run with an output cache.
+    """
+    cache = output_cache_registry.get(test_id)
+    return cache.stats if cache else None
+
+
+def get_grid_search_stats(test_id: str) -> Optional[GridSearchStats]:
+    """
+    Returns how many combos were pruned and fn calls were saved by a test suite's most recent grid search,
+    or None if it didn't use successive halving.
+    """
+    return grid_search_stats_registry.get(test_id)
+
+
+def get_phase_stats(test_id: str) -> Optional[List[PhaseStats]]:
+    """
+    Returns the p50, p95 and max duration of each phase of a test suite's most recent run,
+    or None if it wasn't profiled.
+    """
+    profiler = profiler_registry.get(test_id)
+    return profiler.phase_stats() if profiler else None
+
+
+def get_repetition_counts(test_id: str) -> Optional[List[RepetitionCount]]:
+    """
+    Returns how many repetitions each adaptively repeated test case of a test suite's most recent run ran,
+    or None if none of its test cases were repeated adaptively.
+    """
+    repetition_stats = repetition_stats_registry.get(test_id)
+    return repetition_stats.counts if repetition_stats and repetition_stats.counts else None
+
+
 async def run_evaluator_unsafe(
     test_id: str,
     run_id: str,
@@ -115,43 +225,87 @@ async def run_evaluator_unsafe(
     hook_results: Any,
     evaluator: BaseTestEvaluator,
     test_case_result_id: str,
-) -> None:
+    cached_evaluation: Optional[Evaluation] = None,
+) -> Optional[Evaluation]:
     """
     This is suffixed with _unsafe because it doesn't handle exceptions.
     Its caller will catch and handle all exceptions.
     """
-    async with evaluator_semaphore_registry[test_id][evaluator.id]:
+    if cached_evaluation is not None:
+        evaluation: Optional[Evaluation] = cached_evaluation
+    else:
+        evaluation = await evaluate_with_cache(
+            cache=evaluation_cache_registry.get(test_id),
+            evaluator=evaluator,
+            test_case_ctx=test_case_ctx,
+            output=output,
+            hook_results=hook_results,
+            evaluate=lambda: evaluate_test_case(
+                test_id=test_id,
+                test_case_ctx=test_case_ctx,
+                output=output,
+                hook_results=hook_results,
+                evaluator=evaluator,
+            ),
+        )
+
+    if evaluation is None:
+        return None
+
+    with profile("upload_evaluation"):
+        batcher = result_batcher_registry.get(run_id)
+        if batcher is not None:
+            await batcher.send_evaluation(
+                test_case_hash=test_case_ctx.hash(),
+                test_case_result_id=test_case_result_id,
+                evaluator_external_id=evaluator.id,
+                evaluation=evaluation,
+            )
+            return evaluation
+
+        await send_eval(
+            test_external_id=test_id,
+            run_id=run_id,
+            test_case_hash=test_case_ctx.hash(),
+            evaluator_external_id=evaluator.id,
+            evaluation=evaluation,
+            test_case_result_id=test_case_result_id,
+        )
+    return evaluation
+
+
+async def evaluate_test_case(
+    test_id: str,
+    test_case_ctx: TestCaseContext[TestCaseType],
+    output: Any,
+    hook_results: Any,
+    evaluator: BaseTestEvaluator,
+) -> Optional[Evaluation]:
+    async with profiled_acquire(evaluator_semaphore_registry[test_id][evaluator.id], f"evaluator_wait:{evaluator.id}"):
+        deadline = Deadline(
+            evaluator_timeout(timeout_registry.get(test_id), evaluator),
+            f"Evaluator '{evaluator.id}' on test case '{test_case_ctx.hash()}'",
+        )
         if hook_results is not None:
             kwargs = dict(hook_results=hook_results)
         else:
             kwargs = dict()
 
-        if inspect.iscoroutinefunction(evaluator.evaluate_test_case):
-            evaluation = await evaluator.evaluate_test_case(test_case_ctx.test_case, output, **kwargs)
-        else:
-            ctx = contextvars.copy_context()
-            evaluation = await global_state.event_loop().run_in_executor(
-                None,
-                ctx.run,
-                functools.partial(
-                    evaluator.evaluate_test_case,
-                    test_case_ctx.test_case,
-                    output,
-                    **kwargs,
-                ),
-            )
-
-    if evaluation is None:
-        return
-
-    await send_eval(
-        test_external_id=test_id,
-        run_id=run_id,
-        test_case_hash=test_case_ctx.hash(),
-        evaluator_external_id=evaluator.id,
-        evaluation=evaluation,
-        test_case_result_id=test_case_result_id,
-    )
+        with profile(f"evaluator:{evaluator.id}"):
+            if inspect.iscoroutinefunction(evaluator.evaluate_test_case):
+                evaluation = await deadline.run(evaluator.evaluate_test_case(test_case_ctx.test_case, output, **kwargs))
+            else:
+                suite_executor = executor_registry[test_id]
+                run_sync = suite_executor.run_in_process if evaluator.process_safe else suite_executor.run
+                evaluation = await deadline.run(
+                    run_sync(
+                        evaluator.evaluate_test_case,
+                        test_case_ctx.test_case,
+                        output,
+                        **kwargs,
+                    )
+                )
+    return evaluation  # type: ignore[no-any-return]
 
 
 async def run_evaluator(
@@ -162,20 +316,23 @@ async def run_evaluator(
     hook_results: Any,
     evaluator: BaseTestEvaluator,
     test_case_result_id: str,
-) -> None:
+    cached_evaluation: Optional[Evaluation] = None,
+) -> Optional[Evaluation]:
     reset_token = evaluator_run_context_var.set(
         EvaluatorRunContext(),
     )
     try:
-        await run_evaluator_unsafe(
-            test_id=test_id,
-            run_id=run_id,
-            test_case_ctx=test_case_ctx,
-            output=output,
-            hook_results=hook_results,
-            evaluator=evaluator,
-            test_case_result_id=test_case_result_id,
-        )
+        with profile_lane(evaluator.id):
+            return await run_evaluator_unsafe(
+                test_id=test_id,
+                run_id=run_id,
+                test_case_ctx=test_case_ctx,
+                output=output,
+                hook_results=hook_results,
+                evaluator=evaluator,
+                test_case_result_id=test_case_result_id,
+                cached_evaluation=cached_evaluation,
+            )
     except Exception as err:
         await send_error(
             test_id=test_id,
@@ -184,6 +341,7 @@ async def run_evaluator(
             evaluator_id=evaluator.id,
             error=err,
         )
+        return None
     finally:
         evaluator_run_context_var.reset(reset_token)
 
@@ -194,60 +352,87 @@ async def run_test_case_unsafe(
     test_case_ctx: TestCaseContext[TestCaseType],
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
-) -> Tuple[Any, Any, str]:
+    cached: Optional[CachedOutput] = None,
+) -> Tuple[Any, Any, str, float]:
     """
     This is suffixed with _unsafe because it doesn't handle exceptions.
     Its caller will catch and handle all exceptions.
     """
-    async with test_case_semaphore_registry[test_id]:
+    async with profiled_acquire(test_case_semaphore_registry[test_id], "test_case_wait"):
         # NOTE: This should be _inside_ the `async with` block to ensure we don't start the
         # timer until the semaphore is acquired.
         start_time = time.perf_counter()
+        timeouts = timeout_registry.get(test_id)
+        deadline = Deadline(timeouts.test_case_seconds if timeouts else None, f"Test case '{test_case_ctx.hash()}'")
 
-        if inspect.iscoroutinefunction(fn):
-            output = await fn(test_case_ctx.test_case)
+        if cached is not None:
+            output = cached.output
         else:
-            ctx = contextvars.copy_context()
-            output = await global_state.event_loop().run_in_executor(
-                None,
-                ctx.run,
-                fn,
-                test_case_ctx.test_case,
-            )
+            with profile("fn"):
+                if inspect.iscoroutinefunction(fn):
+                    output = await deadline.run(fn(test_case_ctx.test_case))
+                else:
+                    output = await deadline.run(executor_registry[test_id].run_in_process(fn, test_case_ctx.test_case))
 
         # Calculate duration before running hooks so that the duration only
-        # includes time spent in fn()
-        test_case_duration_ms = (time.perf_counter() - start_time) * 1_000
+        # includes time spent in fn(). Replayed outputs report the duration of the original call.
+        test_case_duration_ms = (
+            cached.test_case_duration_ms if cached is not None else (time.perf_counter() - start_time) * 1_000
+        )
 
         # Run the before-evaluators hook if provided.
         # Note we run this within the test case semaphore so that
         # max_test_case_concurrency applies to both fn + before_evaluators_hook.
         hook_results = None
         if before_evaluators_hook:
-            if inspect.iscoroutinefunction(before_evaluators_hook):
-                hook_results = await before_evaluators_hook(
-                    test_case_ctx.test_case,
-                    output,
-                )
-            else:
-                ctx = contextvars.copy_context()
-                hook_results = await global_state.event_loop().run_in_executor(
-                    None,
-                    ctx.run,
-                    before_evaluators_hook,
-                    test_case_ctx.test_case,
-                    output,
-                )
+            with profile("before_evaluators_hook"):
+                if inspect.iscoroutinefunction(before_evaluators_hook):
+                    hook_results = await deadline.run(
+                        before_evaluators_hook(
+                            test_case_ctx.test_case,
+                            output,
+                        )
+                    )
+                else:
+                    hook_results = await deadline.run(
+                        executor_registry[test_id].run(
+                            before_evaluators_hook,
+                            test_case_ctx.test_case,
+                            output,
+                        )
+                    )
 
-    test_case_result_id = await send_test_case_result(
-        test_external_id=test_id,
-        run_id=run_id,
-        test_case_ctx=test_case_ctx,
-        output=output,
-        test_case_duration_ms=test_case_duration_ms,
-    )
+    with profile("upload_result"):
+        batcher = result_batcher_registry.get(run_id)
+        if batcher is not None:
+            test_case_result_id = await batcher.send_result(
+                test_case_ctx=test_case_ctx,
+                output=output,
+                test_case_duration_ms=test_case_duration_ms,
+            )
+            return output, hook_results, test_case_result_id, test_case_duration_ms
+
+        test_case_result_id = await send_test_case_result(
+            test_external_id=test_id,
+            run_id=run_id,
+            test_case_ctx=test_case_ctx,
+            output=output,
+            test_case_duration_ms=test_case_duration_ms,
+        )
 
-    return output, hook_results, test_case_result_id
+    return output, hook_results, test_case_result_id, test_case_duration_ms
+
+
+async def store_cached_output(
+    cache: OutputCache,
+    test_case_ctx: TestCaseContext[TestCaseType],
+    entry: CachedOutput,
+) -> None:
+    try:
+        await asyncio.to_thread(cache.put, test_case_ctx, grid_search_context_var.get(), entry)
+    except Exception as err:
+        # The cache is an optimization, so failing to write to it shouldn't fail the test case
+        log.warning(f"Failed to cache the output of test case '{test_case_ctx.hash()}'", exc_info=err)
 
 
 async def run_test_case(
@@ -258,31 +443,45 @@ async def run_test_case(
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
     retry_count: int = 0,
-) -> None:
-    reset_token = test_case_run_context_var.set(
-        TestCaseRunContext(
-            run_id=run_id,
-            test_id=test_id,
-            test_case_hash=test_case_ctx.hash(),
-        ),
+) -> Dict[str, Evaluation]:
+    """
+    Returns the evaluations of the test case's output by evaluator id.
+    """
+    run_ctx = TestCaseRunContext(
+        run_id=run_id,
+        test_id=test_id,
+        test_case_hash=test_case_ctx.hash(),
     )
+    reset_token = test_case_run_context_var.set(run_ctx)
 
     # Create retry decorator
-    retry_decorator = create_retry_decorator(retry_count)
+    timeouts = timeout_registry.get(test_id)
+    retry_decorator = create_retry_decorator(
+        retry_count, retry_on_timeout=timeouts is not None and timeouts.retry_on_timeout
+    )
+
+    cache = output_cache_registry.get(test_id)
+    cached: Optional[CachedOutput] = None
 
     # Wrap the unsafe function with retry logic
     @retry_decorator
-    async def _retry_wrapper() -> Tuple[Any, Any, str]:
+    async def _retry_wrapper() -> Tuple[Any, Any, str, float]:
         return await run_test_case_unsafe(
             test_id=test_id,
             run_id=run_id,
             test_case_ctx=test_case_ctx,
             fn=fn,
             before_evaluators_hook=before_evaluators_hook,
+            cached=cached,
         )
 
     try:
-        output, hook_results, test_case_result_id = await _retry_wrapper()
+        if cache is not None:
+            cached = await asyncio.to_thread(cache.get, test_case_ctx, grid_search_context_var.get())
+            if cached is not None:
+                # Replay the revisions fn used so that the result is attributed to them
+                run_ctx.revision_usage.extend(cached.revision_usage)
+        output, hook_results, test_case_result_id, test_case_duration_ms = await _retry_wrapper()
     except Exception as err:
         await send_error(
             test_id=test_id,
@@ -291,10 +490,18 @@ async def run_test_case(
             evaluator_id=None,
             error=err,
         )
-        return
+        return {}
+
+    duration_stats = duration_stats_registry.get(test_id)
+    if duration_stats is not None and cached is None:
+        duration_stats.record(test_case_ctx.test_case.hash(), test_case_duration_ms)
 
+    replay_evaluations = cache is not None and cache.config.replay_evaluations
+    cached_evaluations = cached.evaluations if cached is not None and replay_evaluations else {}
+
+    evaluations_by_id: Dict[str, Evaluation] = {}
     try:
-        await all_settled(
+        evaluations = await all_settled(
             [
                 run_evaluator(
                     test_id=test_id,
@@ -304,10 +511,36 @@ async def run_test_case(
                     hook_results=hook_results,
                     evaluator=evaluator,
                     test_case_result_id=test_case_result_id,
+                    cached_evaluation=cached_evaluations.get(evaluator.id),
                 )
                 for evaluator in evaluators
             ],
         )
+        evaluations_by_id = {
+            evaluator.id: evaluation
+            for evaluator, evaluation in zip(evaluators, evaluations)
+            if isinstance(evaluation, Evaluation)
+        }
+        if cache is not None:
+            new_evaluations = {
+                evaluator_id: evaluation
+                for evaluator_id, evaluation in evaluations_by_id.items()
+                if evaluator_id not in cached_evaluations
+            }
+            if cached is None or (replay_evaluations and new_evaluations):
+                await store_cached_output(
+                    cache=cache,
+                    test_case_ctx=test_case_ctx,
+                    entry=CachedOutput(
+                        output=output,
+                        test_case_duration_ms=test_case_duration_ms,
+                        revision_usage=list(run_ctx.revision_usage),
+                        evaluations={**cached_evaluations, **new_evaluations} if replay_evaluations else {},
+                    ),
+                )
+        batcher = result_batcher_registry.get(run_id)
+        if batcher is not None:
+            await batcher.complete(test_case_ctx.hash())
     except Exception as err:
         await send_error(
             test_id=test_id,
@@ -319,26 +552,30 @@ async def run_test_case(
     finally:
         test_case_run_context_var.reset(reset_token)
 
+    return evaluations_by_id
+
 
 def validate_test_suite_inputs(
     test_id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     evaluators: Sequence[BaseTestEvaluator],
     grid_search_params: Optional[GridSearchParams],
 ) -> None:
-    assert test_cases, f"[{test_id}] No test cases provided."
-    test_case_hashes = set()
-    for test_case in test_cases:
-        assert isinstance(
-            test_case,
-            BaseTestCase,
-        ), f"[{test_id}] Test case {test_case} does not implement {BaseTestCase.__name__}."
-        test_case_hash = test_case.hash()
-        assert test_case_hash not in test_case_hashes, (
-            f"[{test_id}] Duplicate test case hash: '{test_case_hash}'. "
-            "See https://docs.autoblocks.ai/testing/sdk-reference#test-case-hashing"
-        )
-        test_case_hashes.add(test_case_hash)
+    # Streamed test cases are validated as they are pulled, see validate_streamed_test_cases
+    if isinstance(test_cases, Sequence):
+        assert test_cases, f"[{test_id}] No test cases provided."
+        test_case_hashes = set()
+        for test_case in test_cases:
+            assert isinstance(
+                test_case,
+                BaseTestCase,
+            ), f"[{test_id}] Test case {test_case} does not implement {BaseTestCase.__name__}."
+            test_case_hash = test_case.hash()
+            assert test_case_hash not in test_case_hashes, (
+                f"[{test_id}] Duplicate test case hash: '{test_case_hash}'. "
+                "See https://docs.autoblocks.ai/testing/sdk-reference#test-case-hashing"
+            )
+            test_case_hashes.add(test_case_hash)
 
     evaluator_ids = set()
     for evaluator in evaluators:
@@ -398,14 +635,18 @@ def filter_test_cases_for_alignment_mode(
 
 async def run_test_suite_for_grid_combo(
     test_id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     evaluators: Sequence[BaseTestEvaluator],
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
     grid_search_run_group_id: Optional[str],
     grid_search_params_combo: Optional[GridSearchParamsCombo],
     human_review_job: Optional[CreateHumanReviewJob],
+    max_in_flight: int,
     retry_count: int = 0,
+    result_batch: Optional[ResultBatchConfig] = None,
+    on_test_case_done: Optional[Callable[[List[Dict[str, Evaluation]]], None]] = None,
+    shard: Optional[ShardConfig] = None,
 ) -> None:
     try:
         # Determine message with priority: unified overrides > legacy env var
@@ -433,22 +674,58 @@ async def run_test_suite_for_grid_combo(
             )
         return
 
+    if result_batch is not None:
+        result_batcher_registry[run_id] = (
+            CliResultBatcher(test_id=test_id, run_id=run_id, config=result_batch)
+            if is_cli_running()
+            else ResultBatcher(run_id=run_id, config=result_batch)
+        )
+
     reset_token = grid_search_context_var.set(grid_search_params_combo) if grid_search_params_combo else None
 
+    async def run_one(test_case_ctx: TestCaseContext[TestCaseType]) -> Dict[str, Evaluation]:
+        with profile_scope(profiler_registry.get(test_id), track_name(test_case_ctx, grid_search_params_combo)):
+            return await run_test_case(
+                test_id=test_id,
+                run_id=run_id,
+                test_case_ctx=test_case_ctx,
+                evaluators=evaluators,
+                fn=fn,
+                before_evaluators_hook=before_evaluators_hook,
+                retry_count=retry_count,
+            )
+
+    async def run_and_report(test_case_ctx: TestCaseContext[TestCaseType]) -> None:
+        adaptive = adaptive_repetitions(test_case_ctx.test_case)
+        if adaptive is None:
+            repetitions = [await run_one(test_case_ctx)]
+        else:
+            repetitions = []
+
+            async def run_repetition(repetition_ctx: TestCaseContext[TestCaseType]) -> Dict[str, float]:
+                evaluations = await run_one(repetition_ctx)
+                repetitions.append(evaluations)
+                return {evaluator_id: evaluation.score for evaluator_id, evaluation in evaluations.items()}
+
+            config, max_repetitions = adaptive
+            count = await run_adaptive_repetitions(
+                test_case_ctx=test_case_ctx,
+                grid_search_params_combo=grid_search_params_combo,
+                config=config,
+                max_repetitions=max_repetitions,
+                run_repetition=run_repetition,
+            )
+            repetition_stats_registry[test_id].record(count)
+        # The test case counts as done once, with the evaluations of each of its repetitions
+        if on_test_case_done is not None:
+            on_test_case_done(repetitions)
+
     try:
-        await all_settled(
-            [
-                run_test_case(
-                    test_id=test_id,
-                    run_id=run_id,
-                    test_case_ctx=test_case_ctx,
-                    evaluators=evaluators,
-                    fn=fn,
-                    before_evaluators_hook=before_evaluators_hook,
-                    retry_count=retry_count,
-                )
-                for test_case_ctx in yield_test_case_contexts_from_test_cases(test_cases)
-            ],
+        # Test cases are pulled lazily so that only max_in_flight coroutines exist at a time
+        await run_with_bounded_concurrency(
+            filter_shard(aiter_test_case_contexts(test_cases), shard),
+            lambda _, test_case_ctx: run_and_report(test_case_ctx),
+            max_in_flight=max_in_flight,
         )
     except Exception as err:
         await send_error(
@@ -462,6 +739,10 @@ async def run_test_suite_for_grid_combo(
         if reset_token:
             grid_search_context_var.reset(reset_token)
 
+    batcher = result_batcher_registry.pop(run_id, None)
+    if batcher is not None:
+        await batcher.flush()
+
     await send_end_test_run(
         test_external_id=test_id,
         run_id=run_id,
@@ -493,7 +774,7 @@ async def run_test_suite_for_grid_combo(
 
 async def async_run_test_suite(
     test_id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     evaluators: Sequence[BaseTestEvaluator],
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
@@ -502,6 +783,18 @@ async def async_run_test_suite(
     grid_search_params: Optional[GridSearchParams],
     human_review_job: Optional[CreateHumanReviewJob],
     retry_count: int = 0,
+    executor: Optional[Executor] = None,
+    max_executor_workers: Optional[int] = None,
+    execution_mode: ExecutionMode = ExecutionMode.THREAD,
+    max_process_workers: Optional[int] = None,
+    result_batch: Optional[ResultBatchConfig] = None,
+    output_cache: Optional[OutputCacheConfig] = None,
+    evaluation_cache: Optional[EvaluationCache] = None,
+    successive_halving: Optional[SuccessiveHalvingConfig] = None,
+    shard: Optional[ShardConfig] = None,
+    timeouts: Optional[TimeoutConfig] = None,
+    duration_stats: Optional[DurationStatsConfig] = None,
+    profiler: Optional[ProfilerConfig] = None,
 ) -> None:
     # Handle alignment mode
     align_test_id = AutoblocksEnvVar.ALIGN_TEST_EXTERNAL_ID.get()
@@ -510,6 +803,7 @@ async def async_run_test_suite(
             # Not the test suite in alignment mode
             return
 
+        test_cases = await materialize_test_cases(test_cases)
         await send_info_for_alignment_mode(
             test_id=test_id,
             test_cases=test_cases,
@@ -540,15 +834,31 @@ async def async_run_test_suite(
         # hashes to run. We filter the test cases to only run those.
         hashes_to_run = set(tests_and_hashes[test_id] or [])
         if hashes_to_run:
-            test_cases = [tc for tc in test_cases if tc.hash() in hashes_to_run]
+            test_cases = filter_test_cases(test_cases, lambda tc: tc.hash() in hashes_to_run)
 
     try:
+        if grid_search_params is not None:
+            # Every grid combo runs every test case, so streamed test cases can't be consumed only once
+            test_cases = await materialize_test_cases(test_cases)
         validate_test_suite_inputs(
             test_id=test_id,
             test_cases=test_cases,
             evaluators=evaluators,
             grid_search_params=grid_search_params,
         )
+        if execution_mode == ExecutionMode.PROCESS:
+            validate_process_mode_inputs(test_id=test_id, fn=fn, evaluators=evaluators)
+        if successive_halving is not None:
+            validate_successive_halving_inputs(
+                test_id=test_id,
+                config=successive_halving,
+                evaluators=evaluators,
+                grid_search_params=grid_search_params,
+            )
+            # Each shard would prune on its own share of the test cases
+            assert shard is None, f"[{test_id}] successive_halving can't be combined with sharding."
+        if is_streamed(test_cases):
+            test_cases = validate_streamed_test_cases(test_id=test_id, test_cases=test_cases)
     except Exception as err:
         await send_error(
             test_id=test_id,
@@ -564,83 +874,193 @@ async def async_run_test_suite(
     evaluator_semaphore_registry[test_id] = {
         evaluator.id: asyncio.Semaphore(evaluator.max_concurrency) for evaluator in evaluators
     }
+    executor_registry[test_id] = create_test_suite_executor(
+        test_id=test_id,
+        max_test_case_concurrency=max_test_case_concurrency,
+        evaluators=evaluators,
+        executor=executor,
+        max_workers=max_executor_workers,
+        execution_mode=execution_mode,
+        max_process_workers=max_process_workers,
+    )
+    if output_cache is not None:
+        try:
+            output_cache_registry[test_id] = await asyncio.to_thread(OutputCache, output_cache, test_id)
+        except Exception as err:
+            log.warning(f"Running test suite '{test_id}' without the output cache", exc_info=err)
+            output_cache_registry.pop(test_id, None)
+    else:
+        output_cache_registry.pop(test_id, None)
+    if evaluation_cache is not None:
+        evaluation_cache_registry[test_id] = evaluation_cache
+    else:
+        evaluation_cache_registry.pop(test_id, None)
+    grid_search_stats_registry.pop(test_id, None)
+    if timeouts is not None:
+        timeout_registry[test_id] = timeouts
+    else:
+        timeout_registry.pop(test_id, None)
+    duration_stats_registry.pop(test_id, None)
+    if duration_stats is not None:
+        try:
+            suite_duration_stats = await asyncio.to_thread(DurationStats, duration_stats, test_id)
+            duration_stats_registry[test_id] = suite_duration_stats
+            if not isinstance(test_cases, Sequence):
+                log.info(f"Running the streamed test cases of test suite '{test_id}' in the order they're pulled")
+            elif successive_halving is not None:
+                # Successive halving runs the test cases in the given order, so that users control the first rounds
+                log.info(f"Running the test cases of test suite '{test_id}' in the given order for successive halving")
+            else:
+                test_cases = suite_duration_stats.order(test_cases)
+                log.info(
+                    f"Running the test cases of test suite '{test_id}' slowest first, "
+                    f"with durations of {suite_duration_stats.num_known} from previous runs"
+                )
+        except Exception as err:
+            log.warning(f"Running test suite '{test_id}' without duration stats", exc_info=err)
+            duration_stats_registry.pop(test_id, None)
+    if shard is not None:
+        # Shards don't know about each other's runs, so each shard reports its share in its own run
+        log.info(f"Running shard {shard.index + 1} of {shard.total} of test suite '{test_id}' in its own run")
+    if profiler is not None:
+        profiler_registry[test_id] = RunProfiler(profiler, test_id)
+    else:
+        profiler_registry.pop(test_id, None)
+    repetition_stats_registry[test_id] = RepetitionStats()
+
+    try:
+        if grid_search_params is None:
+            try:
+                log.debug(f"No grid search params provided for test suite '{test_id}'")
+                await run_test_suite_for_grid_combo(
+                    test_id=test_id,
+                    test_cases=test_cases,
+                    evaluators=evaluators,
+                    fn=fn,
+                    before_evaluators_hook=before_evaluators_hook,
+                    grid_search_run_group_id=None,
+                    grid_search_params_combo=None,
+                    human_review_job=human_review_job,
+                    max_in_flight=max_in_flight_test_cases(max_test_case_concurrency),
+                    retry_count=retry_count,
+                    result_batch=result_batch,
+                    shard=shard,
+                )
+            except Exception as err:
+                await send_error(
+                    test_id=test_id,
+                    run_id=None,
+                    test_case_hash=None,
+                    evaluator_id=None,
+                    error=err,
+                )
+            return
 
-    if grid_search_params is None:
         try:
-            log.debug(f"No grid search params provided for test suite '{test_id}'")
-            await run_test_suite_for_grid_combo(
-                test_id=test_id,
-                test_cases=test_cases,
-                evaluators=evaluators,
-                fn=fn,
-                before_evaluators_hook=before_evaluators_hook,
-                grid_search_run_group_id=None,
-                grid_search_params_combo=None,
-                human_review_job=human_review_job,
-                retry_count=retry_count,
+            log.debug(f"Starting grid search run for test suite '{test_id}'")
+            grid_search_run_group_id = await send_start_grid_search_run(
+                grid_search_params=grid_search_params,
             )
         except Exception as err:
-            await send_error(
-                test_id=test_id,
-                run_id=None,
-                test_case_hash=None,
-                evaluator_id=None,
-                error=err,
-            )
-        return
+            # Don't allow the run to continue if /grid failed, since all subsequent
+            # requests will fail if the CLI was not able to create the grid.
+            # Also note we don't need to send_error here, since the CLI will
+            # have reported the HTTP error itself.
+            if not is_cli_running():
+                await send_error(
+                    test_id=test_id,
+                    run_id=None,
+                    test_case_hash=None,
+                    evaluator_id=None,
+                    error=err,
+                )
+            return
 
-    try:
-        log.debug(f"Starting grid search run for test suite '{test_id}'")
-        grid_search_run_group_id = await send_start_grid_search_run(
-            grid_search_params=grid_search_params,
-        )
-    except Exception as err:
-        # Don't allow the run to continue if /grid failed, since all subsequent
-        # requests will fail if the CLI was not able to create the grid.
-        # Also note we don't need to send_error here, since the CLI will
-        # have reported the HTTP error itself.
-        if not is_cli_running():
-            await send_error(
-                test_id=test_id,
-                run_id=None,
-                test_case_hash=None,
-                evaluator_id=None,
-                error=err,
+        grid_params_combos = list(yield_grid_search_param_combos(grid_search_params))
+        halving = (
+            SuccessiveHalving(
+                config=successive_halving,
+                test_cases=await materialize_test_cases(test_cases),
+                num_combos=len(grid_params_combos),
             )
-        return
+            if successive_halving is not None
+            else None
+        )
 
-    try:
-        await all_settled(
-            [
-                run_test_suite_for_grid_combo(
+        async def run_combo(combo_idx: int, grid_params_combo: GridSearchParamsCombo) -> None:
+            try:
+                await run_test_suite_for_grid_combo(
                     test_id=test_id,
-                    test_cases=test_cases,
+                    # With successive halving, each combo's test cases are released one round at a time
+                    test_cases=halving.test_cases(combo_idx) if halving is not None else test_cases,
                     evaluators=evaluators,
                     fn=fn,
                     before_evaluators_hook=before_evaluators_hook,
                     grid_search_run_group_id=grid_search_run_group_id,
                     grid_search_params_combo=grid_params_combo,
                     human_review_job=human_review_job,
+                    max_in_flight=max_in_flight_test_cases(max_test_case_concurrency),
                     retry_count=retry_count,
+                    result_batch=result_batch,
+                    on_test_case_done=functools.partial(halving.record, combo_idx) if halving is not None else None,
+                    shard=shard,
                 )
-                for grid_params_combo in yield_grid_search_param_combos(grid_search_params)
-            ],
-        )
-    except Exception as err:
-        await send_error(
-            test_id=test_id,
-            run_id=None,
-            test_case_hash=None,
-            evaluator_id=None,
-            error=err,
-        )
+            finally:
+                if halving is not None:
+                    halving.finish(combo_idx)
+
+        try:
+            await all_settled(
+                [
+                    run_combo(combo_idx, grid_params_combo)
+                    for combo_idx, grid_params_combo in enumerate(grid_params_combos)
+                ],
+            )
+        except Exception as err:
+            await send_error(
+                test_id=test_id,
+                run_id=None,
+                test_case_hash=None,
+                evaluator_id=None,
+                error=err,
+            )
+
+        if halving is not None:
+            grid_search_stats = halving.stats
+            grid_search_stats_registry[test_id] = grid_search_stats
+            log.info(
+                f"Grid search for test suite '{test_id}' pruned {grid_search_stats.pruned_combos} of "
+                f"{grid_search_stats.combos} combos and saved {grid_search_stats.fn_calls_saved} fn calls"
+            )
+    finally:
+        log.debug(f"Executor stats for test suite '{test_id}': {executor_registry[test_id].stats}")
+        executor_registry[test_id].shutdown()
+        finished_duration_stats = duration_stats_registry.get(test_id)
+        if finished_duration_stats is not None:
+            try:
+                await asyncio.to_thread(finished_duration_stats.save)
+            except Exception as err:
+                log.warning(f"Failed to save the duration stats of test suite '{test_id}'", exc_info=err)
+        finished_profiler = profiler_registry.get(test_id)
+        if finished_profiler is not None:
+            try:
+                await asyncio.to_thread(finished_profiler.report)
+            except Exception as err:
+                log.warning(f"Failed to report the profile of test suite '{test_id}'", exc_info=err)
+        repetition_stats_registry[test_id].report(test_id)
+        cache_stats = get_output_cache_stats(test_id)
+        if cache_stats is not None:
+            log.info(
+                f"Output cache for test suite '{test_id}': {cache_stats.hits} hits, {cache_stats.misses} misses, "
+                f"{cache_stats.evictions} evictions"
+            )
 
 
 # Sync fn
 @overload
 def run_test_suite(
     id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     fn: Callable[[TestCaseType], Any],
     evaluators: Optional[Sequence[BaseTestEvaluator]] = None,
     max_test_case_concurrency: int = DEFAULT_MAX_TEST_CASE_CONCURRENCY,
@@ -648,6 +1068,7 @@ def run_test_suite(
     grid_search_params: Optional[GridSearchParams] = None,
     human_review_job: Optional[CreateHumanReviewJob] = None,
     retry_count: int = 0,
+    options: Optional[RunOptions] = None,
 ) -> None: ...
 
 
@@ -655,7 +1076,7 @@ def run_test_suite(
 @overload
 def run_test_suite(
     id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     fn: Callable[[TestCaseType], Awaitable[Any]],
     evaluators: Optional[Sequence[BaseTestEvaluator]] = None,
     max_test_case_concurrency: int = DEFAULT_MAX_TEST_CASE_CONCURRENCY,
@@ -663,12 +1084,13 @@ def run_test_suite(
     grid_search_params: Optional[GridSearchParams] = None,
     human_review_job: Optional[CreateHumanReviewJob] = None,
     retry_count: int = 0,
+    options: Optional[RunOptions] = None,
 ) -> None: ...
 
 
 def run_test_suite(
     id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     evaluators: Optional[Sequence[BaseTestEvaluator]] = None,
     # How many test cases to run concurrently
@@ -677,10 +1099,13 @@ def run_test_suite(
     grid_search_params: Optional[GridSearchParams] = None,
     human_review_job: Optional[CreateHumanReviewJob] = None,
     retry_count: int = 0,
+    # Opt-in features, see RunOptions
+    options: Optional[RunOptions] = None,
 ) -> None:
     if not is_cli_running():
         log.info(f"Running test suite '{id}'")
     global_state.init()
+    options = options or RunOptions()
 
     # Get the caller's filepath. Used in alignment mode to know where the test suite is located.
     try:
@@ -700,6 +1125,18 @@ def run_test_suite(
             grid_search_params=grid_search_params,
             human_review_job=human_review_job,
             retry_count=retry_count,
+            executor=options.executor,
+            max_executor_workers=options.max_executor_workers,
+            execution_mode=options.execution_mode,
+            max_process_workers=options.max_process_workers,
+            result_batch=options.result_batch,
+            output_cache=options.output_cache,
+            evaluation_cache=options.evaluation_cache,
+            successive_halving=options.successive_halving,
+            shard=options.shard or shard_config_from_env(),
+            timeouts=options.timeouts,
+            duration_stats=options.duration_stats,
+            profiler=options.profiler,
         ),
         global_state.event_loop(),
     ).result()
@@ -15,6 +15,11 @@ from autoblocks._impl.testing.models import EvaluationWithId
 from autoblocks._impl.testing.models import OutputType
 from autoblocks._impl.testing.models import TestCaseContext
 from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.testing.profiler import PhaseStats
+from autoblocks._impl.testing.profiler import ProfilerConfig
+from autoblocks._impl.testing.profiler import RunProfiler
+from autoblocks._impl.testing.profiler import profile
+from autoblocks._impl.testing.profiler import profile_scope
 from autoblocks._impl.util import AutoblocksEnvVar
 from autoblocks._impl.util import all_settled
 from autoblocks._impl.util import parse_autoblocks_overrides
@@ -32,11 +37,14 @@ class RunManager(Generic[TestCaseType, OutputType]):
         self,
         test_id: str,
         message: Optional[str] = None,
+        # Times uploading each result and its evaluations and prints the p50, p95 and max when the run ends
+        profiler: Optional[ProfilerConfig] = None,
     ):
         self.test_external_id = test_id
         self.message = message
         self.run_id: Optional[str] = None
         self.ended = False
+        self.profiler = RunProfiler(profiler, test_id) if profiler is not None else None
 
     async def async_start(self) -> None:
         """
@@ -87,36 +95,54 @@ class RunManager(Generic[TestCaseType, OutputType]):
 
         test_case_ctx = TestCaseContext(test_case=test_case, repetition_idx=None)
 
-        test_case_result_id = await send_test_case_result(
-            test_external_id=self.test_external_id,
-            run_id=self.run_id,
-            test_case_ctx=test_case_ctx,
-            output=output,
-            test_case_duration_ms=test_case_duration_ms or 0,
-        )
+        with profile_scope(self.profiler, test_case_ctx.hash()):
+            await self._send_result(
+                test_case_ctx=test_case_ctx,
+                output=output,
+                test_case_duration_ms=test_case_duration_ms,
+                evaluations=evaluations,
+            )
+
+    async def _send_result(
+        self,
+        test_case_ctx: TestCaseContext[TestCaseType],
+        output: OutputType,
+        test_case_duration_ms: Optional[float],
+        evaluations: Optional[List[EvaluationWithId]],
+    ) -> None:
+        assert self.run_id is not None
+        with profile("upload_result"):
+            test_case_result_id = await send_test_case_result(
+                test_external_id=self.test_external_id,
+                run_id=self.run_id,
+                test_case_ctx=test_case_ctx,
+                output=output,
+                test_case_duration_ms=test_case_duration_ms or 0,
+            )
 
         if not evaluations:
             return
 
         try:
-            await all_settled(
-                [
-                    send_eval(
-                        test_external_id=self.test_external_id,
-                        run_id=self.run_id,
-                        test_case_hash=test_case_ctx.hash(),
-                        evaluator_external_id=evaluation.id,
-                        evaluation=Evaluation(
-                            score=evaluation.score,
-                            threshold=evaluation.threshold,
-                            metadata=evaluation.metadata,
-                            assertions=evaluation.assertions,
-                        ),
-                        test_case_result_id=test_case_result_id,
-                    )
-                    for evaluation in evaluations
-                ]
-            )
+            with profile("upload_evaluations"):
+                await all_settled(
+                    [
+                        send_eval(
+                            test_external_id=self.test_external_id,
+                            run_id=self.run_id,
+                            test_case_hash=test_case_ctx.hash(),
+                            evaluator_external_id=evaluation.id,
+                            evaluation=Evaluation(
+                                score=evaluation.score,
+                                threshold=evaluation.threshold,
+                                metadata=evaluation.metadata,
+                                assertions=evaluation.assertions,
+                            ),
+                            test_case_result_id=test_case_result_id,
+                        )
+                        for evaluation in evaluations
+                    ]
+                )
         except Exception as e:
             log.warning(f"Failed to send evaluation to Autoblocks for test case hash {test_case_ctx.hash()}: {e}")
 
@@ -165,8 +191,20 @@ class RunManager(Generic[TestCaseType, OutputType]):
         await send_end_test_run(test_external_id=self.test_external_id, run_id=self.run_id)
         self.ended = True
 
+        if self.profiler is not None:
+            try:
+                await asyncio.to_thread(self.profiler.report)
+            except Exception as err:
+                log.warning(f"Failed to report the profile of test run '{self.run_id}'", exc_info=err)
+
     def end(self) -> None:
         """
         Ends the run.
         """
         asyncio.run_coroutine_threadsafe(self.async_end(), global_state.event_loop()).result()
+
+    def get_phase_stats(self) -> Optional[List[PhaseStats]]:
+        """
+        Returns the p50, p95 and max duration of each phase profiled so far, or None if the run isn't profiled.
+        """
+        return self.profiler.phase_stats() if self.profiler is not None else None
@@ -0,0 +1,146 @@
+import asyncio
+from typing import Any
+from typing import AsyncIterable
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+from typing import TypeVar
+from typing import Union
+
+from autoblocks._impl.testing.models import BaseTestCase
+from autoblocks._impl.testing.models import TestCaseContext
+from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.testing.util import yield_test_case_contexts_from_test_cases
+
+T = TypeVar("T")
+
+# Test cases can be a sequence, any other iterable (e.g. a generator reading from disk), or an async iterable
+TestCaseSource = Union[Iterable[TestCaseType], AsyncIterable[TestCaseType]]
+
+# How many test cases can be in flight per max_test_case_concurrency slot. Test cases release their slot
+# before their evaluators run, so a window larger than max_test_case_concurrency keeps fn busy while
+# earlier test cases are being evaluated.
+IN_FLIGHT_TEST_CASES_PER_SLOT = 2
+
+
+def is_streamed(test_cases: TestCaseSource[TestCaseType]) -> bool:
+    """
+    Streamed test cases can only be iterated once and aren't validated until they are pulled.
+    """
+    return not isinstance(test_cases, Sequence)
+
+
+def max_in_flight_test_cases(max_test_case_concurrency: int) -> int:
+    return max(1, max_test_case_concurrency * IN_FLIGHT_TEST_CASES_PER_SLOT)
+
+
+async def aiter_test_cases(test_cases: TestCaseSource[TestCaseType]) -> AsyncIterator[TestCaseType]:
+    if isinstance(test_cases, AsyncIterable):
+        async for test_case in test_cases:
+            yield test_case
+    else:
+        for test_case in test_cases:
+            yield test_case
+
+
+async def aiter_test_case_contexts(
+    test_cases: TestCaseSource[TestCaseType],
+) -> AsyncIterator[TestCaseContext[TestCaseType]]:
+    async for test_case in aiter_test_cases(test_cases):
+        for test_case_ctx in yield_test_case_contexts_from_test_cases([test_case]):
+            yield test_case_ctx
+
+
+async def materialize_test_cases(test_cases: TestCaseSource[TestCaseType]) -> Sequence[TestCaseType]:
+    if isinstance(test_cases, Sequence):
+        return test_cases
+    return [test_case async for test_case in aiter_test_cases(test_cases)]
+
+
+def filter_test_cases(
+    test_cases: TestCaseSource[TestCaseType],
+    predicate: Callable[[TestCaseType], bool],
+) -> TestCaseSource[TestCaseType]:
+    """
+    Filters test cases without consuming streamed sources.
+    """
+    if isinstance(test_cases, Sequence):
+        return [test_case for test_case in test_cases if predicate(test_case)]
+
+    async def filtered() -> AsyncIterator[TestCaseType]:
+        async for test_case in aiter_test_cases(test_cases):
+            if predicate(test_case):
+                yield test_case
+
+    return filtered()
+
+
+async def validate_streamed_test_cases(
+    test_id: str,
+    test_cases: TestCaseSource[TestCaseType],
+) -> AsyncIterator[TestCaseType]:
+    """
+    Runs the same checks as validate_test_suite_inputs as each test case is pulled.
+    Only the hashes of previous test cases are kept in order to detect duplicates.
+    """
+    test_case_hashes = set()
+    async for test_case in aiter_test_cases(test_cases):
+        assert isinstance(
+            test_case,
+            BaseTestCase,
+        ), f"[{test_id}] Test case {test_case} does not implement {BaseTestCase.__name__}."
+        test_case_hash = test_case.hash()
+        assert test_case_hash not in test_case_hashes, (
+            f"[{test_id}] Duplicate test case hash: '{test_case_hash}'. "
+            "See https://docs.autoblocks.ai/testing/sdk-reference#test-case-hashing"
+        )
+        test_case_hashes.add(test_case_hash)
+        yield test_case
+    assert test_case_hashes, f"[{test_id}] No test cases provided."
+
+
+async def run_with_bounded_concurrency(
+    items: AsyncIterator[T],
+    fn: Callable[[int, T], Awaitable[Any]],
+    max_in_flight: int,
+) -> None:
+    """
+    Calls fn(idx, item) for each item with at most max_in_flight calls running at once. Items are pulled
+    lazily, so only max_in_flight coroutines exist at any time regardless of how many items there are.
+
+    If pulling an item raises, no more items are pulled and the error is raised once in-flight calls finish.
+    """
+    lock = asyncio.Lock()
+    next_idx = 0
+    exhausted = False
+    error: Optional[BaseException] = None
+
+    async def worker() -> None:
+        nonlocal next_idx, exhausted, error
+        while True:
+            # Async generators can't be advanced concurrently
+            async with lock:
+                if exhausted:
+                    return
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    return
+                except Exception as err:
+                    exhausted = True
+                    error = err
+                    return
+                idx = next_idx
+                next_idx += 1
+            await fn(idx, item)
+
+    results = await asyncio.gather(*[worker() for _ in range(max_in_flight)], return_exceptions=True)
+    if error is not None:
+        raise error
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
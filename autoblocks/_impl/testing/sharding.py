@@ -0,0 +1,78 @@
+import dataclasses
+import hashlib
+import logging
+from typing import AsyncIterator
+from typing import Optional
+
+from autoblocks._impl.testing.models import TestCaseContext
+from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.util import CUID2_LENGTH
+from autoblocks._impl.util import AutoblocksEnvVar
+
+log = logging.getLogger(__name__)
+
+BASE36_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+@dataclasses.dataclass(frozen=True)
+class ShardConfig:
+    """
+    Selects the share of a test suite this process runs when the suite is split across CI runners.
+
+    Test cases are assigned to shards by a stable hash of their hash (including the repetition),
+    so every runner agrees on the split without coordinating.
+    """
+
+    # Zero-based
+    index: int
+    total: int
+
+    def __post_init__(self) -> None:
+        if self.total < 1:
+            raise ValueError("total must be at least 1")
+        if not 0 <= self.index < self.total:
+            raise ValueError("index must be at least 0 and less than total")
+
+
+def shard_config_from_env() -> Optional[ShardConfig]:
+    """
+    Reads the shard from the AUTOBLOCKS_SHARD_INDEX (zero-based) and AUTOBLOCKS_SHARD_TOTAL environment variables.
+    """
+    raw_index = AutoblocksEnvVar.SHARD_INDEX.get()
+    raw_total = AutoblocksEnvVar.SHARD_TOTAL.get()
+    if not raw_index and not raw_total:
+        return None
+    try:
+        return ShardConfig(index=int(raw_index or ""), total=int(raw_total or ""))
+    except ValueError:
+        log.warning(
+            f"Ignoring invalid {AutoblocksEnvVar.SHARD_INDEX} '{raw_index}' and {AutoblocksEnvVar.SHARD_TOTAL} "
+            f"'{raw_total}'. Expected an index from 0 to total - 1. Running every test case."
+        )
+        return None
+
+
+def shard_index(test_case_hash: str, total: int) -> int:
+    digest = hashlib.sha256(test_case_hash.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % total
+
+
+async def filter_shard(
+    test_case_contexts: AsyncIterator[TestCaseContext[TestCaseType]],
+    shard: Optional[ShardConfig],
+) -> AsyncIterator[TestCaseContext[TestCaseType]]:
+    async for test_case_ctx in test_case_contexts:
+        if shard is None or shard_index(test_case_ctx.hash(), shard.total) == shard.index:
+            yield test_case_ctx
+
+
+def shared_run_id(test_id: str, build_id: str) -> str:
+    """
+    A CUID2-shaped run id that every shard of the same build derives, so that they report into one run.
+    """
+    value = int.from_bytes(hashlib.sha256(f"{build_id}:{test_id}".encode("utf-8")).digest(), "big")
+    chars = []
+    for _ in range(CUID2_LENGTH):
+        value, remainder = divmod(value, len(BASE36_ALPHABET))
+        chars.append(BASE36_ALPHABET[remainder])
+    return "".join(chars)
@@ -0,0 +1,81 @@
+import asyncio
+import dataclasses
+from typing import Any
+from typing import Awaitable
+from typing import Optional
+from typing import TypeVar
+
+from tenacity import RetryCallState
+from tenacity import wait_random_exponential
+
+from autoblocks._impl.testing.models import BaseTestEvaluator
+
+T = TypeVar("T")
+
+
+class TimeoutExceededError(TimeoutError):
+    """
+    Raised when fn, before_evaluators_hook or an evaluator runs longer than its timeout.
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class TimeoutConfig:
+    """
+    Limits how long a test case's fn and evaluators may run. Time spent waiting for a concurrency slot doesn't count.
+
+    Async callables are cancelled when they time out. Sync ones can't be interrupted, so their slot is released
+    and their result is discarded while they finish in the background.
+    """
+
+    # Seconds fn and before_evaluators_hook may take together
+    test_case_seconds: Optional[float] = None
+    # Seconds each evaluation may take, for evaluators that don't set their own timeout
+    evaluator_seconds: Optional[float] = None
+    # Retries a test case that timed out straight away, up to retry_count times, instead of only retrying
+    # network errors. The retry only starts once the timeout has passed; it isn't a hedged request. A sync fn
+    # that timed out keeps running in the background, but its result is discarded even if it finishes first.
+    retry_on_timeout: bool = False
+
+    def __post_init__(self) -> None:
+        if self.test_case_seconds is not None and self.test_case_seconds <= 0:
+            raise ValueError("test_case_seconds must be positive")
+        if self.evaluator_seconds is not None and self.evaluator_seconds <= 0:
+            raise ValueError("evaluator_seconds must be positive")
+
+
+def evaluator_timeout(config: Optional[TimeoutConfig], evaluator: BaseTestEvaluator) -> Optional[float]:
+    if evaluator.timeout is not None:
+        return evaluator.timeout
+    return config.evaluator_seconds if config else None
+
+
+class Deadline:
+    """
+    Shares one timeout between several awaits, e.g. fn and before_evaluators_hook. Must be created on the event loop.
+    """
+
+    def __init__(self, seconds: Optional[float], description: str) -> None:
+        self._seconds = seconds
+        self._description = description
+        self._loop = asyncio.get_running_loop()
+        self._deadline = self._loop.time() + seconds if seconds is not None else None
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        if self._deadline is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, max(self._deadline - self._loop.time(), 0))
+        except asyncio.TimeoutError as err:
+            raise TimeoutExceededError(f"{self._description} timed out after {self._seconds} seconds") from err
+
+
+class wait_unless_timed_out(wait_random_exponential):
+    """
+    Retries attempts that timed out immediately, since waiting longer is what they've just done.
+    """
+
+    def __call__(self, retry_state: RetryCallState) -> Any:
+        if retry_state.outcome is not None and isinstance(retry_state.outcome.exception(), TimeoutExceededError):
+            return 0
+        return super().__call__(retry_state)
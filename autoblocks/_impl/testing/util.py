@@ -3,6 +3,7 @@ import hashlib
 import itertools
 from typing import Any
 from typing import Generator
+from typing import Iterable
 from typing import Optional
 from typing import Sequence
 
@@ -26,34 +27,70 @@ def md5(text: str) -> str:
     return hashlib.md5(text.encode()).hexdigest()
 
 
+@dataclasses.dataclass(frozen=True)
+class SerializedJson:
+    """
+    A value converted to JSON-safe objects together with its JSON encoding, so that neither is computed twice.
+    """
+
+    value: Any
+    raw: bytes
+
+    @property
+    def text(self) -> str:
+        return self.raw.decode("utf-8")
+
+
+def serialize_json(x: Any) -> SerializedJson:
+    raw = orjson.dumps(x, default=orjson_default)
+    return SerializedJson(value=orjson.loads(raw), raw=raw)
+
+
 def serialize(x: Any) -> Any:
-    return orjson.loads(orjson.dumps(x, default=orjson_default))
+    return serialize_json(x).value
 
 
-def serialize_test_case(test_case: BaseTestCase) -> Any:
+def serialize_test_case_json(test_case: BaseTestCase) -> SerializedJson:
     obj_to_serialize = test_case.serialize()
     # See https://docs.python.org/3/library/dataclasses.html#dataclasses.is_dataclass:
     # isinstance(test_case, type) checks test_case is an instance and not a type
     if dataclasses.is_dataclass(obj_to_serialize) and not isinstance(obj_to_serialize, type):
+        # orjson serializes nested dataclasses itself, so there's no need to copy them with dataclasses.asdict
+        attrs = {
+            field.name: getattr(obj_to_serialize, field.name)
+            for field in dataclasses.fields(obj_to_serialize)
+            # Don't serialize the config
+            if field.name != TEST_CASE_CONFIG_ATTR
+        }
+        try:
+            return serialize_json(attrs)
+        except Exception:
+            pass
+
         serialized: dict[Any, Any] = {}
-        for k, v in dataclasses.asdict(obj_to_serialize).items():
-            if k == TEST_CASE_CONFIG_ATTR:
-                # Don't serialize the config
-                continue
+        for k, v in attrs.items():
             try:
                 serialized[k] = serialize(v)
             except Exception:
                 # Skip over non-serializable test case attributes
                 pass
-        return serialized
+        return serialize_json(serialized)
 
-    return serialize(obj_to_serialize)
+    return serialize_json(obj_to_serialize)
 
 
-def serialize_output(output: Any) -> Any:
+def serialize_test_case(test_case: BaseTestCase) -> Any:
+    return serialize_test_case_json(test_case).value
+
+
+def serialize_output_json(output: Any) -> SerializedJson:
     if callable(getattr(output, "serialize", None)):
-        return serialize(output.serialize())
-    return serialize(output)
+        return serialize_json(output.serialize())
+    return serialize_json(output)
+
+
+def serialize_output(output: Any) -> Any:
+    return serialize_output_json(output).value
 
 
 def serialize_human_review_fields(fields: Optional[list[HumanReviewField]]) -> Optional[list[dict[str, str]]]:
@@ -80,11 +117,12 @@ def config_from_test_case(test_case: TestCaseType) -> Optional[TestCaseConfig]:
 
 
 def yield_test_case_contexts_from_test_cases(
-    test_cases: Sequence[TestCaseType],
+    test_cases: Iterable[TestCaseType],
 ) -> Generator[TestCaseContext[TestCaseType], None, None]:
     for test_case in test_cases:
         config = config_from_test_case(test_case)
-        if not config or config.repeat_num_times is None:
+        # Adaptively repeated test cases are run as one unit, which schedules its own repetitions
+        if not config or config.repeat_num_times is None or config.adaptive_repetitions is not None:
             yield TestCaseContext(
                 test_case=test_case,
                 repetition_idx=None,
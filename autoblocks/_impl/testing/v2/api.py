@@ -1,5 +1,7 @@
+import asyncio
 import logging
 from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
 
@@ -9,7 +11,11 @@ from tenacity import stop_after_attempt
 from tenacity import wait_random_exponential
 
 from autoblocks._impl import global_state
+from autoblocks._impl.api.utils.serialization import deserialize_model
+from autoblocks._impl.app.models import App
+from autoblocks._impl.compression import compression_config_from_env
 from autoblocks._impl.config.constants import API_ENDPOINT_V2
+from autoblocks._impl.encoding import aencode_json_body
 from autoblocks._impl.util import AutoblocksEnvVar
 from autoblocks._impl.util import ThirdPartyEnvVar
 from autoblocks._impl.util import is_ci
@@ -18,20 +24,28 @@ from autoblocks._impl.util import is_github_comment_disabled
 log = logging.getLogger(__name__)
 
 TIMEOUT_SECONDS = 30
+APP_LOOKUP_TIMEOUT_SECONDS = 10
+
+app_registry: Dict[str, App] = {}  # app_slug -> app details, for the lifetime of the process
+app_lookup_registry: Dict[str, "asyncio.Task[App]"] = {}  # app_slug -> in-flight lookup of the app's details
 
 
 @retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=1, max=30), reraise=True)
 async def post_to_api_with_retry(
     url: str,
     api_key: str,
-    json: dict[str, Any],
+    content: bytes,
+    headers: dict[str, str],
 ) -> Response:
-    resp = await global_state.http_client().post(
-        url,
-        json=json,
-        timeout=TIMEOUT_SECONDS,
-        headers={"Authorization": f"Bearer {api_key}"},
-    )
+    # Each attempt takes its own slot so that slots aren't held while waiting to retry
+    async with global_state.test_run_api_limiter().acquire() as permit:
+        resp = await global_state.http_client().post(
+            url,
+            content=content,
+            timeout=TIMEOUT_SECONDS,
+            headers={**headers, "Authorization": f"Bearer {api_key}"},
+        )
+        permit.observe(resp)
     if not resp.is_success:
         try:
             error_body = resp.text
@@ -43,6 +57,27 @@ async def post_to_api_with_retry(
     return resp
 
 
+@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=1, max=30), reraise=True)
+async def get_from_api_with_retry(
+    url: str,
+    api_key: str,
+    timeout: float = TIMEOUT_SECONDS,
+) -> Response:
+    # Each attempt takes its own slot so that slots aren't held while waiting to retry
+    async with global_state.test_run_api_limiter().acquire() as permit:
+        resp = await global_state.http_client().get(
+            url,
+            timeout=timeout,
+            headers={"Authorization": f"Bearer {api_key}"},
+        )
+        permit.observe(resp)
+    if not resp.is_success:
+        log.error(f"API request failed with status {resp.status_code} for {url}")
+
+    resp.raise_for_status()
+    return resp
+
+
 async def post_to_api(
     path: str,
     json: dict[str, Any],
@@ -52,12 +87,49 @@ async def post_to_api(
         raise ValueError(f"You must set the {AutoblocksEnvVar.V2_API_KEY} environment variable.")
 
     url = f"{API_ENDPOINT_V2}{path}"
-    async with global_state.test_run_api_semaphore():
-        return await post_to_api_with_retry(
-            url,
-            api_key,
-            json,
-        )
+    content, headers = await aencode_json_body(json, compression_config_from_env())
+    return await post_to_api_with_retry(
+        url,
+        api_key,
+        content,
+        headers,
+    )
+
+
+async def fetch_app(app_slug: str) -> App:
+    api_key = AutoblocksEnvVar.V2_API_KEY.get()
+    if not api_key:
+        raise ValueError(f"You must set the {AutoblocksEnvVar.V2_API_KEY} environment variable.")
+
+    resp = await get_from_api_with_retry(
+        f"{API_ENDPOINT_V2}/apps/{app_slug}",
+        api_key,
+        timeout=APP_LOOKUP_TIMEOUT_SECONDS,
+    )
+    return deserialize_model(App, resp.json())
+
+
+async def get_app(app_slug: str) -> App:
+    """
+    Looks up an app's details on the shared async HTTP client, at most once per process.
+    Concurrent callers wait for the same request, and a failed lookup is tried again by the next caller.
+    """
+    app = app_registry.get(app_slug)
+    if app is not None:
+        return app
+
+    lookup = app_lookup_registry.get(app_slug)
+    if lookup is None:
+        lookup = asyncio.ensure_future(fetch_app(app_slug))
+        app_lookup_registry[app_slug] = lookup
+    try:
+        # Shielded so that a cancelled caller doesn't cancel the lookup for the others
+        app = await asyncio.shield(lookup)
+    finally:
+        if lookup.done() and app_lookup_registry.get(app_slug) is lookup:
+            del app_lookup_registry[app_slug]
+    app_registry[app_slug] = app
+    return app
 
 
 async def send_create_human_review_job(
@@ -0,0 +1,46 @@
+import dataclasses
+from concurrent.futures import Executor
+from typing import Optional
+
+from autoblocks._impl.testing.cache import EvaluationCache
+from autoblocks._impl.testing.executor import ExecutionMode
+from autoblocks._impl.testing.journal import RunJournalConfig
+from autoblocks._impl.testing.profiler import ProfilerConfig
+from autoblocks._impl.testing.sharding import ShardConfig
+from autoblocks._impl.testing.timeouts import TimeoutConfig
+
+
+@dataclasses.dataclass(frozen=True)
+class RunOptions:
+    """
+    Opt-in features of the V2 run_test_suite. Nothing is enabled by default.
+    """
+
+    # Executor for sync fn, before_evaluators_hook and evaluators. Defaults to a thread pool with enough workers
+    # for max_test_case_concurrency plus every evaluator's max_concurrency. Not shut down when provided.
+    executor: Optional[Executor] = None
+    # Overrides the size of the default thread pool. Ignored if executor is provided.
+    max_executor_workers: Optional[int] = None
+    # In process mode, a sync fn and sync evaluators with process_safe = True run in worker processes,
+    # which avoids contention on the GIL for CPU-bound work. They must be picklable.
+    execution_mode: ExecutionMode = ExecutionMode.THREAD
+    # Number of worker processes in process mode. Defaults to the number of CPUs.
+    max_process_workers: Optional[int] = None
+    # Reuses evaluations of the same evaluator (and cache_version), test case and output instead of calling
+    # the evaluator again. Use InMemoryEvaluationCache, DiskEvaluationCache or your own EvaluationCache.
+    evaluation_cache: Optional[EvaluationCache] = None
+    # Runs only this CI runner's share of the test cases. Unless run_id is given, shards of the same
+    # AUTOBLOCKS_V2_CI_TEST_RUN_BUILD_ID share a run id so that they report into one run. No shard knows when
+    # the others finish, so sharded runs don't create the human review job or send notifications; do that
+    # once every shard has finished.
+    # Defaults to the AUTOBLOCKS_SHARD_INDEX and AUTOBLOCKS_SHARD_TOTAL environment variables.
+    shard: Optional[ShardConfig] = None
+    # Records completed test cases in a local journal. Running the test suite again with the same run_id
+    # skips them and appends the remaining test cases to the run, e.g. after the process was killed.
+    journal: Optional[RunJournalConfig] = None
+    # Limits how long fn and evaluators may run. Timed out test cases and evaluations are reported as errors
+    # on the test case's span.
+    timeouts: Optional[TimeoutConfig] = None
+    # Times each phase of each test case and prints the p50, p95 and max of each phase when the suite finishes.
+    # See get_phase_stats.
+    profiler: Optional[ProfilerConfig] = None
@@ -1,14 +1,17 @@
 import asyncio
-import contextvars
-import functools
 import inspect
 import json
 import logging
+from concurrent.futures import Executor
 from typing import Any
 from typing import Awaitable
 from typing import Callable
+from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Sequence
+from typing import Tuple
+from typing import Type
 from typing import Union
 from typing import overload
 from urllib.parse import quote
@@ -22,10 +25,8 @@ from opentelemetry.context import get_current
 from tenacity import retry
 from tenacity import retry_if_exception_type
 from tenacity import stop_after_attempt
-from tenacity import wait_random_exponential
 
 from autoblocks._impl import global_state
-from autoblocks._impl.api.app_client import AutoblocksAppClient
 from autoblocks._impl.config.constants import PUBLIC_WEBAPP_UI_URL
 from autoblocks._impl.context_vars import EvaluatorRunContext
 from autoblocks._impl.context_vars import TestCaseRunContext
@@ -34,6 +35,17 @@ from autoblocks._impl.context_vars import evaluator_run_context_var
 from autoblocks._impl.context_vars import grid_search_context_var
 from autoblocks._impl.context_vars import test_case_run_context_var
 from autoblocks._impl.context_vars import test_run_context_var
+from autoblocks._impl.testing.cache import EvaluationCache
+from autoblocks._impl.testing.cache import evaluate_with_cache
+from autoblocks._impl.testing.executor import ExecutionMode
+from autoblocks._impl.testing.executor import ExecutorStats
+from autoblocks._impl.testing.executor import TestSuiteExecutor
+from autoblocks._impl.testing.executor import create_test_suite_executor
+from autoblocks._impl.testing.executor import validate_process_mode_inputs
+from autoblocks._impl.testing.journal import RunJournal
+from autoblocks._impl.testing.journal import RunJournalConfig
+from autoblocks._impl.testing.journal import open_run_journal
+from autoblocks._impl.testing.journal import skip_completed
 from autoblocks._impl.testing.models import BaseTestCase
 from autoblocks._impl.testing.models import BaseTestEvaluator
 from autoblocks._impl.testing.models import CreateHumanReviewJob
@@ -41,15 +53,45 @@ from autoblocks._impl.testing.models import Evaluation
 from autoblocks._impl.testing.models import EvaluationWithId
 from autoblocks._impl.testing.models import TestCaseContext
 from autoblocks._impl.testing.models import TestCaseType
+from autoblocks._impl.testing.profiler import PhaseStats
+from autoblocks._impl.testing.profiler import ProfilerConfig
+from autoblocks._impl.testing.profiler import RunProfiler
+from autoblocks._impl.testing.profiler import profile
+from autoblocks._impl.testing.profiler import profile_lane
+from autoblocks._impl.testing.profiler import profile_scope
+from autoblocks._impl.testing.profiler import profiled_acquire
+from autoblocks._impl.testing.profiler import track_name
+from autoblocks._impl.testing.repetitions import RepetitionCount
+from autoblocks._impl.testing.repetitions import RepetitionStats
+from autoblocks._impl.testing.repetitions import adaptive_repetitions
+from autoblocks._impl.testing.repetitions import run_adaptive_repetitions
+from autoblocks._impl.testing.scheduler import TestCaseSource
+from autoblocks._impl.testing.scheduler import aiter_test_case_contexts
+from autoblocks._impl.testing.scheduler import filter_test_cases
+from autoblocks._impl.testing.scheduler import is_streamed
+from autoblocks._impl.testing.scheduler import materialize_test_cases
+from autoblocks._impl.testing.scheduler import max_in_flight_test_cases
+from autoblocks._impl.testing.scheduler import run_with_bounded_concurrency
+from autoblocks._impl.testing.scheduler import validate_streamed_test_cases
+from autoblocks._impl.testing.sharding import ShardConfig
+from autoblocks._impl.testing.sharding import filter_shard
+from autoblocks._impl.testing.sharding import shard_config_from_env
+from autoblocks._impl.testing.sharding import shared_run_id
+from autoblocks._impl.testing.timeouts import Deadline
+from autoblocks._impl.testing.timeouts import TimeoutConfig
+from autoblocks._impl.testing.timeouts import TimeoutExceededError
+from autoblocks._impl.testing.timeouts import evaluator_timeout
+from autoblocks._impl.testing.timeouts import wait_unless_timed_out
 from autoblocks._impl.testing.util import GridSearchParams
 from autoblocks._impl.testing.util import GridSearchParamsCombo
-from autoblocks._impl.testing.util import serialize_output
-from autoblocks._impl.testing.util import serialize_test_case
+from autoblocks._impl.testing.util import serialize_output_json
+from autoblocks._impl.testing.util import serialize_test_case_json
 from autoblocks._impl.testing.util import yield_grid_search_param_combos
-from autoblocks._impl.testing.util import yield_test_case_contexts_from_test_cases
+from autoblocks._impl.testing.v2.api import get_app
 from autoblocks._impl.testing.v2.api import send_create_human_review_job
 from autoblocks._impl.testing.v2.api import send_v2_github_comment
 from autoblocks._impl.testing.v2.api import send_v2_slack_notification
+from autoblocks._impl.testing.v2.options import RunOptions
 from autoblocks._impl.tracer.util import SpanAttribute
 from autoblocks._impl.util import CUID2_LENGTH
 from autoblocks._impl.util import AutoblocksEnvVar
@@ -63,12 +105,22 @@ from autoblocks._impl.util import serialize_to_string
 log = logging.getLogger(__name__)
 
 test_case_semaphore_registry: dict[str, asyncio.Semaphore] = {}  # test_id -> semaphore
+evaluation_semaphore_registry: dict[str, asyncio.Semaphore] = {}  # test_id -> semaphore of the evaluation stage
 evaluator_semaphore_registry: dict[str, dict[str, asyncio.Semaphore]] = {}  # test_id -> evaluator_id -> semaphore
+executor_registry: dict[str, TestSuiteExecutor] = {}  # test_id -> executor for sync callables
+evaluation_cache_registry: dict[str, EvaluationCache] = {}  # test_id -> cache of evaluations
+run_journal_registry: dict[str, RunJournal] = {}  # test_id -> journal of completed test cases
+timeout_registry: dict[str, TimeoutConfig] = {}  # test_id -> timeouts
+profiler_registry: dict[str, RunProfiler] = {}  # test_id -> profiler of the current or last run
+repetition_stats_registry: dict[str, RepetitionStats] = {}  # test_id -> repetitions of adaptively repeated test cases
 
 DEFAULT_MAX_TEST_CASE_CONCURRENCY = 10
 
 
-def create_retry_decorator(retry_count: int) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+def create_retry_decorator(
+    retry_count: int,
+    retry_on_timeout: bool = False,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """Create retry decorator following existing tenacity pattern."""
     if retry_count <= 0:
         # No retry - return identity decorator
@@ -77,19 +129,21 @@ def create_retry_decorator(retry_count: int) -> Callable[[Callable[..., Any]], C
 
         return no_retry_decorator
 
+    retryable: Tuple[Type[BaseException], ...] = (
+        httpx.TimeoutException,
+        httpx.ConnectError,
+        httpx.ReadTimeout,
+        httpx.WriteTimeout,
+        httpx.PoolTimeout,
+    )
+    if retry_on_timeout:
+        retryable += (TimeoutExceededError,)
+
     # Use same pattern as existing code in api.py
     return retry(
         stop=stop_after_attempt(retry_count + 1),  # +1 because first attempt isn't a retry
-        wait=wait_random_exponential(multiplier=1, max=30),
-        retry=retry_if_exception_type(
-            (
-                httpx.TimeoutException,
-                httpx.ConnectError,
-                httpx.ReadTimeout,
-                httpx.WriteTimeout,
-                httpx.PoolTimeout,
-            )
-        ),
+        wait=wait_unless_timed_out(multiplier=1, max=30),
+        retry=retry_if_exception_type(retryable),
         reraise=True,
     )
 
@@ -117,6 +171,39 @@ def filters_test_suites_list() -> list[str]:
     return json.loads(raw)  # type: ignore
 
 
+def flush_tracer_provider() -> None:
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "force_flush"):
+        provider.force_flush()
+
+
+def get_executor_stats(test_id: str) -> Optional[ExecutorStats]:
+    """
+    Returns the queue depth and utilization of the executor that runs a test suite's sync callables,
+    or None if the test suite hasn't started.
+    """
+    executor = executor_registry.get(test_id)
+    return executor.stats if executor else None
+
+
+def get_phase_stats(test_id: str) -> Optional[List[PhaseStats]]:
+    """
+    Returns the p50, p95 and max duration of each phase of a test suite's most recent run,
+    or None if it wasn't profiled.
+    """
+    profiler = profiler_registry.get(test_id)
+    return profiler.phase_stats() if profiler else None
+
+
+def get_repetition_counts(test_id: str) -> Optional[List[RepetitionCount]]:
+    """
+    Returns how many repetitions each adaptively repeated test case of a test suite's most recent run ran,
+    or None if none of its test cases were repeated adaptively.
+    """
+    repetition_stats = repetition_stats_registry.get(test_id)
+    return repetition_stats.counts if repetition_stats and repetition_stats.counts else None
+
+
 async def run_evaluator_unsafe(
     test_id: str,
     test_case_ctx: TestCaseContext[TestCaseType],
@@ -128,27 +215,54 @@ async def run_evaluator_unsafe(
     This is suffixed with _unsafe because it doesn't handle exceptions.
     Its caller will catch and handle all exceptions.
     """
+    return await evaluate_with_cache(
+        cache=evaluation_cache_registry.get(test_id),
+        evaluator=evaluator,
+        test_case_ctx=test_case_ctx,
+        output=output,
+        hook_results=hook_results,
+        evaluate=lambda: evaluate_test_case(
+            test_id=test_id,
+            test_case_ctx=test_case_ctx,
+            output=output,
+            hook_results=hook_results,
+            evaluator=evaluator,
+        ),
+    )
+
+
+async def evaluate_test_case(
+    test_id: str,
+    test_case_ctx: TestCaseContext[TestCaseType],
+    output: Any,
+    hook_results: Any,
+    evaluator: BaseTestEvaluator,
+) -> Optional[Evaluation]:
     evaluation: Union[Optional[Evaluation], Awaitable[Optional[Evaluation]]] = None
-    async with evaluator_semaphore_registry[test_id][evaluator.id]:
+    async with profiled_acquire(evaluator_semaphore_registry[test_id][evaluator.id], f"evaluator_wait:{evaluator.id}"):
+        deadline = Deadline(
+            evaluator_timeout(timeout_registry.get(test_id), evaluator),
+            f"Evaluator '{evaluator.id}' on test case '{test_case_ctx.hash()}'",
+        )
         if hook_results is not None:
             kwargs = dict(hook_results=hook_results)
         else:
             kwargs = dict()
 
-        if inspect.iscoroutinefunction(evaluator.evaluate_test_case):
-            evaluation = await evaluator.evaluate_test_case(test_case_ctx.test_case, output, **kwargs)
-        else:
-            ctx = contextvars.copy_context()
-            evaluation = await global_state.event_loop().run_in_executor(
-                None,
-                ctx.run,
-                functools.partial(
-                    evaluator.evaluate_test_case,
-                    test_case_ctx.test_case,
-                    output,
-                    **kwargs,
-                ),
-            )
+        with profile(f"evaluator:{evaluator.id}"):
+            if inspect.iscoroutinefunction(evaluator.evaluate_test_case):
+                evaluation = await deadline.run(evaluator.evaluate_test_case(test_case_ctx.test_case, output, **kwargs))
+            else:
+                suite_executor = executor_registry[test_id]
+                run_sync = suite_executor.run_in_process if evaluator.process_safe else suite_executor.run
+                evaluation = await deadline.run(
+                    run_sync(
+                        evaluator.evaluate_test_case,
+                        test_case_ctx.test_case,
+                        output,
+                        **kwargs,
+                    )
+                )
     if isinstance(evaluation, Awaitable):
         evaluation = await evaluation
     return evaluation
@@ -166,15 +280,18 @@ async def run_evaluator(
     )
     evaluation: Optional[Evaluation] = None
     try:
-        evaluation = await run_evaluator_unsafe(
-            test_id=test_id,
-            test_case_ctx=test_case_ctx,
-            output=output,
-            hook_results=hook_results,
-            evaluator=evaluator,
-        )
+        with profile_lane(evaluator.id):
+            evaluation = await run_evaluator_unsafe(
+                test_id=test_id,
+                test_case_ctx=test_case_ctx,
+                output=output,
+                hook_results=hook_results,
+                evaluator=evaluator,
+            )
     except Exception as err:
         log.error(f"Error running evaluator '{evaluator.id}' for test case '{test_case_ctx.hash()}'", exc_info=err)
+        # Evaluators run within the test case's span
+        trace.get_current_span().record_exception(err)
     finally:
         evaluator_run_context_var.reset(reset_token)
 
@@ -197,10 +314,12 @@ async def run_test_case_unsafe(
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
     evaluators: Sequence[BaseTestEvaluator],
-) -> None:
+) -> Tuple[str, List[EvaluationWithId]]:
     """
     This is suffixed with _unsafe because it doesn't handle exceptions.
     Its caller will catch and handle all exceptions.
+
+    Returns the test case's execution id and evaluations.
     """
     execution_id = cuid_generator()
     # Get current context and set baggage
@@ -211,68 +330,88 @@ async def run_test_case_unsafe(
     otel_ctx = set_baggage(SpanAttribute.TEST_ID, test_id, context=otel_ctx)
     tracer = trace.get_tracer("AUTOBLOCKS_TRACER")
     token = attach(otel_ctx)
-    async with test_case_semaphore_registry[test_id]:
-        with tracer.start_as_current_span(app_slug, context=otel_ctx) as span:
-            # Set span attributes before function execution
-            span.set_attribute(SpanAttribute.IS_ROOT, True)
-            span.set_attribute(SpanAttribute.EXECUTION_ID, execution_id)
-            span.set_attribute(SpanAttribute.TEST_ID, test_id)
-            span.set_attribute(SpanAttribute.ENVIRONMENT, "test")
-            span.set_attribute(SpanAttribute.APP_SLUG, app_slug)
-            span.set_attribute(SpanAttribute.INPUT, serialize_to_string(serialize_test_case(test_case_ctx.test_case)))
-            if inspect.iscoroutinefunction(fn):
-                output = await fn(test_case_ctx.test_case)
-            else:
-                ctx = contextvars.copy_context()
-                output = await global_state.event_loop().run_in_executor(
-                    None,
-                    ctx.run,
-                    fn,
-                    test_case_ctx.test_case,
+    span: Optional[trace.Span] = None
+    try:
+        async with profiled_acquire(test_case_semaphore_registry[test_id], "test_case_wait"):
+            # The span is started once fn has a slot and stays open until the evaluators are done
+            span = tracer.start_span(app_slug, context=otel_ctx)
+            with trace.use_span(span):
+                # Set span attributes before function execution
+                span.set_attribute(SpanAttribute.IS_ROOT, True)
+                span.set_attribute(SpanAttribute.EXECUTION_ID, execution_id)
+                span.set_attribute(SpanAttribute.TEST_ID, test_id)
+                span.set_attribute(SpanAttribute.ENVIRONMENT, "test")
+                span.set_attribute(SpanAttribute.APP_SLUG, app_slug)
+                with profile("serialize"):
+                    input_raw = serialize_test_case_json(test_case_ctx.test_case).text
+                span.set_attribute(SpanAttribute.INPUT, input_raw)
+                timeouts = timeout_registry.get(test_id)
+                deadline = Deadline(
+                    timeouts.test_case_seconds if timeouts else None,
+                    f"Test case '{test_case_ctx.hash()}'",
                 )
-            span.set_attribute(SpanAttribute.OUTPUT, serialize_to_string(serialize_output(output)))
-
-            # Run the before-evaluators hook if provided.
-            # Note we run this within the test case semaphore so that
-            # max_test_case_concurrency applies to both fn + before_evaluators_hook.
-            hook_results = None
-            if before_evaluators_hook:
-                if inspect.iscoroutinefunction(before_evaluators_hook):
-                    hook_results = await before_evaluators_hook(
-                        test_case_ctx.test_case,
-                        output,
-                    )
-                else:
-                    ctx = contextvars.copy_context()
-                    hook_results = await global_state.event_loop().run_in_executor(
-                        None,
-                        ctx.run,
-                        before_evaluators_hook,
-                        test_case_ctx.test_case,
-                        output,
-                    )
-
-            evaluator_results_futures = await all_settled(
-                [
-                    run_evaluator(
-                        test_id=test_id,
-                        test_case_ctx=test_case_ctx,
-                        output=output,
-                        hook_results=hook_results,
-                        evaluator=evaluator,
-                    )
-                    for evaluator in evaluators
-                ],
-            )
-            evaluator_results: list[EvaluationWithId] = []
-            for result in evaluator_results_futures:
-                if isinstance(result, Exception):
-                    log.error(f"Error running evaluator for test case '{test_case_ctx.hash()}'", exc_info=result)
-                elif isinstance(result, EvaluationWithId):
-                    evaluator_results.append(result)
-            span.set_attribute(SpanAttribute.EVALUATORS, serialize_to_string(evaluator_results))
+                with profile("fn"):
+                    if inspect.iscoroutinefunction(fn):
+                        output = await deadline.run(fn(test_case_ctx.test_case))
+                    else:
+                        output = await deadline.run(
+                            executor_registry[test_id].run_in_process(fn, test_case_ctx.test_case)
+                        )
+                with profile("serialize"):
+                    output_raw = serialize_output_json(output).text
+                span.set_attribute(SpanAttribute.OUTPUT, output_raw)
+
+                # Run the before-evaluators hook if provided.
+                # Note we run this within the test case semaphore so that
+                # max_test_case_concurrency applies to both fn + before_evaluators_hook.
+                hook_results = None
+                if before_evaluators_hook:
+                    with profile("before_evaluators_hook"):
+                        if inspect.iscoroutinefunction(before_evaluators_hook):
+                            hook_results = await deadline.run(
+                                before_evaluators_hook(
+                                    test_case_ctx.test_case,
+                                    output,
+                                )
+                            )
+                        else:
+                            hook_results = await deadline.run(
+                                executor_registry[test_id].run(
+                                    before_evaluators_hook,
+                                    test_case_ctx.test_case,
+                                    output,
+                                )
+                            )
+
+        # The test case's slot is released before evaluating, so that slow evaluators don't hold back fn.
+        # Evaluations are bounded by their own semaphore instead.
+        async with profiled_acquire(evaluation_semaphore_registry[test_id], "evaluation_wait"):
+            with trace.use_span(span):
+                evaluator_results_futures = await all_settled(
+                    [
+                        run_evaluator(
+                            test_id=test_id,
+                            test_case_ctx=test_case_ctx,
+                            output=output,
+                            hook_results=hook_results,
+                            evaluator=evaluator,
+                        )
+                        for evaluator in evaluators
+                    ],
+                )
+                evaluator_results: List[EvaluationWithId] = []
+                for result in evaluator_results_futures:
+                    if isinstance(result, Exception):
+                        log.error(f"Error running evaluator for test case '{test_case_ctx.hash()}'", exc_info=result)
+                    elif isinstance(result, EvaluationWithId):
+                        evaluator_results.append(result)
+                span.set_attribute(SpanAttribute.EVALUATORS, serialize_to_string(evaluator_results))
+    finally:
+        if span is not None:
+            span.end()
+        detach(token)
 
-    detach(token)
+    return execution_id, evaluator_results
 
 
 async def run_test_case(
@@ -285,7 +424,10 @@ async def run_test_case(
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
     test_case_idx: int,
     retry_count: int = 0,
-) -> None:
+) -> Optional[Tuple[str, List[EvaluationWithId]]]:
+    """
+    Returns the test case's execution id and evaluations, or None if it failed.
+    """
     reset_token = test_case_run_context_var.set(
         TestCaseRunContext(
             run_id=run_id,
@@ -295,11 +437,14 @@ async def run_test_case(
     )
 
     # Create retry decorator
-    retry_decorator = create_retry_decorator(retry_count)
+    timeouts = timeout_registry.get(test_id)
+    retry_decorator = create_retry_decorator(
+        retry_count, retry_on_timeout=timeouts is not None and timeouts.retry_on_timeout
+    )
 
     # Wrap the unsafe function with retry logic
     @retry_decorator
-    async def _retry_wrapper() -> None:
+    async def _retry_wrapper() -> Tuple[str, List[EvaluationWithId]]:
         return await run_test_case_unsafe(
             test_id=test_id,
             app_slug=app_slug,
@@ -311,34 +456,112 @@ async def run_test_case(
 
     try:
         log.info(f"Running test case {test_case_idx} for test suite {test_id}")
-        await _retry_wrapper()
+        with profile_scope(profiler_registry.get(test_id), track_name(test_case_ctx, grid_search_context_var.get())):
+            execution_id, evaluations = await _retry_wrapper()
     except Exception as err:
         log.error(f"Error running test case '{test_case_ctx.hash()}'", exc_info=err)
-        return
+        return None
     finally:
         log.info(f"Finished running test case {test_case_idx} for test suite {test_id}")
         test_case_run_context_var.reset(reset_token)
 
+    await journal_test_case(test_id, test_case_ctx, execution_id)
+    return execution_id, evaluations
+
+
+async def journal_test_case(test_id: str, test_case_ctx: TestCaseContext[TestCaseType], execution_id: str) -> None:
+    journal = run_journal_registry.get(test_id)
+    if journal is not None:
+        try:
+            await journal.record(test_case_ctx.hash(), grid_search_context_var.get(), execution_id)
+        except Exception as err:
+            log.warning(f"Failed to journal test case '{test_case_ctx.hash()}'", exc_info=err)
+
+
+async def run_test_case_repetitions(
+    test_id: str,
+    run_id: str,
+    app_slug: str,
+    test_case_ctx: TestCaseContext[TestCaseType],
+    evaluators: Sequence[BaseTestEvaluator],
+    fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
+    before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
+    test_case_idx: int,
+    retry_count: int = 0,
+) -> None:
+    """
+    Runs the test case, or its repetitions until their scores agree if it's repeated adaptively.
+    """
+    adaptive = adaptive_repetitions(test_case_ctx.test_case)
+    if adaptive is None:
+        await run_test_case(
+            test_id=test_id,
+            run_id=run_id,
+            app_slug=app_slug,
+            test_case_ctx=test_case_ctx,
+            evaluators=evaluators,
+            fn=fn,
+            before_evaluators_hook=before_evaluators_hook,
+            test_case_idx=test_case_idx,
+            retry_count=retry_count,
+        )
+        return
+
+    execution_ids: List[str] = []
+
+    async def run_repetition(repetition_ctx: TestCaseContext[TestCaseType]) -> Dict[str, float]:
+        result = await run_test_case(
+            test_id=test_id,
+            run_id=run_id,
+            app_slug=app_slug,
+            test_case_ctx=repetition_ctx,
+            evaluators=evaluators,
+            fn=fn,
+            before_evaluators_hook=before_evaluators_hook,
+            test_case_idx=test_case_idx,
+            retry_count=retry_count,
+        )
+        if result is None:
+            return {}
+        execution_id, evaluations = result
+        execution_ids.append(execution_id)
+        return {evaluation.id: evaluation.score for evaluation in evaluations}
+
+    config, max_repetitions = adaptive
+    count = await run_adaptive_repetitions(
+        test_case_ctx=test_case_ctx,
+        grid_search_params_combo=grid_search_context_var.get(),
+        config=config,
+        max_repetitions=max_repetitions,
+        run_repetition=run_repetition,
+    )
+    repetition_stats_registry[test_id].record(count)
+    if execution_ids:
+        # A resumed run skips the test case once all of its repetitions are done
+        await journal_test_case(test_id, test_case_ctx, execution_ids[-1])
+
 
 def validate_test_suite_inputs(
     test_id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     evaluators: Sequence[BaseTestEvaluator],
     grid_search_params: Optional[GridSearchParams],
 ) -> None:
-    assert test_cases, f"[{test_id}] No test cases provided."
-    test_case_hashes = set()
-    for test_case in test_cases:
-        assert isinstance(
-            test_case,
-            BaseTestCase,
-        ), f"[{test_id}] Test case {test_case} does not implement {BaseTestCase.__name__}."
-        test_case_hash = test_case.hash()
-        assert test_case_hash not in test_case_hashes, (
-            f"[{test_id}] Duplicate test case hash: '{test_case_hash}'. "
-            "See https://docs.autoblocks.ai/testing/sdk-reference#test-case-hashing"
-        )
-        test_case_hashes.add(test_case_hash)
+    # Streamed test cases are validated as they are pulled, see validate_streamed_test_cases
+    if isinstance(test_cases, Sequence):
+        assert test_cases, f"[{test_id}] No test cases provided."
+        test_case_hashes = set()
+        for test_case in test_cases:
+            assert isinstance(
+                test_case,
+                BaseTestCase,
+            ), f"[{test_id}] Test case {test_case} does not implement {BaseTestCase.__name__}."
+            test_case_hash = test_case.hash()
+            assert test_case_hash not in test_case_hashes, (
+                f"[{test_id}] Duplicate test case hash: '{test_case_hash}'. "
+                "See https://docs.autoblocks.ai/testing/sdk-reference#test-case-hashing"
+            )
+            test_case_hashes.add(test_case_hash)
 
     evaluator_ids = set()
     for evaluator in evaluators:
@@ -399,28 +622,24 @@ def filter_test_cases_for_alignment_mode(
 async def run_test_suite_for_grid_combo(
     test_id: str,
     app_slug: str,
+    app_id: Optional[str],
     run_id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     evaluators: Sequence[BaseTestEvaluator],
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
     grid_search_params_combo: Optional[GridSearchParamsCombo],
     human_review_job: Optional[CreateHumanReviewJob],
+    max_in_flight: int,
     retry_count: int = 0,
+    shard: Optional[ShardConfig] = None,
 ) -> None:
     start_timestamp = now_rfc3339()
 
-    # Get app details to retrieve app_id
-    app_id = None
-
-    try:
-        app_client = AutoblocksAppClient(app_slug=app_slug)
-        app = app_client.app.get_app()
-        app_id = app.id
-    except Exception as err:
-        log.warning(f"Failed to retrieve app details: {err}")
-
-    log.info(f"Running test suite '{test_id}' with {len(test_cases)} test cases")
+    if isinstance(test_cases, Sequence):
+        log.info(f"Running test suite '{test_id}' with {len(test_cases)} test cases")
+    else:
+        log.info(f"Running test suite '{test_id}' with streamed test cases")
 
     # Log URL to test results in GitHub CI (before tests start)
     timestamp = quote(start_timestamp, safe="")
@@ -440,21 +659,25 @@ async def run_test_suite_for_grid_combo(
     )
 
     try:
-        await all_settled(
-            [
-                run_test_case(
-                    test_id=test_id,
-                    run_id=run_id,
-                    app_slug=app_slug,
-                    test_case_ctx=test_case_ctx,
-                    evaluators=evaluators,
-                    fn=fn,
-                    before_evaluators_hook=before_evaluators_hook,
-                    test_case_idx=test_case_idx,
-                    retry_count=retry_count,
-                )
-                for test_case_idx, test_case_ctx in enumerate(yield_test_case_contexts_from_test_cases(test_cases))
-            ],
+        # Test cases are pulled lazily so that only max_in_flight coroutines exist at a time
+        await run_with_bounded_concurrency(
+            skip_completed(
+                filter_shard(aiter_test_case_contexts(test_cases), shard),
+                run_journal_registry.get(test_id),
+                grid_search_params_combo,
+            ),
+            lambda test_case_idx, test_case_ctx: run_test_case_repetitions(
+                test_id=test_id,
+                run_id=run_id,
+                app_slug=app_slug,
+                test_case_ctx=test_case_ctx,
+                evaluators=evaluators,
+                fn=fn,
+                before_evaluators_hook=before_evaluators_hook,
+                test_case_idx=test_case_idx,
+                retry_count=retry_count,
+            ),
+            max_in_flight=max_in_flight,
         )
     except Exception as err:
         log.error(f"Error running test suite '{test_id}'", exc_info=err)
@@ -467,6 +690,16 @@ async def run_test_suite_for_grid_combo(
         if test_run_reset_token:
             test_run_context_var.reset(test_run_reset_token)
 
+    if shard is not None:
+        # The follow-ups need the whole run, and no shard knows when the others finish
+        if human_review_job is not None:
+            log.warning(
+                f"Not creating human review job for sharded test run '{run_id}'. "
+                "Create it once every shard has finished."
+            )
+        log.info(f"Not sending notifications for sharded test run '{run_id}'")
+        return
+
     end_timestamp = now_rfc3339()
     if human_review_job is not None:
         try:
@@ -509,14 +742,24 @@ async def async_run_test_suite(
     test_id: str,
     app_slug: str,
     run_id: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     evaluators: Sequence[BaseTestEvaluator],
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]],
     max_test_case_concurrency: int,
+    max_evaluation_concurrency: int,
     grid_search_params: Optional[GridSearchParams],
     human_review_job: Optional[CreateHumanReviewJob],
     retry_count: int = 0,
+    executor: Optional[Executor] = None,
+    max_executor_workers: Optional[int] = None,
+    execution_mode: ExecutionMode = ExecutionMode.THREAD,
+    max_process_workers: Optional[int] = None,
+    evaluation_cache: Optional[EvaluationCache] = None,
+    shard: Optional[ShardConfig] = None,
+    journal: Optional[RunJournalConfig] = None,
+    timeouts: Optional[TimeoutConfig] = None,
+    profiler: Optional[ProfilerConfig] = None,
 ) -> None:
 
     # This will be set if the user passed filters to the CLI
@@ -539,64 +782,143 @@ async def async_run_test_suite(
         # hashes to run. We filter the test cases to only run those.
         hashes_to_run = set(tests_and_hashes[test_id] or [])
         if hashes_to_run:
-            test_cases = [tc for tc in test_cases if tc.hash() in hashes_to_run]
+            test_cases = filter_test_cases(test_cases, lambda tc: tc.hash() in hashes_to_run)
 
     try:
+        if grid_search_params is not None:
+            # Every grid combo runs every test case, so streamed test cases can't be consumed only once
+            test_cases = await materialize_test_cases(test_cases)
         validate_test_suite_inputs(
             test_id=test_id,
             test_cases=test_cases,
             evaluators=evaluators,
             grid_search_params=grid_search_params,
         )
+        if execution_mode == ExecutionMode.PROCESS:
+            validate_process_mode_inputs(test_id=test_id, fn=fn, evaluators=evaluators)
+        if is_streamed(test_cases):
+            test_cases = validate_streamed_test_cases(test_id=test_id, test_cases=test_cases)
     except Exception as err:
         log.error(f"Error validating test suite inputs for '{test_id}'", exc_info=err)
         return
 
     # Initialize the semaphore registries
     test_case_semaphore_registry[test_id] = asyncio.Semaphore(max_test_case_concurrency)
+    evaluation_semaphore_registry[test_id] = asyncio.Semaphore(max_evaluation_concurrency)
     evaluator_semaphore_registry[test_id] = {
         evaluator.id: asyncio.Semaphore(evaluator.max_concurrency) for evaluator in evaluators
     }
-
-    if grid_search_params is None:
+    executor_registry[test_id] = create_test_suite_executor(
+        test_id=test_id,
+        max_test_case_concurrency=max_test_case_concurrency,
+        evaluators=evaluators,
+        executor=executor,
+        max_workers=max_executor_workers,
+        execution_mode=execution_mode,
+        max_process_workers=max_process_workers,
+    )
+    if evaluation_cache is not None:
+        evaluation_cache_registry[test_id] = evaluation_cache
+    else:
+        evaluation_cache_registry.pop(test_id, None)
+    run_journal_registry.pop(test_id, None)
+    if timeouts is not None:
+        timeout_registry[test_id] = timeouts
+    else:
+        timeout_registry.pop(test_id, None)
+    if journal is not None:
         try:
-            log.debug(f"No grid search params provided for test suite '{test_id}'")
-            await run_test_suite_for_grid_combo(
-                test_id=test_id,
-                app_slug=app_slug,
-                test_cases=test_cases,
-                evaluators=evaluators,
-                fn=fn,
-                before_evaluators_hook=before_evaluators_hook,
-                grid_search_params_combo=None,
-                human_review_job=human_review_job,
-                retry_count=retry_count,
-                run_id=run_id,
+            run_journal = await open_run_journal(journal, test_id, run_id, before_write=flush_tracer_provider)
+            run_journal_registry[test_id] = run_journal
+            log.info(
+                f"Journaling completed test cases of test suite '{test_id}' to '{run_journal.path}'. "
+                f"Pass run_id='{run_id}' to resume this run."
             )
+            if run_journal.num_completed:
+                log.info(f"Resuming run '{run_id}' with {run_journal.num_completed} completed test cases")
         except Exception as err:
-            log.error(f"Error running test suite '{test_id}'", exc_info=err)
-        return
+            log.warning(f"Running test suite '{test_id}' without the run journal", exc_info=err)
+    if shard is not None:
+        log.info(f"Running shard {shard.index + 1} of {shard.total} of test suite '{test_id}' in run '{run_id}'")
+    if profiler is not None:
+        profiler_registry[test_id] = RunProfiler(profiler, test_id)
+    else:
+        profiler_registry.pop(test_id, None)
+    repetition_stats_registry[test_id] = RepetitionStats()
+
+    # The app's id is only used for the results URL, so it's looked up once for all grid combos
+    app_id: Optional[str] = None
+    try:
+        app_id = (await get_app(app_slug)).id
+    except Exception as err:
+        log.warning(f"Failed to retrieve app details: {err}")
 
+    # Test cases waiting for or running evaluators are in flight too
+    max_in_flight = max_in_flight_test_cases(max_test_case_concurrency + max_evaluation_concurrency)
     try:
-        await all_settled(
-            [
-                run_test_suite_for_grid_combo(
+        if grid_search_params is None:
+            try:
+                log.debug(f"No grid search params provided for test suite '{test_id}'")
+                await run_test_suite_for_grid_combo(
                     test_id=test_id,
                     app_slug=app_slug,
+                    app_id=app_id,
                     test_cases=test_cases,
                     evaluators=evaluators,
                     fn=fn,
                     before_evaluators_hook=before_evaluators_hook,
-                    grid_search_params_combo=grid_params_combo,
+                    grid_search_params_combo=None,
                     human_review_job=human_review_job,
+                    max_in_flight=max_in_flight,
                     retry_count=retry_count,
                     run_id=run_id,
+                    shard=shard,
                 )
-                for grid_params_combo in yield_grid_search_param_combos(grid_search_params)
-            ],
-        )
-    except Exception as err:
-        log.error(f"Error running test suite '{test_id}'", exc_info=err)
+            except Exception as err:
+                log.error(f"Error running test suite '{test_id}'", exc_info=err)
+            return
+
+        try:
+            await all_settled(
+                [
+                    run_test_suite_for_grid_combo(
+                        test_id=test_id,
+                        app_slug=app_slug,
+                        app_id=app_id,
+                        test_cases=test_cases,
+                        evaluators=evaluators,
+                        fn=fn,
+                        before_evaluators_hook=before_evaluators_hook,
+                        grid_search_params_combo=grid_params_combo,
+                        human_review_job=human_review_job,
+                        max_in_flight=max_in_flight,
+                        retry_count=retry_count,
+                        run_id=run_id,
+                        shard=shard,
+                    )
+                    for grid_params_combo in yield_grid_search_param_combos(grid_search_params)
+                ],
+            )
+        except Exception as err:
+            log.error(f"Error running test suite '{test_id}'", exc_info=err)
+    finally:
+        log.debug(f"Executor stats for test suite '{test_id}': {executor_registry[test_id].stats}")
+        executor_registry[test_id].shutdown()
+        finished_journal = run_journal_registry.get(test_id)
+        if finished_journal is not None:
+            if finished_journal.skipped:
+                log.info(f"Skipped {finished_journal.skipped} test cases of test suite '{test_id}' completed before")
+            try:
+                await finished_journal.flush()
+            except Exception as err:
+                log.warning(f"Failed to write the run journal of test suite '{test_id}'", exc_info=err)
+        finished_profiler = profiler_registry.get(test_id)
+        if finished_profiler is not None:
+            try:
+                await asyncio.to_thread(finished_profiler.report)
+            except Exception as err:
+                log.warning(f"Failed to report the profile of test suite '{test_id}'", exc_info=err)
+        repetition_stats_registry[test_id].report(test_id)
 
 
 # Sync fn
@@ -604,15 +926,17 @@ async def async_run_test_suite(
 def run_test_suite(
     id: str,
     app_slug: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     fn: Callable[[TestCaseType], Any],
     evaluators: Optional[Sequence[BaseTestEvaluator]] = None,
     max_test_case_concurrency: int = DEFAULT_MAX_TEST_CASE_CONCURRENCY,
+    max_evaluation_concurrency: Optional[int] = None,
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]] = None,
     grid_search_params: Optional[GridSearchParams] = None,
     human_review_job: Optional[CreateHumanReviewJob] = None,
     retry_count: int = 0,
     run_id: Optional[str] = None,
+    options: Optional[RunOptions] = None,
 ) -> None: ...
 
 
@@ -621,31 +945,38 @@ def run_test_suite(
 def run_test_suite(
     id: str,
     app_slug: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     fn: Callable[[TestCaseType], Awaitable[Any]],
     evaluators: Optional[Sequence[BaseTestEvaluator]] = None,
     max_test_case_concurrency: int = DEFAULT_MAX_TEST_CASE_CONCURRENCY,
+    max_evaluation_concurrency: Optional[int] = None,
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]] = None,
     grid_search_params: Optional[GridSearchParams] = None,
     human_review_job: Optional[CreateHumanReviewJob] = None,
     retry_count: int = 0,
     run_id: Optional[str] = None,
+    options: Optional[RunOptions] = None,
 ) -> None: ...
 
 
 def run_test_suite(
     id: str,
     app_slug: str,
-    test_cases: Sequence[TestCaseType],
+    test_cases: TestCaseSource[TestCaseType],
     fn: Union[Callable[[TestCaseType], Any], Callable[[TestCaseType], Awaitable[Any]]],
     evaluators: Optional[Sequence[BaseTestEvaluator]] = None,
-    # How many test cases to run concurrently
+    # How many test cases to run fn (and before_evaluators_hook) for concurrently
     max_test_case_concurrency: int = DEFAULT_MAX_TEST_CASE_CONCURRENCY,
+    # How many test cases to run evaluators for concurrently. Test cases give up their max_test_case_concurrency
+    # slot once fn is done, so slow evaluators don't hold back fn. Defaults to max_test_case_concurrency.
+    max_evaluation_concurrency: Optional[int] = None,
     before_evaluators_hook: Optional[Callable[[TestCaseType, Any], Any]] = None,
     grid_search_params: Optional[GridSearchParams] = None,
     human_review_job: Optional[CreateHumanReviewJob] = None,
     retry_count: int = 0,
     run_id: Optional[str] = None,
+    # Opt-in features, see RunOptions
+    options: Optional[RunOptions] = None,
 ) -> None:
     if not global_state.is_auto_tracer_initialized():
         log.error(
@@ -661,6 +992,21 @@ def run_test_suite(
         )
         raise ValueError(f"Invalid run_id: '{run_id}'. Must be a valid CUID2.")
 
+    if max_evaluation_concurrency is not None and max_evaluation_concurrency < 1:
+        raise ValueError("max_evaluation_concurrency must be at least 1")
+
+    options = options or RunOptions()
+    shard = options.shard or shard_config_from_env()
+    if shard is not None and run_id is None:
+        build_id = AutoblocksEnvVar.V2_CI_TEST_RUN_BUILD_ID.get()
+        if build_id:
+            run_id = shared_run_id(test_id=id, build_id=build_id)
+        else:
+            log.warning(
+                f"{AutoblocksEnvVar.V2_CI_TEST_RUN_BUILD_ID} is not set, so shard {shard.index + 1} of {shard.total} "
+                f"of test suite '{id}' reports into its own run. Pass the same run_id to every shard to combine them."
+            )
+
     global_state.init()
 
     asyncio.run_coroutine_threadsafe(
@@ -672,15 +1018,23 @@ def run_test_suite(
             fn=fn,
             before_evaluators_hook=before_evaluators_hook,
             max_test_case_concurrency=max_test_case_concurrency,
+            max_evaluation_concurrency=max_evaluation_concurrency or max_test_case_concurrency,
             grid_search_params=grid_search_params,
             human_review_job=human_review_job,
             retry_count=retry_count,
             run_id=run_id or cuid_generator(),
+            executor=options.executor,
+            max_executor_workers=options.max_executor_workers,
+            execution_mode=options.execution_mode,
+            max_process_workers=options.max_process_workers,
+            evaluation_cache=options.evaluation_cache,
+            shard=shard,
+            journal=options.journal,
+            timeouts=options.timeouts,
+            profiler=options.profiler,
         ),
         global_state.event_loop(),
     ).result()
 
     # Force flush the tracer provider to send all results to Autoblocks
-    provider = trace.get_tracer_provider()
-    if hasattr(provider, "force_flush"):
-        provider.force_flush()
+    flush_tracer_provider()
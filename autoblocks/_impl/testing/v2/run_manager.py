@@ -1,5 +1,4 @@
 import asyncio
-import json
 import logging
 from typing import Any
 from typing import List
@@ -7,16 +6,24 @@ from typing import Optional
 from typing import Sequence
 
 from autoblocks._impl import global_state
+from autoblocks._impl.testing.executor import TestSuiteExecutor
+from autoblocks._impl.testing.executor import default_max_workers
 from autoblocks._impl.testing.models import BaseTestCase
 from autoblocks._impl.testing.models import BaseTestEvaluator
 from autoblocks._impl.testing.models import Evaluation
 from autoblocks._impl.testing.models import EvaluationWithId
 from autoblocks._impl.testing.models import TestCaseContext
-from autoblocks._impl.testing.util import serialize_output
-from autoblocks._impl.testing.util import serialize_test_case
+from autoblocks._impl.testing.profiler import PhaseStats
+from autoblocks._impl.testing.profiler import ProfilerConfig
+from autoblocks._impl.testing.profiler import RunProfiler
+from autoblocks._impl.testing.profiler import profile
+from autoblocks._impl.testing.profiler import profile_scope
+from autoblocks._impl.testing.util import serialize_output_json
+from autoblocks._impl.testing.util import serialize_test_case_json
 from autoblocks._impl.testing.v2.api import send_create_human_review_job
 from autoblocks._impl.testing.v2.api import send_create_result
 from autoblocks._impl.testing.v2.run import evaluator_semaphore_registry
+from autoblocks._impl.testing.v2.run import executor_registry
 from autoblocks._impl.testing.v2.run import run_evaluator
 from autoblocks._impl.util import all_settled
 from autoblocks._impl.util import cuid_generator
@@ -36,10 +43,18 @@ class RunManager:
       - create_human_review(): create HR job using start/end timestamps
     """
 
-    def __init__(self, app_slug: str, environment: str = "test", run_message: Optional[str] = None):
+    def __init__(
+        self,
+        app_slug: str,
+        environment: str = "test",
+        run_message: Optional[str] = None,
+        # Times each evaluator, serialization and upload of add_result and prints the p50, p95 and max on end()
+        profiler: Optional[ProfilerConfig] = None,
+    ):
         self.app_slug = app_slug
         self.environment = environment
         self.run_message = run_message
+        self.profiler = RunProfiler(profiler, app_slug) if profiler is not None else None
 
         self.run_id: str = cuid_generator()
         self.started_at: Optional[str] = None
@@ -75,6 +90,10 @@ class RunManager:
             for evaluator in evaluators:
                 if evaluator.id not in reg:
                     reg[evaluator.id] = asyncio.Semaphore(evaluator.max_concurrency)
+        if self.app_slug not in executor_registry:
+            executor_registry[self.app_slug] = TestSuiteExecutor(
+                max_workers=default_max_workers(max_test_case_concurrency=0, evaluators=evaluators),
+            )
         results = await all_settled(
             [
                 run_evaluator(
@@ -156,6 +175,26 @@ class RunManager:
         # Build test case context
         test_case_ctx = TestCaseContext(test_case=test_case, repetition_idx=None)
 
+        with profile_scope(self.profiler, test_case_ctx.hash()):
+            return await self._add_result(
+                test_case_ctx=test_case_ctx,
+                output=output,
+                duration_ms=duration_ms,
+                evaluators=evaluators,
+                status=status,
+                started_at=started_at,
+            )
+
+    async def _add_result(
+        self,
+        *,
+        test_case_ctx: TestCaseContext[BaseTestCase],
+        output: Any,
+        duration_ms: float,
+        evaluators: Optional[Sequence[BaseTestEvaluator]],
+        status: str,
+        started_at: Optional[str],
+    ) -> str:
         # Compute evaluations like the OTEL path
         evals = await self._compute_evaluations(
             test_case_ctx=test_case_ctx,
@@ -164,30 +203,32 @@ class RunManager:
         )
         eval_result_map, eval_reason_map, eval_score_map = self._evaluations_to_maps(evals)
 
-        # Serialize input/output with standard json to match expected formatting in tests
-        input_raw = json.dumps(serialize_test_case(test_case))
-        output_raw = json.dumps(serialize_output(output))
+        # Serialize input/output once; the raw JSON and the parsed maps are sent side by side
+        with profile("serialize"):
+            serialized_input = serialize_test_case_json(test_case_ctx.test_case)
+            serialized_output = serialize_output_json(output)
 
         # Per-execution start time defaults to now if not provided
         exec_started_at = started_at or now_rfc3339()
 
         # POST composite result
-        resp = await send_create_result(
-            app_slug=self.app_slug,
-            run_id=self.run_id,
-            environment=self.environment,
-            started_at=exec_started_at,
-            duration_ms=duration_ms,
-            status=status,
-            input_raw=input_raw,
-            output_raw=output_raw,
-            input_map=json.loads(input_raw),
-            output_map=json.loads(output_raw),
-            evaluator_id_to_result=eval_result_map,
-            evaluator_id_to_reason=eval_reason_map,
-            evaluator_id_to_score=eval_score_map,
-            run_message=self.run_message,
-        )
+        with profile("upload_result"):
+            resp = await send_create_result(
+                app_slug=self.app_slug,
+                run_id=self.run_id,
+                environment=self.environment,
+                started_at=exec_started_at,
+                duration_ms=duration_ms,
+                status=status,
+                input_raw=serialized_input.text,
+                output_raw=serialized_output.text,
+                input_map=serialized_input.value,
+                output_map=serialized_output.value,
+                evaluator_id_to_result=eval_result_map,
+                evaluator_id_to_reason=eval_reason_map,
+                evaluator_id_to_score=eval_score_map,
+                run_message=self.run_message,
+            )
         data = resp.json()
         execution_id = data["executionId"]
         # Ensure we return a string
@@ -223,9 +264,21 @@ class RunManager:
         self.ended_at = now_rfc3339()
         self.can_create_human_review = True
 
+        if self.profiler is not None:
+            try:
+                await asyncio.to_thread(self.profiler.report)
+            except Exception as err:
+                log.warning(f"Failed to report the profile of run '{self.run_id}'", exc_info=err)
+
     def end(self) -> None:
         asyncio.run_coroutine_threadsafe(self.async_end(), global_state.event_loop()).result()
 
+    def get_phase_stats(self) -> Optional[List[PhaseStats]]:
+        """
+        Returns the p50, p95 and max duration of each phase profiled so far, or None if the run isn't profiled.
+        """
+        return self.profiler.phase_stats() if self.profiler is not None else None
+
     async def async_create_human_review(
         self,
         *,
@@ -3,6 +3,7 @@ from typing import Optional
 
 from opentelemetry import trace
 from opentelemetry.baggage.propagation import W3CBaggagePropagator
+from opentelemetry.exporter.otlp.proto.http import Compression as OTLPCompression
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.propagate import set_global_textmap
 from opentelemetry.propagators.composite import CompositePropagator
@@ -12,22 +13,41 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.sdk.trace.export import SimpleSpanProcessor
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 
+from autoblocks._impl.compression import Compression
+from autoblocks._impl.compression import CompressionConfig
+from autoblocks._impl.compression import compression_config_from_env
 from autoblocks._impl.config.constants import API_ENDPOINT_V2
 from autoblocks._impl.global_state import init_auto_tracer as init_auto_tracer_global_state
 from autoblocks._impl.global_state import is_auto_tracer_initialized
+from autoblocks._impl.tracer.sampling import SamplingConfig
 from autoblocks._impl.tracer.span_processor import ExecutionIdSpanProcessor
 from autoblocks._impl.util import AutoblocksEnvVar
 
 log = logging.getLogger(__name__)
 
 
+def _otlp_compression(config: CompressionConfig) -> Optional[OTLPCompression]:
+    if config.algorithm == Compression.NONE:
+        # Let the exporter fall back to the standard OTEL_EXPORTER_OTLP_COMPRESSION environment variable
+        return None
+    return OTLPCompression.Gzip
+
+
 def init_auto_tracer(
     *,
     api_key: Optional[str] = None,
     is_batch_disabled: Optional[bool] = False,
+    compression: Optional[CompressionConfig] = None,
+    sampling: Optional[SamplingConfig] = None,
 ) -> None:
     """
     Initialize the OpenTelemetry auto tracer.
+
+    Compression defaults to the AUTOBLOCKS_COMPRESSION environment variable. The OTLP exporter only
+    supports gzip and compresses every request, so zstd is sent as gzip and min_bytes is ignored.
+
+    If sampling is set, trace_app only records a fraction of executions. Spans started inside a dropped
+    execution are dropped too.
     """
     if is_auto_tracer_initialized():
         log.debug("Skipping auto tracer initialization because it is already initialized")
@@ -49,6 +69,7 @@ def init_auto_tracer(
     otlp_exporter = OTLPSpanExporter(
         endpoint=api_endpoint,
         headers={"Authorization": f"Bearer {loaded_api_key}"},
+        compression=_otlp_compression(compression or compression_config_from_env()),
     )
 
     # Create a resource to identify your service (using the semantic 'service.name' attribute)
@@ -65,4 +86,4 @@ def init_auto_tracer(
     # Set the global tracer provider
     trace.set_tracer_provider(provider)
     log.debug("Autoblocks auto tracer initialized")
-    init_auto_tracer_global_state()
+    init_auto_tracer_global_state(sampling=sampling)
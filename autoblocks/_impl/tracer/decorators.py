@@ -1,20 +1,113 @@
 import asyncio
+import contextlib
 import functools
+import random
+import time
 from typing import Any
 from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Tuple
 
 from opentelemetry import trace
 from opentelemetry.baggage import set_baggage
+from opentelemetry.context import Context
 from opentelemetry.context import attach
 from opentelemetry.context import detach
 from opentelemetry.context import get_current
+from opentelemetry.trace import NonRecordingSpan
+from opentelemetry.trace import SpanContext
+from opentelemetry.trace import Status
+from opentelemetry.trace import StatusCode
+from opentelemetry.trace import TraceFlags
 
+from autoblocks._impl import global_state
 from autoblocks._impl.context_vars import test_case_run_context_var
+from autoblocks._impl.tracer.sampling import is_sampled
 from autoblocks._impl.tracer.util import SpanAttribute
 from autoblocks._impl.util import cuid_generator
 from autoblocks._impl.util import serialize_to_string
 
 
+def _is_sampled_out(app_slug: str, execution_id: str) -> bool:
+    sampling = global_state.auto_tracer_sampling()
+    return sampling is not None and not is_sampled(sampling, message=app_slug, key=execution_id)
+
+
+def _sampled_out_context(ctx: Context) -> Context:
+    """
+    Makes spans started inside a sampled out execution non-recording. With the default parent-based
+    sampler, child spans of a parent that isn't sampled aren't recorded either, so nothing gets exported.
+    """
+    span_context = SpanContext(
+        trace_id=random.getrandbits(128),
+        span_id=random.getrandbits(64),
+        is_remote=False,
+        trace_flags=TraceFlags(TraceFlags.DEFAULT),
+    )
+    return trace.set_span_in_context(NonRecordingSpan(span_context), ctx)
+
+
+@contextlib.contextmanager
+def _sampled_out_execution(
+    *,
+    ctx: Context,
+    app_slug: str,
+    environment: str,
+    execution_id: str,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+) -> Iterator[None]:
+    """
+    Runs a sampled out execution without recording spans. If it raises, its root span is recorded
+    after the fact so that errors are always kept.
+    """
+    start_time = time.time_ns()
+    token = attach(_sampled_out_context(ctx))
+    try:
+        yield
+    except Exception as err:
+        _record_sampled_out_error(
+            ctx=ctx,
+            app_slug=app_slug,
+            environment=environment,
+            execution_id=execution_id,
+            start_time=start_time,
+            args=args,
+            kwargs=kwargs,
+            error=err,
+        )
+        raise
+    finally:
+        detach(token)
+
+
+def _record_sampled_out_error(
+    *,
+    ctx: Context,
+    app_slug: str,
+    environment: str,
+    execution_id: str,
+    start_time: int,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    error: BaseException,
+) -> None:
+    sampling = global_state.auto_tracer_sampling()
+    if sampling is None or not sampling.always_keep_errors:
+        return
+    tracer = trace.get_tracer("AUTOBLOCKS_TRACER")
+    span = tracer.start_span(app_slug, context=ctx, start_time=start_time)
+    span.set_attribute(SpanAttribute.IS_ROOT, True)
+    span.set_attribute(SpanAttribute.EXECUTION_ID, execution_id)
+    span.set_attribute(SpanAttribute.ENVIRONMENT, environment)
+    span.set_attribute(SpanAttribute.APP_SLUG, app_slug)
+    span.set_attribute(SpanAttribute.INPUT, serialize_to_string({"args": args, "kwargs": kwargs}))
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+    span.end()
+
+
 def trace_app(app_slug: str, environment: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """
     Decorator that wraps a function call in a new span with baggage attributes.
@@ -38,6 +131,18 @@ def trace_app(app_slug: str, environment: str) -> Callable[[Callable[..., Any]],
                 ctx = set_baggage(SpanAttribute.ENVIRONMENT, environment, context=ctx)
                 ctx = set_baggage(SpanAttribute.APP_SLUG, app_slug, context=ctx)
 
+                if _is_sampled_out(app_slug, execution_id):
+                    # Skip creating spans and serializing the input and output entirely
+                    with _sampled_out_execution(
+                        ctx=ctx,
+                        app_slug=app_slug,
+                        environment=environment,
+                        execution_id=execution_id,
+                        args=args,
+                        kwargs=kwargs,
+                    ):
+                        return await fn(*args, **kwargs)
+
                 tracer = trace.get_tracer("AUTOBLOCKS_TRACER")
                 token = attach(ctx)
                 with tracer.start_as_current_span(app_slug, context=ctx) as span:
@@ -73,6 +178,18 @@ def trace_app(app_slug: str, environment: str) -> Callable[[Callable[..., Any]],
                 ctx = set_baggage(SpanAttribute.ENVIRONMENT, environment, context=ctx)
                 ctx = set_baggage(SpanAttribute.APP_SLUG, app_slug, context=ctx)
 
+                if _is_sampled_out(app_slug, execution_id):
+                    # Skip creating spans and serializing the input and output entirely
+                    with _sampled_out_execution(
+                        ctx=ctx,
+                        app_slug=app_slug,
+                        environment=environment,
+                        execution_id=execution_id,
+                        args=args,
+                        kwargs=kwargs,
+                    ):
+                        return fn(*args, **kwargs)
+
                 tracer = trace.get_tracer("AUTOBLOCKS_TRACER")
                 token = attach(ctx)
                 with tracer.start_as_current_span(app_slug, context=ctx) as span:
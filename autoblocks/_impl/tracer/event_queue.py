@@ -0,0 +1,163 @@
+import asyncio
+import collections
+import dataclasses
+import logging
+import random
+import threading
+from datetime import timedelta
+from typing import Any
+from typing import Callable
+from typing import Coroutine
+from typing import Deque
+from typing import Optional
+
+from autoblocks._impl import global_state
+from autoblocks._impl.util import StrEnum
+from autoblocks._impl.util import get_running_loop
+
+log = logging.getLogger(__name__)
+
+QueueItem = Callable[[], Coroutine[Any, Any, None]]
+
+
+class OverflowPolicy(StrEnum):
+    # Wait up to QueueConfig.block_timeout for space, then drop the new event
+    BLOCK = "block"
+    # Drop the new event
+    DROP_NEWEST = "drop_newest"
+    # Drop the oldest queued event to make room for the new one
+    DROP_OLDEST = "drop_oldest"
+    # Once the queue is half full, admit new events with a probability that
+    # shrinks linearly to zero as the queue fills up
+    SAMPLE = "sample"
+
+
+@dataclasses.dataclass(frozen=True)
+class QueueConfig:
+    """
+    Bounds the number of events AutoblocksTracer holds in memory while they wait to be sent.
+    """
+
+    # Maximum number of events waiting to be processed
+    max_size: int = 10_000
+    # What to do with new events when the queue is full
+    overflow_policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST
+    # How long send_event waits for space when overflow_policy is BLOCK
+    block_timeout: timedelta = timedelta(seconds=1)
+    # Maximum number of events being evaluated and sent concurrently
+    max_in_flight: int = 100
+
+    def __post_init__(self) -> None:
+        if self.max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if self.max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+
+@dataclasses.dataclass(frozen=True)
+class QueueStats:
+    # Total number of events accepted into the queue
+    enqueued: int
+    # Total number of events dropped because the queue was full
+    dropped: int
+    # Number of events currently waiting in the queue
+    pending: int
+
+
+class EventQueue:
+    """
+    A bounded queue between the threads calling send_event and the background event loop.
+
+    Producers can be on any thread. A drain task is started on the background event loop
+    whenever the queue goes from empty to non-empty and runs until the queue is empty again.
+    The drain task is registered as a background task so that `flush()` waits for it.
+    """
+
+    def __init__(self, config: QueueConfig, owner: Optional[object] = None) -> None:
+        self._config = config
+        self._owner = owner
+        self._items: Deque[QueueItem] = collections.deque()
+        self._not_full = threading.Condition()
+        self._draining = False
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._enqueued = 0
+        self._dropped = 0
+
+    @property
+    def stats(self) -> QueueStats:
+        with self._not_full:
+            return QueueStats(enqueued=self._enqueued, dropped=self._dropped, pending=len(self._items))
+
+    def put(self, item: QueueItem) -> bool:
+        """
+        Adds an item to the queue, applying the overflow policy if the queue is full.
+        Returns False if the item was dropped.
+        """
+        with self._not_full:
+            if not self._admit():
+                self._dropped += 1
+                return False
+            self._items.append(item)
+            self._enqueued += 1
+            start_draining = not self._draining
+            self._draining = True
+
+        if start_draining:
+            task = asyncio.run_coroutine_threadsafe(self._drain(), global_state.event_loop())
+            global_state.add_background_task(task, owner=self._owner)
+        return True
+
+    def _admit(self) -> bool:
+        """
+        Must be called with the lock held. Returns True if there is room for a new item.
+        """
+        size = len(self._items)
+        max_size = self._config.max_size
+        policy = self._config.overflow_policy
+
+        if policy == OverflowPolicy.SAMPLE and size >= max_size / 2:
+            return random.random() < (max_size - size) / (max_size / 2)
+
+        if size < max_size:
+            return True
+
+        if policy == OverflowPolicy.DROP_OLDEST:
+            self._items.popleft()
+            self._dropped += 1
+            return True
+
+        if policy == OverflowPolicy.BLOCK:
+            if get_running_loop() is global_state.event_loop():
+                # Blocking the background loop would deadlock since it's the one draining the queue
+                return False
+            return self._not_full.wait_for(
+                lambda: len(self._items) < max_size,
+                timeout=self._config.block_timeout.total_seconds(),
+            )
+
+        return False
+
+    async def _drain(self) -> None:
+        if self._in_flight is None:
+            # Created here so that it's bound to the background event loop
+            self._in_flight = asyncio.Semaphore(self._config.max_in_flight)
+        in_flight = self._in_flight
+        tasks: set[asyncio.Task[None]] = set()
+
+        while True:
+            await in_flight.acquire()
+            with self._not_full:
+                if not self._items:
+                    self._draining = False
+                    in_flight.release()
+                    break
+                item = self._items.popleft()
+                self._not_full.notify()
+
+            task = asyncio.get_running_loop().create_task(item())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: in_flight.release())
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,119 @@
+import asyncio
+import dataclasses
+import logging
+from datetime import timedelta
+from typing import Any
+from typing import Callable
+from typing import Coroutine
+from typing import List
+from typing import Optional
+
+from autoblocks._impl import global_state
+from autoblocks._impl.encoding import encode_json
+
+log = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchConfig:
+    """
+    Controls how AutoblocksTracer coalesces events into bulk ingestion requests.
+    A batch is sent as soon as any one of these limits is reached.
+    """
+
+    # Maximum number of events sent in a single request
+    max_batch_size: int = 100
+    # Maximum size of the encoded events sent in a single request
+    max_batch_bytes: int = 1_000_000
+    # Maximum amount of time an event waits in the buffer before its batch is sent
+    max_linger: timedelta = timedelta(milliseconds=200)
+
+    def __post_init__(self) -> None:
+        if self.max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if self.max_batch_bytes < 1:
+            raise ValueError("max_batch_bytes must be at least 1")
+
+
+def encode_batch(records: List[bytes]) -> bytes:
+    """
+    Builds the body of a bulk ingestion request from already-encoded events.
+    """
+    return b'{"events":[' + b",".join(records) + b"]}"
+
+
+class BatchingExporter:
+    """
+    Buffers events on the background event loop and sends them to the ingestion API in bulk.
+
+    Everything except `request_flush` must be called from the background event loop.
+    Sends and linger timers are registered as background tasks so that `flush()` waits for them.
+    """
+
+    def __init__(
+        self,
+        config: BatchConfig,
+        send: Callable[[List[bytes]], Coroutine[Any, Any, None]],
+        owner: Optional[object] = None,
+    ) -> None:
+        self._config = config
+        self._send = send
+        self._owner = owner
+        self._buffer: List[bytes] = []
+        self._buffer_bytes = 0
+        self._linger_task: Optional[asyncio.Task[None]] = None
+        global_state.add_flush_listener(self.request_flush)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def add(self, record: dict[str, Any]) -> None:
+        encoded = encode_json(record)
+        if self._buffer and self._buffer_bytes + len(encoded) > self._config.max_batch_bytes:
+            # Adding this event would go over the byte limit, so send what we have first
+            self._send_buffer()
+
+        self._buffer.append(encoded)
+        self._buffer_bytes += len(encoded)
+
+        if len(self._buffer) >= self._config.max_batch_size or self._buffer_bytes >= self._config.max_batch_bytes:
+            self._send_buffer()
+        elif global_state.is_flushing():
+            # Don't wait for the linger timer while flushing, but still give other
+            # events that are ready in this iteration of the loop a chance to join the batch.
+            asyncio.get_running_loop().call_soon(self._send_buffer)
+        elif self._linger_task is None:
+            self._linger_task = asyncio.get_running_loop().create_task(self._linger())
+            global_state.add_background_task(self._linger_task, owner=self._owner)
+
+    def request_flush(self) -> None:
+        """
+        Sends whatever is buffered without waiting for the linger timer. Safe to call from any thread.
+        """
+        try:
+            global_state.event_loop().call_soon_threadsafe(self._send_buffer)
+        except RuntimeError:
+            # The event loop has already been closed
+            log.debug("Unable to flush batched events because the event loop is closed.")
+
+    async def _linger(self) -> None:
+        await asyncio.sleep(self._config.max_linger.total_seconds())
+        self._linger_task = None
+        self._send_buffer()
+
+    def _send_buffer(self) -> None:
+        if self._linger_task is not None:
+            self._linger_task.cancel()
+            self._linger_task = None
+
+        if not self._buffer:
+            return
+
+        records = self._buffer
+        log.debug(f"Sending batch of {len(records)} events ({self._buffer_bytes} bytes)")
+        self._buffer = []
+        self._buffer_bytes = 0
+
+        task = asyncio.get_running_loop().create_task(self._send(records))
+        global_state.add_background_task(task, owner=self._owner)
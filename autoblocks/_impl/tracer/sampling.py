@@ -0,0 +1,64 @@
+import dataclasses
+import hashlib
+import random
+from typing import Any
+from typing import Callable
+from typing import Mapping
+from typing import Optional
+
+# Hash values are 64-bit integers mapped onto [0, 1)
+_HASH_SPACE = float(2**64)
+
+
+def has_error_property(message: str, properties: Optional[Mapping[str, Any]]) -> bool:
+    """
+    Whether an AutoblocksTracer event reports an error with a truthy "error" property, e.g. the exception's message.
+    """
+    return bool(properties and properties.get("error"))
+
+
+@dataclasses.dataclass(frozen=True)
+class SamplingConfig:
+    """
+    Head sampling for AutoblocksTracer and trace_app.
+
+    Whether a trace is kept is a deterministic hash of its trace ID (AutoblocksTracer) or execution ID
+    (trace_app), so every event in a trace is kept or dropped together, even across processes.
+    Events sent without a trace ID are sampled independently.
+    """
+
+    # Fraction of traces to keep, between 0 and 1
+    rate: float = 1.0
+    # Overrides `rate` for specific event messages (AutoblocksTracer) or app slugs (trace_app)
+    message_rates: Mapping[str, float] = dataclasses.field(default_factory=dict)
+    # If true, error events and trace_app calls that raise are always kept
+    always_keep_errors: bool = True
+    # Decides which AutoblocksTracer events are errors from their message and properties.
+    # Defaults to events whose properties have a truthy "error" key.
+    is_error_event: Callable[[str, Optional[Mapping[str, Any]]], bool] = has_error_property
+
+    def __post_init__(self) -> None:
+        for rate in [self.rate, *self.message_rates.values()]:
+            if not 0 <= rate <= 1:
+                raise ValueError(f"Sampling rates must be between 0 and 1, got {rate}")
+
+    def rate_for(self, message: str) -> float:
+        return self.message_rates.get(message, self.rate)
+
+
+def hash_to_unit_interval(key: str) -> float:
+    """
+    Maps a key onto [0, 1) the same way in every process, unlike the built-in hash().
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / _HASH_SPACE
+
+
+def is_sampled(config: SamplingConfig, message: str, key: Optional[str]) -> bool:
+    rate = config.rate_for(message)
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    value = hash_to_unit_interval(key) if key else random.random()
+    return value < rate
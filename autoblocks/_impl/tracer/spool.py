@@ -0,0 +1,350 @@
+import asyncio
+import dataclasses
+import hashlib
+import logging
+import os
+import random
+import shutil
+import sys
+import threading
+import uuid
+from datetime import timedelta
+from typing import IO
+from typing import Any
+from typing import Callable
+from typing import Coroutine
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import httpx
+
+from autoblocks._impl import global_state
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+log = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+LOCK_FILE_NAME = "lock"
+
+
+@dataclasses.dataclass(frozen=True)
+class SpoolConfig:
+    """
+    Configures the on-disk spool AutoblocksTracer writes events to when they can't be delivered.
+    Spooled events are replayed in the background once the ingestion API is reachable again,
+    including by a new process started with the same directory.
+    """
+
+    # Directory the segment files are written to. Processes sharing a directory each write to their
+    # own subdirectory, and take over the subdirectories of processes that exited without replaying them.
+    directory: str
+    # Segments are rotated before they grow past this size. Each segment is replayed in a single request.
+    max_segment_bytes: int = 1_000_000
+    # Oldest segments are deleted once the spool grows past this size
+    max_total_bytes: int = 100_000_000
+    # Delay before the first replay attempt after a failure; doubles on every failure
+    initial_backoff: timedelta = timedelta(seconds=1)
+    max_backoff: timedelta = timedelta(minutes=5)
+
+    def __post_init__(self) -> None:
+        if self.max_segment_bytes < 1:
+            raise ValueError("max_segment_bytes must be at least 1")
+        if self.max_total_bytes < self.max_segment_bytes:
+            raise ValueError("max_total_bytes must be at least max_segment_bytes")
+
+
+class PartialDeliveryError(Exception):
+    """
+    Raised when some of the events sent together failed delivery, so that only those are spooled or replayed again.
+    """
+
+    def __init__(self, failures: List[Tuple[bytes, BaseException]]) -> None:
+        super().__init__(f"Failed to deliver {len(failures)} events: {failures[0][1]}")
+        # (encoded event, error) of every event that failed
+        self.failures = failures
+
+
+def failed_records(err: BaseException, records: List[bytes]) -> List[Tuple[bytes, BaseException]]:
+    """
+    Returns the events that failed delivery when sending `records` raised `err`, with the error each failed with.
+    """
+    if isinstance(err, PartialDeliveryError):
+        return err.failures
+    return [(record, err) for record in records]
+
+
+def is_retryable_error(err: BaseException) -> bool:
+    """
+    Whether a failed delivery is worth spooling and retrying later.
+    Client errors other than rate limiting won't succeed on retry, so they aren't spooled.
+    """
+    if isinstance(err, httpx.HTTPStatusError):
+        return err.response.status_code == 429 or err.response.status_code >= 500
+    return isinstance(err, httpx.TransportError)
+
+
+def _try_lock(directory: str) -> Optional[IO[bytes]]:
+    """
+    Takes an exclusive lock on the directory's lock file without blocking.
+    Returns the open lock file, or None if another spool holds the lock.
+    The lock is released when the file is closed, including when its process exits.
+    """
+    f = open(os.path.join(directory, LOCK_FILE_NAME), "a+b")
+    try:
+        if sys.platform == "win32":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _segment_name(sequence: int) -> str:
+    return f"{SEGMENT_PREFIX}{sequence:012d}{SEGMENT_SUFFIX}"
+
+
+def _segment_sequence_numbers(directory: str) -> List[int]:
+    sequences = []
+    for name in os.listdir(directory):
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+            try:
+                sequences.append(int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]))
+            except ValueError:
+                continue
+    return sorted(sequences)
+
+
+class EventSpool:
+    """
+    An append-only log of encoded events split across segment files named by sequence number.
+
+    The spool writes to its own subdirectory of the key directory, which it holds a lock on
+    for as long as it's open. When it's created, it takes over the segments of any other
+    subdirectory whose lock isn't held, i.e. the ones left behind by processes that exited.
+
+    Methods other than the constructor and `close()` must be called from the background event loop.
+    They do their file IO in a thread so that they don't block the event loop.
+    The drainer is deliberately not registered as a background task so that `flush()`
+    doesn't wait for an outage to end.
+    """
+
+    def __init__(
+        self,
+        config: SpoolConfig,
+        key_directory: str,
+        send: Callable[[List[bytes]], Coroutine[Any, Any, None]],
+    ) -> None:
+        self._config = config
+        self._send = send
+        self._drainer: Optional[asyncio.Task[None]] = None
+        # Guards the active sequence number and the segment files against concurrent appends and replays
+        self._lock = threading.Lock()
+        os.makedirs(key_directory, exist_ok=True)
+        self._directory, self._lock_file = self._acquire_directory(key_directory)
+        self._adopt_orphaned_segments(key_directory)
+        segments = _segment_sequence_numbers(self._directory)
+        self._active_sequence = segments[-1] + 1 if segments else 0
+
+    def _acquire_directory(self, key_directory: str) -> Tuple[str, IO[bytes]]:
+        # Reuse a directory left behind by a previous process so that its segments keep their order
+        for name in sorted(os.listdir(key_directory)):
+            directory = os.path.join(key_directory, name)
+            if not os.path.isdir(directory):
+                continue
+            lock_file = _try_lock(directory)
+            if lock_file is not None:
+                return directory, lock_file
+        while True:
+            directory = os.path.join(key_directory, uuid.uuid4().hex)
+            os.makedirs(directory, exist_ok=True)
+            lock_file = _try_lock(directory)
+            if lock_file is not None:
+                return directory, lock_file
+
+    def _adopt_orphaned_segments(self, key_directory: str) -> None:
+        for name in sorted(os.listdir(key_directory)):
+            directory = os.path.join(key_directory, name)
+            if directory == self._directory or not os.path.isdir(directory):
+                continue
+            lock_file = _try_lock(directory)
+            if lock_file is None:
+                # Another running process owns it
+                continue
+            try:
+                own_segments = _segment_sequence_numbers(self._directory)
+                next_sequence = own_segments[-1] + 1 if own_segments else 0
+                for sequence in _segment_sequence_numbers(directory):
+                    os.replace(
+                        os.path.join(directory, _segment_name(sequence)),
+                        os.path.join(self._directory, _segment_name(next_sequence)),
+                    )
+                    next_sequence += 1
+            finally:
+                lock_file.close()
+            shutil.rmtree(directory, ignore_errors=True)
+            log.debug(f"Took over spooled events left behind in {directory}")
+
+    @property
+    def pending_bytes(self) -> int:
+        with self._lock:
+            return sum(os.path.getsize(self._segment_path(seq)) for seq in _segment_sequence_numbers(self._directory))
+
+    def _segment_path(self, sequence: int) -> str:
+        return os.path.join(self._directory, _segment_name(sequence))
+
+    async def append(self, records: List[bytes]) -> None:
+        """
+        Writes events that failed delivery to the active segment and makes sure the drainer is running.
+        """
+        if not records:
+            return
+        await asyncio.to_thread(self._write, records)
+        self.ensure_draining()
+
+    def _write(self, records: List[bytes]) -> None:
+        data = b"".join(record + b"\n" for record in records)
+        with self._lock:
+            path = self._segment_path(self._active_sequence)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size and size + len(data) > self._config.max_segment_bytes:
+                # Rotate first so that the newest events are in the active segment, which is never dropped
+                self._active_sequence += 1
+                path = self._segment_path(self._active_sequence)
+            with open(path, "ab") as f:
+                f.write(data)
+            log.debug(f"Spooled {len(records)} events to {path}")
+
+            self._enforce_max_total_bytes()
+
+    def _enforce_max_total_bytes(self) -> None:
+        segments = _segment_sequence_numbers(self._directory)
+        sizes = {seq: os.path.getsize(self._segment_path(seq)) for seq in segments}
+        total = sum(sizes.values())
+        for seq in segments:
+            if total <= self._config.max_total_bytes:
+                break
+            if seq == self._active_sequence:
+                continue
+            log.warning(f"Event spool is over {self._config.max_total_bytes} bytes, dropping its oldest segment.")
+            os.remove(self._segment_path(seq))
+            total -= sizes[seq]
+
+    def ensure_draining(self) -> None:
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.get_running_loop().create_task(self._drain())
+
+    def close(self) -> None:
+        """
+        Stops replaying and releases the spool's directory so that another spool can take it over.
+        """
+        if self._drainer:
+            global_state.event_loop().call_soon_threadsafe(self._drainer.cancel)
+        self._lock_file.close()
+
+    def _read_oldest_segment(self) -> Optional[Tuple[str, List[bytes]]]:
+        with self._lock:
+            segments = _segment_sequence_numbers(self._directory)
+            if not segments:
+                return None
+            if segments[0] == self._active_sequence:
+                # Rotate so that new failures don't get appended to the segment being replayed
+                self._active_sequence += 1
+            path = self._segment_path(segments[0])
+            with open(path, "rb") as f:
+                return path, [line for line in f.read().split(b"\n") if line]
+
+    def _remove(self, path: str) -> None:
+        with self._lock:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Dropped by _enforce_max_total_bytes while it was being replayed
+                pass
+
+    def _rewrite(self, path: str, records: List[bytes]) -> None:
+        """
+        Replaces a segment's events with the ones that still need to be replayed.
+        """
+        if not records:
+            self._remove(path)
+            return
+        with self._lock:
+            if not os.path.exists(path):
+                # Dropped by _enforce_max_total_bytes while it was being replayed
+                return
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(record + b"\n" for record in records))
+            os.replace(tmp_path, path)
+
+    async def _drain(self) -> None:
+        backoff = self._config.initial_backoff.total_seconds()
+        while True:
+            segment = await asyncio.to_thread(self._read_oldest_segment)
+            if segment is None:
+                return
+            path, records = segment
+
+            try:
+                if records:
+                    await self._send(records)
+            except Exception as err:
+                failures = failed_records(err, records)
+                retryable = [record for record, record_err in failures if is_retryable_error(record_err)]
+                if len(retryable) < len(failures):
+                    log.error(
+                        f"Dropping {len(failures) - len(retryable)} spooled events from {path} "
+                        f"that were rejected by Autoblocks: {err}"
+                    )
+                if len(retryable) < len(records):
+                    # Don't send the events that were delivered or rejected again
+                    await asyncio.to_thread(self._rewrite, path, retryable)
+                if not retryable:
+                    continue
+                # Full jitter so that many processes recovering at once don't retry in lockstep
+                delay = random.uniform(0, backoff)
+                log.debug(f"Failed to replay spooled events, retrying in {delay:.2f}s: {err}")
+                await asyncio.sleep(delay)
+                backoff = min(backoff * 2, self._config.max_backoff.total_seconds())
+                continue
+
+            log.debug(f"Replayed {len(records)} spooled events from {path}")
+            await asyncio.to_thread(self._remove, path)
+            backoff = self._config.initial_backoff.total_seconds()
+
+
+_spools: dict[Tuple[str, str], EventSpool] = {}  # (directory, ingestion key digest) -> spool
+
+
+def get_or_create_spool(
+    config: SpoolConfig,
+    ingestion_key: str,
+    send: Callable[[List[bytes]], Coroutine[Any, Any, None]],
+) -> EventSpool:
+    """
+    Tracers configured with the same directory and ingestion key share a spool so that only one drainer
+    replays its segments. Events are spooled per ingestion key so that they're replayed with the key
+    they were sent with; the key's digest names its directory so the key itself isn't written to disk.
+    Starts replaying any segments left behind by a previous process.
+    """
+    directory = os.path.abspath(config.directory)
+    key_digest = hashlib.sha256(ingestion_key.encode("utf-8")).hexdigest()[:16]
+    spool = _spools.get((directory, key_digest))
+    if spool is None:
+        spool = EventSpool(
+            config=dataclasses.replace(config, directory=directory),
+            key_directory=os.path.join(directory, key_digest),
+            send=send,
+        )
+        _spools[(directory, key_digest)] = spool
+        global_state.event_loop().call_soon_threadsafe(spool.ensure_draining)
+    return spool
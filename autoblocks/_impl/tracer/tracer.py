@@ -1,6 +1,7 @@
 import asyncio
 import contextvars
 import dataclasses
+import functools
 import inspect
 import logging
 import uuid
@@ -13,20 +14,46 @@ from typing import Sequence
 from typing import Tuple
 from typing import Union
 
+import httpx
+
 from autoblocks._impl import global_state
+from autoblocks._impl.compression import CompressionConfig
+from autoblocks._impl.compression import compress_body
+from autoblocks._impl.compression import compression_config_from_env
+from autoblocks._impl.config.constants import INGESTION_BATCH_ENDPOINT
 from autoblocks._impl.config.constants import INGESTION_ENDPOINT
 from autoblocks._impl.context_vars import test_case_run_context_var
+from autoblocks._impl.encoding import JSON_HEADERS
+from autoblocks._impl.encoding import acompress_body
+from autoblocks._impl.encoding import encode_json
 from autoblocks._impl.testing.models import BaseEventEvaluator
 from autoblocks._impl.testing.models import Evaluation
 from autoblocks._impl.testing.models import HumanReviewField
 from autoblocks._impl.testing.models import TracerEvent
 from autoblocks._impl.testing.util import serialize_human_review_fields
+from autoblocks._impl.tracer.event_queue import EventQueue
+from autoblocks._impl.tracer.event_queue import QueueConfig
+from autoblocks._impl.tracer.event_queue import QueueStats
+from autoblocks._impl.tracer.exporter import BatchConfig
+from autoblocks._impl.tracer.exporter import BatchingExporter
+from autoblocks._impl.tracer.exporter import encode_batch
+from autoblocks._impl.tracer.sampling import SamplingConfig
+from autoblocks._impl.tracer.sampling import is_sampled
+from autoblocks._impl.tracer.spool import EventSpool
+from autoblocks._impl.tracer.spool import PartialDeliveryError
+from autoblocks._impl.tracer.spool import SpoolConfig
+from autoblocks._impl.tracer.spool import failed_records
+from autoblocks._impl.tracer.spool import get_or_create_spool
+from autoblocks._impl.tracer.spool import is_retryable_error
 from autoblocks._impl.util import AutoblocksEnvVar
 from autoblocks._impl.util import all_settled
 from autoblocks._impl.util import now_iso_8601
 
 log = logging.getLogger(__name__)
 
+# Statuses of bulk ingestion requests that mean the endpoint isn't available, so events are sent one at a time
+BATCH_UNSUPPORTED_STATUS_CODES = (404, 405)
+
 
 @dataclasses.dataclass(frozen=True)
 class Payload:
@@ -71,6 +98,21 @@ class AutoblocksTracer:
         # If true, the tracer will not send events to Autoblocks
         # and instead log them with log.info.
         dry_run: bool = False,
+        # If set, events are buffered and sent to Autoblocks in bulk requests
+        # instead of one request per event.
+        batch: Optional[BatchConfig] = None,
+        # If set, events waiting to be sent are held in a bounded queue and events
+        # that don't fit are handled according to the queue's overflow policy.
+        queue: Optional[QueueConfig] = None,
+        # If set, events that can't be delivered because of network errors or server errors
+        # are written to disk and replayed in the background once Autoblocks is reachable.
+        spool: Optional[SpoolConfig] = None,
+        # Compression for request bodies sent to Autoblocks. Defaults to the
+        # AUTOBLOCKS_COMPRESSION and AUTOBLOCKS_COMPRESSION_MIN_BYTES environment variables.
+        compression: Optional[CompressionConfig] = None,
+        # If set, only a fraction of traces are sent to Autoblocks. Events from dropped traces
+        # are discarded before any work is done to build or send them.
+        sampling: Optional[SamplingConfig] = None,
     ):
         global_state.init()  # Start up event loop if not already started
         self._trace_id: Optional[str] = trace_id
@@ -89,6 +131,23 @@ class AutoblocksTracer:
         self._timeout_seconds = timeout.total_seconds()
         self._dry_run = dry_run
         self._throw_on_error = AutoblocksEnvVar.TRACER_THROW_ON_ERROR.get() == "1"
+        self._compression = compression or compression_config_from_env()
+        self._sampling = sampling
+        self._batch_endpoint_supported = True
+        self._exporter: Optional[BatchingExporter] = (
+            BatchingExporter(config=batch, send=self._send_batch, owner=self) if batch and not dry_run else None
+        )
+        self._queue: Optional[EventQueue] = EventQueue(config=queue, owner=self) if queue else None
+        # Spooled events are replayed the same way they were sent: in bulk if batching, otherwise one at a time
+        self._spool: Optional[EventSpool] = (
+            get_or_create_spool(
+                config=spool,
+                ingestion_key=ingestion_key,
+                send=self._send_records if self._exporter else self._send_individually,
+            )
+            if spool and ingestion_key and not dry_run
+            else None
+        )
 
     def set_trace_id(self, trace_id: str) -> None:
         """
@@ -103,6 +162,38 @@ class AutoblocksTracer:
         """
         return self._trace_id
 
+    @property
+    def queue_stats(self) -> Optional[QueueStats]:
+        """
+        Get the enqueued and dropped event counters if the tracer was configured with a queue.
+        """
+        return self._queue.stats if self._queue else None
+
+    def _is_sampled(self, message: str, trace_id: Optional[str], properties: Optional[Dict[str, Any]]) -> bool:
+        if not self._sampling or test_case_run_context_var.get() is not None:
+            # Events sent during a test run are never sampled out
+            return True
+        if self._sampling.always_keep_errors and self._sampling.is_error_event(message, properties):
+            return True
+        return is_sampled(self._sampling, message=message, key=trace_id or self._trace_id)
+
+    def flush(self, timeout: Optional[timedelta] = None) -> None:
+        """
+        Wait for the events sent by this tracer to be delivered. Unlike the module-level `flush()`,
+        this doesn't wait for other tracers' events.
+        """
+        if self._exporter:
+            self._exporter.request_flush()
+        global_state.flush(timeout=timeout, owner=self)
+
+    async def aflush(self, timeout: Optional[timedelta] = None) -> None:
+        """
+        Like `flush()`, but can be awaited from an async application without blocking its event loop.
+        """
+        if self._exporter:
+            self._exporter.request_flush()
+        await global_state.aflush(timeout=timeout, owner=self)
+
     def set_properties(self, properties: Dict[Any, Any]) -> None:
         """
         Set the properties for all events sent by this tracer.
@@ -228,29 +319,13 @@ class AutoblocksTracer:
             if self._dry_run:
                 log.info(payload.to_json())
                 return
-            if global_state.main_thread_has_finished():
-                # If we're in a shutdown state, we need to use the sync client
-                # to avoid scheduling new futures after the interpreter has shut down.
-                # There is a race condition that can happen where the main thread finishes right as we check
-                # This happens in our async_script e2e test, so we have to use flush()
-                # See https://github.com/boto/boto3/issues/3113
-                log.debug("Sending event with SYNC client because interpreter has shut down")
-                req = global_state.sync_http_client().post(
-                    url=INGESTION_ENDPOINT,
-                    json=payload.to_json(),
-                    headers=self._client_headers,
-                    timeout=self._timeout_seconds,
-                )
-            else:
-                log.debug("Sending event with ASYNC client")
-                req = await global_state.http_client().post(
-                    url=INGESTION_ENDPOINT,
-                    json=payload.to_json(),
-                    headers=self._client_headers,
-                    timeout=self._timeout_seconds,
-                )
-            req.raise_for_status()
+            if self._exporter:
+                self._exporter.add(payload.to_json())
+                return
+            await self._post(url=INGESTION_ENDPOINT, content=encode_json(payload.to_json()))
         except Exception as err:
+            if await self._spool_on_failure(err, [encode_json(payload.to_json())]):
+                return
             # Since we don't call task.result() in the caller of this function,
             # we need to catch and log errors here in order for them to be
             # seen.
@@ -258,6 +333,92 @@ class AutoblocksTracer:
             if self._throw_on_error:
                 raise err
 
+    async def _spool_on_failure(self, err: Exception, records: List[bytes]) -> bool:
+        """
+        Writes the events that failed delivery to the spool if one is configured and their failure is retryable.
+        Returns True if every failed event was spooled.
+        """
+        if not self._spool:
+            return False
+        failures = failed_records(err, records)
+        retryable = [record for record, record_err in failures if is_retryable_error(record_err)]
+        if not retryable:
+            return False
+        try:
+            await self._spool.append(retryable)
+        except Exception as spool_err:
+            log.error(f"Failed to spool {len(retryable)} events: {spool_err}", exc_info=True)
+            return False
+        log.warning(f"Failed to send {len(retryable)} events to Autoblocks, they will be retried later: {err}")
+        # Events that won't succeed on retry are still reported
+        return len(retryable) == len(failures)
+
+    async def _send_records(self, records: List[bytes]) -> None:
+        """
+        Sends the events in one bulk request, or one request per event if the bulk endpoint isn't available.
+        """
+        if self._batch_endpoint_supported:
+            try:
+                await self._post(url=INGESTION_BATCH_ENDPOINT, content=encode_batch(records))
+                return
+            except httpx.HTTPStatusError as err:
+                if err.response.status_code not in BATCH_UNSUPPORTED_STATUS_CODES:
+                    raise
+                log.warning(
+                    f"Bulk ingestion isn't available ({err.response.status_code}), sending events one at a time"
+                )
+                self._batch_endpoint_supported = False
+
+        await self._send_individually(records)
+
+    async def _send_individually(self, records: List[bytes]) -> None:
+        """
+        Sends each event in its own request.
+        If some of the requests fail, a PartialDeliveryError with their events is raised after the others were sent.
+        """
+        results = await all_settled([self._post(url=INGESTION_ENDPOINT, content=record) for record in records])
+        failures = [(record, result) for record, result in zip(records, results) if isinstance(result, BaseException)]
+        if failures:
+            raise PartialDeliveryError(failures)
+
+    async def _send_batch(self, records: List[bytes]) -> None:
+        try:
+            await self._send_records(records)
+        except Exception as err:
+            if await self._spool_on_failure(err, records):
+                return
+            # Batches are sent from background tasks, so there is no caller to re-raise to.
+            log.error(f"Failed to send batch of events to Autoblocks: {err}", exc_info=True)
+
+    async def _post(self, url: str, content: bytes) -> None:
+        """
+        Sends an already-encoded JSON body to the ingestion API, compressing it if configured.
+        """
+        if global_state.main_thread_has_finished():
+            # If we're in a shutdown state, we need to use the sync client
+            # to avoid scheduling new futures after the interpreter has shut down.
+            # There is a race condition that can happen where the main thread finishes right as we check
+            # This happens in our async_script e2e test, so we have to use flush()
+            # See https://github.com/boto/boto3/issues/3113
+            log.debug("Sending event with SYNC client because interpreter has shut down")
+            content, encoding_headers = compress_body(content, self._compression)
+            req = global_state.sync_http_client().post(
+                url=url,
+                content=content,
+                headers={**self._client_headers, **JSON_HEADERS, **encoding_headers},
+                timeout=self._timeout_seconds,
+            )
+        else:
+            log.debug("Sending event with ASYNC client")
+            content, encoding_headers = await acompress_body(content, self._compression)
+            req = await global_state.http_client().post(
+                url=url,
+                content=content,
+                headers={**self._client_headers, **JSON_HEADERS, **encoding_headers},
+                timeout=self._timeout_seconds,
+            )
+        req.raise_for_status()
+
     def _sync_send_test_event_unsafe(
         self,
         payload: Payload,
@@ -319,6 +480,14 @@ class AutoblocksTracer:
         payload: Payload,
         evaluators: Optional[Sequence[BaseEventEvaluator]],
     ) -> None:
+        # With AUTOBLOCKS_TRACER_THROW_ON_ERROR set, events bypass the queue so that send failures are raised below
+        if self._queue and not self._throw_on_error:
+            # The coroutine isn't created until the event is taken off the queue,
+            # so dropped events cost nothing beyond the payload itself.
+            if not self._queue.put(functools.partial(self._async_send_event, payload=payload, evaluators=evaluators)):
+                log.debug(f"Dropped event '{payload.message}' because the tracer's queue is full")
+            return
+
         # Send the task to our background loop
         task = asyncio.run_coroutine_threadsafe(
             self._async_send_event(
@@ -331,7 +500,7 @@ class AutoblocksTracer:
         # Add the task to the set of tasks the
         # global state will wait to complete
         # on shutdown
-        global_state.add_background_task(task)
+        global_state.add_background_task(task, owner=self)
 
         if self._throw_on_error:
             # Wait for the result if AUTOBLOCKS_TRACER_THROW_ON_ERROR is set to true,
@@ -357,6 +526,9 @@ class AutoblocksTracer:
         Sends an event to the Autoblocks ingestion API.
         """
         try:
+            if self._sampling and not self._is_sampled(message=message, trace_id=trace_id, properties=properties):
+                return
+
             # Prepare request payload
             payload = self._make_request_payload(
                 message=message,
@@ -115,6 +115,12 @@ class AutoblocksEnvVar(StrEnum):
     TEST_RUN_MESSAGE = "AUTOBLOCKS_TEST_RUN_MESSAGE"
     DISABLE_GITHUB_COMMENT = "AUTOBLOCKS_DISABLE_GITHUB_COMMENT"
     PUBLIC_WEBAPP_UI_URL = "AUTOBLOCKS_PUBLIC_WEBAPP_UI_URL"
+    COMPRESSION = "AUTOBLOCKS_COMPRESSION"
+    COMPRESSION_MIN_BYTES = "AUTOBLOCKS_COMPRESSION_MIN_BYTES"
+    TEST_RUN_API_CONCURRENCY = "AUTOBLOCKS_TEST_RUN_API_CONCURRENCY"
+    TEST_RUN_API_MAX_CONCURRENCY = "AUTOBLOCKS_TEST_RUN_API_MAX_CONCURRENCY"
+    SHARD_INDEX = "AUTOBLOCKS_SHARD_INDEX"
+    SHARD_TOTAL = "AUTOBLOCKS_SHARD_TOTAL"
 
     def get(self) -> Optional[str]:
         return os.environ.get(self.value)
@@ -185,8 +191,8 @@ def is_cli_running() -> bool:
 
 def orjson_default(o: Any) -> Any:
     if hasattr(o, "model_dump_json") and callable(o.model_dump_json):
-        # pydantic v2
-        return orjson.loads(o.model_dump_json())
+        # pydantic v2. JSON mode gives the same result as parsing model_dump_json() without the round trip.
+        return o.model_dump(mode="json")
     elif hasattr(o, "json") and callable(o.json):
         # pydantic v1
         return orjson.loads(o.json())
@@ -1,3 +1,4 @@
+from autoblocks._impl.testing.models import AdaptiveRepetitionConfig
 from autoblocks._impl.testing.models import Assertion
 from autoblocks._impl.testing.models import BaseEvaluator
 from autoblocks._impl.testing.models import BaseEventEvaluator
@@ -17,6 +18,7 @@ from autoblocks._impl.testing.models import Threshold
 from autoblocks._impl.testing.models import TracerEvent
 
 __all__ = [
+    "AdaptiveRepetitionConfig",
     "Assertion",
     "BaseEvaluator",
     "BaseEventEvaluator",
@@ -1,5 +1,63 @@
 from autoblocks._impl.context_vars import grid_search_ctx
+from autoblocks._impl.limiter import ConcurrencyLimiterStats
+from autoblocks._impl.testing.api import get_api_concurrency_stats
+from autoblocks._impl.testing.batching import ResultBatchConfig
+from autoblocks._impl.testing.cache import CachedEvaluation
+from autoblocks._impl.testing.cache import DiskEvaluationCache
+from autoblocks._impl.testing.cache import EvaluationCache
+from autoblocks._impl.testing.cache import InMemoryEvaluationCache
+from autoblocks._impl.testing.cache import OutputCacheConfig
+from autoblocks._impl.testing.cache import OutputCacheStats
+from autoblocks._impl.testing.cache import invalidate_output_cache
+from autoblocks._impl.testing.durations import DurationStatsConfig
+from autoblocks._impl.testing.executor import ExecutionMode
+from autoblocks._impl.testing.executor import ExecutorStats
+from autoblocks._impl.testing.grid_search import GridSearchStats
+from autoblocks._impl.testing.grid_search import SuccessiveHalvingConfig
+from autoblocks._impl.testing.options import RunOptions
+from autoblocks._impl.testing.profiler import PhaseStats
+from autoblocks._impl.testing.profiler import ProfilerConfig
+from autoblocks._impl.testing.repetitions import RepetitionCount
+from autoblocks._impl.testing.run import get_executor_stats
+from autoblocks._impl.testing.run import get_grid_search_stats
+from autoblocks._impl.testing.run import get_output_cache_stats
+from autoblocks._impl.testing.run import get_phase_stats
+from autoblocks._impl.testing.run import get_repetition_counts
 from autoblocks._impl.testing.run import run_test_suite
 from autoblocks._impl.testing.run_manager import RunManager
+from autoblocks._impl.testing.sharding import ShardConfig
+from autoblocks._impl.testing.timeouts import TimeoutConfig
+from autoblocks._impl.testing.timeouts import TimeoutExceededError
 
-__all__ = ["run_test_suite", "grid_search_ctx", "RunManager"]
+__all__ = [
+    "run_test_suite",
+    "RunOptions",
+    "grid_search_ctx",
+    "RunManager",
+    "ExecutionMode",
+    "ExecutorStats",
+    "get_executor_stats",
+    "ResultBatchConfig",
+    "ConcurrencyLimiterStats",
+    "get_api_concurrency_stats",
+    "OutputCacheConfig",
+    "OutputCacheStats",
+    "get_output_cache_stats",
+    "invalidate_output_cache",
+    "EvaluationCache",
+    "InMemoryEvaluationCache",
+    "DiskEvaluationCache",
+    "CachedEvaluation",
+    "SuccessiveHalvingConfig",
+    "GridSearchStats",
+    "get_grid_search_stats",
+    "ShardConfig",
+    "TimeoutConfig",
+    "TimeoutExceededError",
+    "ProfilerConfig",
+    "PhaseStats",
+    "get_phase_stats",
+    "RepetitionCount",
+    "get_repetition_counts",
+    "DurationStatsConfig",
+]
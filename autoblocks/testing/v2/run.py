@@ -1,3 +1,43 @@
+from autoblocks._impl.limiter import ConcurrencyLimiterStats
+from autoblocks._impl.testing.api import get_api_concurrency_stats
+from autoblocks._impl.testing.cache import CachedEvaluation
+from autoblocks._impl.testing.cache import DiskEvaluationCache
+from autoblocks._impl.testing.cache import EvaluationCache
+from autoblocks._impl.testing.cache import InMemoryEvaluationCache
+from autoblocks._impl.testing.executor import ExecutionMode
+from autoblocks._impl.testing.executor import ExecutorStats
+from autoblocks._impl.testing.journal import RunJournalConfig
+from autoblocks._impl.testing.profiler import PhaseStats
+from autoblocks._impl.testing.profiler import ProfilerConfig
+from autoblocks._impl.testing.repetitions import RepetitionCount
+from autoblocks._impl.testing.sharding import ShardConfig
+from autoblocks._impl.testing.timeouts import TimeoutConfig
+from autoblocks._impl.testing.timeouts import TimeoutExceededError
+from autoblocks._impl.testing.v2.options import RunOptions
+from autoblocks._impl.testing.v2.run import get_executor_stats
+from autoblocks._impl.testing.v2.run import get_phase_stats
+from autoblocks._impl.testing.v2.run import get_repetition_counts
 from autoblocks._impl.testing.v2.run import run_test_suite
 
-__all__ = ["run_test_suite"]
+__all__ = [
+    "run_test_suite",
+    "RunOptions",
+    "ExecutionMode",
+    "ExecutorStats",
+    "get_executor_stats",
+    "ConcurrencyLimiterStats",
+    "get_api_concurrency_stats",
+    "EvaluationCache",
+    "InMemoryEvaluationCache",
+    "DiskEvaluationCache",
+    "CachedEvaluation",
+    "ShardConfig",
+    "RunJournalConfig",
+    "TimeoutConfig",
+    "TimeoutExceededError",
+    "ProfilerConfig",
+    "PhaseStats",
+    "get_phase_stats",
+    "RepetitionCount",
+    "get_repetition_counts",
+]
@@ -1,11 +1,29 @@
+from autoblocks._impl.compression import Compression
+from autoblocks._impl.compression import CompressionConfig
+from autoblocks._impl.global_state import aflush
 from autoblocks._impl.global_state import flush
 from autoblocks._impl.tracer.auto_tracer import init_auto_tracer
 from autoblocks._impl.tracer.decorators import trace_app
+from autoblocks._impl.tracer.event_queue import OverflowPolicy
+from autoblocks._impl.tracer.event_queue import QueueConfig
+from autoblocks._impl.tracer.event_queue import QueueStats
+from autoblocks._impl.tracer.exporter import BatchConfig
+from autoblocks._impl.tracer.sampling import SamplingConfig
+from autoblocks._impl.tracer.spool import SpoolConfig
 from autoblocks._impl.tracer.tracer import AutoblocksTracer
 
 __all__ = [
     "flush",
+    "aflush",
     "AutoblocksTracer",
+    "BatchConfig",
+    "Compression",
+    "CompressionConfig",
+    "OverflowPolicy",
+    "QueueConfig",
+    "QueueStats",
+    "SamplingConfig",
+    "SpoolConfig",
     "trace_app",
     "init_auto_tracer",
 ]
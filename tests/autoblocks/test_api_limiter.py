@@ -0,0 +1,206 @@
+import asyncio
+import os
+import time
+from typing import Optional
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl import global_state
+from autoblocks._impl.limiter import DEFAULT_MAX_LIMIT
+from autoblocks._impl.limiter import AdaptiveLimiter
+from autoblocks._impl.limiter import ConcurrencyLimitConfig
+from autoblocks._impl.limiter import concurrency_limit_config_from_env
+from autoblocks._impl.limiter import parse_retry_after
+from autoblocks._impl.testing.api import post_to_api
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.run import get_api_concurrency_stats
+
+OK = httpx.Response(status_code=200)
+
+
+async def _request(
+    limiter: AdaptiveLimiter, resp: httpx.Response, seconds: float = 0, running: Optional[list[int]] = None
+) -> None:
+    async with limiter.acquire() as permit:
+        if running is not None:
+            running.append(limiter.stats.in_flight)
+        await asyncio.sleep(seconds)
+        permit.observe(resp)
+
+
+def test_limits_requests_in_flight():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=3, max_limit=3))
+    running: list[int] = []
+
+    async def main() -> None:
+        await asyncio.gather(*[_request(limiter, OK, seconds=0.01, running=running) for _ in range(20)])
+
+    asyncio.run(main())
+
+    assert len(running) == 20
+    assert max(running) == 3
+    assert limiter.stats.in_flight == 0
+    assert limiter.stats.waiting == 0
+
+
+def test_grows_additively_while_in_use():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=4, max_limit=8, latency_tolerance=None))
+
+    async def main() -> None:
+        await asyncio.gather(*[_request(limiter, OK, seconds=0.001) for _ in range(200)])
+
+    asyncio.run(main())
+    assert limiter.limit == 8
+
+
+def test_does_not_grow_when_idle():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=4, max_limit=8, latency_tolerance=None))
+
+    async def main() -> None:
+        for _ in range(50):
+            await _request(limiter, OK)
+
+    asyncio.run(main())
+    assert limiter.limit == 4
+
+
+def test_backs_off_once_per_generation():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=16))
+
+    async def main() -> None:
+        # All of these were sent under the same limit, so they only halve it once
+        await asyncio.gather(*[_request(limiter, httpx.Response(status_code=503)) for _ in range(8)])
+        assert limiter.limit == 8
+        await _request(limiter, httpx.Response(status_code=429))
+        assert limiter.limit == 4
+
+    asyncio.run(main())
+
+
+def test_ignores_other_client_errors():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=16))
+
+    async def main() -> None:
+        await _request(limiter, httpx.Response(status_code=404))
+
+    asyncio.run(main())
+    assert limiter.limit == 16
+
+
+def test_backs_off_on_network_errors():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=16))
+
+    async def main() -> None:
+        with pytest.raises(httpx.ConnectError):
+            async with limiter.acquire():
+                raise httpx.ConnectError("boom")
+
+    asyncio.run(main())
+    assert limiter.limit == 8
+    assert limiter.stats.in_flight == 0
+
+
+def test_backs_off_on_slow_responses():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=10, latency_tolerance=2, latency_backoff_ratio=0.5))
+
+    async def main() -> None:
+        await _request(limiter, OK, seconds=0.01)
+        await _request(limiter, OK, seconds=0.1)
+
+    asyncio.run(main())
+    assert limiter.limit == 5
+
+
+def test_honors_retry_after():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=4))
+    started: list[float] = []
+
+    async def main() -> None:
+        await _request(limiter, httpx.Response(status_code=429, headers={"Retry-After": "0.2"}))
+        assert limiter.stats.paused_for > 0
+        start = time.monotonic()
+
+        async def request() -> None:
+            async with limiter.acquire() as permit:
+                started.append(time.monotonic() - start)
+                permit.observe(OK)
+
+        await asyncio.gather(*[request() for _ in range(3)])
+
+    asyncio.run(main())
+    assert len(started) == 3
+    assert min(started) >= 0.15
+
+
+def test_cancelled_waiters_release_their_slot():
+    limiter = AdaptiveLimiter(ConcurrencyLimitConfig(initial_limit=1, max_limit=1))
+
+    async def main() -> None:
+        blocker = asyncio.ensure_future(_request(limiter, OK, seconds=0.05))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(_request(limiter, OK))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await blocker
+        await asyncio.wait_for(_request(limiter, OK), timeout=1)
+
+    asyncio.run(main())
+    assert limiter.stats.in_flight == 0
+    assert limiter.stats.waiting == 0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("2") == 2
+    assert parse_retry_after("1.5") == 1.5
+    assert parse_retry_after("-1") == 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+
+
+def test_config_from_env():
+    with mock.patch.dict(os.environ, {}, clear=True):
+        assert concurrency_limit_config_from_env() == ConcurrencyLimitConfig()
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.TEST_RUN_API_CONCURRENCY.value: "100"}):
+        config = concurrency_limit_config_from_env()
+        assert config.initial_limit == 100
+        assert config.max_limit == 100
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.TEST_RUN_API_MAX_CONCURRENCY.value: "4"}):
+        config = concurrency_limit_config_from_env()
+        assert config.initial_limit == 4
+        assert config.max_limit == 4
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.TEST_RUN_API_CONCURRENCY.value: "nope"}):
+        config = concurrency_limit_config_from_env()
+        assert config.initial_limit == 10
+        assert config.max_limit == DEFAULT_MAX_LIMIT
+
+
+def test_config_validation():
+    with pytest.raises(ValueError, match="initial_limit must be between min_limit and max_limit"):
+        ConcurrencyLimitConfig(initial_limit=100, max_limit=10)
+    with pytest.raises(ValueError, match="backoff ratios must be between 0 and 1"):
+        ConcurrencyLimitConfig(backoff_ratio=1)
+
+
+@mock.patch.dict(os.environ, {AutoblocksEnvVar.API_KEY.value: "mock-api-key"})
+def test_retried_requests_go_through_the_limiter(httpx_mock):
+    global_state.init()
+    httpx_mock.add_response(status_code=429, headers={"Retry-After": "0"})
+    httpx_mock.add_response(status_code=200, json=dict(id="mock-id"))
+
+    stats_before = get_api_concurrency_stats()
+    assert stats_before is not None
+    limit_before = stats_before.limit
+    resp = asyncio.run_coroutine_threadsafe(
+        post_to_api("/runs", json=dict()),
+        global_state.event_loop(),
+    ).result()
+
+    assert resp.json() == dict(id="mock-id")
+    assert len(httpx_mock.get_requests()) == 2
+    stats = get_api_concurrency_stats()
+    assert stats is not None
+    assert stats.limit < limit_before or stats.limit == 1
+    assert stats.in_flight == 0
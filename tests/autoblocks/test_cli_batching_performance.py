@@ -0,0 +1,110 @@
+"""Performance comparison of per-item and coalesced /results and /evals requests to the CLI."""
+
+import dataclasses
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from typing import Any
+from typing import Optional
+from unittest import mock
+
+import pytest
+
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.run import ResultBatchConfig
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import run_test_suite
+
+NUM_TEST_CASES = 300
+# Time the fake CLI spends handling each request, regardless of how many items it contains
+REQUEST_OVERHEAD_SECONDS = 0.001
+
+
+class FakeCliHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeCliHandler.requests += 1
+        time.sleep(REQUEST_OVERHEAD_SECONDS)
+        response: Any
+        if isinstance(body, list):
+            response = [dict(id=f"result-{i}") for i in range(len(body))]
+        else:
+            response = dict(id="mock-id")
+        encoded = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_cli_server():
+    """
+    A real HTTP server that, like the CLI, handles one request at a time.
+    """
+    server = HTTPServer(("127.0.0.1", 0), FakeCliHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    address = f"http://127.0.0.1:{server.server_address[1]}"
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: address}):
+        yield
+    server.shutdown()
+    server.server_close()
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+class MyEvaluator(BaseTestEvaluator):
+    id = "my-evaluator"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        return Evaluation(score=1)
+
+
+def _run(result_batch: Optional[ResultBatchConfig]) -> tuple[float, int]:
+    FakeCliHandler.requests = 0
+    start = time.perf_counter()
+    run_test_suite(
+        id="benchmark",
+        test_cases=[MyTestCase(input=str(i)) for i in range(NUM_TEST_CASES)],
+        evaluators=[MyEvaluator()],
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=50,
+        options=RunOptions(result_batch=result_batch),
+    )
+    return time.perf_counter() - start, FakeCliHandler.requests
+
+
+def test_cli_batching_performance(fake_cli_server):
+    """Ensure coalescing sends fewer requests and finishes sooner against a local CLI server."""
+    unbatched_duration, unbatched_requests = _run(None)
+    batched_duration, batched_requests = _run(ResultBatchConfig())
+
+    # Log performance for visibility
+    print(f"Unbatched: {unbatched_duration:.3f}s, {unbatched_requests} requests")
+    print(f"Batched: {batched_duration:.3f}s, {batched_requests} requests")
+
+    # /start, one /results and one /evals per test case, /end
+    assert unbatched_requests == 2 + NUM_TEST_CASES * 2
+    assert batched_requests < unbatched_requests / 5
+    assert (
+        batched_duration < unbatched_duration
+    ), f"Batching was slower: {batched_duration:.3f}s vs {unbatched_duration:.3f}s"
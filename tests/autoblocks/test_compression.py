@@ -0,0 +1,137 @@
+import asyncio
+import gzip
+import json
+from typing import Any
+
+import httpx
+import pytest
+from opentelemetry.exporter.otlp.proto.http import Compression as OTLPCompression
+
+from autoblocks._impl import compression as compression_module
+from autoblocks._impl import global_state
+from autoblocks._impl.compression import NO_COMPRESSION
+from autoblocks._impl.compression import compress_body
+from autoblocks._impl.compression import compression_config_from_env
+from autoblocks._impl.config.constants import API_ENDPOINT_V2
+from autoblocks._impl.config.constants import INGESTION_BATCH_ENDPOINT
+from autoblocks._impl.config.constants import INGESTION_ENDPOINT
+from autoblocks._impl.testing.v2.api import post_to_api
+from autoblocks._impl.tracer.auto_tracer import _otlp_compression
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.tracer import AutoblocksTracer
+from autoblocks.tracer import BatchConfig
+from autoblocks.tracer import Compression
+from autoblocks.tracer import CompressionConfig
+from autoblocks.tracer import flush
+
+
+def decompress_request_body(request: httpx.Request) -> Any:
+    content = request.read()
+    if request.headers.get("Content-Encoding") == "gzip":
+        content = gzip.decompress(content)
+    return json.loads(content)
+
+
+@pytest.fixture
+def captured_requests(httpx_mock):
+    requests: list[httpx.Request] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(status_code=200, json={})
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+def test_compress_body_skips_small_bodies():
+    body = b'{"message":"hi"}'
+    assert compress_body(body, CompressionConfig(min_bytes=1024)) == (body, {})
+    assert compress_body(body * 100, NO_COMPRESSION) == (body * 100, {})
+
+
+def test_compress_body_gzip():
+    body = b'{"message":"' + b"lorem ipsum " * 200 + b'"}'
+    compressed, headers = compress_body(body, CompressionConfig(algorithm=Compression.GZIP))
+
+    assert headers == {"Content-Encoding": "gzip"}
+    assert len(compressed) < len(body)
+    assert gzip.decompress(compressed) == body
+
+
+def test_compress_body_falls_back_to_gzip_without_zstandard(monkeypatch):
+    monkeypatch.setattr(compression_module, "_get_zstd", lambda: None)
+    body = b"lorem ipsum " * 200
+
+    compressed, headers = compress_body(body, CompressionConfig(algorithm=Compression.ZSTD))
+
+    assert headers == {"Content-Encoding": "gzip"}
+    assert gzip.decompress(compressed) == body
+
+
+def test_compression_config_from_env(monkeypatch):
+    monkeypatch.delenv(AutoblocksEnvVar.COMPRESSION.value, raising=False)
+    assert compression_config_from_env() == NO_COMPRESSION
+
+    monkeypatch.setenv(AutoblocksEnvVar.COMPRESSION.value, "gzip")
+    monkeypatch.setenv(AutoblocksEnvVar.COMPRESSION_MIN_BYTES.value, "10")
+    assert compression_config_from_env() == CompressionConfig(algorithm=Compression.GZIP, min_bytes=10)
+
+    monkeypatch.setenv(AutoblocksEnvVar.COMPRESSION.value, "brotli")
+    assert compression_config_from_env() == NO_COMPRESSION
+
+
+def test_otlp_compression():
+    assert _otlp_compression(NO_COMPRESSION) is None
+    assert _otlp_compression(CompressionConfig(algorithm=Compression.GZIP)) == OTLPCompression.Gzip
+    assert _otlp_compression(CompressionConfig(algorithm=Compression.ZSTD)) == OTLPCompression.Gzip
+
+
+def test_tracer_compresses_large_events(captured_requests):
+    tracer = AutoblocksTracer("mock-ingestion-key", compression=CompressionConfig(min_bytes=1024))
+
+    tracer.send_event("small-event")
+    tracer.send_event("large-event", properties=dict(text="lorem ipsum " * 200))
+    flush()
+
+    requests = {decompress_request_body(req)["message"]: req for req in captured_requests}
+    assert str(requests["small-event"].url) == INGESTION_ENDPOINT
+    assert "Content-Encoding" not in requests["small-event"].headers
+    assert requests["large-event"].headers["Content-Encoding"] == "gzip"
+    assert requests["large-event"].headers["Authorization"] == "Bearer mock-ingestion-key"
+    assert decompress_request_body(requests["large-event"])["properties"] == dict(text="lorem ipsum " * 200)
+
+
+def test_tracer_compresses_batches(captured_requests):
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        batch=BatchConfig(max_batch_size=10),
+        compression=CompressionConfig(min_bytes=0),
+    )
+
+    for i in range(10):
+        tracer.send_event(f"message-{i}")
+    flush()
+
+    assert all(str(req.url) == INGESTION_BATCH_ENDPOINT for req in captured_requests)
+    assert all(req.headers["Content-Encoding"] == "gzip" for req in captured_requests)
+    messages = [event["message"] for req in captured_requests for event in decompress_request_body(req)["events"]]
+    assert messages == [f"message-{i}" for i in range(10)]
+
+
+def test_post_to_api_compresses_when_enabled(captured_requests, monkeypatch):
+    monkeypatch.setenv(AutoblocksEnvVar.V2_API_KEY.value, "mock-api-key")
+    monkeypatch.setenv(AutoblocksEnvVar.COMPRESSION.value, "gzip")
+    monkeypatch.setenv(AutoblocksEnvVar.COMPRESSION_MIN_BYTES.value, "0")
+
+    global_state.init()
+    asyncio.run_coroutine_threadsafe(
+        post_to_api("/testing/results", json=dict(outputRaw="lorem ipsum " * 200)),
+        global_state.event_loop(),
+    ).result()
+
+    (request,) = captured_requests
+    assert str(request.url) == f"{API_ENDPOINT_V2}/testing/results"
+    assert request.headers["Content-Encoding"] == "gzip"
+    assert request.headers["Content-Type"] == "application/json"
+    assert decompress_request_body(request) == dict(outputRaw="lorem ipsum " * 200)
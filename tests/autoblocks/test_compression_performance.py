@@ -0,0 +1,80 @@
+"""Bytes-on-wire and CPU cost of compressing typical LLM event payloads."""
+
+import json
+import random
+import time
+from typing import Any
+
+from autoblocks._impl.compression import compress_body
+from autoblocks._impl.compression import is_zstd_available
+from autoblocks.tracer import Compression
+from autoblocks.tracer import CompressionConfig
+
+NUM_EVENTS = 500
+
+WORDS = (
+    "the model should answer the question using only the provided context and cite the relevant documents "
+    "customer order refund shipping policy account password reset invoice payment subscription plan upgrade "
+    "summarize explain classify extract entities sentiment positive negative neutral confidence reasoning"
+).split()
+
+
+def make_llm_event(rng: random.Random) -> dict[str, Any]:
+    def text(num_words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(num_words))
+
+    return dict(
+        message="ai.request.completed",
+        traceId=f"trace-{rng.randrange(1_000_000)}",
+        timestamp="2024-01-01T00:00:00.000Z",
+        properties=dict(
+            provider="openai",
+            model="gpt-4o-mini",
+            temperature=0.2,
+            messages=[
+                dict(role="system", content=text(150)),
+                dict(role="user", content=text(rng.randint(20, 300))),
+            ],
+            response=dict(
+                choices=[dict(index=0, message=dict(role="assistant", content=text(rng.randint(50, 400))))],
+                usage=dict(prompt_tokens=rng.randint(100, 2000), completion_tokens=rng.randint(50, 800)),
+            ),
+        ),
+    )
+
+
+def _measure(bodies: list[bytes], config: CompressionConfig) -> tuple[float, float]:
+    """Returns average bytes on wire and CPU microseconds per event."""
+    total_bytes = 0
+    start = time.process_time()
+    for body in bodies:
+        compressed, _ = compress_body(body, config)
+        total_bytes += len(compressed)
+    cpu = time.process_time() - start
+    return total_bytes / len(bodies), cpu / len(bodies) * 1_000_000
+
+
+def test_compression_performance():
+    """Ensure compression meaningfully reduces bytes on wire for LLM payloads at an acceptable CPU cost."""
+    rng = random.Random(0)
+    bodies = [json.dumps(make_llm_event(rng)).encode() for _ in range(NUM_EVENTS)]
+
+    configs = {
+        "none": CompressionConfig(algorithm=Compression.NONE),
+        "gzip-1": CompressionConfig(algorithm=Compression.GZIP, min_bytes=0, level=1),
+        "gzip-6": CompressionConfig(algorithm=Compression.GZIP, min_bytes=0),
+    }
+    if is_zstd_available():
+        configs["zstd"] = CompressionConfig(algorithm=Compression.ZSTD, min_bytes=0)
+
+    results = {name: _measure(bodies, config) for name, config in configs.items()}
+
+    # Log performance for visibility
+    raw_bytes = results["none"][0]
+    for name, (avg_bytes, cpu_us) in results.items():
+        print(f"{name}: {avg_bytes:.0f} bytes/event ({avg_bytes / raw_bytes:.1%} of raw), {cpu_us:.1f}us CPU/event")
+
+    gzip_bytes, gzip_cpu_us = results["gzip-6"]
+    assert gzip_bytes < raw_bytes / 2, f"gzip only reduced events to {gzip_bytes / raw_bytes:.1%} of raw"
+    # Should compress a typical event in well under a millisecond
+    assert gzip_cpu_us < 1_000, f"gzip too slow: {gzip_cpu_us:.1f}us per event"
@@ -0,0 +1,60 @@
+"""Performance comparison of stdlib json and the orjson request body encoder."""
+
+import json
+import random
+import time
+from typing import Any
+
+from autoblocks._impl.encoding import encode_json
+
+NUM_ITERATIONS = 200
+
+
+def make_nested_payload(rng: random.Random) -> dict[str, Any]:
+    """A test case result with a large nested output, similar to what send_test_case_result uploads."""
+    return dict(
+        testCaseHash="a" * 64,
+        testCaseBody=dict(
+            question="What is the refund policy? " * 20,
+            documents=[dict(id=i, title=f"doc-{i}", text="lorem ipsum dolor sit amet " * 40) for i in range(20)],
+        ),
+        testCaseOutput=dict(
+            answer="The refund policy allows returns within 30 days. " * 30,
+            citations=[dict(doc=i, score=rng.random(), spans=[[j, j + 10] for j in range(10)]) for i in range(20)],
+            trace=[dict(step=i, tokens=rng.randint(1, 1000), latencyMs=rng.random() * 100) for i in range(200)],
+        ),
+        testCaseRevisionUsage=[dict(entityExternalId=f"prompt-{i}", revisionId="b" * 24) for i in range(5)],
+    )
+
+
+def test_encode_json_matches_stdlib():
+    payload = make_nested_payload(random.Random(0))
+    assert json.loads(encode_json(payload)) == json.loads(json.dumps(payload))
+    # Non-string keys are coerced to strings like the stdlib does
+    assert json.loads(encode_json({1: "a"})) == {"1": "a"}
+
+
+def test_encode_json_performance():
+    """Ensure the shared encoder is faster than the stdlib encoder httpx's json= argument uses."""
+    payload = make_nested_payload(random.Random(0))
+    size = len(encode_json(payload))
+
+    start = time.perf_counter()
+    for _ in range(NUM_ITERATIONS):
+        json.dumps(payload).encode("utf-8")
+    stdlib_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(NUM_ITERATIONS):
+        encode_json(payload)
+    orjson_duration = time.perf_counter() - start
+
+    # Log performance for visibility
+    print(f"Payload size: {size / 1024:.0f}KiB")
+    print(f"stdlib json: {NUM_ITERATIONS * size / stdlib_duration / 1024**2:.0f}MiB/second")
+    print(f"encode_json: {NUM_ITERATIONS * size / orjson_duration / 1024**2:.0f}MiB/second")
+    print(f"Speedup: {stdlib_duration / orjson_duration:.1f}x")
+
+    assert (
+        orjson_duration < stdlib_duration
+    ), f"encode_json was slower than stdlib json: {orjson_duration:.3f}s vs {stdlib_duration:.3f}s"
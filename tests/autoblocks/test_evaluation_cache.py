@@ -0,0 +1,226 @@
+import asyncio
+import dataclasses
+import os
+from typing import Any
+from typing import Callable
+from typing import Optional
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.context_vars import RevisionType
+from autoblocks._impl.context_vars import register_revision_usage
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.models import Threshold
+from autoblocks.testing.run import CachedEvaluation
+from autoblocks.testing.run import DiskEvaluationCache
+from autoblocks.testing.run import EvaluationCache
+from autoblocks.testing.run import InMemoryEvaluationCache
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import run_test_suite
+from autoblocks.testing.v2.run import RunOptions as RunOptionsV2
+from autoblocks.testing.v2.run import run_test_suite as run_test_suite_v2
+from autoblocks.tracer import init_auto_tracer
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture
+def cli_requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        body = decode_request_body(request)
+        requests.append((request.url.path, body))
+        return httpx.Response(status_code=200, json=dict(id="mock-id"))
+
+    httpx_mock.add_callback(handle)
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS}):
+        yield requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+class MyEvaluator(BaseTestEvaluator):
+    id = "my-evaluator"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        self.calls += 1
+        register_revision_usage("my-judge-prompt", RevisionType.PROMPT, "revision-1")
+        return Evaluation(score=0.5, threshold=Threshold(gte=0.5), metadata=dict(output=output))
+
+
+class MyAsyncEvaluator(BaseTestEvaluator):
+    id = "my-async-evaluator"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        self.calls += 1
+        return Evaluation(score=1)
+
+
+def _run(
+    evaluators: list[BaseTestEvaluator],
+    cache: Optional[EvaluationCache],
+    fn: Callable[[MyTestCase], Any] = lambda test_case: test_case.input,
+) -> None:
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=str(i)) for i in range(3)],
+        evaluators=evaluators,
+        fn=fn,
+        options=RunOptions(evaluation_cache=cache),
+    )
+
+
+def test_reuses_evaluations_across_runs(cli_requests):
+    cache = InMemoryEvaluationCache()
+    evaluator = MyEvaluator()
+    async_evaluator = MyAsyncEvaluator()
+
+    _run([evaluator, async_evaluator], cache)
+    first_evals = sorted(
+        (body for path, body in cli_requests if path == "/evals"),
+        key=lambda body: (body["evaluatorExternalId"], body["testCaseHash"]),
+    )
+    cli_requests.clear()
+    _run([evaluator, async_evaluator], cache)
+
+    assert evaluator.calls == 3
+    assert async_evaluator.calls == 3
+    assert len(cache) == 6
+
+    # Cached evaluations are sent exactly like fresh ones, including the revisions the evaluator used
+    evals = sorted(
+        (body for path, body in cli_requests if path == "/evals"),
+        key=lambda body: (body["evaluatorExternalId"], body["testCaseHash"]),
+    )
+    assert [{**body, "revisionUsage": None} for body in evals] == [
+        {**body, "revisionUsage": None} for body in first_evals
+    ]
+    revision_usage = [body["revisionUsage"] for body in evals if body["evaluatorExternalId"] == "my-evaluator"]
+    assert all(usage[0]["revisionId"] == "revision-1" for usage in revision_usage)
+
+
+def test_output_and_cache_version_are_part_of_the_key(cli_requests):
+    cache = InMemoryEvaluationCache()
+    evaluator = MyEvaluator()
+
+    _run([evaluator], cache)
+    _run([evaluator], cache, fn=lambda test_case: test_case.input + "!")
+    assert evaluator.calls == 6
+
+    class MyNewEvaluator(MyEvaluator):
+        cache_version = "2"
+
+    new_evaluator = MyNewEvaluator()
+    _run([new_evaluator], cache)
+    assert new_evaluator.calls == 3
+
+
+def test_disabled_by_default(cli_requests):
+    evaluator = MyEvaluator()
+    _run([evaluator], None)
+    _run([evaluator], None)
+    assert evaluator.calls == 6
+
+
+def test_disk_cache_persists_across_instances(tmp_path, cli_requests):
+    evaluator = MyEvaluator()
+
+    _run([evaluator], DiskEvaluationCache(str(tmp_path)))
+    _run([evaluator], DiskEvaluationCache(str(tmp_path)))
+
+    assert evaluator.calls == 3
+    assert len(list(tmp_path.glob("*.pkl"))) == 3
+
+
+async def cached_score(cache: EvaluationCache, key: str) -> float:
+    entry = await cache.get(key)
+    assert entry is not None
+    return entry.evaluation.score
+
+
+def test_in_memory_cache_evicts_least_recently_used():
+    cache = InMemoryEvaluationCache(max_entries=2)
+
+    async def main() -> None:
+        await cache.set("a", CachedEvaluation(evaluation=Evaluation(score=1)))
+        await cache.set("b", CachedEvaluation(evaluation=Evaluation(score=2)))
+        assert await cache.get("a") is not None
+        await cache.set("c", CachedEvaluation(evaluation=Evaluation(score=3)))
+
+        assert await cache.get("b") is None
+        assert await cached_score(cache, "a") == 1
+        assert await cached_score(cache, "c") == 3
+
+    asyncio.run(main())
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    async def main() -> None:
+        probe = DiskEvaluationCache(str(tmp_path / "probe"))
+        await probe.set("a", CachedEvaluation(evaluation=Evaluation(score=1)))
+        entry_size = os.path.getsize(next((tmp_path / "probe").glob("*.pkl")))
+
+        cache = DiskEvaluationCache(str(tmp_path / "cache"), max_total_bytes=entry_size * 2)
+        await cache.set("a", CachedEvaluation(evaluation=Evaluation(score=1)))
+        await cache.set("b", CachedEvaluation(evaluation=Evaluation(score=2)))
+        paths = {path.name: path for path in (tmp_path / "cache").glob("*.pkl")}
+        for i, path in enumerate(sorted(paths.values())):
+            os.utime(path, (i, i))
+        # Reading touches the entry so that it's kept
+        assert await cached_score(cache, "a") == 1
+        await cache.set("c", CachedEvaluation(evaluation=Evaluation(score=3)))
+
+        assert await cache.get("b") is None
+        assert await cached_score(cache, "a") == 1
+        assert await cached_score(cache, "c") == 3
+
+    asyncio.run(main())
+
+
+def test_cache_version_must_be_a_string():
+    with pytest.raises(TypeError, match="cache_version must be a str"):
+
+        class MyBadEvaluator(BaseTestEvaluator):
+            id = "my-bad-evaluator"
+            cache_version = 2  # type: ignore[assignment]
+
+            def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+                return Evaluation(score=1)
+
+
+@mock.patch.dict(os.environ, {AutoblocksEnvVar.V2_API_KEY.value: "mock-api-key"})
+def test_v2_reuses_evaluations():
+    init_auto_tracer(api_key="mock-api-key")
+    cache = InMemoryEvaluationCache()
+    evaluator = MyEvaluator()
+
+    for _ in range(2):
+        run_test_suite_v2(
+            id="my-test-id",
+            app_slug="test-app",
+            test_cases=[MyTestCase(input=str(i)) for i in range(3)],
+            evaluators=[evaluator],
+            fn=lambda test_case: test_case.input,
+            options=RunOptionsV2(evaluation_cache=cache),
+        )
+
+    assert evaluator.calls == 3
+    assert len(cache) == 3
@@ -0,0 +1,78 @@
+"""Performance comparison of thread and process execution modes for CPU-bound test functions."""
+
+import dataclasses
+import os
+import time
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.run import ExecutionMode
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import run_test_suite
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+
+NUM_TEST_CASES = 32
+NUM_ITERATIONS_PER_TEST_CASE = 300_000
+
+
+@pytest.fixture(autouse=True)
+def fake_cli_server(httpx_mock):
+    httpx_mock.add_callback(lambda request: httpx.Response(status_code=200, json=dict(id="mock-id")))
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS}):
+        yield
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    seed: int
+
+    def hash(self) -> str:
+        return str(self.seed)
+
+
+def cpu_bound_fn(test_case: MyTestCase) -> int:
+    """Holds the GIL the whole time, like regex-heavy scoring or tokenization."""
+    total = test_case.seed
+    for i in range(NUM_ITERATIONS_PER_TEST_CASE):
+        total = (total * 31 + i) % 1_000_003
+    return total
+
+
+def _run(execution_mode: ExecutionMode, max_process_workers: int = 1) -> float:
+    start = time.perf_counter()
+    run_test_suite(
+        id=f"benchmark-{execution_mode}-{max_process_workers}",
+        test_cases=[MyTestCase(seed=i) for i in range(NUM_TEST_CASES)],
+        fn=cpu_bound_fn,
+        max_test_case_concurrency=NUM_TEST_CASES,
+        options=RunOptions(execution_mode=execution_mode, max_process_workers=max_process_workers),
+    )
+    return time.perf_counter() - start
+
+
+def test_process_mode_scales_with_cores():
+    num_cpus = os.cpu_count() or 1
+
+    thread_duration = _run(ExecutionMode.THREAD)
+    process_durations = {}
+    for workers in sorted({1, 2, 4, num_cpus}):
+        if workers <= num_cpus:
+            process_durations[workers] = _run(ExecutionMode.PROCESS, max_process_workers=workers)
+
+    # Log performance for visibility
+    print(f"CPUs: {num_cpus}")
+    print(f"thread mode: {NUM_TEST_CASES / thread_duration:.1f} test cases/second")
+    for workers, duration in process_durations.items():
+        print(f"process mode, {workers} workers: {NUM_TEST_CASES / duration:.1f} test cases/second")
+
+    if num_cpus < 2:
+        pytest.skip("Process mode can't outperform thread mode with a single CPU")
+
+    best_process_duration = min(process_durations.values())
+    assert (
+        best_process_duration < thread_duration
+    ), f"Process mode was slower than thread mode: {best_process_duration:.3f}s vs {thread_duration:.3f}s"
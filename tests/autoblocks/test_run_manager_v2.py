@@ -87,8 +87,8 @@ def test_full_lifecycle_v2(httpx_mock):
             startedAt="2025-01-01T00:00:00.000Z",
             durationMS=100,
             status="SUCCESS",
-            inputRaw=json.dumps({"input": "test"}),
-            outputRaw=json.dumps({"output": "test"}),
+            inputRaw=json.dumps({"input": "test"}, separators=(",", ":")),
+            outputRaw=json.dumps({"output": "test"}, separators=(",", ":")),
             input={"input": "test"},
             output={"output": "test"},
             evaluatorIdToResult={"evaluator-external-id": True},
@@ -173,8 +173,8 @@ def test_add_result_without_evaluators_sends_empty_maps(httpx_mock):
             startedAt=ANY_STRING,
             durationMS=250,
             status="SUCCESS",
-            inputRaw=json.dumps({"input": "test"}),
-            outputRaw=json.dumps({"output": "test"}),
+            inputRaw=json.dumps({"input": "test"}, separators=(",", ":")),
+            outputRaw=json.dumps({"output": "test"}, separators=(",", ":")),
             input={"input": "test"},
             output={"output": "test"},
             evaluatorIdToResult={},
@@ -0,0 +1,188 @@
+import dataclasses
+import os
+from typing import Any
+from typing import Optional
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.testing.repetitions import confidence_half_width
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import AdaptiveRepetitionConfig
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.models import TestCaseConfig
+from autoblocks.testing.run import RepetitionCount
+from autoblocks.testing.run import get_repetition_counts
+from autoblocks.testing.run import run_test_suite
+from autoblocks.testing.v2.run import get_repetition_counts as get_repetition_counts_v2
+from autoblocks.testing.v2.run import run_test_suite as run_test_suite_v2
+from autoblocks.tracer import init_auto_tracer
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+            AutoblocksEnvVar.V2_API_KEY.value: "mock-api-key",
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, decode_request_body(request)))
+        return httpx.Response(status_code=200, json=dict(id="mock-run-id"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+    test_case_config: Optional[TestCaseConfig] = None
+
+    def hash(self) -> str:
+        return self.input
+
+
+class SequenceEvaluator(BaseTestEvaluator):
+    """
+    Scores the n-th evaluation with the n-th score, and repeats the last score after that.
+    """
+
+    id = "my-evaluator"
+
+    def __init__(self, scores: list[float]) -> None:
+        self.scores = scores
+        self.calls = 0
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        score = self.scores[min(self.calls, len(self.scores) - 1)]
+        self.calls += 1
+        return Evaluation(score=score)
+
+
+def adaptive(max_repetitions: int, **kwargs: Any) -> TestCaseConfig:
+    return TestCaseConfig(
+        repeat_num_times=max_repetitions,
+        adaptive_repetitions=AdaptiveRepetitionConfig(max_half_width=0.5, **kwargs),
+    )
+
+
+def repetition_count() -> RepetitionCount:
+    counts = get_repetition_counts("my-test-id")
+    assert counts is not None
+    [count] = counts
+    return count
+
+
+def _run(requests: list[tuple[str, dict[str, Any]]], test_cases: list[MyTestCase], scores: list[float]) -> list[str]:
+    requests.clear()
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases,
+        evaluators=[SequenceEvaluator(scores)],
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=1,
+    )
+    assert not [body for path, body in requests if path == "/errors"]
+    return [body["testCaseHash"] for path, body in requests if path == "/results"]
+
+
+def test_stops_once_scores_agree(requests):
+    hashes = _run(
+        requests,
+        [MyTestCase(input="a", test_case_config=adaptive(20)), MyTestCase(input="b")],
+        scores=[1],
+    )
+
+    # Identical scores are certain after min_repetitions
+    assert sorted(hashes) == ["a-0", "a-1", "a-2", "b"]
+    count = repetition_count()
+    assert (count.test_case_hash, count.repetitions, count.max_repetitions) == ("a", 3, 20)
+    assert count.mean_scores == {"my-evaluator": 1}
+    assert count.half_widths == {"my-evaluator": 0}
+
+
+def test_repeats_until_the_interval_is_narrow_enough(requests):
+    # The 95% interval's half-width is 1.23 after 3 scores, 0.65 after 4 and 0.44 after 5
+    hashes = _run(requests, [MyTestCase(input="a", test_case_config=adaptive(20))], scores=[0, 1, 0.5])
+
+    assert sorted(hashes) == [f"a-{i}" for i in range(5)]
+    count = repetition_count()
+    assert count.repetitions == 5
+    assert round(count.half_widths["my-evaluator"], 2) == 0.44
+
+
+def test_stops_at_the_maximum(requests):
+    hashes = _run(
+        requests,
+        [MyTestCase(input="a", test_case_config=adaptive(6, batch_size=2))],
+        scores=[0, 1] * 10,
+    )
+
+    assert sorted(hashes) == [f"a-{i}" for i in range(6)]
+    count = repetition_count()
+    assert count.repetitions == count.max_repetitions == 6
+
+
+def test_not_reported_without_adaptive_repetitions(requests):
+    hashes = _run(requests, [MyTestCase(input="a", test_case_config=TestCaseConfig(repeat_num_times=3))], scores=[1])
+
+    assert sorted(hashes) == ["a-0", "a-1", "a-2"]
+    assert get_repetition_counts("my-test-id") is None
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_v2_stops_once_scores_agree():
+    init_auto_tracer(api_key="mock-api-key")
+    fn_calls: list[str] = []
+
+    def fn(test_case: MyTestCase) -> str:
+        fn_calls.append(test_case.input)
+        return test_case.input
+
+    run_test_suite_v2(
+        id="my-test-id",
+        app_slug="test-app",
+        test_cases=[MyTestCase(input="a", test_case_config=adaptive(20, min_repetitions=4))],
+        evaluators=[SequenceEvaluator([1])],
+        fn=fn,
+    )
+
+    assert fn_calls == ["a"] * 4
+    counts = get_repetition_counts_v2("my-test-id")
+    assert counts is not None
+    [count] = counts
+    assert (count.test_case_hash, count.repetitions, count.max_repetitions) == ("a", 4, 20)
+
+
+def test_confidence_half_width():
+    assert confidence_half_width([1, 1], 0.95) == float("inf")
+    # t(0.975, 9) = 2.262
+    assert round(confidence_half_width([0, 1] * 5, 0.95), 3) == round(2.262 * 0.527 / 10**0.5, 3)
+
+
+def test_config_validation():
+    with pytest.raises(ValueError, match="max_half_width must be greater than 0"):
+        AdaptiveRepetitionConfig(max_half_width=0)
+    with pytest.raises(ValueError, match="confidence must be between 0 and 1"):
+        AdaptiveRepetitionConfig(max_half_width=0.1, confidence=1)
+    with pytest.raises(ValueError, match="min_repetitions must be at least 3"):
+        AdaptiveRepetitionConfig(max_half_width=0.1, min_repetitions=2)
+    with pytest.raises(ValueError, match="batch_size must be at least 1"):
+        AdaptiveRepetitionConfig(max_half_width=0.1, batch_size=0)
+    with pytest.raises(ValueError, match="adaptive_repetitions requires repeat_num_times"):
+        TestCaseConfig(adaptive_repetitions=AdaptiveRepetitionConfig(max_half_width=0.1))
@@ -0,0 +1,179 @@
+import dataclasses
+import os
+from typing import Any
+from typing import Callable
+from typing import Optional
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.run import ResultBatchConfig
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import run_test_suite
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+def make_cli_handler(
+    requests: list[tuple[str, Any]],
+    accepts_arrays: bool,
+    handle_array: Optional[Callable[[str, list[Any]], Optional[httpx.Response]]] = None,
+) -> Callable[[httpx.Request], httpx.Response]:
+    def handle(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        body = decode_request_body(request)
+        requests.append((path, body))
+        if isinstance(body, list):
+            response = handle_array(path, body) if handle_array is not None else None
+            if response is not None:
+                return response
+            if not accepts_arrays:
+                return httpx.Response(status_code=404)
+            return httpx.Response(status_code=200, json=[dict(id=f"result-{item['testCaseHash']}") for item in body])
+        return httpx.Response(status_code=200, json=dict(id=f"result-{body.get('testCaseHash', 'run')}"))
+
+    return handle
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+class MyEvaluator(BaseTestEvaluator):
+    id = "my-evaluator"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        return Evaluation(score=1)
+
+
+def _run(num_test_cases: int, config: ResultBatchConfig) -> None:
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=str(i)) for i in range(num_test_cases)],
+        evaluators=[MyEvaluator()],
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=20,
+        options=RunOptions(result_batch=config),
+    )
+
+
+def test_coalesces_results_and_evals(httpx_mock):
+    requests: list[tuple[str, Any]] = []
+    httpx_mock.add_callback(make_cli_handler(requests, accepts_arrays=True))
+
+    _run(num_test_cases=40, config=ResultBatchConfig(max_batch_size=10))
+
+    assert not [body for path, body in requests if path == "/errors"]
+
+    results = [body for path, body in requests if path == "/results"]
+    evals = [body for path, body in requests if path == "/evals"]
+    # Every request made within the linger time is combined, up to max_batch_size
+    assert all(isinstance(body, list) and len(body) <= 10 for body in results + evals)
+    assert len(results) < 40
+    assert len(evals) < 40
+
+    result_items = [item for body in results for item in body]
+    assert sorted(item["testCaseHash"] for item in result_items) == sorted(str(i) for i in range(40))
+    assert all(item["testExternalId"] == "my-test-id" for item in result_items)
+    eval_items = [item for body in evals for item in body]
+    assert sorted(item["testCaseHash"] for item in eval_items) == sorted(str(i) for i in range(40))
+    assert all(item["evaluatorExternalId"] == "my-evaluator" for item in eval_items)
+
+
+def test_falls_back_to_single_requests(httpx_mock):
+    requests: list[tuple[str, Any]] = []
+    httpx_mock.add_callback(make_cli_handler(requests, accepts_arrays=False))
+
+    _run(num_test_cases=40, config=ResultBatchConfig(max_batch_size=10))
+
+    assert not [body for path, body in requests if path == "/errors"]
+
+    for path in ["/results", "/evals"]:
+        bodies = [body for request_path, body in requests if request_path == path]
+        # Only one batch per endpoint is attempted before falling back
+        assert len([body for body in bodies if isinstance(body, list)]) == 1
+        single = [body for body in bodies if isinstance(body, dict)]
+        assert sorted(body["testCaseHash"] for body in single) == sorted(str(i) for i in range(40))
+
+
+def single_hashes(requests: list[tuple[str, Any]], path: str) -> list[str]:
+    return sorted(
+        body["testCaseHash"] for request_path, body in requests if request_path == path and isinstance(body, dict)
+    )
+
+
+def test_falls_back_to_single_requests_when_the_cli_answers_a_batch_with_one_response(httpx_mock):
+    requests: list[tuple[str, Any]] = []
+    # Like a CLI that handles the array as a single item
+    httpx_mock.add_callback(
+        make_cli_handler(
+            requests,
+            accepts_arrays=True,
+            handle_array=lambda path, body: httpx.Response(status_code=200, json=dict(id="result")),
+        )
+    )
+
+    _run(num_test_cases=40, config=ResultBatchConfig(max_batch_size=10))
+
+    assert not [body for path, body in requests if path == "/errors"]
+    for path in ["/results", "/evals"]:
+        assert len([body for request_path, body in requests if request_path == path and isinstance(body, list)]) == 1
+        assert single_hashes(requests, path) == sorted(str(i) for i in range(40))
+
+
+def test_sends_the_first_batch_one_at_a_time_when_it_fails(httpx_mock):
+    requests: list[tuple[str, Any]] = []
+    failed: set[str] = set()
+
+    def fail_first_batch(path: str, body: list[Any]) -> Optional[httpx.Response]:
+        if path in failed:
+            return None
+        failed.add(path)
+        return httpx.Response(status_code=503)
+
+    httpx_mock.add_callback(make_cli_handler(requests, accepts_arrays=True, handle_array=fail_first_batch))
+
+    _run(num_test_cases=40, config=ResultBatchConfig(max_batch_size=10))
+
+    assert not [body for path, body in requests if path == "/errors"]
+    for path in ["/results", "/evals"]:
+        batches = [body for request_path, body in requests if request_path == path and isinstance(body, list)]
+        # The failed batch's requests are sent one at a time, and later batches still go out as batches
+        assert single_hashes(requests, path) == sorted(item["testCaseHash"] for item in batches[0])
+        batched = [item["testCaseHash"] for body in batches[1:] for item in body]
+        assert sorted(batched + single_hashes(requests, path)) == sorted(str(i) for i in range(40))
+
+
+def test_batching_disabled_by_default(httpx_mock):
+    requests: list[tuple[str, Any]] = []
+    httpx_mock.add_callback(make_cli_handler(requests, accepts_arrays=True))
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=str(i)) for i in range(5)],
+        evaluators=[MyEvaluator()],
+        fn=lambda test_case: test_case.input,
+    )
+
+    assert all(isinstance(body, dict) for _, body in requests)
+    assert [path for path, _ in requests].count("/results") == 5
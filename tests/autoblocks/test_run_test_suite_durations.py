@@ -0,0 +1,146 @@
+import dataclasses
+import json
+import os
+from typing import Sequence
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.testing.durations import DurationStats
+from autoblocks._impl.testing.durations import load_duration_entries
+from autoblocks._impl.testing.durations import write_duration_entries
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import TestCaseConfig
+from autoblocks.testing.run import DurationStatsConfig
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import run_test_suite
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def cli(httpx_mock):
+    httpx_mock.add_callback(lambda request: httpx.Response(status_code=200, json=dict(id="mock-id")))
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+def _run(path: str, test_cases: Sequence[MyTestCase]) -> list[str]:
+    calls: list[str] = []
+
+    def fn(test_case: MyTestCase) -> str:
+        calls.append(test_case.input)
+        return test_case.input
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases,
+        fn=fn,
+        max_test_case_concurrency=1,
+        options=RunOptions(duration_stats=DurationStatsConfig(path=path)),
+    )
+    return calls
+
+
+def test_runs_slowest_first(tmp_path, cli):
+    path = str(tmp_path / "durations.jsonl")
+    write_duration_entries(
+        path,
+        {
+            ("my-test-id", "a"): (10.0, 3),
+            ("my-test-id", "b"): (300.0, 3),
+            ("my-test-id", "c"): (200.0, 3),
+            ("my-other-test-id", "d"): (1000.0, 1),
+        },
+    )
+
+    # "d" has no duration for this test suite, so it counts as the average of the known ones (170ms)
+    calls = _run(path, [MyTestCase(input=x) for x in ["a", "b", "c", "d"]])
+
+    assert calls == ["b", "c", "d", "a"]
+
+
+def test_records_durations(tmp_path, cli):
+    path = str(tmp_path / "durations.jsonl")
+    write_duration_entries(path, {("my-other-test-id", "a"): (1000.0, 1)})
+
+    # Without history the given order is kept
+    assert _run(path, [MyTestCase(input=x) for x in ["b", "a"]]) == ["b", "a"]
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    # One sorted line per test case, and other test suites' entries are kept
+    assert [line[:2] for line in lines] == [["my-other-test-id", "a"], ["my-test-id", "a"], ["my-test-id", "b"]]
+    assert all(line[2] >= 0 and line[3] == 1 for line in lines[1:])
+
+
+def test_repetitions_are_recorded_under_the_test_case(tmp_path, cli):
+    @dataclasses.dataclass
+    class MyRepeatedTestCase(MyTestCase):
+        test_case_config: TestCaseConfig = dataclasses.field(
+            default_factory=lambda: TestCaseConfig(repeat_num_times=3),
+        )
+
+    path = str(tmp_path / "durations.jsonl")
+    _run(path, [MyRepeatedTestCase(input="a")])
+
+    assert list(load_duration_entries(path)) == [("my-test-id", "a")]
+
+
+def test_mean_of_recent_runs(tmp_path):
+    path = str(tmp_path / "durations.jsonl")
+    config = DurationStatsConfig(path=path, max_samples=2)
+
+    for duration_ms in [100, 200, 400]:
+        stats = DurationStats(config, "my-test-id")
+        stats.record("a", duration_ms)
+        stats.record("a", duration_ms)
+        stats.save()
+
+    # 100, then the mean of 100 and 200, then halfway from 150 to 400
+    assert load_duration_entries(path) == {("my-test-id", "a"): (275.0, 2)}
+
+
+def test_concatenated_files_are_merged(tmp_path):
+    shard_0 = str(tmp_path / "shard-0.jsonl")
+    shard_1 = str(tmp_path / "shard-1.jsonl")
+    write_duration_entries(shard_0, {("my-test-id", "a"): (100.0, 1), ("my-test-id", "b"): (50.0, 2)})
+    write_duration_entries(shard_1, {("my-test-id", "a"): (400.0, 2), ("my-test-id", "c"): (10.0, 1)})
+
+    merged = str(tmp_path / "merged.jsonl")
+    with open(merged, "w") as f:
+        for path in [shard_0, shard_1]:
+            with open(path) as shard:
+                f.write(shard.read())
+        f.write("not json\n")
+
+    assert load_duration_entries(merged) == {
+        ("my-test-id", "a"): (300.0, 3),
+        ("my-test-id", "b"): (50.0, 2),
+        ("my-test-id", "c"): (10.0, 1),
+    }
+
+
+def test_config_validation():
+    with pytest.raises(ValueError, match="path must not be empty"):
+        DurationStatsConfig(path="")
+    with pytest.raises(ValueError, match="max_samples must be at least 1"):
+        DurationStatsConfig(path="durations.jsonl", max_samples=0)
@@ -0,0 +1,200 @@
+import dataclasses
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.testing import run as run_module
+from autoblocks._impl.testing.executor import default_max_workers
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import get_executor_stats
+from autoblocks.testing.run import run_test_suite
+from autoblocks.testing.v2.run import get_executor_stats as get_v2_executor_stats
+from autoblocks.testing.v2.run import run_test_suite as run_v2_test_suite
+from autoblocks.tracer import init_auto_tracer
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def cli_requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, decode_request_body(request)))
+        return httpx.Response(status_code=200, json=dict(id="mock-id"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+class MyEvaluator(BaseTestEvaluator):
+    id = "my-evaluator"
+    max_concurrency = 20
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        return Evaluation(score=1)
+
+
+def test_default_max_workers():
+    assert default_max_workers(100, []) == 100
+    assert default_max_workers(100, [MyEvaluator()]) == 120
+
+
+def test_sync_fn_runs_at_requested_concurrency(cli_requests):
+    # More than the default executor's min(32, cpu_count + 4) threads
+    num_test_cases = 50
+    barrier = threading.Barrier(num_test_cases, timeout=10)
+
+    def fn(test_case: MyTestCase) -> str:
+        # Only passes if every test case is running at the same time
+        barrier.wait()
+        return test_case.input
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=str(i)) for i in range(num_test_cases)],
+        fn=fn,
+        max_test_case_concurrency=num_test_cases,
+    )
+
+    assert [path for path, _ in cli_requests].count("/results") == num_test_cases
+    assert not [path for path, _ in cli_requests if path == "/errors"]
+
+    stats = get_executor_stats("my-test-id")
+    assert stats is not None
+    assert stats.max_workers == num_test_cases
+    assert stats.completed == num_test_cases
+    assert stats.queued == 0
+    assert stats.running == 0
+
+
+def test_runs_evaluators_and_hooks_in_executor(cli_requests):
+    thread_names: list[str] = []
+
+    def fn(test_case: MyTestCase) -> str:
+        thread_names.append(threading.current_thread().name)
+        return test_case.input
+
+    def hook(test_case: MyTestCase, output: str) -> str:
+        thread_names.append(threading.current_thread().name)
+        return output
+
+    class Evaluator(BaseTestEvaluator):
+        id = "evaluator"
+
+        def evaluate_test_case(self, test_case: MyTestCase, output: str, hook_results: str) -> Evaluation:
+            thread_names.append(threading.current_thread().name)
+            return Evaluation(score=1)
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=fn,
+        evaluators=[Evaluator()],
+        before_evaluators_hook=hook,
+        max_test_case_concurrency=1,
+    )
+
+    assert len(thread_names) == 3
+    assert all(name.startswith("autoblocks-test-suite") for name in thread_names)
+    stats = get_executor_stats("my-test-id")
+    assert stats is not None
+    assert stats.max_workers == 11
+    assert stats.completed == 3
+
+
+def test_uses_provided_executor(cli_requests):
+    thread_names: list[str] = []
+
+    def fn(test_case: MyTestCase) -> str:
+        thread_names.append(threading.current_thread().name)
+        return test_case.input
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="my-executor") as executor:
+        run_test_suite(
+            id="my-test-id",
+            test_cases=[MyTestCase(input="a"), MyTestCase(input="b")],
+            fn=fn,
+            max_test_case_concurrency=1,
+            options=RunOptions(executor=executor),
+        )
+
+        # Provided executors aren't shut down
+        assert executor.submit(lambda: 1).result() == 1
+
+    assert len(thread_names) == 2
+    assert all(name.startswith("my-executor") for name in thread_names)
+    stats = get_executor_stats("my-test-id")
+    assert stats is not None
+    assert stats.max_workers == 2
+
+
+def test_max_executor_workers(cli_requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=10,
+        options=RunOptions(max_executor_workers=3),
+    )
+
+    assert run_module.executor_registry["my-test-id"].max_workers == 3
+
+
+def test_get_executor_stats_for_unknown_test_suite():
+    assert get_executor_stats("unknown-test-id") is None
+
+
+def test_v2_sync_fn_runs_at_requested_concurrency():
+    init_auto_tracer(api_key="mock-api-key")
+
+    num_test_cases = 50
+    barrier = threading.Barrier(num_test_cases, timeout=10)
+    outputs: list[str] = []
+
+    def fn(test_case: MyTestCase) -> str:
+        barrier.wait()
+        outputs.append(test_case.input)
+        return test_case.input
+
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.V2_API_KEY.value: "mock-api-key"}):
+        run_v2_test_suite(
+            id="my-v2-test-id",
+            app_slug="test-app",
+            test_cases=[MyTestCase(input=str(i)) for i in range(num_test_cases)],
+            fn=fn,
+            max_test_case_concurrency=num_test_cases,
+        )
+
+    assert len(outputs) == num_test_cases
+    stats = get_v2_executor_stats("my-v2-test-id")
+    assert stats is not None
+    assert stats.completed == num_test_cases
@@ -0,0 +1,316 @@
+import dataclasses
+import json
+import os
+from typing import Any
+from typing import Callable
+from typing import Optional
+from typing import Sequence
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.context_vars import RevisionType
+from autoblocks._impl.context_vars import register_revision_usage
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.models import TestCaseConfig
+from autoblocks.testing.run import OutputCacheConfig
+from autoblocks.testing.run import OutputCacheStats
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import get_output_cache_stats
+from autoblocks.testing.run import grid_search_ctx
+from autoblocks.testing.run import invalidate_output_cache
+from autoblocks.testing.run import run_test_suite
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        body = decode_request_body(request)
+        requests.append((request.url.path, body))
+        return httpx.Response(status_code=200, json=dict(id=f"result-{body.get('testCaseHash', 'run')}"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+@dataclasses.dataclass
+class MyRepeatedTestCase(BaseTestCase):
+    input: str
+    test_case_config: TestCaseConfig = dataclasses.field(default_factory=lambda: TestCaseConfig(repeat_num_times=2))
+
+    def hash(self) -> str:
+        return self.input
+
+
+class MyEvaluator(BaseTestEvaluator):
+    id = "my-evaluator"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        self.calls += 1
+        return Evaluation(score=0.5, metadata=dict(output=output))
+
+
+class CountingFn:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def __call__(self, test_case: MyTestCase) -> str:
+        self.calls.append(test_case.input)
+        return f"output-{test_case.input}"
+
+
+def _run(
+    fn: Callable[..., Any],
+    config: OutputCacheConfig,
+    evaluators: Optional[list[BaseTestEvaluator]] = None,
+    test_cases: Optional[Sequence[BaseTestCase]] = None,
+    grid_search_params: Optional[dict[str, Sequence[Any]]] = None,
+) -> None:
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases or [MyTestCase(input=str(i)) for i in range(3)],
+        evaluators=evaluators or [],
+        fn=fn,
+        grid_search_params=grid_search_params,
+        options=RunOptions(output_cache=config),
+    )
+
+
+def cache_stats() -> OutputCacheStats:
+    stats = get_output_cache_stats("my-test-id")
+    assert stats is not None
+    return stats
+
+
+def test_replays_outputs_on_second_run(tmp_path, requests):
+    config = OutputCacheConfig(directory=str(tmp_path))
+    fn = CountingFn()
+
+    _run(fn, config)
+    assert sorted(fn.calls) == ["0", "1", "2"]
+    stats = cache_stats()
+    assert stats.hits == 0
+    assert stats.misses == 3
+
+    requests.clear()
+    _run(fn, config)
+    assert len(fn.calls) == 3
+    stats = cache_stats()
+    assert stats.hits == 3
+    assert stats.misses == 0
+
+    # Replayed outputs are reported like any other result
+    assert not [body for path, body in requests if path == "/errors"]
+    results = sorted((body for path, body in requests if path == "/results"), key=lambda body: body["testCaseHash"])
+    assert [body["testCaseOutput"] for body in results] == ["output-0", "output-1", "output-2"]
+
+
+def test_fingerprint_and_test_id_are_part_of_the_key(tmp_path, requests):
+    fn = CountingFn()
+
+    _run(fn, OutputCacheConfig(directory=str(tmp_path), fingerprint="v1"))
+    _run(fn, OutputCacheConfig(directory=str(tmp_path), fingerprint="v2"))
+    assert len(fn.calls) == 6
+    assert cache_stats().misses == 3
+
+    run_test_suite(
+        id="my-other-test-id",
+        test_cases=[MyTestCase(input=str(i)) for i in range(3)],
+        fn=fn,
+        options=RunOptions(output_cache=OutputCacheConfig(directory=str(tmp_path), fingerprint="v2")),
+    )
+    assert len(fn.calls) == 9
+
+
+def test_repetitions_and_grid_combos_are_cached_separately(tmp_path, requests):
+    config = OutputCacheConfig(directory=str(tmp_path))
+    outputs: list[str] = []
+
+    def fn(test_case: MyRepeatedTestCase) -> str:
+        ctx = grid_search_ctx()
+        assert ctx is not None
+        output = f"{test_case.input}-{ctx['x']}"
+        outputs.append(output)
+        return output
+
+    test_cases = [MyRepeatedTestCase(input="a")]
+    grid_search_params: dict[str, Sequence[Any]] = dict(x=[1, 2])
+    _run(fn, config, test_cases=test_cases, grid_search_params=grid_search_params)
+    assert sorted(outputs) == ["a-1", "a-1", "a-2", "a-2"]
+    assert cache_stats().misses == 4
+
+    requests.clear()
+    _run(fn, config, test_cases=test_cases, grid_search_params=grid_search_params)
+    assert len(outputs) == 4
+    assert cache_stats().hits == 4
+    results = [body for path, body in requests if path == "/results"]
+    assert sorted(body["testCaseOutput"] for body in results) == ["a-1", "a-1", "a-2", "a-2"]
+
+
+def test_evaluators_run_on_hits_by_default(tmp_path, requests):
+    config = OutputCacheConfig(directory=str(tmp_path))
+    evaluator = MyEvaluator()
+
+    _run(CountingFn(), config, evaluators=[evaluator])
+    _run(CountingFn(), config, evaluators=[evaluator])
+
+    assert evaluator.calls == 6
+    assert len([body for path, body in requests if path == "/evals"]) == 6
+
+
+def test_replays_evaluations(tmp_path, requests):
+    config = OutputCacheConfig(directory=str(tmp_path), replay_evaluations=True)
+    evaluator = MyEvaluator()
+    fn = CountingFn()
+
+    _run(fn, config, evaluators=[evaluator])
+    requests.clear()
+    _run(fn, config, evaluators=[evaluator])
+
+    assert len(fn.calls) == 3
+    assert evaluator.calls == 3
+    evals = [body for path, body in requests if path == "/evals"]
+    assert sorted(body["testCaseHash"] for body in evals) == ["0", "1", "2"]
+    assert all(body["score"] == 0.5 for body in evals)
+
+    # A new evaluator runs against the cached output and its evaluations are added to the entries
+    class MyOtherEvaluator(MyEvaluator):
+        id = "my-other-evaluator"
+
+    other = MyOtherEvaluator()
+    _run(fn, config, evaluators=[evaluator, other])
+    _run(fn, config, evaluators=[evaluator, other])
+    assert len(fn.calls) == 3
+    assert evaluator.calls == 3
+    assert other.calls == 3
+
+
+def test_overridden_revisions_miss(tmp_path, requests):
+    config = OutputCacheConfig(directory=str(tmp_path))
+    fn_calls = []
+
+    def fn(test_case: MyTestCase) -> str:
+        fn_calls.append(test_case.input)
+        register_revision_usage("my-prompt", RevisionType.PROMPT, "revision-1")
+        return test_case.input
+
+    _run(fn, config)
+    requests.clear()
+    _run(fn, config)
+    assert len(fn_calls) == 3
+
+    # The replayed revision usage is reported with the result
+    results = [body for path, body in requests if path == "/results"]
+    assert all(body["testCaseRevisionUsage"][0]["revisionId"] == "revision-1" for body in results)
+
+    with mock.patch.dict(
+        os.environ,
+        {AutoblocksEnvVar.OVERRIDES_PROMPT_REVISIONS.value: json.dumps({"my-prompt": "revision-1"})},
+    ):
+        _run(fn, config)
+    assert len(fn_calls) == 3
+
+    with mock.patch.dict(
+        os.environ,
+        {AutoblocksEnvVar.OVERRIDES_PROMPT_REVISIONS.value: json.dumps({"my-prompt": "revision-2"})},
+    ):
+        _run(fn, config)
+    assert len(fn_calls) == 6
+    assert cache_stats().misses == 3
+
+
+def test_invalidate(tmp_path, requests):
+    config = OutputCacheConfig(directory=str(tmp_path))
+    fn = CountingFn()
+    _run(fn, config, test_cases=[MyRepeatedTestCase(input=str(i)) for i in range(3)])
+    assert len(fn.calls) == 6
+
+    assert invalidate_output_cache(str(tmp_path), test_id="my-test-id", test_case_hash="0") == 2
+    assert invalidate_output_cache(str(tmp_path), test_id="my-other-test-id") == 0
+    _run(fn, config, test_cases=[MyRepeatedTestCase(input=str(i)) for i in range(3)])
+    assert sorted(fn.calls[6:]) == ["0", "0"]
+
+    assert invalidate_output_cache(str(tmp_path)) == 6
+    assert invalidate_output_cache(str(tmp_path / "missing")) == 0
+    _run(fn, config, test_cases=[MyRepeatedTestCase(input=str(i)) for i in range(3)])
+    assert len(fn.calls) == 14
+
+
+def test_evicts_least_recently_used_entries(tmp_path, requests):
+    def fn(test_case: MyTestCase) -> str:
+        return test_case.input * 1_000
+
+    # Fill the cache, then read the first entry so that it's the most recently used
+    _run(fn, OutputCacheConfig(directory=str(tmp_path)), test_cases=[MyTestCase(input=str(i)) for i in range(3)])
+    entries = sorted(str(path) for path in tmp_path.rglob("*.pkl"))
+    entry_size = os.path.getsize(entries[0])
+    for i, path in enumerate(entries):
+        os.utime(path, (i, i))
+
+    os.utime(entries[0], (10, 10))
+
+    # Adding a fourth entry evicts the least recently used one
+    _run(
+        fn,
+        OutputCacheConfig(directory=str(tmp_path), max_total_bytes=entry_size * 3 + 10),
+        test_cases=[MyTestCase(input="3")],
+    )
+    assert cache_stats().evictions == 1
+    remaining = sorted(str(path) for path in tmp_path.rglob("*.pkl"))
+    assert len(remaining) == 3
+    assert entries[0] in remaining
+    assert entries[1] not in remaining
+
+
+def test_unpicklable_outputs_are_not_cached(tmp_path, requests):
+    fn_calls = []
+
+    class LocalOutput(str):
+        pass
+
+    def fn(test_case: MyTestCase) -> str:
+        fn_calls.append(test_case.input)
+        # Instances of local classes can't be pickled
+        return LocalOutput(test_case.input)
+
+    _run(fn, OutputCacheConfig(directory=str(tmp_path)), test_cases=[MyTestCase(input="a")])
+    _run(fn, OutputCacheConfig(directory=str(tmp_path)), test_cases=[MyTestCase(input="a")])
+    assert len(fn_calls) == 2
+    assert not [body for path, body in requests if path == "/errors"]
+
+
+def test_config_validation(tmp_path):
+    with pytest.raises(ValueError, match="directory must not be empty"):
+        OutputCacheConfig(directory="")
+    with pytest.raises(ValueError, match="max_total_bytes must be positive"):
+        OutputCacheConfig(directory=str(tmp_path), max_total_bytes=0)
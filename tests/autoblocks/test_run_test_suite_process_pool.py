@@ -0,0 +1,163 @@
+import dataclasses
+import os
+from typing import Any
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.run import ExecutionMode
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import get_executor_stats
+from autoblocks.testing.run import run_test_suite
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def cli_requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, decode_request_body(request)))
+        return httpx.Response(status_code=200, json=dict(id="mock-id"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+# Worker processes import these by reference, so they must be defined at the top level of the module
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+def fn_with_pid(test_case: MyTestCase) -> dict[str, Any]:
+    return dict(output=test_case.input.upper(), pid=os.getpid())
+
+
+class ProcessSafeEvaluator(BaseTestEvaluator):
+    id = "process-safe"
+    process_safe = True
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: dict[str, Any]) -> Evaluation:
+        return Evaluation(score=1, metadata=dict(pid=os.getpid()))
+
+
+class ThreadEvaluator(BaseTestEvaluator):
+    id = "thread"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: dict[str, Any]) -> Evaluation:
+        return Evaluation(score=0, metadata=dict(pid=os.getpid()))
+
+
+def test_runs_fn_and_process_safe_evaluators_in_worker_processes(cli_requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a"), MyTestCase(input="b")],
+        fn=fn_with_pid,
+        evaluators=[ProcessSafeEvaluator(), ThreadEvaluator()],
+        max_test_case_concurrency=2,
+        options=RunOptions(execution_mode=ExecutionMode.PROCESS, max_process_workers=2),
+    )
+
+    assert not [body for path, body in cli_requests if path == "/errors"]
+
+    results = [body for path, body in cli_requests if path == "/results"]
+    assert sorted(result["testCaseOutput"]["output"] for result in results) == ["A", "B"]
+    assert all(result["testCaseOutput"]["pid"] != os.getpid() for result in results)
+
+    evals = [body for path, body in cli_requests if path == "/evals"]
+    assert len(evals) == 4
+    for evaluation in evals:
+        if evaluation["evaluatorExternalId"] == ProcessSafeEvaluator.id:
+            assert evaluation["score"] == 1
+            assert evaluation["metadata"]["pid"] != os.getpid()
+        else:
+            assert evaluation["score"] == 0
+            assert evaluation["metadata"]["pid"] == os.getpid()
+
+    stats = get_executor_stats("my-test-id")
+    assert stats is not None
+    assert stats.process_max_workers == 2
+    assert stats.process_pending == 0
+
+
+def test_process_mode_requires_picklable_fn(cli_requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=1,
+        options=RunOptions(execution_mode=ExecutionMode.PROCESS),
+    )
+
+    assert [path for path, _ in cli_requests] == ["/errors"]
+    error = cli_requests[0][1]["error"]
+    assert error["name"] == "AssertionError"
+    assert error["message"].startswith("[my-test-id] fn must be picklable to run in process mode.")
+
+
+def test_process_mode_requires_picklable_process_safe_evaluators(cli_requests):
+    class NestedEvaluator(BaseTestEvaluator):
+        id = "nested"
+        process_safe = True
+
+        def evaluate_test_case(self, test_case: MyTestCase, output: dict[str, Any]) -> Evaluation:
+            return Evaluation(score=1)
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=fn_with_pid,
+        evaluators=[NestedEvaluator()],
+        max_test_case_concurrency=1,
+        options=RunOptions(execution_mode=ExecutionMode.PROCESS),
+    )
+
+    assert [path for path, _ in cli_requests] == ["/errors"]
+    assert cli_requests[0][1]["error"]["message"].startswith(
+        "[my-test-id] Evaluator 'nested' is process_safe but can't be pickled."
+    )
+
+
+def test_thread_mode_ignores_process_safe(cli_requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=fn_with_pid,
+        evaluators=[ProcessSafeEvaluator()],
+        max_test_case_concurrency=1,
+    )
+
+    (evaluation,) = [body for path, body in cli_requests if path == "/evals"]
+    assert evaluation["metadata"]["pid"] == os.getpid()
+
+
+def test_process_safe_must_be_bool():
+    with pytest.raises(TypeError, match="process_safe must be a bool"):
+
+        class MyEvaluator(BaseTestEvaluator):
+            id = "my-evaluator"
+            process_safe = "yes"  # type: ignore[assignment]
+
+            def evaluate_test_case(self, test_case: MyTestCase, output: dict[str, Any]) -> Evaluation:
+                return Evaluation(score=1)
@@ -0,0 +1,248 @@
+import asyncio
+import dataclasses
+import json
+import os
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.config.constants import API_ENDPOINT_V2
+from autoblocks._impl.testing.profiler import RunProfiler
+from autoblocks._impl.testing.v2.run_manager import RunManager as RunManagerV2
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.models import EvaluationWithId
+from autoblocks.testing.run import ProfilerConfig
+from autoblocks.testing.run import RunManager
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import get_phase_stats
+from autoblocks.testing.run import run_test_suite
+from autoblocks.testing.v2.run import RunOptions as RunOptionsV2
+from autoblocks.testing.v2.run import get_phase_stats as get_phase_stats_v2
+from autoblocks.testing.v2.run import run_test_suite as run_test_suite_v2
+from autoblocks.tracer import init_auto_tracer
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+            AutoblocksEnvVar.V2_API_KEY.value: "mock-api-key",
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def cli(httpx_mock):
+    httpx_mock.add_callback(lambda request: httpx.Response(status_code=200, json=dict(id="mock-id")))
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+class SlowEvaluator(BaseTestEvaluator):
+    id = "slow"
+    max_concurrency = 1
+
+    async def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        await asyncio.sleep(0.1)
+        return Evaluation(score=1)
+
+
+class FastEvaluator(BaseTestEvaluator):
+    id = "fast"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        return Evaluation(score=1)
+
+
+def test_profiles_each_phase(tmp_path, cli, capsys):
+    trace_path = str(tmp_path / "trace.json")
+
+    async def fn(test_case: MyTestCase) -> str:
+        await asyncio.sleep(0.05)
+        return test_case.input
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=x) for x in ["a", "b", "c"]],
+        evaluators=[SlowEvaluator(), FastEvaluator()],
+        fn=fn,
+        before_evaluators_hook=lambda test_case, output: None,
+        options=RunOptions(profiler=ProfilerConfig(trace_path=trace_path)),
+    )
+
+    phase_stats = get_phase_stats("my-test-id")
+    assert phase_stats is not None
+    stats = {s.phase: s for s in phase_stats}
+    assert set(stats) == {
+        "test_case_wait",
+        "fn",
+        "before_evaluators_hook",
+        "serialize",
+        "upload_result",
+        "evaluator_wait:slow",
+        "evaluator:slow",
+        "evaluator_wait:fast",
+        "evaluator:fast",
+        "upload_evaluation",
+    }
+    assert all(s.count == 3 for phase, s in stats.items() if phase != "upload_evaluation")
+    assert stats["upload_evaluation"].count == 6
+    assert stats["fn"].p50_ms >= 50
+    # The slow evaluator runs one test case at a time, so the last one waits for the other two
+    assert stats["evaluator_wait:slow"].max_ms >= 150
+    assert (
+        stats["evaluator_wait:slow"].p50_ms
+        <= stats["evaluator_wait:slow"].p95_ms
+        <= stats["evaluator_wait:slow"].max_ms
+    )
+
+    out = capsys.readouterr().out
+    assert "Profile of 'my-test-id' (wall-clock ms):" in out
+    assert "evaluator_wait:slow" in out
+
+    with open(trace_path) as f:
+        events = json.load(f)["traceEvents"]
+    processes = {event["pid"]: event["args"]["name"] for event in events if event["name"] == "process_name"}
+    assert sorted(processes.values()) == ["a", "b", "c"]
+    threads = {
+        (processes[event["pid"]], event["args"]["name"]): event["tid"]
+        for event in events
+        if event["name"] == "thread_name"
+    }
+    assert {lane for _, lane in threads} == {"test case", "slow", "fast"}
+    assert threads[("a", "test case")] == 0
+    spans = [event for event in events if event["ph"] == "X"]
+    assert len(spans) == sum(s.count for s in stats.values())
+    [fn_span] = [span for span in spans if span["name"] == "fn" and processes[span["pid"]] == "a"]
+    assert fn_span["tid"] == 0
+    assert fn_span["dur"] >= 50_000
+
+
+def test_grid_search_combos_are_separate_tracks(tmp_path, cli):
+    trace_path = str(tmp_path / "trace.json")
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=lambda test_case: test_case.input,
+        grid_search_params=dict(x=[1, 2]),
+        options=RunOptions(profiler=ProfilerConfig(trace_path=trace_path)),
+    )
+
+    with open(trace_path) as f:
+        events = json.load(f)["traceEvents"]
+    assert sorted(event["args"]["name"] for event in events if event["name"] == "process_name") == [
+        'a {"x": 1}',
+        'a {"x": 2}',
+    ]
+
+
+def test_not_profiled_by_default(cli):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=lambda test_case: test_case.input,
+    )
+
+    assert get_phase_stats("my-test-id") is None
+
+
+def test_profiles_v2_test_suite():
+    init_auto_tracer(api_key="mock-api-key")
+
+    run_test_suite_v2(
+        id="my-test-id",
+        app_slug="test-app",
+        test_cases=[MyTestCase(input=x) for x in ["a", "b"]],
+        evaluators=[SlowEvaluator()],
+        fn=lambda test_case: test_case.input,
+        options=RunOptionsV2(profiler=ProfilerConfig()),
+    )
+
+    phase_stats = get_phase_stats_v2("my-test-id")
+    assert phase_stats is not None
+    stats = {s.phase: s for s in phase_stats}
+    assert set(stats) == {
+        "test_case_wait",
+        "fn",
+        "serialize",
+        "evaluation_wait",
+        "evaluator_wait:slow",
+        "evaluator:slow",
+    }
+    assert stats["serialize"].count == 4
+    assert stats["evaluator:slow"].count == 2
+
+
+def test_run_manager(cli, capsys):
+    run = RunManager[MyTestCase, str](test_id="my-test-id", profiler=ProfilerConfig())
+    run.start()
+    run.add_result(
+        test_case=MyTestCase(input="a"),
+        output="a",
+        evaluations=[EvaluationWithId(id="my-evaluator", score=1)],
+    )
+    run.end()
+
+    phase_stats = run.get_phase_stats()
+    assert phase_stats is not None
+    assert sorted(s.phase for s in phase_stats) == ["serialize", "upload_evaluations", "upload_result"]
+    assert "Profile of 'my-test-id' (wall-clock ms):" in capsys.readouterr().out
+
+
+def test_run_manager_v2(httpx_mock):
+    httpx_mock.add_response(
+        url=f"{API_ENDPOINT_V2}/testing/results",
+        method="POST",
+        json=dict(executionId="mock-exec-id"),
+    )
+
+    run = RunManagerV2(app_slug="my-app", profiler=ProfilerConfig())
+    run.start()
+    run.add_result(
+        test_case=MyTestCase(input="a"),
+        output="a",
+        duration_ms=100,
+        evaluators=[SlowEvaluator()],
+    )
+    run.end()
+
+    phase_stats = run.get_phase_stats()
+    assert phase_stats is not None
+    stats = {s.phase: s for s in phase_stats}
+    assert set(stats) == {"evaluator_wait:slow", "evaluator:slow", "serialize", "upload_result"}
+    assert stats["evaluator:slow"].max_ms >= 100
+
+
+def test_percentiles():
+    profiler = RunProfiler(ProfilerConfig(), "my-test-id")
+    for i in range(1, 101):
+        profiler.record("fn", str(i), "test case", 0, i / 1_000)
+    profiler.record("serialize", "1", "test case", 0, 0.5)
+
+    fn_stats, serialize_stats = profiler.phase_stats()
+    assert fn_stats.phase == "fn"
+    assert fn_stats.count == 100
+    assert (round(fn_stats.p50_ms), round(fn_stats.p95_ms), round(fn_stats.max_ms)) == (50, 95, 100)
+    # Phases that took longer in total come first
+    assert serialize_stats.phase == "serialize"
+    assert serialize_stats.p50_ms == serialize_stats.max_ms == 500
+
+
+def test_config_validation():
+    with pytest.raises(ValueError, match="trace_path must not be empty"):
+        ProfilerConfig(trace_path="")
@@ -0,0 +1,218 @@
+import dataclasses
+import os
+from typing import Any
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.config.constants import API_ENDPOINT
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.run import ResultBatchConfig
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import run_test_suite
+from autoblocks.tracer import AutoblocksTracer
+from tests.util import decode_request_body
+
+API_PATH_PREFIX = "/testing/local"
+
+
+@pytest.fixture(autouse=True)
+def mock_api_key_env_var():
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.API_KEY.value: "mock-api-key"}):
+        os.environ.pop("CI", None)
+        yield
+
+
+@pytest.fixture
+def api_requests(httpx_mock):
+    """
+    Stands in for the public API and records the path and body of every request it receives.
+    """
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        path = str(request.url)[len(API_ENDPOINT) :]
+        assert path.startswith(API_PATH_PREFIX)
+        requests.append((path[len(API_PATH_PREFIX) :], decode_request_body(request)))
+        return httpx.Response(status_code=200, json=dict(id="mock-id"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+class EvaluatorA(BaseTestEvaluator):
+    id = "evaluator-a"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        return Evaluation(score=0, metadata=dict(reason="because"))
+
+
+class EvaluatorB(BaseTestEvaluator):
+    id = "evaluator-b"
+
+    async def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        return Evaluation(score=1)
+
+
+def test_batches_results_with_their_evaluations(api_requests):
+    tracer = AutoblocksTracer("mock-ingestion-key")
+
+    def fn(test_case: MyTestCase) -> str:
+        tracer.send_event("my-event", properties=dict(input=test_case.input))
+        return test_case.input.upper()
+
+    num_test_cases = 120
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=str(i)) for i in range(num_test_cases)],
+        evaluators=[EvaluatorA(), EvaluatorB()],
+        fn=fn,
+        max_test_case_concurrency=10,
+        options=RunOptions(result_batch=ResultBatchConfig(max_batch_size=50)),
+    )
+
+    paths = [path for path, _ in api_requests]
+    assert paths[0] == "/runs"
+    assert paths[-1] == "/runs/mock-id/end"
+    assert paths[1:-1] == ["/runs/mock-id/results/batch"] * 3
+
+    batches = [body["results"] for path, body in api_requests if path.endswith("/results/batch")]
+    assert [len(batch) for batch in batches] == [50, 50, 20]
+
+    records = {record["testCaseHash"]: record for batch in batches for record in batch}
+    assert sorted(records) == sorted(str(i) for i in range(num_test_cases))
+
+    record = records["7"]
+    assert record["testCaseBody"] == dict(input="7")
+    assert record["testCaseOutput"] == "7"
+    assert record["testCaseDurationMs"] > 0
+    assert [event["message"] for event in record["testCaseEvents"]] == ["my-event"]
+    assert sorted(record["evaluations"], key=lambda e: e["evaluatorExternalId"]) == [
+        dict(
+            evaluatorExternalId="evaluator-a",
+            score=0,
+            passed=None,
+            threshold=None,
+            metadata=dict(reason="because"),
+            revisionUsage=None,
+            assertions=None,
+        ),
+        dict(
+            evaluatorExternalId="evaluator-b",
+            score=1,
+            passed=None,
+            threshold=None,
+            metadata=None,
+            revisionUsage=None,
+            assertions=None,
+        ),
+    ]
+
+
+def test_large_results_are_split(api_requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="small"), MyTestCase(input="large")],
+        evaluators=[EvaluatorA()],
+        fn=lambda test_case: test_case.input * (1_000 if test_case.input == "large" else 1),
+        max_test_case_concurrency=1,
+        options=RunOptions(result_batch=ResultBatchConfig(max_batch_bytes=2_000)),
+    )
+
+    paths = [path for path, _ in api_requests]
+    # The large result is sent the same way as without batching
+    assert sorted(paths) == sorted(
+        [
+            "/runs",
+            "/runs/mock-id/results",
+            "/runs/mock-id/results/mock-id/body",
+            "/runs/mock-id/results/mock-id/output",
+            "/runs/mock-id/results/mock-id/human-review-fields",
+            "/runs/mock-id/results/mock-id/ui-based-evaluations",
+            "/runs/mock-id/results/mock-id/evaluations",
+            "/runs/mock-id/results/batch",
+            "/runs/mock-id/end",
+        ]
+    )
+    (batch,) = [body["results"] for path, body in api_requests if path.endswith("/results/batch")]
+    assert [record["testCaseHash"] for record in batch] == ["small"]
+    (output,) = [body for path, body in api_requests if path.endswith("/output")]
+    assert output == dict(testCaseOutput="large" * 1_000)
+
+
+def test_falls_back_to_single_results_when_batches_are_unsupported(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        path = str(request.url)[len(API_ENDPOINT) + len(API_PATH_PREFIX) :]
+        requests.append((path, decode_request_body(request)))
+        if path.endswith("/results/batch"):
+            return httpx.Response(status_code=404)
+        return httpx.Response(status_code=200, json=dict(id="mock-id"))
+
+    httpx_mock.add_callback(handle)
+    tracer = AutoblocksTracer("mock-ingestion-key")
+
+    def fn(test_case: MyTestCase) -> str:
+        tracer.send_event("my-event")
+        return test_case.input.upper()
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=str(i)) for i in range(6)],
+        evaluators=[EvaluatorA()],
+        fn=fn,
+        max_test_case_concurrency=1,
+        options=RunOptions(result_batch=ResultBatchConfig(max_batch_size=2)),
+    )
+
+    paths = [path for path, _ in requests]
+    # The first batch finds out the endpoint is missing, so the rest aren't attempted
+    assert paths.count("/runs/mock-id/results/batch") == 1
+    results = sorted(body["testCaseHash"] for path, body in requests if path == "/runs/mock-id/results")
+    assert results == [str(i) for i in range(6)]
+    outputs = sorted(body["testCaseOutput"] for path, body in requests if path.endswith("/output"))
+    assert outputs == [str(i) for i in range(6)]
+    assert len([path for path in paths if path.endswith("/events")]) == 6
+    assert len([path for path in paths if path.endswith("/evaluations")]) == 6
+
+
+def test_batching_reduces_requests(api_requests):
+    test_cases = [MyTestCase(input=str(i)) for i in range(20)]
+    evaluators = [EvaluatorA(), EvaluatorB()]
+
+    run_test_suite(id="my-test-id", test_cases=test_cases, evaluators=evaluators, fn=lambda test_case: test_case.input)
+    unbatched_requests = len(api_requests)
+
+    api_requests.clear()
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases,
+        evaluators=evaluators,
+        fn=lambda test_case: test_case.input,
+        options=RunOptions(result_batch=ResultBatchConfig()),
+    )
+
+    # /runs, 5 requests per result, 2 evaluations per result, /end
+    assert unbatched_requests == 2 + 20 * (5 + 2)
+    # /runs, one batch, /end
+    assert len(api_requests) == 3
+
+
+def test_batch_config_validation():
+    with pytest.raises(ValueError, match="max_batch_size must be at least 1"):
+        ResultBatchConfig(max_batch_size=0)
+    with pytest.raises(ValueError, match="max_batch_bytes must be at least 1"):
+        ResultBatchConfig(max_batch_bytes=0)
@@ -0,0 +1,220 @@
+import dataclasses
+import logging
+import os
+from typing import Any
+from typing import Optional
+from typing import Sequence
+from unittest import mock
+
+import httpx
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+
+from autoblocks._impl.testing.sharding import shard_config_from_env
+from autoblocks._impl.testing.sharding import shard_index
+from autoblocks._impl.testing.sharding import shared_run_id
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks._impl.util import is_valid_cuid2
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import CreateHumanReviewJob
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.models import TestCaseConfig
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import ShardConfig
+from autoblocks.testing.run import SuccessiveHalvingConfig
+from autoblocks.testing.run import run_test_suite
+from autoblocks.testing.v2.run import RunOptions as RunOptionsV2
+from autoblocks.testing.v2.run import run_test_suite as run_test_suite_v2
+from autoblocks.tracer import init_auto_tracer
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, decode_request_body(request)))
+        return httpx.Response(status_code=200, json=dict(id="mock-run-id"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: int
+
+    def hash(self) -> str:
+        return str(self.input)
+
+
+class MyEvaluator(BaseTestEvaluator):
+    id = "my-evaluator"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: int) -> Evaluation:
+        return Evaluation(score=1)
+
+
+def _run(
+    requests: list[tuple[str, dict[str, Any]]],
+    test_cases: Sequence[MyTestCase],
+    shard: Optional[ShardConfig] = None,
+) -> list[str]:
+    requests.clear()
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases,
+        evaluators=[MyEvaluator()],
+        fn=lambda test_case: test_case.input,
+        options=RunOptions(shard=shard),
+    )
+    assert not [body for path, body in requests if path == "/errors"]
+    return [body["testCaseHash"] for path, body in requests if path == "/results"]
+
+
+def test_shards_partition_the_test_cases(requests):
+    test_cases = [MyTestCase(input=i) for i in range(50)]
+
+    hashes_by_shard = [_run(requests, test_cases, shard=ShardConfig(index=i, total=3)) for i in range(3)]
+
+    assert sorted(h for hashes in hashes_by_shard for h in hashes) == sorted(str(i) for i in range(50))
+    # Every shard gets a share of the work
+    assert all(len(hashes) > 5 for hashes in hashes_by_shard)
+
+    # The split doesn't depend on the order of the test cases
+    assert sorted(_run(requests, test_cases[::-1], shard=ShardConfig(index=1, total=3))) == sorted(hashes_by_shard[1])
+
+
+def test_repetitions_are_sharded_separately(requests):
+    @dataclasses.dataclass
+    class MyRepeatedTestCase(MyTestCase):
+        test_case_config: TestCaseConfig = dataclasses.field(
+            default_factory=lambda: TestCaseConfig(repeat_num_times=10),
+        )
+
+    test_cases = [MyRepeatedTestCase(input=1)]
+    counts = [len(_run(requests, test_cases, shard=ShardConfig(index=i, total=2))) for i in range(2)]
+
+    assert sum(counts) == 10
+    assert all(count > 0 for count in counts)
+
+
+def test_each_shard_reports_its_own_run(requests):
+    _run(requests, [MyTestCase(input=i) for i in range(3)], shard=ShardConfig(index=1, total=2))
+
+    start = [body for path, body in requests if path == "/start"]
+    end = [body for path, body in requests if path == "/end"]
+    assert start == [dict(testExternalId="my-test-id", gridSearchRunGroupId=None, gridSearchParamsCombo=None)]
+    assert end == [dict(testExternalId="my-test-id", runId="mock-run-id")]
+
+
+@mock.patch.dict(
+    os.environ,
+    {AutoblocksEnvVar.SHARD_INDEX.value: "0", AutoblocksEnvVar.SHARD_TOTAL.value: "2"},
+)
+def test_shard_from_env(requests):
+    test_cases = [MyTestCase(input=i) for i in range(20)]
+
+    hashes = _run(requests, test_cases)
+
+    assert sorted(hashes) == sorted(str(i) for i in range(20) if shard_index(str(i), 2) == 0)
+    assert len([body for path, body in requests if path == "/start"]) == 1
+
+
+def test_invalid_env_runs_every_test_case(caplog):
+    with mock.patch.dict(
+        os.environ,
+        {AutoblocksEnvVar.SHARD_INDEX.value: "2", AutoblocksEnvVar.SHARD_TOTAL.value: "2"},
+    ):
+        with caplog.at_level(logging.WARNING):
+            assert shard_config_from_env() is None
+    assert "Ignoring invalid AUTOBLOCKS_SHARD_INDEX" in caplog.text
+
+    with mock.patch.dict(os.environ, {AutoblocksEnvVar.SHARD_TOTAL.value: "2"}):
+        assert shard_config_from_env() is None
+
+    assert shard_config_from_env() is None
+
+
+def test_cannot_combine_with_successive_halving(requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=i) for i in range(3)],
+        evaluators=[MyEvaluator()],
+        fn=lambda test_case: test_case.input,
+        grid_search_params=dict(x=[1, 2]),
+        options=RunOptions(successive_halving=SuccessiveHalvingConfig(), shard=ShardConfig(index=0, total=2)),
+    )
+
+    errors = [body for path, body in requests if path == "/errors"]
+    assert len(errors) == 1
+    assert "successive_halving can't be combined with sharding" in errors[0]["error"]["message"]
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+@pytest.mark.parametrize("shard", [None, ShardConfig(index=0, total=2)])
+def test_v2_sharded_runs_leave_follow_ups_to_the_caller(httpx_mock, monkeypatch, shard):
+    init_auto_tracer(api_key="mock-api-key")
+    # Keep the spans in process
+    monkeypatch.setattr(trace, "get_tracer", TracerProvider().get_tracer)
+    httpx_mock.add_response(json=dict(id="mock-app-id", name="Test App", slug="test-app"))
+
+    with (
+        mock.patch.dict(
+            os.environ,
+            {
+                AutoblocksEnvVar.V2_API_KEY.value: "mock-api-key",
+                AutoblocksEnvVar.V2_CI_TEST_RUN_BUILD_ID.value: "build-1",
+            },
+        ),
+        mock.patch("autoblocks._impl.testing.v2.run.send_create_human_review_job") as create_human_review_job,
+        mock.patch("autoblocks._impl.testing.v2.run.send_v2_slack_notification") as slack_notification,
+        mock.patch("autoblocks._impl.testing.v2.run.send_v2_github_comment") as github_comment,
+    ):
+        run_test_suite_v2(
+            id="my-test-id",
+            app_slug="test-app",
+            test_cases=[MyTestCase(input=i) for i in range(3)],
+            fn=lambda test_case: test_case.input,
+            human_review_job=CreateHumanReviewJob(assignee_email_address="reviewer@example.com", name="Review"),
+            options=RunOptionsV2(shard=shard),
+        )
+
+    # No shard knows when the others finish
+    expected_calls = 0 if shard else 1
+    assert create_human_review_job.call_count == expected_calls
+    assert slack_notification.call_count == expected_calls
+    assert github_comment.call_count == expected_calls
+
+
+def test_shared_run_id():
+    run_id = shared_run_id(test_id="my-test-id", build_id="build-1")
+
+    assert is_valid_cuid2(run_id)
+    assert run_id == shared_run_id(test_id="my-test-id", build_id="build-1")
+    assert run_id != shared_run_id(test_id="my-test-id", build_id="build-2")
+    assert run_id != shared_run_id(test_id="my-other-test-id", build_id="build-1")
+
+
+def test_config_validation():
+    with pytest.raises(ValueError, match="total must be at least 1"):
+        ShardConfig(index=0, total=0)
+    with pytest.raises(ValueError, match="index must be at least 0 and less than total"):
+        ShardConfig(index=2, total=2)
+    with pytest.raises(ValueError, match="index must be at least 0 and less than total"):
+        ShardConfig(index=-1, total=2)
@@ -0,0 +1,200 @@
+import asyncio
+import dataclasses
+import os
+from typing import Any
+from typing import AsyncIterator
+from typing import Iterator
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.testing.scheduler import max_in_flight_test_cases
+from autoblocks._impl.testing.scheduler import run_with_bounded_concurrency
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import TestCaseConfig
+from autoblocks.testing.run import run_test_suite
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def cli_requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, decode_request_body(request)))
+        return httpx.Response(status_code=200, json=dict(id="mock-run-id"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+    test_case_config: TestCaseConfig = dataclasses.field(default_factory=TestCaseConfig)
+
+    def hash(self) -> str:
+        return self.input
+
+
+def test_run_with_bounded_concurrency_pulls_lazily():
+    num_items = 100_000
+    max_in_flight = 8
+    pulled = 0
+    running = 0
+    max_running = 0
+    max_pulled_ahead = 0
+    seen: list[int] = []
+
+    async def items() -> AsyncIterator[int]:
+        nonlocal pulled
+        for i in range(num_items):
+            pulled += 1
+            yield i
+
+    async def fn(idx: int, item: int) -> None:
+        nonlocal running, max_running, max_pulled_ahead
+        running += 1
+        max_running = max(max_running, running)
+        max_pulled_ahead = max(max_pulled_ahead, pulled - len(seen))
+        await asyncio.sleep(0)
+        assert idx == item
+        seen.append(item)
+        running -= 1
+
+    asyncio.run(run_with_bounded_concurrency(items(), fn, max_in_flight=max_in_flight))
+
+    assert sorted(seen) == list(range(num_items))
+    assert max_running == max_in_flight
+    assert max_pulled_ahead <= max_in_flight
+
+
+def test_run_with_bounded_concurrency_stops_pulling_after_error():
+    calls: list[int] = []
+
+    async def items() -> AsyncIterator[int]:
+        yield 0
+        yield 1
+        raise ValueError("boom")
+
+    async def fn(idx: int, item: int) -> None:
+        calls.append(item)
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(run_with_bounded_concurrency(items(), fn, max_in_flight=4))
+
+    assert sorted(calls) == [0, 1]
+
+
+def test_generator_of_test_cases(cli_requests):
+    num_test_cases = 200
+    max_test_case_concurrency = 4
+    pulled = 0
+    finished = 0
+    max_pulled_ahead = 0
+
+    def test_cases() -> Iterator[MyTestCase]:
+        nonlocal pulled
+        for i in range(num_test_cases):
+            pulled += 1
+            yield MyTestCase(input=str(i))
+
+    def fn(test_case: MyTestCase) -> str:
+        nonlocal finished, max_pulled_ahead
+        max_pulled_ahead = max(max_pulled_ahead, pulled - finished)
+        finished += 1
+        return test_case.input
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases(),
+        fn=fn,
+        max_test_case_concurrency=max_test_case_concurrency,
+    )
+
+    assert not [body for path, body in cli_requests if path == "/errors"]
+    results = [body for path, body in cli_requests if path == "/results"]
+    assert sorted(result["testCaseHash"] for result in results) == sorted(str(i) for i in range(num_test_cases))
+    assert max_pulled_ahead <= max_in_flight_test_cases(max_test_case_concurrency)
+
+
+def test_async_generator_of_test_cases_with_repetitions(cli_requests):
+    async def test_cases() -> AsyncIterator[MyTestCase]:
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield MyTestCase(input=str(i), test_case_config=TestCaseConfig(repeat_num_times=2))
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases(),
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=2,
+    )
+
+    results = [body for path, body in cli_requests if path == "/results"]
+    assert sorted(result["testCaseHash"] for result in results) == ["0-0", "0-1", "1-0", "1-1", "2-0", "2-1"]
+
+
+def test_streamed_duplicate_test_case_hashes(cli_requests):
+    def test_cases() -> Iterator[MyTestCase]:
+        yield MyTestCase(input="a")
+        yield MyTestCase(input="a")
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases(),
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=1,
+    )
+
+    paths = [path for path, _ in cli_requests]
+    # The run has already started when the duplicate is pulled
+    assert paths[0] == "/start"
+    assert paths[-1] == "/end"
+    assert paths.count("/results") == 1
+    (error,) = [body for path, body in cli_requests if path == "/errors"]
+    assert error["runId"] == "mock-run-id"
+    assert error["error"]["message"].startswith("[my-test-id] Duplicate test case hash: 'a'.")
+
+
+def test_empty_streamed_test_cases(cli_requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=iter([]),
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=1,
+    )
+
+    (error,) = [body for path, body in cli_requests if path == "/errors"]
+    assert error["error"]["message"] == "[my-test-id] No test cases provided."
+
+
+def test_streamed_test_cases_with_grid_search(cli_requests):
+    def test_cases() -> Iterator[MyTestCase]:
+        yield MyTestCase(input="a")
+        yield MyTestCase(input="b")
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=test_cases(),
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=1,
+        grid_search_params=dict(x=[1, 2]),
+    )
+
+    # Every combo runs every test case
+    assert [path for path, _ in cli_requests].count("/results") == 4
@@ -0,0 +1,239 @@
+import dataclasses
+import os
+from collections import Counter
+from typing import Any
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.testing.grid_search import round_budgets
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import AdaptiveRepetitionConfig
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.models import TestCaseConfig
+from autoblocks.testing.run import GridSearchStats
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import SuccessiveHalvingConfig
+from autoblocks.testing.run import get_grid_search_stats
+from autoblocks.testing.run import grid_search_ctx
+from autoblocks.testing.run import run_test_suite
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        body = decode_request_body(request)
+        requests.append((path, body))
+        if path == "/start":
+            # One run per combo
+            return httpx.Response(status_code=200, json=dict(id=f"run-{body['gridSearchParamsCombo']['x']}"))
+        return httpx.Response(status_code=200, json=dict(id="mock-id"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: int
+
+    def hash(self) -> str:
+        return str(self.input)
+
+
+class ScoreEvaluator(BaseTestEvaluator):
+    id = "score"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: int) -> Evaluation:
+        return Evaluation(score=output / 10)
+
+
+class ConstantEvaluator(BaseTestEvaluator):
+    id = "constant"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: int) -> Evaluation:
+        return Evaluation(score=0.5)
+
+
+def results_by_run(requests: list[tuple[str, dict[str, Any]]]) -> Counter[str]:
+    return Counter(body["runId"] for path, body in requests if path == "/results")
+
+
+def current_x() -> int:
+    ctx = grid_search_ctx()
+    assert ctx is not None
+    x: int = ctx["x"]
+    return x
+
+
+def grid_search_stats() -> GridSearchStats:
+    stats = get_grid_search_stats("my-test-id")
+    assert stats is not None
+    return stats
+
+
+def test_prunes_losing_combos(requests):
+    calls: list[int] = []
+
+    def fn(test_case: MyTestCase) -> int:
+        calls.append(current_x())
+        return current_x()
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=i) for i in range(9)],
+        evaluators=[ScoreEvaluator()],
+        fn=fn,
+        grid_search_params=dict(x=list(range(9))),
+        options=RunOptions(successive_halving=SuccessiveHalvingConfig()),
+    )
+
+    assert not [body for path, body in requests if path == "/errors"]
+
+    # 9 combos on 1 test case, the best 3 on 3 test cases, then the best one on all 9
+    assert len(calls) == 9 + 3 * 2 + 6
+    assert results_by_run(requests) == Counter(
+        {"run-8": 9, "run-7": 3, "run-6": 3, **{f"run-{x}": 1 for x in range(6)}},
+    )
+
+    # Every combo still gets its own run, including the pruned ones
+    assert sorted(body["gridSearchParamsCombo"]["x"] for path, body in requests if path == "/start") == list(range(9))
+    assert sorted(body["runId"] for path, body in requests if path == "/end") == sorted(f"run-{x}" for x in range(9))
+
+    stats = grid_search_stats()
+    assert stats.combos == 9
+    assert stats.pruned_combos == 8
+    assert stats.fn_calls == 21
+    assert stats.fn_calls_saved == 81 - 21
+
+
+def test_ranks_by_the_given_evaluator_and_direction(requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=i) for i in range(4)],
+        evaluators=[ConstantEvaluator(), ScoreEvaluator()],
+        fn=lambda test_case: current_x(),
+        grid_search_params=dict(x=[1, 2, 3, 4]),
+        options=RunOptions(
+            successive_halving=SuccessiveHalvingConfig(
+                evaluator_id="score",
+                higher_is_better=False,
+                reduction_factor=2,
+            ),
+        ),
+    )
+
+    # 4 combos on 1 test case, the best 2 on 2, the best one on all 4
+    assert results_by_run(requests) == Counter({"run-1": 4, "run-2": 2, "run-3": 1, "run-4": 1})
+    assert grid_search_stats().fn_calls_saved == 16 - 8
+
+
+def test_counts_repetitions_and_failures(requests):
+    @dataclasses.dataclass
+    class MyRepeatedTestCase(MyTestCase):
+        test_case_config: TestCaseConfig = dataclasses.field(
+            default_factory=lambda: TestCaseConfig(repeat_num_times=2),
+        )
+
+    def fn(test_case: MyTestCase) -> int:
+        if current_x() == 9:
+            # Scores highest if it ever succeeded, but failed test cases have no score
+            raise ValueError("boom")
+        return current_x()
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyRepeatedTestCase(input=i) for i in range(4)],
+        evaluators=[ScoreEvaluator()],
+        fn=fn,
+        grid_search_params=dict(x=[1, 9]),
+        options=RunOptions(successive_halving=SuccessiveHalvingConfig(reduction_factor=2)),
+    )
+
+    assert results_by_run(requests) == Counter({"run-1": 8})
+    assert len([body for path, body in requests if path == "/errors"]) == 4
+    stats = grid_search_stats()
+    assert stats.pruned_combos == 1
+    assert stats.fn_calls == 12
+    assert stats.fn_calls_saved == 4
+
+
+def test_ranks_adaptively_repeated_test_cases_by_their_repetitions(requests):
+    @dataclasses.dataclass
+    class MyAdaptiveTestCase(MyTestCase):
+        test_case_config: TestCaseConfig = dataclasses.field(
+            default_factory=lambda: TestCaseConfig(
+                repeat_num_times=10,
+                adaptive_repetitions=AdaptiveRepetitionConfig(max_half_width=0.5),
+            ),
+        )
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyAdaptiveTestCase(input=i) for i in range(4)],
+        evaluators=[ScoreEvaluator()],
+        fn=lambda test_case: current_x(),
+        grid_search_params=dict(x=[1, 2]),
+        options=RunOptions(successive_halving=SuccessiveHalvingConfig(reduction_factor=2)),
+    )
+
+    assert not [body for path, body in requests if path == "/errors"]
+    # Identical scores stop each test case after 3 repetitions
+    assert results_by_run(requests) == Counter({"run-2": 12, "run-1": 6})
+    stats = grid_search_stats()
+    assert stats.pruned_combos == 1
+
+
+def test_requires_grid_search_params(requests):
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input=i) for i in range(4)],
+        evaluators=[ScoreEvaluator()],
+        fn=lambda test_case: 1,
+        options=RunOptions(successive_halving=SuccessiveHalvingConfig()),
+    )
+
+    errors = [body for path, body in requests if path == "/errors"]
+    assert len(errors) == 1
+    assert "successive_halving requires grid_search_params" in errors[0]["error"]["message"]
+    assert not [body for path, body in requests if path == "/start"]
+
+
+def test_round_budgets():
+    config = SuccessiveHalvingConfig()
+    assert round_budgets(num_test_cases=9, num_combos=9, config=config) == [1, 3, 9]
+    assert round_budgets(num_test_cases=100, num_combos=9, config=config) == [12, 36, 100]
+    assert round_budgets(num_test_cases=100, num_combos=1, config=config) == [100]
+    assert round_budgets(num_test_cases=2, num_combos=27, config=config) == [1, 2]
+    assert round_budgets(num_test_cases=100, num_combos=9, config=SuccessiveHalvingConfig(min_test_cases=5)) == [
+        5,
+        15,
+        45,
+        100,
+    ]
+
+
+def test_config_validation():
+    with pytest.raises(ValueError, match="reduction_factor must be at least 2"):
+        SuccessiveHalvingConfig(reduction_factor=1)
+    with pytest.raises(ValueError, match="min_test_cases must be at least 1"):
+        SuccessiveHalvingConfig(min_test_cases=0)
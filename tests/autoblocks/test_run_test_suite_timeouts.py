@@ -0,0 +1,250 @@
+import asyncio
+import dataclasses
+import os
+import threading
+import time
+from typing import Any
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl import global_state
+from autoblocks._impl.testing.executor import TestSuiteExecutor
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.run import RunOptions
+from autoblocks.testing.run import TimeoutConfig
+from autoblocks.testing.run import get_executor_stats
+from autoblocks.testing.run import run_test_suite
+from tests.util import MOCK_CLI_SERVER_ADDRESS
+from tests.util import decode_request_body
+
+
+@pytest.fixture(autouse=True)
+def mock_cli_server_address_env_var():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.CLI_SERVER_ADDRESS.value: MOCK_CLI_SERVER_ADDRESS,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def requests(httpx_mock):
+    requests: list[tuple[str, dict[str, Any]]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.path, decode_request_body(request)))
+        return httpx.Response(status_code=200, json=dict(id="mock-id"))
+
+    httpx_mock.add_callback(handle)
+    return requests
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+class MyEvaluator(BaseTestEvaluator):
+    id = "my-evaluator"
+
+    def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        return Evaluation(score=1)
+
+
+def errors(requests: list[tuple[str, dict[str, Any]]]) -> list[dict[str, Any]]:
+    return [body for path, body in requests if path == "/errors"]
+
+
+def results(requests: list[tuple[str, dict[str, Any]]]) -> list[str]:
+    return sorted(body["testCaseHash"] for path, body in requests if path == "/results")
+
+
+def test_cancels_async_fn(requests):
+    cancelled = []
+
+    async def fn(test_case: MyTestCase) -> str:
+        if test_case.input == "hangs":
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(test_case.input)
+                raise
+        return test_case.input
+
+    start = time.perf_counter()
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="hangs"), MyTestCase(input="a"), MyTestCase(input="b")],
+        evaluators=[MyEvaluator()],
+        fn=fn,
+        # A single slot, so a hung test case would block the others
+        max_test_case_concurrency=1,
+        options=RunOptions(timeouts=TimeoutConfig(test_case_seconds=0.2)),
+    )
+
+    assert time.perf_counter() - start < 10
+    assert cancelled == ["hangs"]
+    assert results(requests) == ["a", "b"]
+    [error] = errors(requests)
+    assert error["testCaseHash"] == "hangs"
+    assert error["evaluatorExternalId"] is None
+    assert error["error"]["name"] == "TimeoutExceededError"
+    assert error["error"]["message"] == "Test case 'hangs' timed out after 0.2 seconds"
+
+
+def test_abandons_sync_fn(requests):
+    release = threading.Event()
+
+    def fn(test_case: MyTestCase) -> str:
+        if test_case.input == "hangs":
+            release.wait(30)
+        return test_case.input
+
+    try:
+        start = time.perf_counter()
+        run_test_suite(
+            id="my-test-id",
+            test_cases=[MyTestCase(input="hangs"), MyTestCase(input="a")],
+            fn=fn,
+            max_test_case_concurrency=1,
+            options=RunOptions(timeouts=TimeoutConfig(test_case_seconds=0.2)),
+        )
+        assert time.perf_counter() - start < 10
+    finally:
+        release.set()
+
+    assert results(requests) == ["a"]
+    assert [error["testCaseHash"] for error in errors(requests)] == ["hangs"]
+    # "a" ran on a replacement worker instead of queueing behind the hung one
+    stats = get_executor_stats("my-test-id")
+    assert stats is not None
+    assert stats.abandoned == 1
+    assert stats.max_workers == 1
+
+
+def test_replacement_workers_are_capped():
+    global_state.init()
+    release = threading.Event()
+    executor = TestSuiteExecutor(max_workers=1)
+
+    async def abandon() -> None:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(executor.run(release.wait, 30), 0.05)
+
+    async def main() -> None:
+        # The first hung worker gets a replacement, which then hangs too
+        await abandon()
+        await abandon()
+        # Both pools are busy, so this queues until a hung worker returns
+        task = asyncio.ensure_future(executor.run(lambda: "done"))
+        await asyncio.sleep(0.2)
+        assert not task.done()
+        release.set()
+        assert await task == "done"
+
+    try:
+        asyncio.run_coroutine_threadsafe(main(), global_state.event_loop()).result(timeout=10)
+    finally:
+        release.set()
+        executor.shutdown()
+    assert executor.stats.abandoned == 2
+    assert executor.stats.max_workers == 1
+
+
+def test_evaluator_timeouts(requests):
+    class SlowEvaluator(BaseTestEvaluator):
+        id = "slow"
+
+        async def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+            await asyncio.sleep(60)
+            return Evaluation(score=1)
+
+    class SlowWithOwnTimeoutEvaluator(BaseTestEvaluator):
+        id = "slow-with-own-timeout"
+        timeout = 5
+
+        async def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+            await asyncio.sleep(0.5)
+            return Evaluation(score=1)
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        evaluators=[MyEvaluator(), SlowEvaluator(), SlowWithOwnTimeoutEvaluator()],
+        fn=lambda test_case: test_case.input,
+        options=RunOptions(timeouts=TimeoutConfig(evaluator_seconds=0.2)),
+    )
+
+    assert results(requests) == ["a"]
+    evals = sorted(body["evaluatorExternalId"] for path, body in requests if path == "/evals")
+    assert evals == ["my-evaluator", "slow-with-own-timeout"]
+    [error] = errors(requests)
+    assert error["evaluatorExternalId"] == "slow"
+    assert error["error"]["message"] == "Evaluator 'slow' on test case 'a' timed out after 0.2 seconds"
+
+
+def test_retries_on_timeout(requests):
+    attempts = []
+
+    async def fn(test_case: MyTestCase) -> str:
+        attempts.append(test_case.input)
+        if len(attempts) == 1:
+            await asyncio.sleep(60)
+        return test_case.input
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=fn,
+        retry_count=1,
+        options=RunOptions(timeouts=TimeoutConfig(test_case_seconds=0.2, retry_on_timeout=True)),
+    )
+
+    assert attempts == ["a", "a"]
+    assert results(requests) == ["a"]
+    assert not errors(requests)
+
+
+def test_timeouts_are_not_retried_by_default(requests):
+    attempts = []
+
+    async def fn(test_case: MyTestCase) -> str:
+        attempts.append(test_case.input)
+        await asyncio.sleep(60)
+        return test_case.input
+
+    run_test_suite(
+        id="my-test-id",
+        test_cases=[MyTestCase(input="a")],
+        fn=fn,
+        retry_count=1,
+        options=RunOptions(timeouts=TimeoutConfig(test_case_seconds=0.2)),
+    )
+
+    assert attempts == ["a"]
+    assert len(errors(requests)) == 1
+
+
+def test_validation():
+    with pytest.raises(ValueError, match="test_case_seconds must be positive"):
+        TimeoutConfig(test_case_seconds=0)
+    with pytest.raises(ValueError, match="evaluator_seconds must be positive"):
+        TimeoutConfig(evaluator_seconds=-1)
+    with pytest.raises(TypeError, match="timeout must be a positive number"):
+
+        class MyBadEvaluator(BaseTestEvaluator):
+            id = "my-bad-evaluator"
+            timeout = "10"  # type: ignore[assignment]
+
+            def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+                return Evaluation(score=1)
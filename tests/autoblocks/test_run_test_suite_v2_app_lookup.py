@@ -0,0 +1,123 @@
+import asyncio
+import dataclasses
+import os
+from typing import Any
+from typing import Coroutine
+from typing import TypeVar
+from unittest import mock
+
+import httpx
+import pytest
+from tenacity import wait_none
+
+from autoblocks._impl import global_state
+from autoblocks._impl.app.models import App
+from autoblocks._impl.config.constants import API_ENDPOINT_V2
+from autoblocks._impl.testing.v2.api import app_registry
+from autoblocks._impl.testing.v2.api import get_app
+from autoblocks._impl.testing.v2.api import get_from_api_with_retry
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.v2.run import run_test_suite
+from autoblocks.tracer import init_auto_tracer
+
+APP_URL = f"{API_ENDPOINT_V2}/apps/test-app"
+
+T = TypeVar("T")
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.V2_API_KEY.value: "mock-api-key",
+        },
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_app_registry():
+    app_registry.clear()
+    yield
+    app_registry.clear()
+
+
+@pytest.fixture
+def no_retry_wait():
+    with mock.patch.object(get_from_api_with_retry.retry, "wait", wait_none()):
+        yield
+
+
+def app_lookups(httpx_mock: Any) -> list[httpx.Request]:
+    return [request for request in httpx_mock.get_requests() if request.method == "GET" and request.url == APP_URL]
+
+
+def test_looks_up_the_app_once_for_all_grid_combos(httpx_mock, capsys):
+    init_auto_tracer(api_key="mock-api-key")
+    httpx_mock.add_response(
+        url=APP_URL,
+        method="GET",
+        json=dict(id="mock-app-id", name="Test App", slug="test-app"),
+    )
+
+    for _ in range(2):
+        run_test_suite(
+            id="my-test-id",
+            app_slug="test-app",
+            test_cases=[MyTestCase(input="a")],
+            fn=lambda test_case: test_case.input,
+            grid_search_params=dict(x=[1, 2, 3]),
+        )
+
+    # Once per process, not once per combo or per test suite run
+    [request] = app_lookups(httpx_mock)
+    assert request.headers["Authorization"] == "Bearer mock-api-key"
+    out = capsys.readouterr().out
+    assert out.count("View test results at: ") == 6
+    assert out.count("/apps/mock-app-id/runs/inspect-run") == 6
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    return asyncio.run_coroutine_threadsafe(coro, global_state.event_loop()).result()
+
+
+async def lookup_concurrently() -> list[Any]:
+    return await asyncio.gather(*[get_app("test-app") for _ in range(5)], return_exceptions=True)
+
+
+def test_concurrent_lookups_share_a_request_and_errors_are_retried(httpx_mock, no_retry_wait):
+    global_state.init()
+    httpx_mock.add_response(url=APP_URL, method="GET", status_code=503)
+    httpx_mock.add_response(url=APP_URL, method="GET", json=dict(id="mock-app-id", name="Test App", slug="test-app"))
+
+    results = run(lookup_concurrently())
+    assert all(isinstance(result, App) and result.id == "mock-app-id" for result in results)
+    assert len(app_lookups(httpx_mock)) == 2
+
+    assert run(get_app("test-app")).id == "mock-app-id"
+    assert len(app_lookups(httpx_mock)) == 2
+
+
+def test_failed_lookups_are_tried_again_by_the_next_caller(httpx_mock, no_retry_wait):
+    global_state.init()
+    for _ in range(3):
+        httpx_mock.add_response(url=APP_URL, method="GET", status_code=503)
+    httpx_mock.add_response(url=APP_URL, method="GET", json=dict(id="mock-app-id", name="Test App", slug="test-app"))
+
+    results = run(lookup_concurrently())
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+    assert len(app_lookups(httpx_mock)) == 3
+
+    results = run(lookup_concurrently())
+    assert all(isinstance(result, App) and result.id == "mock-app-id" for result in results)
+    assert len(app_lookups(httpx_mock)) == 4
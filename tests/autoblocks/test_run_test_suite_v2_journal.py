@@ -0,0 +1,136 @@
+import asyncio
+import dataclasses
+import json
+import os
+from typing import Any
+from typing import Callable
+from unittest import mock
+
+import pytest
+
+from autoblocks._impl.testing.journal import journal_path
+from autoblocks._impl.testing.journal import open_run_journal
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks._impl.util import cuid_generator
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.run import grid_search_ctx
+from autoblocks.testing.v2.run import RunJournalConfig
+from autoblocks.testing.v2.run import RunOptions
+from autoblocks.testing.v2.run import run_test_suite
+from autoblocks.tracer import init_auto_tracer
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.V2_API_KEY.value: "mock-api-key",
+        },
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def init_tracer():
+    init_auto_tracer(
+        api_key="mock-api-key",
+    )
+
+
+def test_resumes_interrupted_run(tmp_path):
+    config = RunJournalConfig(directory=str(tmp_path))
+    run_id = cuid_generator()
+    calls: list[tuple[int, str]] = []
+
+    def record_call(test_case: MyTestCase) -> None:
+        ctx = grid_search_ctx()
+        assert ctx is not None
+        calls.append((ctx["x"], test_case.input))
+
+    def fn(test_case: MyTestCase) -> str:
+        record_call(test_case)
+        if len(calls) > 4:
+            # The first attempt dies partway through
+            raise RuntimeError("Out of memory")
+        return test_case.input
+
+    def run(fn: Callable[[MyTestCase], Any]) -> None:
+        run_test_suite(
+            id="my-test-id",
+            app_slug="test-app",
+            test_cases=[MyTestCase(input=str(i)) for i in range(3)],
+            fn=fn,
+            grid_search_params=dict(x=[1, 2]),
+            max_test_case_concurrency=1,
+            run_id=run_id,
+            options=RunOptions(journal=config),
+        )
+
+    run(fn)
+    completed = set(calls[:4])
+
+    with open(journal_path(str(tmp_path), "my-test-id", run_id)) as f:
+        entries = [json.loads(line) for line in f]
+    assert {(entry["gridSearchParamsCombo"]["x"], entry["testCaseHash"]) for entry in entries} == completed
+    assert all(entry["id"] for entry in entries)
+
+    calls.clear()
+    run(record_call)
+
+    # Only the test cases that didn't complete run again, and they're appended to the journal
+    assert sorted(calls) == sorted({(x, str(i)) for x in [1, 2] for i in range(3)} - completed)
+    with open(journal_path(str(tmp_path), "my-test-id", run_id)) as f:
+        assert len(f.readlines()) == 6
+
+
+def test_batches_writes(tmp_path):
+    writes = 0
+
+    def before_write() -> None:
+        nonlocal writes
+        writes += 1
+
+    async def main() -> None:
+        config = RunJournalConfig(directory=str(tmp_path), max_pending=2, flush_interval_seconds=3600)
+        journal = await open_run_journal(config, "my-test-id", "my-run-id", before_write=before_write)
+        for i in range(5):
+            await journal.record(str(i), None, f"execution-{i}")
+        assert writes == 2
+        await journal.flush()
+        assert writes == 3
+        await journal.flush()
+        assert writes == 3
+
+        # A line cut short by a crash is ignored
+        with open(journal.path, "a") as f:
+            f.write('{"testCaseHash": "5", "gridSe')
+        reopened = await open_run_journal(config, "my-test-id", "my-run-id")
+        assert reopened.num_completed == 5
+        assert reopened.is_completed("4", None)
+        assert not reopened.is_completed("4", dict(x=1))
+        assert not reopened.is_completed("5", None)
+
+        # The next write starts on a new line
+        await reopened.record("5", None, "execution-5")
+        await reopened.flush()
+        assert (await open_run_journal(config, "my-test-id", "my-run-id")).num_completed == 6
+
+    asyncio.run(main())
+
+
+def test_config_validation(tmp_path):
+    with pytest.raises(ValueError, match="directory must not be empty"):
+        RunJournalConfig(directory="")
+    with pytest.raises(ValueError, match="max_pending must be at least 1"):
+        RunJournalConfig(directory=str(tmp_path), max_pending=0)
+    with pytest.raises(ValueError, match="flush_interval_seconds must not be negative"):
+        RunJournalConfig(directory=str(tmp_path), flush_interval_seconds=-1)
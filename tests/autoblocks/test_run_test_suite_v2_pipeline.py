@@ -0,0 +1,141 @@
+import asyncio
+import dataclasses
+import json
+import os
+import time
+from unittest import mock
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from autoblocks._impl.config.constants import API_ENDPOINT_V2
+from autoblocks._impl.tracer.util import SpanAttribute
+from autoblocks._impl.util import AutoblocksEnvVar
+from autoblocks.testing.models import BaseTestCase
+from autoblocks.testing.models import BaseTestEvaluator
+from autoblocks.testing.models import Evaluation
+from autoblocks.testing.v2.run import run_test_suite
+from autoblocks.tracer import init_auto_tracer
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    with mock.patch.dict(
+        os.environ,
+        {
+            AutoblocksEnvVar.V2_API_KEY.value: "mock-api-key",
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(trace, "get_tracer", provider.get_tracer)
+    return exporter
+
+
+@dataclasses.dataclass
+class MyTestCase(BaseTestCase):
+    input: str
+
+    def hash(self) -> str:
+        return self.input
+
+
+class SlowJudge(BaseTestEvaluator):
+    id = "slow-judge"
+    max_concurrency = 100
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+        self.finished_at: list[float] = []
+
+    async def evaluate_test_case(self, test_case: MyTestCase, output: str) -> Evaluation:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.2)
+        self.running -= 1
+        self.finished_at.append(time.perf_counter())
+        return Evaluation(score=1)
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_evaluators_do_not_hold_back_fn(spans, httpx_mock):
+    init_auto_tracer(api_key="mock-api-key")
+    # Otherwise the failed app lookup's retries count towards the duration
+    httpx_mock.add_response(
+        url=f"{API_ENDPOINT_V2}/apps/test-app",
+        method="GET",
+        json=dict(id="mock-app-id", name="Test App", slug="test-app"),
+    )
+    judge = SlowJudge()
+    fn_finished_at: list[float] = []
+
+    async def fn(test_case: MyTestCase) -> str:
+        await asyncio.sleep(0.01)
+        fn_finished_at.append(time.perf_counter())
+        return test_case.input
+
+    start = time.perf_counter()
+    run_test_suite(
+        id="my-test-id",
+        app_slug="test-app",
+        test_cases=[MyTestCase(input=str(i)) for i in range(8)],
+        evaluators=[judge],
+        fn=fn,
+        max_test_case_concurrency=1,
+        max_evaluation_concurrency=4,
+    )
+    duration = time.perf_counter() - start
+
+    # fn runs one test case at a time without waiting for the judge, which evaluates 4 test cases at a time
+    assert max(fn_finished_at) < min(judge.finished_at)
+    assert judge.peak == 4
+    assert duration < 8 * 0.2
+
+    test_case_spans = [span for span in spans.get_finished_spans() if span.attributes.get(SpanAttribute.IS_ROOT)]
+    assert len(test_case_spans) == 8
+    for span in test_case_spans:
+        # The span ends once its evaluations are done
+        [evaluation] = json.loads(span.attributes[SpanAttribute.EVALUATORS])
+        assert evaluation["id"] == "slow-judge"
+        assert span.end_time - span.start_time >= 0.2 * 1e9
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_evaluation_concurrency_defaults_to_test_case_concurrency():
+    init_auto_tracer(api_key="mock-api-key")
+    judge = SlowJudge()
+
+    run_test_suite(
+        id="my-test-id",
+        app_slug="test-app",
+        test_cases=[MyTestCase(input=str(i)) for i in range(6)],
+        evaluators=[judge],
+        fn=lambda test_case: test_case.input,
+        max_test_case_concurrency=2,
+    )
+
+    assert judge.peak == 2
+    assert len(judge.finished_at) == 6
+
+
+def test_validates_evaluation_concurrency():
+    init_auto_tracer(api_key="mock-api-key")
+
+    with pytest.raises(ValueError, match="max_evaluation_concurrency must be at least 1"):
+        run_test_suite(
+            id="my-test-id",
+            app_slug="test-app",
+            test_cases=[MyTestCase(input="a")],
+            fn=lambda test_case: test_case.input,
+            max_evaluation_concurrency=0,
+        )
@@ -0,0 +1,149 @@
+"""Checks that the test case serializers encode large test cases and outputs in a single pass."""
+
+import dataclasses
+import datetime
+import json
+import random
+from typing import Any
+from unittest import mock
+
+import orjson
+import pydantic
+
+from autoblocks._impl.testing.models import BaseTestCase
+from autoblocks._impl.testing.models import TestCaseConfig
+from autoblocks._impl.testing.util import TEST_CASE_CONFIG_ATTR
+from autoblocks._impl.testing.util import serialize_output_json
+from autoblocks._impl.testing.util import serialize_test_case_json
+
+
+@dataclasses.dataclass
+class Document:
+    id: int
+    title: str
+    text: str
+    score: float
+    created_at: datetime.datetime
+
+
+@dataclasses.dataclass
+class LargeDataclassTestCase(BaseTestCase):
+    question: str
+    documents: list[Document]
+    tags: list[str]
+    test_case_config: TestCaseConfig = dataclasses.field(default_factory=lambda: TestCaseConfig(repeat_num_times=2))
+
+    def hash(self) -> str:
+        return self.question
+
+
+class Citation(pydantic.BaseModel):
+    doc: int
+    score: float
+    spans: list[list[int]]
+
+
+class Answer(pydantic.BaseModel):
+    answer: str
+    citations: list[Citation]
+    created_at: datetime.datetime
+
+
+@dataclasses.dataclass
+class LargePydanticTestCase(BaseTestCase):
+    question: str
+    expected: list[Answer]
+
+    def hash(self) -> str:
+        return self.question
+
+
+def make_documents(rng: random.Random) -> list[Document]:
+    return [
+        Document(
+            id=i,
+            title=f"doc-{i}",
+            text="lorem ipsum dolor sit amet " * 40,
+            score=rng.random(),
+            created_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        for i in range(50)
+    ]
+
+
+def make_answer(rng: random.Random) -> Answer:
+    return Answer(
+        answer="The refund policy allows returns within 30 days. " * 20,
+        citations=[Citation(doc=i, score=rng.random(), spans=[[j, j + 10] for j in range(10)]) for i in range(20)],
+        created_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+
+
+def legacy_default(o: Any) -> Any:
+    if hasattr(o, "model_dump_json"):
+        return orjson.loads(o.model_dump_json())
+    raise TypeError
+
+
+def legacy_serialize(x: Any) -> Any:
+    return orjson.loads(orjson.dumps(x, default=legacy_default))
+
+
+def legacy_serialize_test_case(test_case: Any) -> Any:
+    # Serialized each attribute separately, after deep copying the test case with dataclasses.asdict
+    return {k: legacy_serialize(v) for k, v in dataclasses.asdict(test_case).items() if k != TEST_CASE_CONFIG_ATTR}
+
+
+def assert_single_pass(test_case: BaseTestCase, output: Any) -> None:
+    legacy_input = legacy_serialize_test_case(test_case)
+    legacy_output = legacy_serialize(output)
+
+    with mock.patch.object(orjson, "dumps", wraps=orjson.dumps) as dumps, mock.patch.object(
+        orjson, "loads", wraps=orjson.loads
+    ) as loads:
+        serialized_input = serialize_test_case_json(test_case)
+        serialized_output = serialize_output_json(output)
+
+    # The test case and the output are each encoded once and decoded once, instead of once per attribute
+    # and once more for every pydantic model
+    assert dumps.call_count == 2
+    assert loads.call_count == 2
+
+    assert serialized_input.value == legacy_input
+    assert serialized_output.value == legacy_output
+    assert json.loads(serialized_input.raw) == legacy_input
+    assert json.loads(serialized_output.raw) == legacy_output
+
+
+def test_serializes_large_dataclass_test_case_in_one_pass():
+    rng = random.Random(0)
+    test_case = LargeDataclassTestCase(
+        question="What is the refund policy?",
+        documents=make_documents(rng),
+        tags=[f"tag-{i}" for i in range(100)],
+    )
+    assert_single_pass(test_case, output=dict(documents=make_documents(rng), answer="Within 30 days."))
+
+
+def test_serializes_large_pydantic_test_case_in_one_pass():
+    rng = random.Random(0)
+    test_case = LargePydanticTestCase(
+        question="What is the refund policy?",
+        expected=[make_answer(rng) for _ in range(5)],
+    )
+    assert_single_pass(test_case, output=make_answer(rng))
+
+
+def test_skips_attributes_that_cannot_be_serialized():
+    @dataclasses.dataclass
+    class MyTestCase(BaseTestCase):
+        input: str
+        client: object
+
+        def hash(self) -> str:
+            return self.input
+
+    serialized = serialize_test_case_json(MyTestCase(input="a", client=object()))
+
+    assert serialized.value == dict(input="a")
+    assert serialized.text == '{"input":"a"}'
@@ -9,6 +9,7 @@ from unittest import mock
 import freezegun
 import pytest
 
+from autoblocks._impl.config.constants import INGESTION_BATCH_ENDPOINT
 from autoblocks._impl.config.constants import INGESTION_ENDPOINT
 from autoblocks._impl.testing.models import HumanReviewField
 from autoblocks.testing.models import BaseEvaluator
@@ -18,8 +19,9 @@ from autoblocks.testing.models import Evaluation
 from autoblocks.testing.models import Threshold
 from autoblocks.testing.models import TracerEvent
 from autoblocks.tracer import AutoblocksTracer
+from autoblocks.tracer import BatchConfig
 from autoblocks.tracer import flush
-from tests.util import make_expected_body
+from tests.util import decode_request_body
 
 mock_now = datetime(2021, 1, 1, 1, 1, 1, 1)
 mock_now_timestamp = "2021-01-01T01:01:01.000001+00:00"
@@ -72,14 +74,12 @@ def expect_ingestion_post_request(
         method="POST",
         status_code=status_code,
         match_headers={"Authorization": "Bearer mock-ingestion-key"},
-        match_content=make_expected_body(
-            dict(
-                message=message,
-                traceId=trace_id,
-                timestamp=timestamp or mock_now_timestamp,
-                properties=properties or dict(),
-                systemProperties=system_properties,
-            )
+        match_json=dict(
+            message=message,
+            traceId=trace_id,
+            timestamp=timestamp or mock_now_timestamp,
+            properties=properties or dict(),
+            systemProperties=system_properties,
         ),
     )
 
@@ -93,7 +93,7 @@ def expect_cli_post_request(
         method="POST",
         status_code=200,
         match_headers={"Authorization": "Bearer mock-ingestion-key"},
-        match_content=make_expected_body(body),
+        match_json=body,
     )
 
 
@@ -641,3 +641,93 @@ def test_tracer_human_review_fields(httpx_mock):
         ],
     )
     flush()
+
+
+def test_tracer_batches_events(httpx_mock):
+    httpx_mock.add_response(
+        url=INGESTION_BATCH_ENDPOINT,
+        method="POST",
+        status_code=200,
+        match_headers={"Authorization": "Bearer mock-ingestion-key"},
+    )
+
+    tracer = AutoblocksTracer("mock-ingestion-key", batch=BatchConfig(max_batch_size=2))
+    tracer.send_event("message-1", trace_id="my-trace-id")
+    tracer.send_event("message-2", properties=dict(x=1))
+    tracer.send_event("message-3")
+    flush()
+
+    requests = httpx_mock.get_requests()
+    assert all(str(req.url) == INGESTION_BATCH_ENDPOINT for req in requests)
+    batches = [decode_request_body(req)["events"] for req in requests]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert [event for batch in batches for event in batch] == [
+        dict(
+            message="message-1",
+            traceId="my-trace-id",
+            timestamp=mock_now_timestamp,
+            properties={},
+            systemProperties=None,
+        ),
+        dict(
+            message="message-2",
+            traceId=None,
+            timestamp=mock_now_timestamp,
+            properties=dict(x=1),
+            systemProperties=None,
+        ),
+        # The last batch is sent on flush even though it isn't full
+        dict(
+            message="message-3",
+            traceId=None,
+            timestamp=mock_now_timestamp,
+            properties={},
+            systemProperties=None,
+        ),
+    ]
+
+
+def test_tracer_batches_respect_max_bytes(httpx_mock):
+    httpx_mock.add_response(url=INGESTION_BATCH_ENDPOINT, method="POST", status_code=200)
+
+    tracer = AutoblocksTracer("mock-ingestion-key", batch=BatchConfig(max_batch_bytes=200))
+    for i in range(4):
+        tracer.send_event(f"message-{i}", properties=dict(text="x" * 50))
+    flush()
+
+    batches = [decode_request_body(req)["events"] for req in httpx_mock.get_requests()]
+    assert [[event["message"] for event in batch] for batch in batches] == [
+        ["message-0"],
+        ["message-1"],
+        ["message-2"],
+        ["message-3"],
+    ]
+
+
+def test_tracer_batching_falls_back_to_single_events(httpx_mock):
+    httpx_mock.add_response(url=INGESTION_BATCH_ENDPOINT, method="POST", status_code=404)
+    httpx_mock.add_response(url=INGESTION_ENDPOINT, method="POST", status_code=200)
+
+    tracer = AutoblocksTracer("mock-ingestion-key", batch=BatchConfig(max_batch_size=2))
+    for i in range(2):
+        tracer.send_event(f"message-{i}")
+    flush()
+    # Once the bulk endpoint is known to be missing, it isn't tried again
+    tracer.send_event("message-2")
+    flush()
+
+    requests = httpx_mock.get_requests()
+    assert [str(req.url) for req in requests].count(INGESTION_BATCH_ENDPOINT) == 1
+    assert sorted(decode_request_body(req)["message"] for req in requests if str(req.url) == INGESTION_ENDPOINT) == [
+        "message-0",
+        "message-1",
+        "message-2",
+    ]
+
+
+def test_tracer_batching_swallows_errors(httpx_mock):
+    httpx_mock.add_exception(Exception())
+
+    tracer = AutoblocksTracer("mock-ingestion-key", batch=BatchConfig())
+    tracer.send_event("my-message")
+    flush()
@@ -0,0 +1,68 @@
+"""Performance comparison of per-event and batched ingestion in AutoblocksTracer."""
+
+import statistics
+import time
+
+import httpx
+import pytest
+
+from autoblocks._impl.config.constants import INGESTION_BATCH_ENDPOINT
+from autoblocks._impl.config.constants import INGESTION_ENDPOINT
+from autoblocks.tracer import AutoblocksTracer
+from autoblocks.tracer import BatchConfig
+from autoblocks.tracer import flush
+from tests.util import decode_request_body
+
+NUM_EVENTS = 2_000
+
+
+@pytest.fixture
+def fake_ingestion_server(httpx_mock):
+    """
+    Stands in for the ingestion API and counts the events it receives.
+    """
+    received = dict(requests=0, events=0)
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        received["requests"] += 1
+        if str(request.url) == INGESTION_BATCH_ENDPOINT:
+            received["events"] += len(decode_request_body(request)["events"])
+        else:
+            received["events"] += 1
+        return httpx.Response(status_code=200)
+
+    httpx_mock.add_callback(handle, url=INGESTION_ENDPOINT)
+    httpx_mock.add_callback(handle, url=INGESTION_BATCH_ENDPOINT)
+    return received
+
+
+def _run(tracer: AutoblocksTracer) -> tuple[float, float]:
+    latencies = []
+    start = time.perf_counter()
+    for i in range(NUM_EVENTS):
+        send_start = time.perf_counter()
+        tracer.send_event("benchmark-event", properties=dict(i=i, text="lorem ipsum " * 20))
+        latencies.append(time.perf_counter() - send_start)
+    flush()
+    duration = time.perf_counter() - start
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    return NUM_EVENTS / duration, p99
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_batched_ingestion_performance(fake_ingestion_server):
+    """Ensure batching sends fewer requests and doesn't slow down send_event."""
+    unbatched_eps, unbatched_p99 = _run(AutoblocksTracer("mock-ingestion-key"))
+    assert fake_ingestion_server["requests"] == NUM_EVENTS
+    assert fake_ingestion_server["events"] == NUM_EVENTS
+
+    fake_ingestion_server.update(requests=0, events=0)
+    batched_eps, batched_p99 = _run(AutoblocksTracer("mock-ingestion-key", batch=BatchConfig(max_batch_size=100)))
+    assert fake_ingestion_server["events"] == NUM_EVENTS
+    assert fake_ingestion_server["requests"] < NUM_EVENTS / 10
+
+    # Log performance for visibility
+    print(f"Unbatched: {unbatched_eps:.0f} events/second, p99 send_event latency {unbatched_p99 * 1_000:.3f}ms")
+    print(f"Batched: {batched_eps:.0f} events/second, p99 send_event latency {batched_p99 * 1_000:.3f}ms")
+
+    assert batched_eps > unbatched_eps, f"Batching was slower: {batched_eps:.0f} vs {unbatched_eps:.0f} events/second"
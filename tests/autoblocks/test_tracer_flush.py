@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+import httpx
+import pytest
+
+from autoblocks._impl.config.constants import INGESTION_BATCH_ENDPOINT
+from autoblocks._impl.config.constants import INGESTION_ENDPOINT
+from autoblocks.tracer import AutoblocksTracer
+from autoblocks.tracer import BatchConfig
+from autoblocks.tracer import aflush
+from autoblocks.tracer import flush
+from tests.util import decode_request_body
+
+# The old implementation polled every 100ms, so anything close to that means we're not event driven
+MAX_FLUSH_OVERHEAD_SECONDS = 0.05
+
+
+class FakeIngestionServer:
+    """
+    Stands in for the ingestion API. Responses to messages starting with "slow" are held until released.
+    """
+
+    def __init__(self) -> None:
+        self.received: list[str] = []
+        self.release_slow = threading.Event()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = decode_request_body(request)
+        messages = [event["message"] for event in body["events"]] if "events" in body else [body["message"]]
+        if any(message.startswith("slow") for message in messages):
+            while not self.release_slow.is_set():
+                await asyncio.sleep(0.005)
+        self.received.extend(messages)
+        return httpx.Response(status_code=200)
+
+
+@pytest.fixture
+def server(httpx_mock):
+    fake = FakeIngestionServer()
+    httpx_mock.add_callback(fake.handle, url=INGESTION_ENDPOINT)
+    httpx_mock.add_callback(fake.handle, url=INGESTION_BATCH_ENDPOINT)
+    yield fake
+    fake.release_slow.set()
+    flush()
+
+
+def timed_flush() -> float:
+    start = time.perf_counter()
+    flush()
+    return time.perf_counter() - start
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_flush_latency_with_no_pending_events(server):
+    AutoblocksTracer("mock-ingestion-key")
+    duration = timed_flush()
+
+    print(f"flush() with 0 pending events: {duration * 1_000:.3f}ms")
+    assert duration < MAX_FLUSH_OVERHEAD_SECONDS
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_flush_latency_with_one_pending_event(server):
+    tracer = AutoblocksTracer("mock-ingestion-key")
+    tracer.send_event("message")
+    duration = timed_flush()
+
+    print(f"flush() with 1 pending event: {duration * 1_000:.3f}ms")
+    assert server.received == ["message"]
+    assert duration < MAX_FLUSH_OVERHEAD_SECONDS
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_flush_latency_with_many_pending_events(server):
+    tracer = AutoblocksTracer("mock-ingestion-key", batch=BatchConfig(max_batch_size=500))
+    for i in range(10_000):
+        tracer.send_event(f"message-{i}")
+    duration = timed_flush()
+
+    print(f"flush() with 10k pending events: {duration * 1_000:.3f}ms")
+    assert len(server.received) == 10_000
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_aflush(server):
+    tracer = AutoblocksTracer("mock-ingestion-key")
+
+    async def main() -> None:
+        tracer.send_event("message-1")
+        await aflush()
+        assert server.received == ["message-1"]
+
+        tracer.send_event("message-2")
+        await tracer.aflush()
+        assert server.received == ["message-1", "message-2"]
+
+    asyncio.run(main())
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_aflush_times_out(server):
+    tracer = AutoblocksTracer("mock-ingestion-key")
+    tracer.send_event("slow-message")
+
+    start = time.perf_counter()
+    asyncio.run(aflush(timeout=timedelta(milliseconds=50)))
+
+    assert time.perf_counter() - start < 1
+    assert server.received == []
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_tracer_flush_only_waits_for_its_own_events(server):
+    slow_tracer = AutoblocksTracer("mock-ingestion-key")
+    fast_tracer = AutoblocksTracer("mock-ingestion-key", batch=BatchConfig())
+
+    slow_tracer.send_event("slow-message")
+    fast_tracer.send_event("fast-message")
+
+    start = time.perf_counter()
+    fast_tracer.flush(timeout=timedelta(seconds=5))
+    assert time.perf_counter() - start < 1
+    assert server.received == ["fast-message"]
+
+    server.release_slow.set()
+    slow_tracer.flush()
+    assert server.received == ["fast-message", "slow-message"]
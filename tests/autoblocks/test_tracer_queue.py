@@ -0,0 +1,135 @@
+import os
+import threading
+from datetime import timedelta
+from unittest import mock
+
+import httpx
+import pytest
+
+from autoblocks._impl.config.constants import INGESTION_ENDPOINT
+from autoblocks.tracer import AutoblocksTracer
+from autoblocks.tracer import OverflowPolicy
+from autoblocks.tracer import QueueConfig
+from autoblocks.tracer import flush
+from tests.util import decode_request_body
+
+
+@pytest.fixture
+def stalled_ingestion_endpoint(httpx_mock):
+    """
+    Blocks every ingestion request until the returned event is set, and records the messages it receives.
+    """
+    unstall = threading.Event()
+    received: list[str] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        unstall.wait(timeout=10)
+        received.append(decode_request_body(request)["message"])
+        return httpx.Response(status_code=200)
+
+    httpx_mock.add_callback(handle, url=INGESTION_ENDPOINT)
+    yield unstall, received
+    unstall.set()
+
+
+def test_tracer_queue_drops_newest_when_full(stalled_ingestion_endpoint):
+    unstall, received = stalled_ingestion_endpoint
+    tracer = AutoblocksTracer("mock-ingestion-key", queue=QueueConfig(max_size=10, max_in_flight=1))
+
+    for i in range(1000):
+        tracer.send_event(f"message-{i}")
+
+    stats = tracer.queue_stats
+    assert stats is not None
+    assert stats.enqueued + stats.dropped == 1000
+    assert stats.pending <= 10
+    # At most one event was taken off the queue before the endpoint stalled the loop
+    assert stats.enqueued <= 11
+
+    unstall.set()
+    flush()
+
+    assert len(received) == stats.enqueued
+    # The oldest events are kept and newer ones are dropped
+    assert received[:10] == [f"message-{i}" for i in range(10)]
+
+
+def test_tracer_queue_drops_oldest_when_full(stalled_ingestion_endpoint):
+    unstall, received = stalled_ingestion_endpoint
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        queue=QueueConfig(max_size=5, overflow_policy=OverflowPolicy.DROP_OLDEST, max_in_flight=1),
+    )
+
+    for i in range(100):
+        tracer.send_event(f"message-{i}")
+
+    stats = tracer.queue_stats
+    assert stats is not None
+    assert stats.enqueued == 100
+    assert stats.pending == 5
+
+    unstall.set()
+    flush()
+
+    assert received[-5:] == [f"message-{i}" for i in range(95, 100)]
+    assert len(received) == 100 - stats.dropped
+
+
+def test_tracer_queue_blocks_with_timeout(stalled_ingestion_endpoint):
+    unstall, received = stalled_ingestion_endpoint
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        queue=QueueConfig(
+            max_size=1,
+            overflow_policy=OverflowPolicy.BLOCK,
+            block_timeout=timedelta(milliseconds=10),
+            max_in_flight=1,
+        ),
+    )
+
+    for i in range(5):
+        tracer.send_event(f"message-{i}")
+
+    stats = tracer.queue_stats
+    assert stats is not None
+    assert stats.dropped >= 3
+
+    unstall.set()
+    flush()
+
+    assert len(received) == stats.enqueued
+
+
+def test_tracer_queue_samples_when_filling_up(stalled_ingestion_endpoint):
+    unstall, received = stalled_ingestion_endpoint
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        queue=QueueConfig(max_size=100, overflow_policy=OverflowPolicy.SAMPLE, max_in_flight=1),
+    )
+
+    for i in range(1000):
+        tracer.send_event(f"message-{i}")
+
+    stats = tracer.queue_stats
+    assert stats is not None
+    assert stats.pending <= 100
+    # Everything is admitted until the queue is half full
+    assert stats.enqueued >= 50
+
+    unstall.set()
+    flush()
+
+    assert len(received) == stats.enqueued
+
+
+@mock.patch.dict(os.environ, dict(AUTOBLOCKS_TRACER_THROW_ON_ERROR="1"))
+def test_tracer_queue_is_bypassed_when_throwing_errors(httpx_mock):
+    class MyCustomException(Exception):
+        pass
+
+    httpx_mock.add_exception(MyCustomException())
+
+    tracer = AutoblocksTracer("mock-ingestion-key", queue=QueueConfig(max_size=10))
+    with pytest.raises(MyCustomException):
+        tracer.send_event("my-message")
@@ -0,0 +1,172 @@
+import asyncio
+from typing import Any
+
+import httpx
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from autoblocks._impl import global_state
+from autoblocks._impl.config.constants import INGESTION_ENDPOINT
+from autoblocks._impl.tracer.sampling import hash_to_unit_interval
+from autoblocks._impl.tracer.util import SpanAttribute
+from autoblocks.tracer import AutoblocksTracer
+from autoblocks.tracer import SamplingConfig
+from autoblocks.tracer import flush
+from autoblocks.tracer import trace_app
+from tests.util import decode_request_body
+
+
+@pytest.fixture
+def received(httpx_mock):
+    events: list[dict[str, Any]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        events.append(decode_request_body(request))
+        return httpx.Response(status_code=200)
+
+    httpx_mock.add_callback(handle, url=INGESTION_ENDPOINT)
+    return events
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(trace, "get_tracer", provider.get_tracer)
+    return exporter
+
+
+def set_auto_tracer_sampling(monkeypatch: pytest.MonkeyPatch, sampling: SamplingConfig) -> None:
+    monkeypatch.setattr(global_state, "_auto_tracer_sampling", sampling)
+
+
+def test_hash_to_unit_interval_is_deterministic():
+    assert hash_to_unit_interval("trace-1") == hash_to_unit_interval("trace-1")
+    assert 0 <= hash_to_unit_interval("trace-1") < 1
+    assert hash_to_unit_interval("trace-1") != hash_to_unit_interval("trace-2")
+
+
+def test_sampling_config_validates_rates():
+    with pytest.raises(ValueError):
+        SamplingConfig(rate=1.5)
+    with pytest.raises(ValueError):
+        SamplingConfig(message_rates={"my-message": -0.1})
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_keeps_or_drops_whole_traces(received):
+    tracer = AutoblocksTracer("mock-ingestion-key", sampling=SamplingConfig(rate=0.3))
+
+    num_traces = 1_000
+    for i in range(num_traces):
+        for message in ["step-1", "step-2", "step-3"]:
+            tracer.send_event(message, trace_id=f"trace-{i}")
+    flush()
+
+    messages_per_trace: dict[str, list[str]] = {}
+    for event in received:
+        messages_per_trace.setdefault(event["traceId"], []).append(event["message"])
+
+    assert all(sorted(messages) == ["step-1", "step-2", "step-3"] for messages in messages_per_trace.values())
+    assert 0.25 < len(messages_per_trace) / num_traces < 0.35
+    assert set(messages_per_trace) == {
+        f"trace-{i}" for i in range(num_traces) if hash_to_unit_interval(f"trace-{i}") < 0.3
+    }
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_message_rates_and_errors(received):
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        sampling=SamplingConfig(rate=0, message_rates={"always-keep": 1}),
+    )
+
+    tracer.send_event("dropped", trace_id="trace-1")
+    tracer.send_event("always-keep", trace_id="trace-1")
+    tracer.send_event("request.failed", trace_id="trace-1", properties=dict(error="boom"))
+    # Only the error property counts, not the message
+    tracer.send_event("lint.no-errors-found", trace_id="trace-1")
+    tracer.send_event("request.completed", trace_id="trace-1", properties=dict(error=None))
+    flush()
+
+    assert sorted(event["message"] for event in received) == ["always-keep", "request.failed"]
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_custom_error_events(received):
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        sampling=SamplingConfig(rate=0, is_error_event=lambda message, properties: message.endswith(".error")),
+    )
+
+    tracer.send_event("request.error", trace_id="trace-1")
+    tracer.send_event("request.completed", trace_id="trace-1", properties=dict(error="boom"))
+    flush()
+
+    assert [event["message"] for event in received] == ["request.error"]
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_errors_can_be_sampled_out(received):
+    tracer = AutoblocksTracer("mock-ingestion-key", sampling=SamplingConfig(rate=0, always_keep_errors=False))
+
+    tracer.send_event("request.failed", trace_id="trace-1", properties=dict(error="boom"))
+    flush()
+
+    assert received == []
+
+
+def test_sampled_out_events_skip_payload_construction(monkeypatch):
+    tracer = AutoblocksTracer("mock-ingestion-key", sampling=SamplingConfig(rate=0))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Payload should not be built for sampled out events")
+
+    monkeypatch.setattr(tracer, "_make_request_payload", fail)
+    tracer.send_event("dropped", trace_id="trace-1", properties=dict(large="x" * 1_000_000))
+
+
+def test_trace_app_drops_sampled_out_executions(spans, monkeypatch):
+    set_auto_tracer_sampling(monkeypatch, SamplingConfig(rate=0))
+
+    @trace_app("my-app", "test")
+    def my_app(x: int) -> int:
+        with trace.get_tracer("test").start_as_current_span("child"):
+            return x + 1
+
+    assert my_app(1) == 2
+    assert spans.get_finished_spans() == ()
+
+
+def test_trace_app_keeps_errors_from_sampled_out_executions(spans, monkeypatch):
+    set_auto_tracer_sampling(monkeypatch, SamplingConfig(rate=0))
+
+    @trace_app("my-app", "test")
+    async def my_app(x: int) -> int:
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(my_app(1))
+
+    (span,) = spans.get_finished_spans()
+    assert span.name == "my-app"
+    assert span.attributes[SpanAttribute.IS_ROOT] is True
+    assert span.attributes[SpanAttribute.APP_SLUG] == "my-app"
+    assert not span.status.is_ok
+    assert span.events[0].name == "exception"
+
+
+def test_trace_app_keeps_sampled_executions(spans, monkeypatch):
+    set_auto_tracer_sampling(monkeypatch, SamplingConfig(rate=0, message_rates={"my-app": 1}))
+
+    @trace_app("my-app", "test")
+    def my_app(x: int) -> int:
+        with trace.get_tracer("test").start_as_current_span("child"):
+            return x + 1
+
+    assert my_app(1) == 2
+    assert sorted(span.name for span in spans.get_finished_spans()) == ["child", "my-app"]
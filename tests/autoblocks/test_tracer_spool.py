@@ -0,0 +1,322 @@
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable
+
+import httpx
+import pytest
+
+from autoblocks._impl.config.constants import INGESTION_BATCH_ENDPOINT
+from autoblocks._impl.config.constants import INGESTION_ENDPOINT
+from autoblocks._impl.tracer import spool as spool_module
+from autoblocks.tracer import AutoblocksTracer
+from autoblocks.tracer import BatchConfig
+from autoblocks.tracer import SpoolConfig
+from autoblocks.tracer import flush
+from tests.util import decode_request_body
+
+
+class FakeIngestionServer:
+    """
+    Stands in for the ingestion API. Refuses connections while it is down.
+    """
+
+    def __init__(self) -> None:
+        self.up = True
+        self.status_code = 200
+        self.bulk_supported = True
+        # Events with these messages are rejected with a 503
+        self.failing_messages: set[str] = set()
+        self.received: list[str] = []
+        # (endpoint, authorization header, message) of every received event
+        self.received_from: list[tuple[str, str, str]] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if not self.up:
+            raise httpx.ConnectError("Connection refused", request=request)
+        if str(request.url) == INGESTION_BATCH_ENDPOINT and not self.bulk_supported:
+            return httpx.Response(status_code=404)
+        if str(request.url) == INGESTION_ENDPOINT and decode_request_body(request)["message"] in self.failing_messages:
+            return httpx.Response(status_code=503)
+        if self.status_code == 200:
+            body = decode_request_body(request)
+            events = body["events"] if str(request.url) == INGESTION_BATCH_ENDPOINT else [body]
+            self.received.extend(event["message"] for event in events)
+            self.received_from.extend(
+                (str(request.url), request.headers["Authorization"], event["message"]) for event in events
+            )
+        return httpx.Response(status_code=self.status_code)
+
+
+@pytest.fixture
+def server(httpx_mock):
+    fake = FakeIngestionServer()
+    httpx_mock.add_callback(fake.handle, url=INGESTION_ENDPOINT)
+    httpx_mock.add_callback(fake.handle, url=INGESTION_BATCH_ENDPOINT)
+    return fake
+
+
+def stop_spools() -> None:
+    for spool in spool_module._spools.values():
+        spool.close()
+    spool_module._spools.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_spools():
+    yield
+    # Stop drainers so they don't send requests during other tests
+    stop_spools()
+
+
+def make_spool_config(directory: str) -> SpoolConfig:
+    return SpoolConfig(
+        directory=directory,
+        initial_backoff=timedelta(milliseconds=10),
+        max_backoff=timedelta(milliseconds=50),
+    )
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5) -> None:
+    start = time.perf_counter()
+    while not condition():
+        assert time.perf_counter() - start < timeout, "Timed out waiting for condition"
+        time.sleep(0.01)
+
+
+def spooled_files(directory: Path) -> list[str]:
+    return sorted(path.name for path in directory.rglob(f"{spool_module.SEGMENT_PREFIX}*"))
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_spools_events_while_down_and_replays_when_up(server, tmp_path):
+    server.up = False
+    tracer = AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+
+    tracer.send_event("message-1")
+    tracer.send_event("message-2")
+    flush()
+
+    assert server.received == []
+    assert spooled_files(tmp_path)
+
+    server.up = True
+    wait_for(lambda: len(server.received) == 2)
+
+    assert sorted(server.received) == ["message-1", "message-2"]
+    wait_for(lambda: spooled_files(tmp_path) == [])
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_spools_failed_batches(server, tmp_path):
+    server.up = False
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        batch=BatchConfig(max_batch_size=10),
+        spool=make_spool_config(str(tmp_path)),
+    )
+
+    for i in range(5):
+        tracer.send_event(f"message-{i}")
+    flush()
+
+    assert server.received == []
+
+    server.up = True
+    wait_for(lambda: len(server.received) == 5)
+    assert sorted(server.received) == [f"message-{i}" for i in range(5)]
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_replays_spool_left_behind_by_previous_process(server, tmp_path):
+    server.up = False
+    tracer = AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+    tracer.send_event("message-before-restart")
+    flush()
+    assert spooled_files(tmp_path)
+
+    # Simulate a restart by stopping the spool, then bring the server back up
+    # before a new tracer is created with the same directory.
+    stop_spools()
+    server.up = True
+    AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+
+    wait_for(lambda: "message-before-restart" in server.received)
+    wait_for(lambda: spooled_files(tmp_path) == [])
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_does_not_spool_client_errors(server, tmp_path):
+    server.status_code = 400
+    tracer = AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+
+    tracer.send_event("message-1")
+    flush()
+
+    assert spooled_files(tmp_path) == []
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_spool_drops_oldest_segments_over_max_total_bytes(server, tmp_path):
+    server.up = False
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        spool=SpoolConfig(
+            directory=str(tmp_path),
+            max_segment_bytes=100,
+            max_total_bytes=500,
+            initial_backoff=timedelta(minutes=1),
+        ),
+    )
+
+    for i in range(50):
+        tracer.send_event(f"message-{i}", properties=dict(text="x" * 50))
+    flush()
+
+    total = sum(os.path.getsize(path) for path in tmp_path.rglob(f"{spool_module.SEGMENT_PREFIX}*"))
+    assert 0 < total <= 500
+
+
+def test_spool_keeps_the_newest_events_over_max_total_bytes(tmp_path):
+    async def send(records: list[bytes]) -> None:
+        pass
+
+    spool = spool_module.EventSpool(
+        config=SpoolConfig(directory=str(tmp_path), max_segment_bytes=500, max_total_bytes=500),
+        key_directory=str(tmp_path),
+        send=send,
+    )
+    try:
+        for i in range(50):
+            spool._write([f"message-{i:02d}".encode() * 6])
+            spooled = b"".join(path.read_bytes() for path in tmp_path.rglob(f"{spool_module.SEGMENT_PREFIX}*"))
+            assert f"message-{i:02d}".encode() in spooled
+            assert len(spooled) <= 500
+    finally:
+        spool.close()
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_spools_only_the_failed_events_of_a_batch(server, tmp_path):
+    server.bulk_supported = False
+    server.failing_messages = {"message-2"}
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        batch=BatchConfig(max_batch_size=10),
+        spool=make_spool_config(str(tmp_path)),
+    )
+
+    for i in range(5):
+        tracer.send_event(f"message-{i}")
+    flush()
+
+    assert sorted(server.received) == ["message-0", "message-1", "message-3", "message-4"]
+
+    server.failing_messages = set()
+    wait_for(lambda: "message-2" in server.received)
+    wait_for(lambda: spooled_files(tmp_path) == [])
+    assert sorted(server.received) == [f"message-{i}" for i in range(5)]
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_replays_only_the_failed_events_of_a_segment(server, tmp_path):
+    server.up = False
+    tracer = AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+
+    for i in range(3):
+        tracer.send_event(f"message-{i}")
+    flush()
+
+    server.failing_messages = {"message-1"}
+    server.up = True
+    wait_for(lambda: sorted(server.received) == ["message-0", "message-2"])
+
+    server.failing_messages = set()
+    wait_for(lambda: spooled_files(tmp_path) == [])
+    assert sorted(server.received) == ["message-0", "message-1", "message-2"]
+
+
+def test_config_validation(tmp_path):
+    with pytest.raises(ValueError, match="max_segment_bytes must be at least 1"):
+        SpoolConfig(directory=str(tmp_path), max_segment_bytes=0)
+    with pytest.raises(ValueError, match="max_total_bytes must be at least max_segment_bytes"):
+        SpoolConfig(directory=str(tmp_path), max_segment_bytes=1_000, max_total_bytes=500)
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_replays_with_the_ingestion_key_events_were_sent_with(server, tmp_path):
+    server.up = False
+    tracer_a = AutoblocksTracer("mock-ingestion-key-a", spool=make_spool_config(str(tmp_path)))
+    tracer_b = AutoblocksTracer("mock-ingestion-key-b", spool=make_spool_config(str(tmp_path)))
+
+    tracer_a.send_event("message-a")
+    tracer_b.send_event("message-b")
+    flush()
+
+    server.up = True
+    wait_for(lambda: len(server.received) == 2)
+
+    assert sorted(server.received_from) == [
+        (INGESTION_ENDPOINT, "Bearer mock-ingestion-key-a", "message-a"),
+        (INGESTION_ENDPOINT, "Bearer mock-ingestion-key-b", "message-b"),
+    ]
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_replays_batches_in_bulk(server, tmp_path):
+    server.up = False
+    tracer = AutoblocksTracer(
+        "mock-ingestion-key",
+        batch=BatchConfig(max_batch_size=10),
+        spool=make_spool_config(str(tmp_path)),
+    )
+
+    tracer.send_event("message-1")
+    flush()
+
+    server.up = True
+    wait_for(lambda: len(server.received) == 1)
+
+    assert server.received_from == [(INGESTION_BATCH_ENDPOINT, "Bearer mock-ingestion-key", "message-1")]
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_processes_sharing_a_directory_spool_separately(server, tmp_path):
+    server.up = False
+    tracer = AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+    tracer.send_event("message-1")
+    flush()
+
+    # Forget the spool without releasing its lock, as if it belonged to another running process
+    running_spool = spool_module._spools.pop(next(iter(spool_module._spools)))
+    other_tracer = AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+    other_tracer.send_event("message-2")
+    flush()
+
+    directories = [path for path in tmp_path.rglob("*") if (path / spool_module.LOCK_FILE_NAME).exists()]
+    assert len(directories) == 2
+
+    server.up = True
+    wait_for(lambda: sorted(server.received) == ["message-1", "message-2"])
+    wait_for(lambda: spooled_files(tmp_path) == [])
+    running_spool.close()
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_takes_over_spools_of_every_exited_process(server, tmp_path):
+    server.up = False
+    exited_spools = []
+    for i in range(2):
+        tracer = AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+        tracer.send_event(f"message-{i}")
+        flush()
+        exited_spools.append(spool_module._spools.pop(next(iter(spool_module._spools))))
+    for spool in exited_spools:
+        spool.close()
+
+    server.up = True
+    AutoblocksTracer("mock-ingestion-key", spool=make_spool_config(str(tmp_path)))
+
+    wait_for(lambda: sorted(server.received) == ["message-0", "message-1"])
+    assert len([path for path in tmp_path.rglob("*") if (path / spool_module.LOCK_FILE_NAME).exists()]) == 1